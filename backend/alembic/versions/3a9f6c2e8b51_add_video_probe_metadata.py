@@ -0,0 +1,38 @@
+"""Add videos.has_audio, probe_metadata and keyframe_times so tasks skip re-probing
+
+Revision ID: 3a9f6c2e8b51
+Revises: 7d2f4a8c6e15
+Create Date: 2026-10-16 22:41:12.504918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9f6c2e8b51'
+down_revision = '7d2f4a8c6e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    existing_cols = [c['name'] for c in inspector.get_columns('videos')]
+    if 'has_audio' not in existing_cols:
+        op.add_column('videos', sa.Column('has_audio', sa.Boolean(), nullable=True))
+    if 'probe_metadata' not in existing_cols:
+        # NULL = not probed yet (videos processed before this revision)
+        op.add_column('videos', sa.Column('probe_metadata', postgresql.JSONB(), nullable=True))
+    if 'keyframe_times' not in existing_cols:
+        op.add_column('videos', sa.Column('keyframe_times', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'keyframe_times')
+    op.drop_column('videos', 'probe_metadata')
+    op.drop_column('videos', 'has_audio')
@@ -0,0 +1,32 @@
+"""Add camera_pins.motion_gate for per-pin motion-gated detection
+
+Revision ID: 4b8e2f1d9a37
+Revises: c7115132462a
+Create Date: 2026-10-16 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e2f1d9a37'
+down_revision = 'c7115132462a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    existing_cols = [c['name'] for c in inspector.get_columns('camera_pins')]
+    if 'motion_gate' not in existing_cols:
+        # NULL = global defaults (CV_MOTION_GATE_ENABLED)
+        op.add_column('camera_pins', sa.Column('motion_gate', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('camera_pins', 'motion_gate')
@@ -0,0 +1,32 @@
+"""Add camera_pins.tiling for tiled inference on high-resolution cameras
+
+Revision ID: 5e1a7c9b3d42
+Revises: 9c3d5e7f1a26
+Create Date: 2026-10-16 12:14:05.218364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1a7c9b3d42'
+down_revision = '9c3d5e7f1a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    existing_cols = [c['name'] for c in inspector.get_columns('camera_pins')]
+    if 'tiling' not in existing_cols:
+        # NULL = auto (tile when the video resolution reaches CV_TILING_MIN_LONG_SIDE)
+        op.add_column('camera_pins', sa.Column('tiling', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('camera_pins', 'tiling')
@@ -0,0 +1,49 @@
+"""Add stage_results index for the content-addressed CV stage cache
+
+Revision ID: 7d2f4a8c6e15
+Revises: 5e1a7c9b3d42
+Create Date: 2026-10-16 14:02:37.615208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f4a8c6e15'
+down_revision = '5e1a7c9b3d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'stage_results' not in inspector.get_table_names():
+        op.create_table(
+            'stage_results',
+            sa.Column('id', sa.UUID(), nullable=False, server_default=sa.text('gen_random_uuid()')),
+            sa.Column('checksum_sha256', sa.String(length=64), nullable=False),
+            sa.Column('stage', sa.String(length=50), nullable=False),
+            sa.Column('model_version', sa.String(length=255), nullable=False),
+            sa.Column('params_hash', sa.String(length=64), nullable=False),
+            sa.Column('params', postgresql.JSONB(), nullable=False),
+            sa.Column('object_path', sa.String(length=512), nullable=False),
+            sa.Column('size_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('source_video_id', sa.UUID(), nullable=True),
+            sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+            sa.Column('last_used_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+            sa.PrimaryKeyConstraint('id'),
+            sa.ForeignKeyConstraint(['source_video_id'], ['videos.id'], ondelete='SET NULL'),
+            sa.UniqueConstraint('checksum_sha256', 'stage', 'model_version', 'params_hash', name='uq_stage_result_key'),
+        )
+        op.create_index('ix_stage_results_checksum_sha256', 'stage_results', ['checksum_sha256'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stage_results_checksum_sha256', table_name='stage_results')
+    op.drop_table('stage_results')
@@ -0,0 +1,32 @@
+"""Add camera_pins.roi_polygons for region-of-interest inference
+
+Revision ID: 9c3d5e7f1a26
+Revises: 4b8e2f1d9a37
+Create Date: 2026-10-16 11:02:17.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3d5e7f1a26'
+down_revision = '4b8e2f1d9a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    existing_cols = [c['name'] for c in inspector.get_columns('camera_pins')]
+    if 'roi_polygons' not in existing_cols:
+        # NULL = whole frame
+        op.add_column('camera_pins', sa.Column('roi_polygons', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('camera_pins', 'roi_polygons')
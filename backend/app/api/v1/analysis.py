@@ -3,12 +3,15 @@ Computer Vision Analysis API endpoints.
 
 Handles CV analysis operations:
 - POST /analysis/videos/{video_id}:run - Trigger person detection
+- POST /analysis/videos/{video_id}:track - Trigger chunked tracking (tracklet generation)
 - GET /analysis/jobs/{job_id} - Get job status
 - GET /analysis/videos/{video_id}/detections - Get detection results
-- GET /analysis/videos/{video_id}/tracklets - Get tracklets (Phase 3.4+)
+- GET /analysis/videos/{video_id}/tracklets - Get tracklets (partial while tracking runs)
 """
 import logging
-from typing import Optional, Dict, Any
+import re
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
@@ -16,10 +19,11 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
 from app.core.database import get_db
-from app.models import Video, ProcessingJob
+from app.models import Video, ProcessingJob, Tracklet
+from app.cv.tracklet_sink import read_tracklet_parts
 from app.services.job_service import get_job_service, JobService
 from app.services.storage_service import get_storage_service
-from app.tasks.analysis_tasks import detect_persons_in_video
+from app.tasks.analysis_tasks import detect_persons_in_video, tracklet_parts_prefix
 import json
 
 logger = logging.getLogger(__name__)
@@ -50,6 +54,23 @@ class RunAnalysisRequest(BaseModel):
         le=10.0,
         description="Frame extraction rate for analysis (fps)"
     )
+    batch_size: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Frames per batched detector forward pass"
+    )
+    backend: str = Field(
+        default="torch",
+        pattern="^(torch|onnx|openvino|auto)$",
+        description="Detector inference backend: torch, onnx, openvino, or auto (fastest available for the device)"
+    )
+    source: Optional[str] = Field(
+        default=None,
+        pattern="^(original|scaled|proxy)$",
+        description="Frames to detect on: original, scaled (original downscaled while decoding) or proxy; "
+                    "defaults to the server setting. Boxes are always in original-resolution coordinates"
+    )
 
 
 class RunAnalysisResponse(BaseModel):
@@ -65,6 +86,41 @@ class RunAnalysisResponse(BaseModel):
     )
 
 
+class RunTrackingRequest(BaseModel):
+    """Request schema for triggering tracklet generation."""
+    device: str = Field(
+        default="cpu",
+        pattern="^(cpu|cuda|mps)$",
+        description="Device for inference: cpu, cuda (NVIDIA GPU), or mps (Apple Metal)"
+    )
+    conf_threshold: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="Confidence threshold for person detection (0.0-1.0)"
+    )
+    analysis_fps: float = Field(
+        default=1.0,
+        ge=0.1,
+        le=10.0,
+        description="Frame extraction rate for tracking (fps)"
+    )
+    extract_embeddings: Optional[bool] = Field(
+        default=None,
+        description="Extract CLIP embeddings per tracklet; defaults to the server setting"
+    )
+
+
+class RunTrackingResponse(BaseModel):
+    """Response schema for tracking trigger."""
+    status: str = "queued"
+    job_id: UUID = Field(..., description="Processing job ID for tracking")
+    video_id: UUID
+    message: str = "Tracking job queued successfully"
+    job_type: str = "cv_tracking"
+    chunks: int = Field(..., description="Parallel chunk tasks the video was split into")
+
+
 class JobStatusResponse(BaseModel):
     """Response schema for job status query."""
     job_id: UUID
@@ -114,6 +170,37 @@ class DetectionResultsResponse(BaseModel):
     message: str = "Detection results available"
 
 
+class TrackletSummary(BaseModel):
+    """One within-camera tracklet (without box sequence and embedding)."""
+    track_id: int = Field(..., description="Camera-local track ID (chunk-local in partial results)")
+    chunk: Optional[int] = Field(None, description="Tracking chunk (partial results only)")
+    t_in: datetime
+    t_out: datetime
+    duration_seconds: float
+    num_observations: int
+    quality: float
+    confidence: float
+    height_category: str
+    aspect_ratio: float
+    outfit: Dict[str, Any] = Field(..., description="Outfit descriptor: top, bottom, shoes")
+    has_embedding: bool
+
+
+class TrackletsResponse(BaseModel):
+    """Response schema for a video's tracklets."""
+    video_id: UUID
+    job_id: UUID
+    status: str = Field(..., description="Tracking job status: pending, running, completed, failed")
+    partial: bool = Field(
+        ...,
+        description="Tracklets streamed so far by an unfinished job (not yet stitched across chunks)"
+    )
+    total: int
+    page: int
+    page_size: int
+    tracklets: List[TrackletSummary]
+
+
 # ============================================================================
 # Analysis Endpoints
 # ============================================================================
@@ -237,6 +324,9 @@ def run_video_analysis(
                 "device": request.device,
                 "conf_threshold": request.conf_threshold,
                 "analysis_fps": request.analysis_fps,
+                "batch_size": request.batch_size,
+                "backend": request.backend,
+                "source": request.source,
             },
             queue="cv_analysis",
             priority=7,  # Higher priority than proxy generation
@@ -281,6 +371,114 @@ def run_video_analysis(
     )
 
 
+@router.post(
+    "/videos/{video_id}:track",
+    response_model=RunTrackingResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Trigger tracklet generation on video",
+    description="""
+    Trigger within-camera tracking on a video (Phase 3.4: Tracklet generation).
+
+    The video is split into overlapping time chunks tracked in parallel on
+    the 'cv_analysis' queue; a final step links tracks across the chunk
+    boundaries, stores the tracklets and completes the job.
+
+    Query the job status using GET /analysis/jobs/{job_id}
+    Retrieve results (partial while the job runs) using
+    GET /analysis/videos/{video_id}/tracklets
+    """,
+)
+def run_video_tracking(
+    video_id: UUID = Path(..., description="Video UUID"),
+    request: RunTrackingRequest = RunTrackingRequest(),
+    db: Session = Depends(get_db),
+    job_service: JobService = Depends(get_job_service),
+) -> RunTrackingResponse:
+    """
+    Trigger chunked tracking on a video.
+
+    Args:
+        video_id: Video UUID to track
+        request: Tracking parameters (device, confidence, fps, embeddings)
+        db: Database session
+        job_service: Job service for queueing the tracking chord
+
+    Returns:
+        RunTrackingResponse with job_id for tracking
+
+    Raises:
+        404: Video not found
+        400: Video not ready for tracking (still uploading or failed)
+        409: Tracking already in progress
+        500: Failed to queue tracking job
+    """
+    logger.info(f"Tracking requested: video_id={video_id}, device={request.device}")
+
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Video {video_id} not found"
+        )
+
+    if video.processing_status == "uploading":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Video is still uploading. Please wait for upload to complete."
+        )
+
+    if video.processing_status == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Video processing failed. Cannot run tracking on failed video."
+        )
+
+    existing_job = (
+        db.query(ProcessingJob)
+        .filter(ProcessingJob.video_id == video_id)
+        .filter(ProcessingJob.job_type == "cv_tracking")
+        .filter(ProcessingJob.status.in_(["pending", "running"]))
+        .first()
+    )
+    if existing_job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Tracking already in progress for this video (job_id={existing_job.id})"
+        )
+
+    try:
+        job = job_service.queue_tracking(
+            video_id=video_id,
+            priority=7,  # Same as detection
+            analysis_fps=request.analysis_fps,
+            device=request.device,
+            conf_threshold=request.conf_threshold,
+            extract_embeddings=request.extract_embeddings,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Failed to queue tracking: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue tracking: {str(e)}"
+        )
+
+    logger.info(
+        f"✅ Tracking queued: video_id={video_id}, job_id={job.id}, task_id={job.celery_task_id}"
+    )
+
+    return RunTrackingResponse(
+        status="queued",
+        job_id=job.id,
+        video_id=video_id,
+        chunks=(job.result_data or {}).get("chunks", 1),
+    )
+
+
 @router.get(
     "/jobs/{job_id}",
     response_model=JobStatusResponse,
@@ -442,38 +640,138 @@ def get_detection_results(
     )
 
 
+_CHUNK_PATTERN = re.compile(r"/chunk_(\d+)/")
+
+
+def _tracklet_summary(tracklet: Dict[str, Any], chunk: Optional[int] = None) -> TrackletSummary:
+    """Summary of a streamed tracklet dict (Tracklet.to_dict() of app.cv.tracklet_generator)."""
+    return TrackletSummary(
+        track_id=tracklet["track_id"],
+        chunk=chunk,
+        t_in=tracklet["t_in"],
+        t_out=tracklet["t_out"],
+        duration_seconds=tracklet["duration_seconds"],
+        num_observations=tracklet["num_observations"],
+        quality=tracklet["quality"],
+        confidence=tracklet["confidence"],
+        height_category=tracklet["height_category"],
+        aspect_ratio=tracklet["aspect_ratio"],
+        outfit=tracklet["outfit"],
+        has_embedding=bool(tracklet.get("visual_embedding")),
+    )
+
+
+def _tracklet_row_summary(row: Tracklet) -> TrackletSummary:
+    """Summary of a stored Tracklet row."""
+    return TrackletSummary(
+        track_id=row.track_id,
+        t_in=row.t_in,
+        t_out=row.t_out,
+        duration_seconds=row.box_stats.get("duration_seconds", (row.t_out - row.t_in).total_seconds()),
+        num_observations=row.box_stats.get("num_observations", 0),
+        quality=row.quality,
+        confidence=row.box_stats.get("confidence", 0.0),
+        height_category=row.physique.get("height_category", "medium"),
+        aspect_ratio=row.physique.get("aspect_ratio", 0.5),
+        outfit=row.outfit_json,
+        has_embedding=bool(row.outfit_vec),
+    )
+
+
 @router.get(
     "/videos/{video_id}/tracklets",
-    status_code=status.HTTP_501_NOT_IMPLEMENTED,
-    summary="Get tracklets for video (Phase 3.4+)",
+    response_model=TrackletsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get tracklets for video",
     description="""
-    Get within-camera tracklets for a video.
-
-    **Status**: Not implemented yet (Phase 3.4)
-
-    This endpoint will return tracklet data once Phase 3.4
-    (within-camera tracking with ByteTrack) is completed.
+    Get within-camera tracklets for a video (Phase 3.4).
 
     A tracklet represents a single person tracked within one camera view,
     including:
     - Track ID (camera-local)
     - Time in/out timestamps
-    - Outfit descriptor (type, color, visual embedding)
+    - Outfit descriptor (type, color)
     - Bounding box statistics
     - Quality score
+
+    Once the latest tracking job completed, returns the stored tracklets
+    (video-wide track IDs). While it runs (or after it failed), returns the
+    tracklets the chunk tasks have streamed so far, with `partial=true`:
+    track IDs are local to their chunk, and people crossing a chunk
+    boundary appear once per chunk until the job stitches them.
     """,
 )
 def get_video_tracklets(
     video_id: UUID = Path(..., description="Video UUID"),
+    page: int = Query(1, ge=1, description="Page number (1-indexed)"),
+    page_size: int = Query(100, ge=1, le=1000, description="Tracklets per page"),
     db: Session = Depends(get_db),
-):
+) -> TrackletsResponse:
     """
-    Get tracklets for a video (Phase 3.4+).
+    Get tracklets for a video, partial while tracking runs.
+
+    Args:
+        video_id: Video UUID
+        page: Page number (default: 1)
+        page_size: Tracklets per page (default: 100, max: 1000)
+        db: Database session
+
+    Returns:
+        TrackletsResponse with one page of tracklets
 
-    Not implemented yet - will be available in Phase 3.4
-    when within-camera tracking is complete.
+    Raises:
+        404: Video not found or never tracked
     """
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Tracklet extraction not implemented yet (Phase 3.4)"
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Video {video_id} not found"
+        )
+
+    job = (
+        db.query(ProcessingJob)
+        .filter(ProcessingJob.video_id == video_id)
+        .filter(ProcessingJob.job_type == "cv_tracking")
+        .order_by(ProcessingJob.queued_at.desc())
+        .first()
+    )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No tracking job found for this video"
+        )
+
+    offset = (page - 1) * page_size
+    partial = job.status != "completed"
+    if not partial:
+        query = db.query(Tracklet).filter(Tracklet.video_id == video_id)
+        total = query.count()
+        rows = query.order_by(Tracklet.t_in, Tracklet.track_id).offset(offset).limit(page_size).all()
+        tracklets = [_tracklet_row_summary(row) for row in rows]
+    else:
+        # Streamed parts, in chunk and write order (parts are read one at a time)
+        storage = get_storage_service()
+        tracklets = []
+        total = 0
+        for path in storage.list_files(tracklet_parts_prefix(video)):
+            match = _CHUNK_PATTERN.search(path)
+            chunk = int(match.group(1)) if match else None
+            try:
+                for tracklet in read_tracklet_parts(storage, [path]):
+                    if offset <= total < offset + page_size:
+                        tracklets.append(_tracklet_summary(tracklet, chunk))
+                    total += 1
+            except FileNotFoundError:
+                continue  # Removed by a chunk retry or the stitch step meanwhile
+
+    return TrackletsResponse(
+        video_id=video_id,
+        job_id=job.id,
+        status=job.status,
+        partial=partial,
+        total=total,
+        page=page,
+        page_size=page_size,
+        tracklets=tracklets,
     )
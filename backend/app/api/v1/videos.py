@@ -23,6 +23,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.upload_service import get_upload_service, UploadService
 from app.services.job_service import get_job_service, JobService
@@ -280,8 +281,13 @@ def complete_multipart_upload(
             final_checksum_sha256=request.final_checksum_sha256,
         )
 
-        # Queue background job for proxy generation
-        processing_job = job_service.queue_proxy_generation(
+        # Queue background job for proxy generation (fused with CV analysis
+        # when enabled, so the upload is downloaded and decoded once)
+        queue_job = (
+            job_service.queue_ingest if settings.CV_ANALYZE_ON_UPLOAD
+            else job_service.queue_proxy_generation
+        )
+        processing_job = queue_job(
             video_id=video_id,
             priority=5,  # Default priority
         )
@@ -563,8 +569,10 @@ def get_video_details(
             width=video.width,
             height=video.height,
             fps=video.fps,
-            duration_seconds=video.duration_seconds,
+            # Exact duration from the stored probe (the column is whole seconds)
+            duration_seconds=(video.probe_metadata or {}).get("duration_seconds", video.duration_seconds),
             codec=video.codec,
+            has_audio=video.has_audio,
             processing_status=video.processing_status,
             processing_job_id=video.processing_job_id,
             processing_error=video.processing_error,
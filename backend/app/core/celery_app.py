@@ -7,6 +7,7 @@ Handles:
 - Result backend configuration
 - Queue routing
 - Worker configuration
+- CV model preloading (worker model registry)
 """
 from celery import Celery
 from celery.schedules import crontab
@@ -105,6 +106,8 @@ from celery.signals import (
     task_failure,
     task_success,
     task_retry,
+    worker_init,
+    worker_process_init,
 )
 import logging
 
@@ -148,3 +151,68 @@ def task_retry_handler(
 ):
     """Log when task is retried."""
     logger.warning(f"Task {sender.name} [{task_id}] retrying: {reason}")
+
+
+# Whether this worker preloads CV models (decided in the parent, inherited by forked children)
+_preload_cv_models = False
+
+
+def _consumed_queues(app) -> set:
+    """
+    Names of the queues a starting worker consumes.
+
+    Without -Q, consume_from is the app's whole queue set, which only holds
+    the queues declared so far: the routed queues are added as well.
+    """
+    queues = app.amqp.queues
+    selected = queues.consume_from
+    if selected and selected is not queues:
+        return set(selected)
+    routed = {route["queue"] for route in (app.conf.task_routes or {}).values() if "queue" in route}
+    return set(queues) | routed
+
+
+@worker_init.connect
+def worker_init_handler(sender=None, **extra):
+    """
+    Preload fork-safe CV models in the parent worker process.
+
+    Runs before the prefork pool starts, so every child (including the ones
+    recycled by worker_max_tasks_per_child) shares the weights copy-on-write.
+    Only workers consuming the cv_analysis queue (or started without -Q)
+    preload. Models are not warmed here: a warm-up inference would start
+    torch/OpenMP thread pools in the parent, which hang forked children.
+    """
+    global _preload_cv_models
+    from app.cv.model_registry import freeze_for_fork, get_model_registry
+
+    registry = get_model_registry()
+    if settings.CV_INFERENCE_SERVER_SOCKET:
+        # Models live in the inference server; workers only hold clients
+        registry.server_socket = settings.CV_INFERENCE_SERVER_SOCKET
+        return
+
+    _preload_cv_models = settings.CV_PRELOAD_MODELS and "cv_analysis" in _consumed_queues(sender.app)
+    if not _preload_cv_models:
+        return
+
+    from app.tasks.analysis_tasks import cv_preload_specs
+
+    registry.preload(cv_preload_specs(), fork_safe_only=True, warm=False)
+    freeze_for_fork()
+    logger.info(f"Preloaded CV models before fork: {registry.stats()['models']}")
+
+
+@worker_process_init.connect
+def worker_process_init_handler(**extra):
+    """Load the remaining (fork-unsafe) CV models and warm everything up in the child."""
+    if not _preload_cv_models:
+        return
+
+    from app.cv.model_registry import get_model_registry
+    from app.tasks.analysis_tasks import cv_preload_specs
+
+    registry = get_model_registry()
+    registry.preload(cv_preload_specs())
+    registry.warm_up()
+    logger.info(f"CV model registry ready: {registry.stats()}")
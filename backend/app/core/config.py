@@ -1,7 +1,7 @@
 """
 Application configuration management using Pydantic Settings.
 """
-from typing import List
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -44,6 +44,14 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str
     MINIO_BUCKET: str = "spatial-intel-videos"
     MINIO_SECURE: bool = False
+    # Objects larger than one part are transferred as parallel ranged GETs /
+    # multipart PUT parts (up to CONCURRENCY parts held in memory per upload)
+    STORAGE_TRANSFER_PART_SIZE: int = 16 * 1024 ** 2  # S3 minimum is 5 MiB
+    STORAGE_TRANSFER_CONCURRENCY: int = 8
+    STORAGE_TRANSFER_RETRIES: int = 3  # Attempts per part
+    # Compare object ETags with the MD5 of uploaded bytes (disable when the
+    # server encrypts objects, their ETags are then not MD5 digests)
+    STORAGE_VERIFY_ETAG: bool = True
 
     # Video Upload Limits
     MAX_VIDEO_SIZE_MB: int = 500
@@ -52,6 +60,73 @@ class Settings(BaseSettings):
     # Processing
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/2"
+    # Let FFmpeg read stored videos through presigned URLs (HTTP range requests)
+    # instead of downloading them to temp disk before processing
+    STREAMING_INPUT_ENABLED: bool = False
+    STREAMING_INPUT_URL_EXPIRY_HOURS: int = 12  # Must outlast the longest task
+    # Worker-local LRU cache of downloaded videos, shared by the worker processes
+    # on a host (None = disabled); takes precedence over streaming input
+    VIDEO_CACHE_DIR: Optional[str] = None
+    VIDEO_CACHE_MAX_BYTES: int = 50 * 1024 ** 3
+
+    # Computer Vision
+    # Frame source for detection: original (full resolution), scaled (original
+    # downscaled in FFmpeg to CV_ANALYSIS_MAX_SIZE) or proxy (the 480p proxy)
+    CV_ANALYSIS_SOURCE: str = "scaled"
+    CV_ANALYSIS_MAX_SIZE: int = 640  # Long side of scaled frames; match the detector input size
+    # Parallel FFmpeg processes decoding keyframe-aligned segments of long videos
+    # (1 = single pass; size to the cores left free by concurrent Celery tasks)
+    CV_DECODE_WORKERS: int = 1
+    # Run detection on every fresh upload, fused with proxy/thumbnail generation
+    # into one download and one decode (JobService.queue_ingest)
+    CV_ANALYZE_ON_UPLOAD: bool = False
+    CV_MOTION_GATE_ENABLED: bool = True  # Default for pins without a motion_gate config
+    CV_ROI_MODE: str = "crop"  # crop (ROI bounding rectangle) or mask (also grey out non-ROI pixels)
+    CV_TILING_MIN_LONG_SIDE: int = 2560  # Auto-tile videos at least this wide/tall (pins can override)
+    CV_APPEARANCE_BATCH_FRAMES: int = 1  # Frames of keyframe crops per garment/CLIP batch when tracking
+    CV_TRACK_KEYFRAME_CROPS: int = 3  # Best person crops kept per live track (appearance memory is otherwise fixed)
+    CV_TRACK_KEYFRAME_CROP_HEIGHT: int = 128  # Kept crops are downscaled to this height
+    # Keyframe selection: garment analysis/CLIP runs on the best-scored crops of each track
+    # (size, aspect, edge truncation, sharpness, occlusion), per sliding window of frames
+    CV_KEYFRAME_WINDOW_FRAMES: int = 5
+    CV_KEYFRAMES_PER_WINDOW: int = 1
+    CV_KEYFRAME_MIN_SCORE: float = 0.35  # Crops scoring lower are skipped (except a track's first two)
+    CV_DETECTOR_PRECISION: str = "fp32"  # fp32, int8_static
+    CV_EMBEDDING_PRECISION: str = "fp32"  # fp32, int8_dynamic, int8_static
+    CV_CALIBRATION_DIR: Optional[str] = None  # Sample frames/crops for int8_static
+    # Accuracy gate for INT8 modes (validated by scripts/benchmark_quantization.py)
+    CV_QUANT_MIN_DETECTION_RECALL: float = 0.95
+    CV_QUANT_MAX_EMBEDDING_COSINE_DRIFT: float = 0.02
+    CV_QUANT_MIN_SPEEDUP: float = 1.0
+    # Worker model registry (loaded at worker start, shared copy-on-write by prefork children)
+    CV_PRELOAD_MODELS: bool = True
+    CV_PRELOAD_DEVICE: str = "cpu"
+    CV_PRELOAD_DETECTOR_BACKENDS: List[str] = ["torch"]
+    CV_PRELOAD_EMBEDDINGS: bool = False  # CLIP is downloaded on first load; enable where the network allows
+    CV_DETECTOR_MODEL: str = "yolov8n.pt"
+    CV_EMBEDDING_MODEL: str = "openai/clip-vit-base-patch32"
+    # Local inference server (scripts/run_inference_server.py); when set, workers load no models
+    CV_INFERENCE_SERVER_SOCKET: Optional[str] = None
+    CV_INFERENCE_SERVER_MAX_BATCH: int = 32  # Frames/crops per batch
+    CV_INFERENCE_SERVER_MAX_LATENCY_MS: float = 10.0  # Batching wait budget per request
+    CV_INFERENCE_SERVER_THREADS: int = 0  # Intra-op threads (0 = runtime default)
+    # Content-addressed stage-result cache (detections, tracks, appearance; keyed by video checksum,
+    # stage, model version and params, each stage chained to the one it consumes)
+    CV_STAGE_CACHE_ENABLED: bool = True
+    CV_STAGE_CACHE_PREFIX: str = "stage_cache"
+    # Chunked tracking (JobService.queue_tracking): longer videos are tracked in
+    # overlapping windows on parallel workers and stitched in a reduce step
+    CV_TRACKING_CHUNK_SECONDS: float = 600.0
+    CV_TRACKING_CHUNK_OVERLAP_SECONDS: float = 20.0  # Lookahead shared by neighbours; must cover track confirmation
+    CV_TRACKING_STITCH_IOU_WEIGHT: float = 0.7  # Boundary match score: IoU weight vs embedding cosine
+    CV_TRACKING_STITCH_MIN_SCORE: float = 0.5
+    # Continue live tracks from the pin's previous video when it ended within track_buffer frames
+    CV_TRACKING_CARRY_OVER: bool = True
+    # Finished tracklets are streamed to object storage in batches while a chunk is tracked
+    # (partial results for running jobs), then bulk-inserted in batches by the stitch step
+    CV_TRACKLET_SINK_FORMAT: str = "ndjson"  # ndjson (gzipped) or parquet (requires pyarrow)
+    CV_TRACKLET_SINK_BATCH_SIZE: int = 50
+    CV_TRACKLET_SINK_MAX_WAIT_SECONDS: float = 30.0  # Write a partial batch once its oldest tracklet is this old
 
 
 settings = Settings()
@@ -9,17 +9,46 @@ This package contains all computer vision services for Phase 3:
 """
 
 from app.cv.person_detector import PersonDetector, create_detector
+from app.cv.inference_backends import DetectionBackend, available_backends, create_backend
+from app.cv.quantization import QuantizationGateError, QuantizationThresholds
+from app.cv.model_registry import ModelRegistry, get_model_registry
+from app.cv.inference_client import InferenceClient, InferenceServerError
 from app.cv.garment_segmenter import GarmentSegmenter, GarmentRegions, create_segmenter
 from app.cv.color_extractor import ColorExtractor, ColorDescriptor, create_color_extractor
 from app.cv.garment_type_classifier import GarmentTypeClassifier, create_type_classifier
 from app.cv.embedding_extractor import EmbeddingExtractor, create_embedding_extractor
 from app.cv.garment_analyzer import GarmentAnalyzer, OutfitDescriptor, create_garment_analyzer
 from app.cv.byte_tracker import ByteTracker, Detection, Track, create_byte_tracker
+from app.cv.track_appearance import TrackAppearance
+from app.cv.keyframe_selector import CropQualityConfig, CropQualityScorer, KeyframeSelector
 from app.cv.tracklet_generator import TrackletGenerator, Tracklet, create_tracklet_generator
+from app.cv.tracklet_sink import (
+    TrackletSink,
+    MemoryTrackletSink,
+    ObjectStoreTrackletSink,
+    read_tracklet_parts,
+)
+from app.cv.motion_gate import MotionGate, MotionGateConfig, create_motion_gate
+from app.cv.roi import RegionOfInterest
+from app.cv.tiling import TilingConfig, resolve_tiling
+from app.cv.detection_pipeline import (
+    DetectionPipeline,
+    DetectionResult,
+    create_detection_pipeline,
+)
 
 __all__ = [
     "PersonDetector",
     "create_detector",
+    "DetectionBackend",
+    "available_backends",
+    "create_backend",
+    "QuantizationGateError",
+    "QuantizationThresholds",
+    "ModelRegistry",
+    "get_model_registry",
+    "InferenceClient",
+    "InferenceServerError",
     "GarmentSegmenter",
     "GarmentRegions",
     "create_segmenter",
@@ -37,7 +66,24 @@ __all__ = [
     "Detection",
     "Track",
     "create_byte_tracker",
+    "TrackAppearance",
+    "CropQualityConfig",
+    "CropQualityScorer",
+    "KeyframeSelector",
     "TrackletGenerator",
     "Tracklet",
     "create_tracklet_generator",
+    "TrackletSink",
+    "MemoryTrackletSink",
+    "ObjectStoreTrackletSink",
+    "read_tracklet_parts",
+    "MotionGate",
+    "MotionGateConfig",
+    "create_motion_gate",
+    "RegionOfInterest",
+    "TilingConfig",
+    "resolve_tiling",
+    "DetectionPipeline",
+    "DetectionResult",
+    "create_detection_pipeline",
 ]
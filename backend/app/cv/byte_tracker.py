@@ -12,17 +12,24 @@ Key Features:
 - Track state management (Active, Lost, Removed)
 - Adaptive track aging for 1 FPS footage
 - Kalman filter-free (suitable for low FPS)
+- Vectorized for crowded scenes: live track state is a struct-of-arrays
+  table, pairwise IoU is computed by broadcasting, and histories are
+  fixed-size ring buffers
+- Serializable state (to_dict/from_dict), so tracking can be resumed in
+  another process (chunked tracking, carry-over between videos)
 
 References:
 - ByteTrack: https://arxiv.org/abs/2110.06864
 - Adapted for 1 FPS CCTV with relaxed temporal assumptions
 """
 import logging
-from typing import List, Tuple, Optional
-from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Tuple, Optional
+from dataclasses import dataclass
 from enum import Enum
 import numpy as np
 from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,187 @@ class TrackState(Enum):
     REMOVED = 4      # Permanently removed from tracking
 
 
+# Track state codes as stored in TrackTable.states
+_NEW = TrackState.NEW.value
+_TRACKED = TrackState.TRACKED.value
+_LOST = TrackState.LOST.value
+_REMOVED = TrackState.REMOVED.value
+
+HISTORY_LENGTH = 30  # Frames of history per track (~30 seconds at 1 FPS)
+_LOST_AFTER_MISSES = 3  # TRACKED -> LOST after this many consecutive misses
+# Below this many track x detection pairs (~100 people) dense assignment is as fast
+_GATING_MIN_PAIRS = 10_000
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def _broadcast_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of float32 [..., 4] box arrays, broadcast against each other."""
+    top_left = np.maximum(a[..., :2], b[..., :2])
+    bottom_right = np.minimum(a[..., 2:], b[..., 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+
+    return np.divide(
+        intersection, union,
+        out=np.zeros_like(intersection),
+        where=union > 0,
+    )
+
+
+def _as_boxes(boxes) -> np.ndarray:
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise Intersection over Union of two sets of boxes.
+
+    Args:
+        boxes_a: (N, 4) boxes [x1, y1, x2, y2]
+        boxes_b: (M, 4) boxes [x1, y1, x2, y2]
+
+    Returns:
+        (N, M) float32 IoU matrix (0 where the union is empty)
+    """
+    return _broadcast_iou(_as_boxes(boxes_a)[:, None, :], _as_boxes(boxes_b)[None, :, :])
+
+
+def overlapping_pairs(boxes_a: np.ndarray, boxes_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs of boxes that overlap (IoU > 0), without testing every pair.
+
+    Sort-and-sweep on x: boxes_b is sorted by x1, so the only candidates for
+    a box of boxes_a are those with x1 in (a.x1 - widest b, a.x2), found with
+    a binary search. Candidates are then filtered on the exact x/y overlap.
+
+    Args:
+        boxes_a: (N, 4) boxes [x1, y1, x2, y2]
+        boxes_b: (M, 4) boxes [x1, y1, x2, y2]
+
+    Returns:
+        (a_indices, b_indices) of the overlapping pairs
+    """
+    a = _as_boxes(boxes_a).astype(np.float64)
+    b = _as_boxes(boxes_b).astype(np.float64)
+    if len(a) == 0 or len(b) == 0:
+        return _EMPTY, _EMPTY
+
+    order = np.argsort(b[:, 0], kind="stable")
+    sorted_x1 = b[order, 0]
+    widest = np.max(b[:, 2] - b[:, 0])
+    lo = np.searchsorted(sorted_x1, a[:, 0] - widest, side="right")
+    hi = np.searchsorted(sorted_x1, a[:, 2], side="left")
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return _EMPTY, _EMPTY
+
+    # Expand each box's [lo, hi) range of sorted candidates into index pairs
+    a_idx = np.repeat(np.arange(len(a)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    b_idx = order[np.repeat(lo, counts) + offsets]
+
+    overlap = (
+        (np.minimum(a[a_idx, 2], b[b_idx, 2]) > np.maximum(a[a_idx, 0], b[b_idx, 0]))
+        & (np.minimum(a[a_idx, 3], b[b_idx, 3]) > np.maximum(a[a_idx, 1], b[b_idx, 1]))
+    )
+    return a_idx[overlap], b_idx[overlap]
+
+
+def dense_assignment(
+    boxes_a: np.ndarray,
+    boxes_b: np.ndarray,
+    iou_threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Optimal IoU assignment over the full cost matrix (Hungarian algorithm).
+
+    Args:
+        boxes_a: (N, 4) track boxes
+        boxes_b: (M, 4) detection boxes
+        iou_threshold: Minimum IoU for an accepted pair
+
+    Returns:
+        (a_positions, b_positions) of the accepted pairs, ordered by a
+    """
+    iou = iou_matrix(boxes_a, boxes_b)
+    # Hungarian algorithm on cost = 1 - IoU
+    row_pos, col_pos = linear_sum_assignment(1 - iou)
+    valid = iou[row_pos, col_pos] >= iou_threshold
+    return row_pos[valid], col_pos[valid]
+
+
+def gated_assignment(
+    boxes_a: np.ndarray,
+    boxes_b: np.ndarray,
+    iou_threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Same result as dense_assignment, computed on the sparse overlap graph.
+
+    Only overlapping pairs are scored (overlapping_pairs). Minimizing the
+    dense cost sum(1 - IoU) is maximizing the total IoU of the matched pairs,
+    and zero-IoU pairs never pass a positive threshold, so the optimum splits
+    into independent problems, one per connected component of the bipartite
+    overlap graph. One-to-one components (the common case: a person alone in
+    their neighbourhood) are matched directly, and the rest get a small
+    Hungarian problem each. Results equal the dense path up to ties between
+    equally good assignments.
+
+    Args:
+        boxes_a: (N, 4) track boxes
+        boxes_b: (M, 4) detection boxes
+        iou_threshold: Minimum IoU for an accepted pair (> 0)
+
+    Returns:
+        (a_positions, b_positions) of the accepted pairs, ordered by a
+    """
+    a = _as_boxes(boxes_a)
+    b = _as_boxes(boxes_b)
+    a_idx, b_idx = overlapping_pairs(a, b)
+    if len(a_idx) == 0:
+        return _EMPTY, _EMPTY
+    iou = _broadcast_iou(a[a_idx], b[b_idx])
+
+    n = len(a)
+    graph = coo_matrix(
+        (np.ones(len(a_idx), dtype=np.int8), (a_idx, n + b_idx)),
+        shape=(n + len(b), n + len(b)),
+    )
+    num_components, labels = connected_components(graph, directed=False)
+    edge_component = labels[a_idx]
+    a_per_component = np.bincount(labels[:n], minlength=num_components)
+    b_per_component = np.bincount(labels[n:], minlength=num_components)
+
+    # One-to-one components consist of a single edge: take it
+    single = (a_per_component[edge_component] == 1) & (b_per_component[edge_component] == 1)
+    rows, cols, values = [a_idx[single]], [b_idx[single]], [iou[single]]
+
+    # Larger components: Hungarian algorithm on each component's submatrix
+    shared = np.flatnonzero(~single)
+    shared = shared[np.argsort(edge_component[shared], kind="stable")]
+    boundaries = np.flatnonzero(np.diff(edge_component[shared])) + 1
+    for edges in np.split(shared, boundaries) if len(shared) else []:
+        component_a, local_a = np.unique(a_idx[edges], return_inverse=True)
+        component_b, local_b = np.unique(b_idx[edges], return_inverse=True)
+        sub_iou = np.zeros((len(component_a), len(component_b)), dtype=np.float32)
+        sub_iou[local_a, local_b] = iou[edges]
+        row_pos, col_pos = linear_sum_assignment(1 - sub_iou)
+        rows.append(component_a[row_pos])
+        cols.append(component_b[col_pos])
+        values.append(sub_iou[row_pos, col_pos])
+
+    rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+    valid = values >= iou_threshold
+    rows, cols = rows[valid], cols[valid]
+    order = np.argsort(rows, kind="stable")
+    return rows[order], cols[order]
+
+
 @dataclass
 class Detection:
     """
@@ -70,36 +258,271 @@ class Detection:
         return max(0, (x2 - x1) * (y2 - y1))
 
 
-@dataclass
+class RingBuffer:
+    """
+    Fixed-capacity history backed by one preallocated array.
+
+    Appending to a full buffer overwrites the oldest entry. Iteration,
+    indexing and np.asarray() see entries oldest first.
+    """
+
+    __slots__ = ("_data", "_start", "_size")
+
+    def __init__(self, capacity: int, shape: Tuple[int, ...] = (), dtype=np.float64):
+        self._data = np.zeros((capacity, *shape), dtype=dtype)
+        self._start = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def append(self, value) -> None:
+        capacity = len(self._data)
+        self._data[(self._start + self._size) % capacity] = value
+        if self._size < capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % capacity
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def array(self) -> np.ndarray:
+        """Entries oldest first, as a new array."""
+        if self._start + self._size <= len(self._data):
+            return self._data[self._start:self._start + self._size].copy()
+        return np.roll(self._data, -self._start, axis=0)[:self._size]
+
+    def tolist(self) -> list:
+        return self.array().tolist()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        return iter(self.array())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if not -self._size <= index < self._size:
+                raise IndexError("RingBuffer index out of range")
+            return self._data[(self._start + index % self._size) % len(self._data)]
+        return self.array()[index]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self.array()
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.tolist()!r}, capacity={self.capacity})"
+
+
+class TrackTable:
+    """
+    Struct-of-arrays storage for live tracks.
+
+    Row i holds the current bbox, confidence, counters and state code of
+    tracks[i]. Track objects read and write their own row, so the tracker
+    can select, age and expire all tracks with array operations instead of
+    per-track Python loops. Removing tracks compacts the table (keeping row
+    order) and hands each removed track a private copy of its row.
+    """
+
+    __slots__ = (
+        "bboxes", "confidences", "frame_ids", "ages", "hits",
+        "time_since_update", "states", "tracks",
+    )
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(1, capacity)
+        self.bboxes = np.zeros((capacity, 4), dtype=np.float32)
+        self.confidences = np.zeros(capacity, dtype=np.float64)
+        self.frame_ids = np.zeros(capacity, dtype=np.int64)
+        self.ages = np.zeros(capacity, dtype=np.int32)
+        self.hits = np.zeros(capacity, dtype=np.int32)
+        self.time_since_update = np.zeros(capacity, dtype=np.int32)
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.tracks: List["Track"] = []
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return (
+            self.bboxes, self.confidences, self.frame_ids, self.ages,
+            self.hits, self.time_since_update, self.states,
+        )
+
+    def add(self, track: "Track") -> None:
+        """Move a track's values into a new row of this table."""
+        row = len(self.tracks)
+        if row == len(self.states):
+            self._grow(2 * row)
+        source, source_row = track._table, track._row
+        for column, source_column in zip(self._columns(), source._columns()):
+            column[row] = source_column[source_row]
+        track._table, track._row = self, row
+        self.tracks.append(track)
+
+    def remove_rows(self, rows: np.ndarray) -> List["Track"]:
+        """
+        Detach the tracks at the given rows and compact the table.
+
+        Returns:
+            Removed tracks (still readable, no longer backed by this table)
+        """
+        if len(rows) == 0:
+            return []
+        removed = [self.tracks[row] for row in rows]
+        for track in removed:
+            track._detach()
+
+        keep = np.ones(len(self.tracks), dtype=bool)
+        keep[rows] = False
+        kept_rows = np.flatnonzero(keep)
+        for column in self._columns():
+            column[:len(kept_rows)] = column[kept_rows]
+        self.tracks = [self.tracks[row] for row in kept_rows]
+        for row, track in enumerate(self.tracks):
+            track._row = row
+        return removed
+
+    def rows_in_state(self, state: TrackState) -> np.ndarray:
+        """Row indices of the tracks in a state, in row order."""
+        return np.flatnonzero(self.states[:len(self.tracks)] == state.value)
+
+    def _grow(self, capacity: int) -> None:
+        for name in ("bboxes", "confidences", "frame_ids", "ages", "hits", "time_since_update", "states"):
+            column = getattr(self, name)
+            grown = np.zeros((capacity, *column.shape[1:]), dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+
 class Track:
     """
     Person track within single camera.
 
     Maintains state for a single person across frames.
     Optimized for 1 FPS footage with relaxed temporal constraints.
+
+    Current values (bbox, confidence, counters, state) live in a row of the
+    tracker's TrackTable; a track created on its own gets a private one-row
+    table. `bbox` is a view of that row: copy it to keep a snapshot.
     """
-    track_id: int
-    bbox: np.ndarray  # Current bounding box [x1, y1, x2, y2]
-    confidence: float  # Detection confidence
-    frame_id: int  # Last updated frame
-
-    # Track metadata
-    state: TrackState = TrackState.NEW
-    age: int = 0  # Frames since creation
-    hits: int = 0  # Total successful matches
-    time_since_update: int = 0  # Frames since last match
-
-    # Track history for quality assessment
-    bbox_history: List[np.ndarray] = field(default_factory=list)
-    confidence_history: List[float] = field(default_factory=list)
-    frame_history: List[int] = field(default_factory=list)
 
-    def __post_init__(self):
-        self.bbox = np.asarray(self.bbox, dtype=np.float32)
-        # Initialize history
-        self.bbox_history.append(self.bbox.copy())
-        self.confidence_history.append(self.confidence)
-        self.frame_history.append(self.frame_id)
+    __slots__ = ("track_id", "bbox_history", "confidence_history", "frame_history", "_table", "_row")
+
+    def __init__(
+        self,
+        track_id: int,
+        bbox: np.ndarray,
+        confidence: float,
+        frame_id: int,
+        state: TrackState = TrackState.NEW,
+        age: int = 0,
+        hits: int = 0,
+        time_since_update: int = 0,
+    ):
+        """
+        Args:
+            track_id: Camera-local track ID
+            bbox: Current bounding box [x1, y1, x2, y2]
+            confidence: Detection confidence
+            frame_id: Last updated frame
+            state: Lifecycle state
+            age: Frames since creation
+            hits: Total successful matches
+            time_since_update: Frames since last match
+        """
+        self.track_id = track_id
+        self._table = TrackTable(capacity=1)
+        self._table.tracks.append(self)
+        self._row = 0
+
+        self.bbox = bbox
+        self.confidence = confidence
+        self.frame_id = frame_id
+        self.state = state
+        self.age = age
+        self.hits = hits
+        self.time_since_update = time_since_update
+
+        # Track history for quality assessment (last HISTORY_LENGTH updates)
+        self.bbox_history = RingBuffer(HISTORY_LENGTH, (4,), np.float32)
+        self.confidence_history = RingBuffer(HISTORY_LENGTH)
+        self.frame_history = RingBuffer(HISTORY_LENGTH, dtype=np.int64)
+        self._record_history()
+
+    def _record_history(self) -> None:
+        row = self._row
+        self.bbox_history.append(self._table.bboxes[row])
+        self.confidence_history.append(self._table.confidences[row])
+        self.frame_history.append(self._table.frame_ids[row])
+
+    def _detach(self) -> None:
+        """Copy this track's row into a private table (on removal from the tracker)."""
+        table = TrackTable(capacity=1)
+        table.add(self)
+
+    @property
+    def bbox(self) -> np.ndarray:
+        """Current bounding box [x1, y1, x2, y2] (view of the table row)"""
+        return self._table.bboxes[self._row]
+
+    @bbox.setter
+    def bbox(self, value: np.ndarray) -> None:
+        self._table.bboxes[self._row] = value
+
+    @property
+    def confidence(self) -> float:
+        return float(self._table.confidences[self._row])
+
+    @confidence.setter
+    def confidence(self, value: float) -> None:
+        self._table.confidences[self._row] = value
+
+    @property
+    def frame_id(self) -> int:
+        return int(self._table.frame_ids[self._row])
+
+    @frame_id.setter
+    def frame_id(self, value: int) -> None:
+        self._table.frame_ids[self._row] = value
+
+    @property
+    def state(self) -> TrackState:
+        return TrackState(int(self._table.states[self._row]))
+
+    @state.setter
+    def state(self, value: TrackState) -> None:
+        self._table.states[self._row] = value.value
+
+    @property
+    def age(self) -> int:
+        return int(self._table.ages[self._row])
+
+    @age.setter
+    def age(self, value: int) -> None:
+        self._table.ages[self._row] = value
+
+    @property
+    def hits(self) -> int:
+        return int(self._table.hits[self._row])
+
+    @hits.setter
+    def hits(self, value: int) -> None:
+        self._table.hits[self._row] = value
+
+    @property
+    def time_since_update(self) -> int:
+        return int(self._table.time_since_update[self._row])
+
+    @time_since_update.setter
+    def time_since_update(self, value: int) -> None:
+        self._table.time_since_update[self._row] = value
 
     def update(self, detection: Detection):
         """
@@ -108,28 +531,20 @@ class Track:
         Args:
             detection: Matched detection
         """
-        self.bbox = detection.bbox.copy()
-        self.confidence = detection.confidence
-        self.frame_id = detection.frame_id
-
-        self.hits += 1
-        self.time_since_update = 0
-
-        # Append to history (limit to last 30 frames ~30 seconds at 1 FPS)
-        self.bbox_history.append(self.bbox.copy())
-        self.confidence_history.append(self.confidence)
-        self.frame_history.append(self.frame_id)
-
-        if len(self.bbox_history) > 30:
-            self.bbox_history.pop(0)
-            self.confidence_history.pop(0)
-            self.frame_history.pop(0)
+        table, row = self._table, self._row
+        table.bboxes[row] = detection.bbox
+        table.confidences[row] = detection.confidence
+        table.frame_ids[row] = detection.frame_id
+        table.hits[row] += 1
+        table.time_since_update[row] = 0
+        self._record_history()
 
         # Update state
-        if self.state == TrackState.NEW and self.hits >= 3:
-            self.state = TrackState.TRACKED
-        elif self.state == TrackState.LOST:
-            self.state = TrackState.TRACKED
+        state = table.states[row]
+        if state == _NEW and table.hits[row] >= 3:
+            table.states[row] = _TRACKED
+        elif state == _LOST:
+            table.states[row] = _TRACKED
 
     def mark_missed(self):
         """Mark track as missed in current frame"""
@@ -140,7 +555,7 @@ class Track:
         # At 1 FPS: Allow 10 seconds (10 frames) lost before removal
         if self.time_since_update > 10:
             self.state = TrackState.REMOVED
-        elif self.time_since_update > 3:
+        elif self.time_since_update > _LOST_AFTER_MISSES:
             self.state = TrackState.LOST
 
     @property
@@ -162,31 +577,90 @@ class Track:
     @property
     def average_confidence(self) -> float:
         """Return average detection confidence across history"""
-        if not self.confidence_history:
+        if not len(self.confidence_history):
             return 0.0
-        return float(np.mean(self.confidence_history))
+        return float(np.mean(self.confidence_history.array()))
 
     @property
     def average_bbox(self) -> np.ndarray:
         """Return average bounding box across recent history (smoothing)"""
-        if not self.bbox_history:
-            return self.bbox
-        return np.mean(self.bbox_history, axis=0)
+        if not len(self.bbox_history):
+            return self.bbox.copy()
+        return self.bbox_history.array().mean(axis=0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of the track (current values and histories)."""
+        return {
+            "track_id": self.track_id,
+            "bbox": self.bbox.tolist(),
+            "confidence": self.confidence,
+            "frame_id": self.frame_id,
+            "state": self.state.name,
+            "age": self.age,
+            "hits": self.hits,
+            "time_since_update": self.time_since_update,
+            "bbox_history": self.bbox_history.tolist(),
+            "confidence_history": self.confidence_history.tolist(),
+            "frame_history": self.frame_history.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Track":
+        """Rebuild a standalone track from to_dict() output."""
+        track = cls(
+            track_id=data["track_id"],
+            bbox=data["bbox"],
+            confidence=data["confidence"],
+            frame_id=data["frame_id"],
+            state=TrackState[data["state"]],
+            age=data["age"],
+            hits=data["hits"],
+            time_since_update=data["time_since_update"],
+        )
+        for history, values in (
+            (track.bbox_history, data["bbox_history"]),
+            (track.confidence_history, data["confidence_history"]),
+            (track.frame_history, data["frame_history"]),
+        ):
+            history.clear()
+            for value in values:
+                history.append(value)
+        return track
+
+    def __repr__(self) -> str:
+        return (
+            f"Track(track_id={self.track_id}, bbox={self.bbox.tolist()}, "
+            f"confidence={self.confidence:.3f}, frame_id={self.frame_id}, "
+            f"state={self.state.name}, hits={self.hits}, "
+            f"time_since_update={self.time_since_update})"
+        )
 
 
 class ByteTracker:
     """
     ByteTrack multi-object tracker optimized for 1 FPS CCTV footage.
 
-    Two-stage matching strategy:
-    1. High confidence detections matched with active tracks (IoU)
-    2. Low confidence detections matched with lost tracks (IoU recovery)
+    Matching strategy:
+    1. High confidence detections matched with confirmed tracks (IoU)
+    2. Low confidence detections matched with still-unmatched confirmed tracks
+    3. Remaining high confidence detections matched with lost tracks (recovery)
+    4. Remaining high confidence detections matched with unconfirmed tracks;
+       unconfirmed tracks that miss a frame are dropped
+
+    Confirmed tracks become LOST after 3 missed frames and are removed once
+    they have been missed for more than track_buffer frames.
+
+    In dense scenes each matching stage only scores overlapping track and
+    detection pairs and solves each cluster of overlapping boxes separately
+    (gated_assignment), which gives the same matches as the dense Hungarian
+    assignment at a fraction of the cost.
 
     Attributes:
         track_thresh: Minimum confidence for high-confidence detections (default: 0.6)
         match_thresh: IoU threshold for first-stage matching (default: 0.5)
         track_buffer: Frames to keep lost tracks before removal (default: 10 at 1 FPS)
         min_box_area: Minimum bounding box area to filter noise (default: 100)
+        gated: Use spatially gated sparse assignment for large stages (default: True)
     """
 
     def __init__(
@@ -194,7 +668,8 @@ class ByteTracker:
         track_thresh: float = 0.6,
         match_thresh: float = 0.5,
         track_buffer: int = 10,
-        min_box_area: float = 100
+        min_box_area: float = 100,
+        gated: bool = True
     ):
         """
         Initialize ByteTracker.
@@ -204,21 +679,36 @@ class ByteTracker:
             match_thresh: IoU threshold for matching (default: 0.5)
             track_buffer: Frames to buffer lost tracks (default: 10 for 1 FPS)
             min_box_area: Minimum bbox area (default: 100 pixels)
+            gated: Match only overlapping pairs, per connected component
+                   (identical results, faster with hundreds of detections)
         """
         self.track_thresh = track_thresh
         self.match_thresh = match_thresh
         self.track_buffer = track_buffer
         self.min_box_area = min_box_area
+        self.gated = gated
 
-        # Track management
-        self.tracked_tracks: List[Track] = []
-        self.lost_tracks: List[Track] = []
+        # Track management: live tracks (NEW, TRACKED, LOST) in one table;
+        # removed tracks are handed over until the caller clears them
+        self._table = TrackTable()
         self.removed_tracks: List[Track] = []
 
         # Track ID counter
         self.next_id = 1
         self.frame_id = 0
 
+    @property
+    def tracked_tracks(self) -> List[Track]:
+        """Tracks in the tracked pool (NEW or TRACKED)"""
+        states = self._table.states[:len(self._table)]
+        rows = np.flatnonzero((states == _NEW) | (states == _TRACKED))
+        return [self._table.tracks[row] for row in rows]
+
+    @property
+    def lost_tracks(self) -> List[Track]:
+        """Tracks waiting for recovery (LOST)"""
+        return [self._table.tracks[row] for row in self._table.rows_in_state(TrackState.LOST)]
+
     def update(self, detections: List[Detection]) -> List[Track]:
         """
         Update tracker with new detections.
@@ -230,141 +720,120 @@ class ByteTracker:
             List of active tracks after update
         """
         self.frame_id += 1
+        table = self._table
 
         # Filter out low-area detections (noise)
         detections = [d for d in detections if d.area >= self.min_box_area]
+        if detections:
+            det_boxes = np.stack([d.bbox for d in detections])
+            det_conf = np.array([d.confidence for d in detections], dtype=np.float64)
+        else:
+            det_boxes = np.empty((0, 4), dtype=np.float32)
+            det_conf = np.empty(0, dtype=np.float64)
 
         # Split detections by confidence
-        high_dets = [d for d in detections if d.confidence >= self.track_thresh]
-        low_dets = [d for d in detections if d.confidence < self.track_thresh]
+        high_dets = np.flatnonzero(det_conf >= self.track_thresh)
+        low_dets = np.flatnonzero(det_conf < self.track_thresh)
 
-        # Separate active and lost tracks
-        unconfirmed_tracks = [t for t in self.tracked_tracks if t.state == TrackState.NEW]
-        confirmed_tracks = [t for t in self.tracked_tracks if t.state == TrackState.TRACKED]
+        # Split live tracks by state (before any of them is updated)
+        table.ages[:len(table)] += 1
+        confirmed = table.rows_in_state(TrackState.TRACKED)
+        unconfirmed = table.rows_in_state(TrackState.NEW)
+        lost = table.rows_in_state(TrackState.LOST)
 
         ### Stage 1: Match high-confidence detections with confirmed tracks
-        matches_stage1, unmatched_dets_stage1, unmatched_tracks_stage1 = self._match(
-            confirmed_tracks, high_dets, self.match_thresh
+        rows1, dets1, unmatched_confirmed, unmatched_high = self._match(
+            confirmed, high_dets, det_boxes, self.match_thresh
         )
 
-        # Update matched tracks
-        for track_idx, det_idx in matches_stage1:
-            confirmed_tracks[track_idx].update(high_dets[det_idx])
-
-        # Collect unmatched confirmed tracks
-        unmatched_confirmed = [confirmed_tracks[i] for i in unmatched_tracks_stage1]
-
         ### Stage 2: Match low-confidence detections with unmatched confirmed tracks
-        matches_stage2, unmatched_dets_stage2, unmatched_tracks_stage2 = self._match(
-            unmatched_confirmed, low_dets, self.match_thresh * 0.8  # Relaxed threshold
+        rows2, dets2, unmatched_confirmed, _ = self._match(
+            unmatched_confirmed, low_dets, det_boxes, self.match_thresh * 0.8  # Relaxed threshold
         )
 
-        # Update matched tracks from stage 2
-        for track_idx, det_idx in matches_stage2:
-            unmatched_confirmed[track_idx].update(low_dets[det_idx])
-
-        # Collect final unmatched tracks
-        unmatched_confirmed_final = [unmatched_confirmed[i] for i in unmatched_tracks_stage2]
-
         ### Stage 3: Match remaining high-confidence detections with lost tracks (recovery)
-        matches_stage3, unmatched_dets_stage3, unmatched_lost = self._match(
-            self.lost_tracks,
-            [high_dets[i] for i in unmatched_dets_stage1],
-            self.match_thresh * 0.7  # More relaxed for recovery
+        rows3, dets3, unmatched_lost, unmatched_high = self._match(
+            lost, unmatched_high, det_boxes, self.match_thresh * 0.7  # More relaxed for recovery
         )
 
-        # Recover lost tracks
-        for track_idx, det_idx in matches_stage3:
-            self.lost_tracks[track_idx].update(high_dets[unmatched_dets_stage1[det_idx]])
-            self.tracked_tracks.append(self.lost_tracks[track_idx])
+        ### Stage 4: Confirm new tracks with the remaining high-confidence detections
+        rows4, dets4, unmatched_unconfirmed, unmatched_high = self._match(
+            unconfirmed, unmatched_high, det_boxes, self.match_thresh
+        )
 
-        # Remove recovered tracks from lost list
-        self.lost_tracks = [self.lost_tracks[i] for i in unmatched_lost]
+        # Update matched tracks
+        for rows, dets in ((rows1, dets1), (rows2, dets2), (rows3, dets3), (rows4, dets4)):
+            for row, det_idx in zip(rows.tolist(), dets.tolist()):
+                table.tracks[row].update(detections[det_idx])
+
+        ### Mark unmatched tracks as missed: TRACKED -> LOST -> REMOVED
+        missed = np.concatenate([unmatched_confirmed, unmatched_lost])
+        if len(missed):
+            table.time_since_update[missed] += 1
+            misses = table.time_since_update[missed]
+            states = table.states[missed]
+            states[misses > _LOST_AFTER_MISSES] = _LOST
+            states[misses > self.track_buffer] = _REMOVED
+            table.states[missed] = states
+        table.states[unmatched_unconfirmed] = _REMOVED
 
         ### Create new tracks for remaining unmatched high-confidence detections
-        remaining_high_det_indices = [unmatched_dets_stage1[i] for i in unmatched_dets_stage3]
-        for det_idx in remaining_high_det_indices:
-            det = high_dets[det_idx]
+        for det_idx in unmatched_high.tolist():
+            det = detections[det_idx]
             new_track = Track(
                 track_id=self.next_id,
                 bbox=det.bbox,
                 confidence=det.confidence,
                 frame_id=det.frame_id,
-                state=TrackState.NEW
+                state=TrackState.NEW,
+                hits=1,
             )
-            new_track.hits = 1
-            self.tracked_tracks.append(new_track)
+            table.add(new_track)
             self.next_id += 1
 
-        ### Mark unmatched tracks as missed
-        for track in unmatched_confirmed_final:
-            track.mark_missed()
-            if track.state == TrackState.REMOVED:
-                self.removed_tracks.append(track)
-            else:
-                self.lost_tracks.append(track)
-
-        # Remove unmatched tracks from tracked list
-        self.tracked_tracks = [t for t in self.tracked_tracks if t.is_active]
-
-        ### Clean up lost tracks that exceeded buffer
-        self.lost_tracks = [t for t in self.lost_tracks if t.state != TrackState.REMOVED]
-        for track in self.lost_tracks:
-            if track.time_since_update > self.track_buffer:
-                track.state = TrackState.REMOVED
-                self.removed_tracks.append(track)
-        self.lost_tracks = [t for t in self.lost_tracks if t.state != TrackState.REMOVED]
+        ### Hand over removed tracks
+        self.removed_tracks.extend(table.remove_rows(table.rows_in_state(TrackState.REMOVED)))
 
         # Return only actively tracked tracks (exclude NEW tracks with <3 hits)
-        return [t for t in self.tracked_tracks if t.state == TrackState.TRACKED]
+        return self.get_active_tracks()
 
     def _match(
         self,
-        tracks: List[Track],
-        detections: List[Detection],
+        rows: np.ndarray,
+        det_indices: np.ndarray,
+        det_boxes: np.ndarray,
         iou_threshold: float
-    ) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
         Match tracks to detections using IoU-based Hungarian algorithm.
 
         Args:
-            tracks: List of tracks to match
-            detections: List of detections to match
+            rows: Track table rows to match
+            det_indices: Indices into det_boxes to match
+            det_boxes: (D, 4) boxes of all detections in the frame
             iou_threshold: Minimum IoU for valid match
 
         Returns:
-            Tuple of (matches, unmatched_detections, unmatched_tracks)
-            - matches: List of (track_idx, detection_idx) pairs
-            - unmatched_detections: List of detection indices
-            - unmatched_tracks: List of track indices
+            Tuple of (matched_rows, matched_dets, unmatched_rows, unmatched_dets),
+            each an index array; matches are pairwise aligned and all arrays
+            keep the order of the inputs
         """
-        if len(tracks) == 0 or len(detections) == 0:
-            return [], list(range(len(detections))), list(range(len(tracks)))
-
-        # Compute IoU cost matrix
-        iou_matrix = np.zeros((len(tracks), len(detections)), dtype=np.float32)
-        for t_idx, track in enumerate(tracks):
-            for d_idx, det in enumerate(detections):
-                iou_matrix[t_idx, d_idx] = self._iou(track.tlbr, det.tlbr)
-
-        # Convert IoU to cost (1 - IoU)
-        cost_matrix = 1 - iou_matrix
-
-        # Hungarian algorithm for optimal assignment
-        row_indices, col_indices = linear_sum_assignment(cost_matrix)
+        if len(rows) == 0 or len(det_indices) == 0:
+            return _EMPTY, _EMPTY, rows, det_indices
 
-        # Filter matches by IoU threshold
-        matches = []
-        unmatched_tracks = list(range(len(tracks)))
-        unmatched_dets = list(range(len(detections)))
+        track_boxes = self._table.bboxes[rows]
+        boxes = det_boxes[det_indices]
+        if self.gated and len(rows) * len(det_indices) >= _GATING_MIN_PAIRS:
+            track_pos, det_pos = gated_assignment(track_boxes, boxes, iou_threshold)
+        else:
+            track_pos, det_pos = dense_assignment(track_boxes, boxes, iou_threshold)
 
-        for row, col in zip(row_indices, col_indices):
-            if iou_matrix[row, col] >= iou_threshold:
-                matches.append((row, col))
-                unmatched_tracks.remove(row)
-                unmatched_dets.remove(col)
+        track_free = np.ones(len(rows), dtype=bool)
+        track_free[track_pos] = False
+        det_free = np.ones(len(det_indices), dtype=bool)
+        det_free[det_pos] = False
 
-        return matches, unmatched_dets, unmatched_tracks
+        return rows[track_pos], det_indices[det_pos], rows[track_free], det_indices[det_free]
 
     @staticmethod
     def _iou(bbox1: np.ndarray, bbox2: np.ndarray) -> float:
@@ -378,34 +847,42 @@ class ByteTracker:
         Returns:
             IoU score (0-1)
         """
-        x1_1, y1_1, x2_1, y2_1 = bbox1
-        x1_2, y1_2, x2_2, y2_2 = bbox2
+        return float(iou_matrix(bbox1, bbox2)[0, 0])
 
-        # Calculate intersection area
-        x_left = max(x1_1, x1_2)
-        y_top = max(y1_1, y1_2)
-        x_right = min(x2_1, x2_2)
-        y_bottom = min(y2_1, y2_2)
-
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-
-        intersection = (x_right - x_left) * (y_bottom - y_top)
-
-        # Calculate union area
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
-
-        if union == 0:
-            return 0.0
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable snapshot of the tracker.
 
-        return intersection / union
+        Holds the parameters, ID and frame counters and every live track
+        (NEW, TRACKED, LOST) with its histories; removed tracks that the
+        caller has not collected yet are not included.
+        """
+        return {
+            "params": {
+                "track_thresh": self.track_thresh,
+                "match_thresh": self.match_thresh,
+                "track_buffer": self.track_buffer,
+                "min_box_area": self.min_box_area,
+                "gated": self.gated,
+            },
+            "next_id": self.next_id,
+            "frame_id": self.frame_id,
+            "tracks": [track.to_dict() for track in self._table.tracks],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ByteTracker":
+        """Rebuild a tracker from to_dict() output; it continues exactly where the snapshot left off."""
+        tracker = cls(**data["params"])
+        tracker.next_id = data["next_id"]
+        tracker.frame_id = data["frame_id"]
+        for track_data in data["tracks"]:
+            tracker._table.add(Track.from_dict(track_data))
+        return tracker
 
     def reset(self):
         """Reset tracker state"""
-        self.tracked_tracks.clear()
-        self.lost_tracks.clear()
+        self._table = TrackTable()
         self.removed_tracks.clear()
         self.next_id = 1
         self.frame_id = 0
@@ -413,17 +890,18 @@ class ByteTracker:
 
     def get_all_tracks(self) -> List[Track]:
         """Get all tracks (active + lost)"""
-        return self.tracked_tracks + self.lost_tracks
+        return list(self._table.tracks)
 
     def get_active_tracks(self) -> List[Track]:
         """Get only actively tracked tracks (confirmed)"""
-        return [t for t in self.tracked_tracks if t.state == TrackState.TRACKED]
+        return [self._table.tracks[row] for row in self._table.rows_in_state(TrackState.TRACKED)]
 
 
 def create_byte_tracker(
     track_thresh: float = 0.6,
     match_thresh: float = 0.5,
-    track_buffer: int = 10
+    track_buffer: int = 10,
+    gated: bool = True
 ) -> ByteTracker:
     """
     Factory function to create ByteTracker instance.
@@ -432,6 +910,7 @@ def create_byte_tracker(
         track_thresh: High-confidence detection threshold
         match_thresh: IoU matching threshold
         track_buffer: Frames to buffer lost tracks (1 FPS: 10 frames = 10 seconds)
+        gated: Use spatially gated sparse assignment in dense scenes
 
     Returns:
         ByteTracker instance
@@ -439,5 +918,6 @@ def create_byte_tracker(
     return ByteTracker(
         track_thresh=track_thresh,
         match_thresh=match_thresh,
-        track_buffer=track_buffer
+        track_buffer=track_buffer,
+        gated=gated
     )
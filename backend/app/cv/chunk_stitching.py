@@ -0,0 +1,479 @@
+"""
+Chunked Tracking: Planning and Stitching
+
+Splits a long video into overlapping time windows that are tracked
+independently (on different Celery workers) and stitches the per-chunk
+tracks back into one set of tracklets with video-wide track IDs.
+
+Each chunk owns the frames [start_frame, end_frame) and keeps tracking
+through a lookahead of `overlap` frames owned by the next chunk. Both
+chunks see the same frames there (FFmpegService.stream_frames(time_range=...)
+numbers them identically), so a person crossing the boundary has a track
+in each chunk with near-identical boxes in the overlap. The reduce step:
+
+1. Matches the tracks of consecutive chunks by their mean IoU over the
+   overlap frames they share, blended with the cosine similarity of their
+   tracklet embeddings when both have one (Hungarian assignment)
+2. Links matched tracks into chains and numbers the chains in order of
+   first appearance (global track IDs)
+3. Merges each chain's tracklets into one, counting frames seen by both
+   chunks once
+4. Drops chains seen only in lookahead frames: the next chunk owns those
+   frames and did not confirm the track
+
+When the first chunk continued tracks from the pin's previous video (tracker
+carry-over), those tracks keep their IDs and the other chains are numbered
+after the previous video's IDs; relabel_tracking_state() puts the last
+chunk's end state into the same global IDs for the next video.
+"""
+import logging
+import math
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from app.cv.byte_tracker import HISTORY_LENGTH, Track, iou_matrix
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TrackingChunk:
+    """
+    One time window of a chunked tracking job.
+
+    Frame numbers are sampling interval indices + 1 (as streamed with
+    FFmpegService.stream_frames(time_range=...)). The last chunk has no end
+    and runs to the end of the file.
+
+    Attributes:
+        index: Chunk position in the video (0-based)
+        start_frame: First frame owned by the chunk
+        end_frame: First frame owned by the next chunk (None for the last chunk)
+        window_end_frame: First frame not tracked (end_frame + overlap; None for the last chunk)
+        head_end_frame: Frames before this one are shared with the previous chunk's lookahead
+    """
+    index: int
+    start_frame: int
+    end_frame: Optional[int]
+    window_end_frame: Optional[int]
+    head_end_frame: int
+
+    def time_range(self, fps: float) -> Tuple[float, Optional[float]]:
+        """Seconds (relative to the start of the video) to stream for this chunk."""
+        end = (self.window_end_frame - 1) / fps if self.window_end_frame is not None else None
+        return (self.start_frame - 1) / fps, end
+
+    def is_boundary_frame(self, frame_number: int) -> bool:
+        """Whether a frame is shared with a neighbouring chunk."""
+        return frame_number < self.head_end_frame or (
+            self.end_frame is not None and frame_number >= self.end_frame
+        )
+
+    def owns(self, frame_number: int) -> bool:
+        """Whether a frame is in the chunk's own range (not its lookahead)."""
+        return self.end_frame is None or frame_number < self.end_frame
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrackingChunk":
+        return cls(**data)
+
+
+def plan_chunks(
+    duration_seconds: Optional[float],
+    fps: float,
+    chunk_seconds: float,
+    overlap_seconds: float,
+) -> List[TrackingChunk]:
+    """
+    Split a video's sampled frames into overlapping tracking chunks.
+
+    Args:
+        duration_seconds: Video duration (None = unknown, one chunk)
+        fps: Analysis frame rate
+        chunk_seconds: Frames owned by each chunk, in seconds
+        overlap_seconds: Lookahead shared with the next chunk, in seconds
+                         (long enough for a track to be confirmed in both)
+
+    Returns:
+        Chunks in timeline order (a single open-ended chunk for short videos)
+    """
+    chunk_frames = max(1, round(chunk_seconds * fps))
+    overlap_frames = max(0, round(overlap_seconds * fps))
+    if duration_seconds is None:
+        return [TrackingChunk(0, 1, None, None, 1)]
+
+    total_frames = max(1, math.ceil(duration_seconds * fps - 1e-6))
+    chunks = []
+    start = 1
+    while True:
+        end = start + chunk_frames
+        head_end = start + overlap_frames if chunks else start
+        # The last chunk also takes a remainder shorter than the overlap
+        if end + overlap_frames > total_frames:
+            chunks.append(TrackingChunk(len(chunks), start, None, None, head_end))
+            return chunks
+        chunks.append(TrackingChunk(len(chunks), start, end, end + overlap_frames, head_end))
+        start = end
+
+
+class BoundaryObservations:
+    """
+    Boxes of a chunk's tracks in the frames it shares with its neighbours.
+
+    Recorded while tracking, for every track updated in the frame
+    (including unconfirmed ones), since a tracklet only keeps its latest
+    boxes and the stitching needs the ones in the overlap.
+    """
+
+    def __init__(self, chunk: TrackingChunk):
+        self.chunk = chunk
+        self.boxes: Dict[int, Dict[int, List[float]]] = {}
+
+    def record(self, frame_number: int, tracks: Iterable[Track]) -> None:
+        """Record the tracks matched in a frame (after the tracker update)."""
+        if not self.chunk.is_boundary_frame(frame_number):
+            return
+        for track in tracks:
+            if track.time_since_update == 0:
+                self.boxes.setdefault(track.track_id, {})[frame_number] = track.bbox.tolist()
+
+    def to_dict(self) -> Dict[str, List[List[float]]]:
+        """{track_id: [[frame_number, x1, y1, x2, y2], ...]} (JSON keys are strings)."""
+        return {
+            str(track_id): [[frame, *bbox] for frame, bbox in sorted(frames.items())]
+            for track_id, frames in self.boxes.items()
+        }
+
+
+def _observations_in(
+    observations: Dict[str, List[List[float]]],
+    first_frame: int,
+    end_frame: int,
+) -> Dict[int, Dict[int, np.ndarray]]:
+    """{track_id: {frame: bbox}} restricted to frames in [first_frame, end_frame)."""
+    selected = {}
+    for track_id, rows in observations.items():
+        frames = {
+            int(row[0]): np.asarray(row[1:], dtype=np.float32)
+            for row in rows
+            if first_frame <= row[0] < end_frame
+        }
+        if frames:
+            selected[int(track_id)] = frames
+    return selected
+
+
+def _unit(embedding) -> Optional[np.ndarray]:
+    if embedding is None:
+        return None
+    vector = np.asarray(embedding, dtype=np.float64)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+def match_boundary(
+    previous: Dict[int, Dict[int, np.ndarray]],
+    following: Dict[int, Dict[int, np.ndarray]],
+    previous_embeddings: Dict[int, np.ndarray],
+    following_embeddings: Dict[int, np.ndarray],
+    iou_weight: float = 0.7,
+    min_score: float = 0.5,
+) -> List[Tuple[int, int, float]]:
+    """
+    Match the tracks of two consecutive chunks in their overlap.
+
+    The spatial score of a pair is their mean IoU over the overlap frames
+    in which both were observed (0 if none). When both tracks have an
+    embedding it is blended with their cosine similarity:
+    score = iou_weight * IoU + (1 - iou_weight) * cosine.
+
+    Args:
+        previous: {track_id: {frame: bbox}} of the earlier chunk in the overlap
+        following: {track_id: {frame: bbox}} of the later chunk in the overlap
+        previous_embeddings: Unit embeddings of the earlier chunk's tracks
+        following_embeddings: Unit embeddings of the later chunk's tracks
+        iou_weight: Weight of the spatial score
+        min_score: Minimum score of an accepted match
+
+    Returns:
+        List of (previous_track_id, following_track_id, score)
+    """
+    if not previous or not following:
+        return []
+    previous_ids, following_ids = sorted(previous), sorted(following)
+    iou_sum = np.zeros((len(previous_ids), len(following_ids)))
+    shared = np.zeros_like(iou_sum)
+
+    previous_frames = {f for boxes in previous.values() for f in boxes}
+    following_frames = {f for boxes in following.values() for f in boxes}
+    for frame in sorted(previous_frames & following_frames):
+        rows = [i for i, track_id in enumerate(previous_ids) if frame in previous[track_id]]
+        cols = [j for j, track_id in enumerate(following_ids) if frame in following[track_id]]
+        if not rows or not cols:
+            continue
+        iou = iou_matrix(
+            [previous[previous_ids[i]][frame] for i in rows],
+            [following[following_ids[j]][frame] for j in cols],
+        )
+        iou_sum[np.ix_(rows, cols)] += iou
+        shared[np.ix_(rows, cols)] += 1
+
+    score = np.divide(iou_sum, shared, out=np.zeros_like(iou_sum), where=shared > 0)
+    for i, previous_id in enumerate(previous_ids):
+        a = previous_embeddings.get(previous_id)
+        if a is None:
+            continue
+        for j, following_id in enumerate(following_ids):
+            b = following_embeddings.get(following_id)
+            if b is not None and shared[i, j] > 0:
+                score[i, j] = iou_weight * score[i, j] + (1 - iou_weight) * float(a @ b)
+
+    rows, cols = linear_sum_assignment(-score)
+    return [
+        (previous_ids[i], following_ids[j], float(score[i, j]))
+        for i, j in zip(rows, cols)
+        if score[i, j] >= min_score
+    ]
+
+
+def _observed_frames(tracklet: Dict[str, Any]) -> List[int]:
+    return tracklet.get("observation_frames") or tracklet.get("frame_sequence") or []
+
+
+def merge_tracklets(parts: List[Dict[str, Any]], track_id: int) -> Dict[str, Any]:
+    """
+    Merge the tracklets of one person from consecutive chunks.
+
+    Frames observed by two chunks count once. The embedding, confidence,
+    quality, aspect ratio and average box are averaged weighted by each
+    part's observations; the outfit and height category come from the part
+    with the most observations.
+
+    Args:
+        parts: Tracklet dicts (Tracklet.to_dict()) in chunk order
+        track_id: Global track ID of the merged tracklet
+
+    Returns:
+        Merged tracklet dict
+    """
+    if len(parts) == 1:
+        return {**parts[0], "track_id": track_id}
+
+    weights = np.array([max(1, part["num_observations"]) for part in parts], dtype=np.float64)
+    weights /= weights.sum()
+    main = parts[int(np.argmax([part["num_observations"] for part in parts]))]
+
+    t_in = min(datetime.fromisoformat(part["t_in"]) for part in parts)
+    t_out = max(datetime.fromisoformat(part["t_out"]) for part in parts)
+    observation_frames = sorted({f for part in parts for f in _observed_frames(part)})
+    observation_boxes = {}
+    for part in parts:
+        observation_boxes.update(zip(part.get("observation_frames", []), part.get("observation_boxes", [])))
+
+    boxes = {}
+    for part in parts:
+        boxes.update(zip(part.get("frame_sequence", []), part.get("bbox_sequence", [])))
+    frame_sequence = sorted(boxes)[-HISTORY_LENGTH:]
+
+    embeddings = [(w, _unit(part.get("visual_embedding"))) for w, part in zip(weights, parts)]
+    embeddings = [(w, e) for w, e in embeddings if e is not None]
+    visual_embedding = None
+    if embeddings:
+        visual_embedding = _unit(sum(w * e for w, e in embeddings)).tolist()
+
+    def weighted(key: str) -> float:
+        return float(sum(w * part[key] for w, part in zip(weights, parts)))
+
+    return {
+        **main,
+        "track_id": track_id,
+        "t_in": t_in.isoformat(),
+        "t_out": t_out.isoformat(),
+        "duration_seconds": (t_out - t_in).total_seconds(),
+        "bbox_sequence": [boxes[f] for f in frame_sequence],
+        "frame_sequence": frame_sequence,
+        "avg_bbox": np.average([part["avg_bbox"] for part in parts], axis=0, weights=weights).tolist(),
+        "visual_embedding": visual_embedding,
+        "aspect_ratio": weighted("aspect_ratio"),
+        "confidence": weighted("confidence"),
+        "quality": weighted("quality"),
+        "num_observations": len(observation_frames) or sum(part["num_observations"] for part in parts),
+        "observation_frames": observation_frames,
+        "observation_boxes": (
+            [observation_boxes[f] for f in observation_frames]
+            if observation_boxes.keys() >= set(observation_frames) else []
+        ),
+    }
+
+
+class _Chains:
+    """Union-find over (chunk_index, track_id) nodes."""
+
+    def __init__(self):
+        self.parent: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def find(self, node: Tuple[int, int]) -> Tuple[int, int]:
+        self.parent.setdefault(node, node)
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+        return node
+
+    def union(self, a: Tuple[int, int], b: Tuple[int, int]) -> None:
+        self.parent[self.find(b)] = self.find(a)
+
+
+def stitch_chunks(
+    chunk_results: List[Dict[str, Any]],
+    iou_weight: float = 0.7,
+    min_score: float = 0.5,
+    first_track_id: int = 1,
+    carried_track_ids: Iterable[int] = (),
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], Dict[Tuple[int, int], int]]:
+    """
+    Stitch per-chunk tracking results into video-wide tracklets.
+
+    Args:
+        chunk_results: One dict per chunk with "chunk" (TrackingChunk.to_dict()),
+                       "tracklets" (Tracklet.to_dict() list, chunk-local track
+                       IDs) and "observations" (BoundaryObservations.to_dict())
+        iou_weight: Weight of the spatial score when matching boundary tracks
+        min_score: Minimum score of a boundary match
+        first_track_id: First global track ID to assign
+        carried_track_ids: Track IDs of the first chunk continued from the
+                           previous video; their chains keep them
+
+    Returns:
+        Tuple of (tracklet dicts with global track IDs numbered from
+        first_track_id in order of first appearance, stitching statistics,
+        {(chunk_index, chunk-local track ID): global track ID})
+    """
+    carried = set(carried_track_ids)
+    results = sorted(chunk_results, key=lambda r: r["chunk"]["index"])
+    chunks = [TrackingChunk.from_dict(r["chunk"]) for r in results]
+    tracklets = {
+        (chunk.index, tracklet["track_id"]): tracklet
+        for chunk, result in zip(chunks, results)
+        for tracklet in result["tracklets"]
+    }
+
+    chains = _Chains()
+    links = 0
+    for (chunk, result), (next_chunk, next_result) in zip(
+        zip(chunks, results), zip(chunks[1:], results[1:])
+    ):
+        overlap = (next_chunk.start_frame, chunk.window_end_frame)
+
+        def embeddings(index: int, track_ids) -> Dict[int, np.ndarray]:
+            units = {t: _unit(tracklets.get((index, t), {}).get("visual_embedding")) for t in track_ids}
+            return {t: e for t, e in units.items() if e is not None}
+
+        previous = _observations_in(result["observations"], *overlap)
+        following = _observations_in(next_result["observations"], *overlap)
+        for previous_id, following_id, _ in match_boundary(
+            previous,
+            following,
+            embeddings(chunk.index, previous),
+            embeddings(next_chunk.index, following),
+            iou_weight=iou_weight,
+            min_score=min_score,
+        ):
+            chains.union((chunk.index, previous_id), (next_chunk.index, following_id))
+            links += 1
+
+    groups: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for node in tracklets:
+        groups.setdefault(chains.find(node), []).append(node)
+
+    kept, dropped = [], 0
+    for nodes in groups.values():
+        nodes.sort()
+        # Seen only in lookahead frames: the owning chunk did not confirm it
+        if not any(
+            any(chunks[index].owns(f) for f in _observed_frames(tracklets[(index, track_id)]))
+            for index, track_id in nodes
+        ):
+            dropped += len(nodes)
+            continue
+        first_frame = min(min(_observed_frames(tracklets[node]), default=0) for node in nodes)
+        kept.append((first_frame, nodes[0], nodes))
+
+    members: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for node in list(chains.parent):
+        members.setdefault(chains.find(node), []).append(node)
+
+    kept.sort(key=lambda entry: entry[:2])
+    stitched, track_ids = [], {}
+    next_id = first_track_id
+    for _, _, nodes in kept:
+        index, local_id = nodes[0]
+        if index == 0 and local_id in carried:
+            track_id = local_id
+        else:
+            track_id, next_id = next_id, next_id + 1
+        stitched.append(merge_tracklets([tracklets[node] for node in nodes], track_id))
+        # Every track of the chain, including those without a tracklet of their own
+        for node in [*nodes, *members.get(chains.find(nodes[0]), [])]:
+            track_ids[node] = track_id
+    stats = {
+        "chunks": len(chunks),
+        "boundary_links": links,
+        "chunk_tracklets": len(tracklets),
+        "tracklets": len(stitched),
+        "merged_tracklets": sum(len(nodes) > 1 for _, _, nodes in kept),
+        "dropped_lookahead_tracklets": dropped,
+    }
+    logger.info(f"Stitched {len(chunks)} chunks: {stats}")
+    return stitched, stats, track_ids
+
+
+def relabel_tracking_state(
+    state: Dict[str, Any],
+    track_ids: Dict[int, int],
+    next_id: int,
+) -> Dict[str, Any]:
+    """
+    Put a chunk's TrackletGenerator.get_state() snapshot into global track IDs.
+
+    Used on the last chunk's end state before it is saved for the pin's next
+    video. Live tracks without a global ID (e.g. too short for a tracklet
+    so far) get new IDs from next_id; completed tracklets are dropped (they
+    are part of this video's results already).
+
+    Args:
+        state: Snapshot with chunk-local track IDs
+        track_ids: {chunk-local track ID: global track ID} for the chunk
+        next_id: First unused global track ID
+
+    Returns:
+        Relabeled snapshot (the input is not modified)
+    """
+    mapping = dict(track_ids)
+    next_id = max([next_id, *(track_id + 1 for track_id in mapping.values())])
+    for track in sorted(state["tracker"]["tracks"], key=lambda t: t["track_id"]):
+        if track["track_id"] not in mapping:
+            mapping[track["track_id"]] = next_id
+            next_id += 1
+
+    tracker = state["tracker"]
+    return {
+        **state,
+        "tracker": {
+            **tracker,
+            "next_id": next_id,
+            "tracks": [{**track, "track_id": mapping[track["track_id"]]} for track in tracker["tracks"]],
+        },
+        "track_appearances": {
+            str(mapping[int(track_id)]): appearance
+            for track_id, appearance in state["track_appearances"].items()
+            if int(track_id) in mapping
+        },
+        "completed_tracklets": [],
+    }
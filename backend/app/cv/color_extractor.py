@@ -94,13 +94,7 @@ class ColorExtractor:
         # Graceful degradation for very small regions (e.g., narrow shoe crops)
         if h * w < 10:
             logger.warning(f"Region too small for reliable color extraction: {h}x{w} = {h*w} pixels")
-            # Return default gray with minimal confidence
-            return ColorDescriptor(
-                color_name="gray",
-                lab=(50.0, 0.0, 0.0),  # Neutral gray
-                histogram=[0.1] * 30,  # Flat histogram
-                confidence=0.1  # Very low confidence
-            )
+            return self._default_descriptor()
 
         # Small but extractable regions: proceed with warning
         if h * w < self.min_pixels:
@@ -128,6 +122,83 @@ class ColorExtractor:
             confidence=float(confidence)
         )
 
+    def extract_batch(self, regions: List[np.ndarray]) -> List[Optional[ColorDescriptor]]:
+        """
+        Extract color descriptors for many regions in one pass.
+
+        Converts the pixels of all regions to LAB with a single cvtColor call
+        and counts the 256 values of every channel of every region with a
+        single bincount; medians, spreads and histograms all come from those
+        counts. Results match extract() on each region.
+
+        Args:
+            regions: RGB garment regions (H x W x 3, any sizes)
+
+        Returns:
+            ColorDescriptor per region (None where extract() would raise)
+        """
+        results: List[Optional[ColorDescriptor]] = [None] * len(regions)
+        valid = []
+        for i, region in enumerate(regions):
+            if region is None or region.size == 0 or len(region.shape) != 3 or region.shape[2] != 3:
+                logger.warning(f"Invalid region {i}: {None if region is None else region.shape}")
+            elif region.shape[0] * region.shape[1] < 10:
+                results[i] = self._default_descriptor()
+            else:
+                valid.append(i)
+        if not valid:
+            return results
+
+        sizes = np.array([regions[i].shape[0] * regions[i].shape[1] for i in valid])
+        pixels = np.concatenate([regions[i].reshape(-1, 3) for i in valid])
+        # Color conversion is per pixel: one row holding every region's pixels
+        lab_pixels = cv2.cvtColor(pixels[np.newaxis], cv2.COLOR_RGB2LAB)[0]
+
+        # counts[region, channel, value]
+        owner = np.repeat(np.arange(len(valid)), sizes)
+        keys = (owner[:, np.newaxis] * 3 + np.arange(3)) * 256 + lab_pixels
+        counts = np.bincount(keys.ravel(), minlength=len(valid) * 768).reshape(len(valid), 3, 256)
+
+        # Median (mean of the two middle values for even sizes, like np.median)
+        cumulative = np.cumsum(counts, axis=2)
+        lower = (cumulative > ((sizes - 1) // 2)[:, np.newaxis, np.newaxis]).argmax(axis=2)
+        upper = (cumulative > (sizes // 2)[:, np.newaxis, np.newaxis]).argmax(axis=2)
+        dominant = (lower + upper) / 2.0
+
+        # Spread around the mean, per channel
+        values = np.arange(256, dtype=np.float64)
+        means = (counts * values).sum(axis=2) / sizes[:, np.newaxis]
+        stds = np.sqrt((counts * (values - means[..., np.newaxis]) ** 2).sum(axis=2) / sizes[:, np.newaxis])
+        confidences = np.clip(1.0 - stds.mean(axis=1) / 50.0, 0.3, 1.0)
+
+        # Same bins as cv2.calcHist over [0, 256): floor(value * bins / 256)
+        bins = self.histogram_bins
+        bin_of_value = (np.arange(256) * bins) >> 8
+        histograms = np.zeros((len(valid), 3, bins), dtype=np.float32)
+        np.add.at(histograms, (slice(None), slice(None), bin_of_value), counts.astype(np.float32))
+        histograms = histograms.reshape(len(valid), 3 * bins)
+        histograms /= histograms.sum(axis=1, keepdims=True) + 1e-10
+
+        for k, i in enumerate(valid):
+            results[i] = ColorDescriptor(
+                color_name=self._lab_to_color_name(dominant[k]),
+                lab=tuple(dominant[k].tolist()),
+                histogram=histograms[k].tolist(),
+                confidence=float(confidences[k])
+            )
+
+        return results
+
+    @staticmethod
+    def _default_descriptor() -> ColorDescriptor:
+        """Default gray with minimal confidence, for regions too small to measure."""
+        return ColorDescriptor(
+            color_name="gray",
+            lab=(50.0, 0.0, 0.0),  # Neutral gray
+            histogram=[0.1] * 30,  # Flat histogram
+            confidence=0.1  # Very low confidence
+        )
+
     def _get_dominant_color(self, lab_image: np.ndarray) -> np.ndarray:
         """
         Get dominant LAB color from image using median.
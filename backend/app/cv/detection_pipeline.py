@@ -0,0 +1,455 @@
+"""
+Batched Detection Pipeline
+
+Staged, prefetching person detection loop for video analysis.
+Overlaps FFmpeg decoding with YOLO inference so neither stage waits on the other.
+
+Stages:
+1. Decode: producer thread pulls frames from the frame iterator into a bounded queue
+   (and measures motion when a MotionGate is attached)
+2. Inference: worker thread groups frames into micro-batches for detect_batch(),
+   skipping motionless frames whose last known result was empty
+3. Results: caller consumes per-frame results in frame order, with boxes in
+   original-resolution coordinates when frames were decoded downscaled or
+   from the proxy (VideoFrame.scale)
+
+Per-stage queue depths are sampled on every hand-off so a worker's bottleneck
+can be read from the stats: a full frame queue means inference is the
+bottleneck, an empty one means decode is.
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.cv.motion_gate import MotionGate
+from app.cv.person_detector import PersonDetector
+from app.cv.roi import RegionOfInterest
+from app.cv.tiling import TilingConfig
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_END = object()
+
+
+@dataclass
+class DetectionResult:
+    """Detections for a single sampled frame."""
+    frame_number: int
+    timestamp_seconds: float
+    detections: List[Dict]
+    skipped: bool = False  # True if the motion gate reused the last empty result
+
+
+def scale_detections(detections: List[Dict], scale: Tuple[float, float]) -> List[Dict]:
+    """
+    Map detections from a resized frame back to original-resolution coordinates.
+
+    Args:
+        detections: Detections with XYWH "bbox" in frame coordinates
+        scale: (x, y) original pixels per frame pixel
+
+    Returns:
+        Detections with scaled boxes (unchanged if scale is (1, 1))
+    """
+    sx, sy = scale
+    if sx == 1.0 and sy == 1.0:
+        return detections
+    scaled = []
+    for det in detections:
+        x, y, w, h = det["bbox"]
+        scaled.append({**det, "bbox": [x * sx, y * sy, w * sx, h * sy]})
+    return scaled
+
+
+@dataclass
+class _StageError:
+    """Exception raised in a worker thread, forwarded to the consumer."""
+    exc: BaseException
+
+
+@dataclass
+class QueueStats:
+    """Running queue depth statistics for one pipeline stage."""
+    capacity: int
+    samples: int = 0
+    total_depth: int = 0
+    max_depth: int = 0
+    wait_seconds: float = 0.0  # Time the downstream stage spent blocked on an empty queue
+
+    def sample(self, depth: int):
+        self.samples += 1
+        self.total_depth += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def to_dict(self) -> Dict:
+        avg_depth = self.total_depth / self.samples if self.samples else 0.0
+        return {
+            "capacity": self.capacity,
+            "avg_depth": round(avg_depth, 2),
+            "max_depth": self.max_depth,
+            "avg_fill": round(avg_depth / self.capacity, 3) if self.capacity else 0.0,
+            "consumer_wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+@dataclass
+class PipelineStats:
+    """Throughput and queue statistics for a pipeline run."""
+    frames_decoded: int = 0
+    frames_detected: int = 0
+    frames_skipped: int = 0
+    batches: int = 0
+    decode_seconds: float = 0.0
+    inference_seconds: float = 0.0
+    decode_queue: QueueStats = field(default_factory=lambda: QueueStats(capacity=0))
+    result_queue: QueueStats = field(default_factory=lambda: QueueStats(capacity=0))
+
+    def to_dict(self) -> Dict:
+        return {
+            "frames_decoded": self.frames_decoded,
+            "frames_detected": self.frames_detected,
+            "frames_skipped": self.frames_skipped,
+            "batches": self.batches,
+            "avg_batch_size": round(self.frames_detected / self.batches, 2) if self.batches else 0.0,
+            "decode_seconds": round(self.decode_seconds, 3),
+            "inference_seconds": round(self.inference_seconds, 3),
+            "decode_queue": self.decode_queue.to_dict(),
+            "result_queue": self.result_queue.to_dict(),
+        }
+
+
+class DetectionPipeline:
+    """
+    Prefetching, micro-batched person detection over a frame stream.
+
+    Example:
+        >>> pipeline = DetectionPipeline(detector, batch_size=8)
+        >>> frames = ffmpeg.stream_frames(path, fps=1.0,
+        ...                               buffer_count=pipeline.required_buffer_count)
+        >>> for result in pipeline.run(frames):
+        ...     print(result.frame_number, len(result.detections))
+        >>> pipeline.stats.to_dict()
+    """
+
+    def __init__(
+        self,
+        detector: PersonDetector,
+        batch_size: int = 8,
+        prefetch_frames: int = 16,
+        result_queue_size: int = 64,
+        motion_gate: Optional[MotionGate] = None,
+        roi: Optional[RegionOfInterest] = None,
+        tiling: Optional[TilingConfig] = None,
+    ):
+        """
+        Initialize detection pipeline.
+
+        Args:
+            detector: PersonDetector used for batch inference
+            batch_size: Frames per detect_batch() call (default: 8)
+            prefetch_frames: Capacity of the decoded-frame queue (default: 16)
+            result_queue_size: Capacity of the per-frame result queue (default: 64)
+            motion_gate: Skip detection on motionless frames (default: detect every frame)
+            roi: Camera region of interest; inference and motion measurement
+                 only look at the ROI rectangle (default: whole frame)
+            tiling: Tiled inference for high-resolution video; tiles of the
+                    whole micro-batch share one forward pass (default: untiled)
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if prefetch_frames < 1:
+            raise ValueError(f"prefetch_frames must be >= 1, got {prefetch_frames}")
+
+        self.detector = detector
+        self.batch_size = batch_size
+        self.prefetch_frames = prefetch_frames
+        self.result_queue_size = result_queue_size
+        self.motion_gate = motion_gate
+        self.roi = roi
+        self.tiling = tiling
+        self.stats = PipelineStats()
+
+    @property
+    def required_buffer_count(self) -> int:
+        """
+        Minimum frame buffers a reusable-buffer source needs for this pipeline.
+
+        Frames in flight: one held by the decoder, the full frame queue, and
+        one micro-batch being assembled or inferred.
+        """
+        return self.prefetch_frames + self.batch_size + 2
+
+    def run(self, frames: Iterable) -> Iterator[DetectionResult]:
+        """
+        Run detection over a frame stream.
+
+        Args:
+            frames: Iterable of VideoFrame-like objects exposing
+                    `image` (RGB), `frame_number` and `timestamp_seconds`
+                    (and optionally `scale`, see VideoFrame)
+
+        Returns:
+            Iterator of DetectionResult in frame order
+
+        Raises:
+            Any exception raised by the frame source or the detector
+        """
+        self.stats = PipelineStats(
+            decode_queue=QueueStats(capacity=self.prefetch_frames),
+            result_queue=QueueStats(capacity=self.result_queue_size),
+        )
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        frame_queue: queue.Queue = queue.Queue(maxsize=self.prefetch_frames)
+        result_queue: queue.Queue = queue.Queue(maxsize=self.result_queue_size)
+        stop = threading.Event()
+
+        decoder = threading.Thread(
+            target=self._decode_stage, args=(frames, frame_queue, stop),
+            name="detection-decode", daemon=True,
+        )
+        inference = threading.Thread(
+            target=self._inference_stage, args=(frame_queue, result_queue, stop),
+            name="detection-inference", daemon=True,
+        )
+        decoder.start()
+        inference.start()
+
+        try:
+            while True:
+                item = self._get(result_queue, self.stats.result_queue)
+                if item is _END:
+                    break
+                if isinstance(item, _StageError):
+                    raise item.exc
+                yield item
+        finally:
+            stop.set()
+            # Unblock stages waiting on full queues so they can observe `stop`
+            self._drain(result_queue)
+            self._drain(frame_queue)
+            inference.join(timeout=10)
+            decoder.join(timeout=10)
+
+        logger.info(f"Detection pipeline finished: {self.stats.to_dict()}")
+
+    def _decode_stage(self, frames: Iterable, frame_queue: queue.Queue, stop: threading.Event):
+        """Producer: pull frames from the source into the bounded frame queue."""
+        iterator = iter(frames)
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    frame = next(iterator)
+                except StopIteration:
+                    break
+                self.stats.decode_seconds += time.perf_counter() - start
+                self.stats.frames_decoded += 1
+
+                # Motion is measured here, in frame order, off the inference thread
+                has_motion = True
+                if self.motion_gate is not None:
+                    image = frame.image if self.roi is None else self.roi.crop(frame.image)[0]
+                    has_motion = self.motion_gate.measure_motion(image)
+
+                if not self._put(frame_queue, (frame, has_motion), stop, self.stats.decode_queue):
+                    return
+            self._put(frame_queue, _END, stop, self.stats.decode_queue)
+        except Exception as e:  # Forwarded to the consumer
+            self._put(frame_queue, _StageError(e), stop, self.stats.decode_queue)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def _inference_stage(
+        self, frame_queue: queue.Queue, result_queue: queue.Queue, stop: threading.Event
+    ):
+        """Worker: group frames into micro-batches and run detect_batch()."""
+        try:
+            finished = False
+            while not finished and not stop.is_set():
+                # Block for the first frame, then take whatever is ready up to batch_size
+                batch = []
+                item = self._get(frame_queue, self.stats.decode_queue, stop)
+                while True:
+                    if item is _END:
+                        finished = True
+                        break
+                    if isinstance(item, _StageError):
+                        self._put(result_queue, item, stop, self.stats.result_queue)
+                        return
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = frame_queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if not batch:
+                    continue
+
+                if not self._process_batch(batch, result_queue, stop):
+                    return
+
+            self._put(result_queue, _END, stop, self.stats.result_queue)
+        except Exception as e:  # Forwarded to the consumer
+            self._put(result_queue, _StageError(e), stop, self.stats.result_queue)
+
+    def _process_batch(
+        self, batch: List, result_queue: queue.Queue, stop: threading.Event
+    ) -> bool:
+        """
+        Run detection on the gated frames of a batch and emit results in order.
+
+        Gate decisions are made in frame order: a frame is only skipped once
+        the results of all earlier frames are recorded, so the detector call
+        is cut before a frame whose skip would rest on results still pending.
+
+        Returns False if the pipeline was stopped.
+        """
+        gate = self.motion_gate
+        pending = []  # Frames to detect in the next detect_batch() call
+        for frame, has_motion in batch:
+            if gate is not None and pending and gate.would_skip(has_motion):
+                # Pending frames may contain people: record them, then decide
+                if not self._detect_frames(pending, result_queue, stop):
+                    return False
+                pending = []
+
+            if gate is None or gate.should_detect(has_motion):
+                pending.append(frame)
+                continue
+
+            self.stats.frames_skipped += 1
+            result = DetectionResult(
+                frame_number=frame.frame_number,
+                timestamp_seconds=frame.timestamp_seconds,
+                detections=[],  # Carry the last known (empty) result forward
+                skipped=True,
+            )
+            if not self._put(result_queue, result, stop, self.stats.result_queue):
+                return False
+
+        return self._detect_frames(pending, result_queue, stop)
+
+    def _detect_frames(
+        self, frames: List, result_queue: queue.Queue, stop: threading.Event
+    ) -> bool:
+        """
+        Detect frames in one detect_batch() call, record and emit the results.
+
+        Returns False if the pipeline was stopped.
+        """
+        if not frames:
+            return True
+
+        start = time.perf_counter()
+        batch_detections = self.detector.detect_batch(
+            [frame.image for frame in frames], **self._detect_options()
+        )
+        self.stats.inference_seconds += time.perf_counter() - start
+        self.stats.batches += 1
+        self.stats.frames_detected += len(frames)
+
+        for frame, detections in zip(frames, batch_detections):
+            if self.motion_gate is not None:
+                self.motion_gate.record(detections)
+            result = DetectionResult(
+                frame_number=frame.frame_number,
+                timestamp_seconds=frame.timestamp_seconds,
+                detections=scale_detections(detections, getattr(frame, "scale", (1.0, 1.0))),
+                skipped=False,
+            )
+            if not self._put(result_queue, result, stop, self.stats.result_queue):
+                return False
+        return True
+
+    def _detect_options(self) -> Dict:
+        """Optional detect_batch() keyword arguments for this pipeline."""
+        options = {}
+        if self.roi is not None:
+            options["roi"] = self.roi
+        if self.tiling is not None:
+            options["tiling"] = self.tiling
+        return options
+
+    @staticmethod
+    def _put(q: queue.Queue, item, stop: threading.Event, stats: QueueStats) -> bool:
+        """Put with periodic stop checks. Returns False if the pipeline was stopped."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                stats.sample(q.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(q: queue.Queue, stats: QueueStats, stop: Optional[threading.Event] = None):
+        """
+        Blocking get that records how long the consumer waited.
+
+        Returns _END if `stop` is set while waiting.
+        """
+        try:
+            return q.get_nowait()
+        except queue.Empty:
+            pass
+
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    if stop is not None and stop.is_set():
+                        return _END
+        finally:
+            stats.wait_seconds += time.perf_counter() - start
+
+    @staticmethod
+    def _drain(q: queue.Queue):
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                return
+
+
+def create_detection_pipeline(
+    detector: PersonDetector,
+    batch_size: int = 8,
+    prefetch_frames: int = 16,
+    motion_gate: Optional[MotionGate] = None,
+    roi: Optional[RegionOfInterest] = None,
+    tiling: Optional[TilingConfig] = None,
+) -> DetectionPipeline:
+    """
+    Factory function to create DetectionPipeline instance.
+
+    Args:
+        detector: PersonDetector used for batch inference
+        batch_size: Frames per detect_batch() call
+        prefetch_frames: Decoded frames buffered ahead of inference
+        motion_gate: Optional motion gate to skip motionless frames
+        roi: Optional camera region of interest
+        tiling: Optional tiled inference config
+
+    Returns:
+        DetectionPipeline instance
+    """
+    return DetectionPipeline(
+        detector=detector,
+        batch_size=batch_size,
+        prefetch_frames=prefetch_frames,
+        motion_gate=motion_gate,
+        roi=roi,
+        tiling=tiling,
+    )
@@ -10,20 +10,88 @@ Key Features:
 - L2-normalized embeddings for cosine similarity
 - PCA-initialized projection (fallback if no pretrained weights)
 - Binary serialization for efficient storage
+- Optional INT8 vision tower (ONNX Runtime) gated on embedding cosine drift
+- Client mode: the vision tower runs on the host's inference server
 """
 import logging
+import os
 import struct
+import tempfile
 import warnings
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
 import numpy as np
 import torch
 import torch.nn as nn
 from transformers import CLIPProcessor, CLIPModel
 from sklearn.decomposition import PCA
 
+from app.cv.inference_backends import DEFAULT_MODEL_CACHE_DIR
+from app.cv.quantization import (
+    QuantizationThresholds,
+    load_calibration_images,
+    quantize_onnx_model,
+    require_gate_pass,
+    validate_precision,
+)
+
 logger = logging.getLogger(__name__)
 
 
+class _VisionTower(nn.Module):
+    """get_image_features() as a module, for ONNX export."""
+
+    def __init__(self, model: CLIPModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.model.get_image_features(pixel_values=pixel_values)
+
+
+def export_clip_vision_onnx(
+    model: CLIPModel,
+    model_name: str,
+    cache_dir: Optional[str] = None,
+) -> str:
+    """
+    Export the CLIP vision tower (pixels -> image features) to ONNX once.
+
+    Args:
+        model: Loaded CLIP model (on CPU)
+        model_name: HuggingFace model name, used for the cache file name
+        cache_dir: Artifact directory (default: CV_MODEL_CACHE_DIR or ~/.cache)
+
+    Returns:
+        Path to the cached .onnx file
+    """
+    cache_path = Path(cache_dir or DEFAULT_MODEL_CACHE_DIR)
+    cache_path.mkdir(parents=True, exist_ok=True)
+
+    onnx_path = cache_path / f"{model_name.replace('/', '--')}_vision.onnx"
+    if onnx_path.exists():
+        return str(onnx_path)
+
+    logger.info(f"Exporting CLIP vision tower to ONNX -> {onnx_path}")
+    image_size = model.config.vision_config.image_size
+
+    with tempfile.TemporaryDirectory(dir=cache_path) as temp_dir:
+        staged = os.path.join(temp_dir, "vision.onnx")
+        torch.onnx.export(
+            _VisionTower(model).eval(),
+            (torch.zeros(1, 3, image_size, image_size),),
+            staged,
+            input_names=["pixel_values"],
+            output_names=["image_features"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_features": {0: "batch"}},
+            opset_version=17,
+            dynamo=False,
+        )
+        os.replace(staged, onnx_path)
+
+    return str(onnx_path)
+
+
 class EmbeddingExtractor:
     """
     Extract visual embeddings using CLIP model.
@@ -46,6 +114,13 @@ class EmbeddingExtractor:
     - Option A (MVP): Use PCA-initialized projection from sample crops
     - Option B (Future): Load pretrained projection from fashion re-ID dataset
       (e.g., DeepFashion2, Market-1501 fine-tuned CLIP)
+
+    INT8 modes ('int8_dynamic', 'int8_static') run the vision tower with ONNX
+    Runtime on CPU. They load only if the quantized artifact has a passing
+    accuracy gate report (see scripts/benchmark_quantization.py).
+
+    Client mode (server_socket) loads only the preprocessor; CLIP features
+    are computed by the local inference server, batched with other workers.
     """
 
     def __init__(
@@ -53,7 +128,13 @@ class EmbeddingExtractor:
         model_name: str = "openai/clip-vit-base-patch32",
         projection_weights_path: Optional[str] = None,
         embedding_dim: Optional[int] = None,
-        device: Optional[str] = None
+        device: Optional[str] = None,
+        precision: str = "fp32",
+        calibration_dir: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        gate_thresholds: Optional[QuantizationThresholds] = None,
+        enforce_gate: bool = True,
+        server_socket: Optional[str] = None
     ):
         """
         Initialize embedding extractor.
@@ -65,24 +146,55 @@ class EmbeddingExtractor:
                           If None, uses raw CLIP features (512D for ViT-B/32)
                           If specified with projection_weights_path, uses projection
             device: Device to run on ("cuda", "cpu", or None for auto-detect)
+            precision: 'fp32', 'int8_dynamic' or 'int8_static' (INT8 runs on CPU)
+            calibration_dir: Folder of sample person crops (required for int8_static)
+            cache_dir: ONNX artifact cache directory
+            gate_thresholds: Configured accuracy thresholds for INT8 modes
+            enforce_gate: Refuse INT8 models without a passing gate report
+                          (disabled only by the quantization benchmark)
+            server_socket: Inference server Unix socket; enables client mode
+                           (no CLIP weights in this process)
+
+        Raises:
+            QuantizationGateError: If an INT8 mode has not passed the accuracy gate
         """
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        validate_precision(precision)
+        self.model_name = model_name
+        self.precision = precision
+        self.onnx_path = None
+        self.session = None
+        self.client = None
+
+        if server_socket:
+            from app.cv.inference_client import InferenceClient
+
+            # Features come back from the server as CPU arrays
+            self.server_device = device
+            self.device = "cpu"
+            self.client = InferenceClient(server_socket)
+            self.model = None
+            logger.info(f"Using CLIP model {model_name} on inference server {server_socket}")
+        else:
+            if precision != "fp32":
+                device = "cpu"
+            self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
 
-        logger.info(f"Loading CLIP model: {model_name} on {self.device}")
+            logger.info(f"Loading CLIP model: {model_name} on {self.device}")
 
-        # Load CLIP model and processor
-        self.model = CLIPModel.from_pretrained(model_name).to(self.device)
-        self.processor = CLIPProcessor.from_pretrained(model_name)
+            # Load CLIP model
+            self.model = CLIPModel.from_pretrained(model_name).to(self.device)
+
+            # Set to evaluation mode
+            self.model.eval()
 
-        # Set to evaluation mode
-        self.model.eval()
+        self.processor = CLIPProcessor.from_pretrained(model_name)
 
         # Get CLIP feature dimension
         # Note: ViT-B/32 outputs 512D from vision model, but get_image_features returns projection output
         # which can be different. We need to check the actual output dimension.
         with torch.no_grad():
             dummy_input = torch.randn(1, 3, 224, 224).to(self.device)
-            dummy_features = self.model.get_image_features(pixel_values=dummy_input)
+            dummy_features = self._image_features({"pixel_values": dummy_input})
             self.clip_dim = dummy_features.shape[-1]
 
         logger.info(f"Detected CLIP feature dimension: {self.clip_dim}D")
@@ -109,6 +221,60 @@ class EmbeddingExtractor:
                 "For dimensionality reduction, provide projection_weights_path or use initialize_projection_pca()."
             )
 
+        # Optional INT8 vision tower (in client mode the server applies precision)
+        if precision != "fp32" and self.client is None:
+            self._load_quantized(model_name, calibration_dir, cache_dir, gate_thresholds, enforce_gate)
+
+    def _load_quantized(
+        self,
+        model_name: str,
+        calibration_dir: Optional[str],
+        cache_dir: Optional[str],
+        gate_thresholds: Optional[QuantizationThresholds],
+        enforce_gate: bool
+    ):
+        """Export, quantize and load the vision tower with ONNX Runtime."""
+        import onnxruntime as ort
+
+        fp32_path = export_clip_vision_onnx(self.model, model_name, cache_dir)
+
+        def calibration_inputs():
+            for crop in load_calibration_images(calibration_dir):
+                inputs = self.processor(images=crop, return_tensors="np")
+                yield {"pixel_values": inputs["pixel_values"].astype(np.float32)}
+
+        self.onnx_path = quantize_onnx_model(
+            fp32_path,
+            self.precision,
+            calibration_inputs=calibration_inputs if self.precision == "int8_static" else None,
+            calibration_dir=calibration_dir,
+            # Transformer compute is in the linear layers
+            op_types_to_quantize=["MatMul", "Gemm"],
+        )
+        if enforce_gate:
+            require_gate_pass(self.onnx_path, gate_thresholds)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            self.onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+        logger.info(f"Using {self.precision} CLIP vision tower: {self.onnx_path}")
+
+    def _image_features(self, inputs: dict) -> torch.Tensor:
+        """CLIP image features for preprocessed inputs (fp32 model, INT8 session or server)."""
+        if self.client is not None:
+            pixel_values = inputs["pixel_values"].cpu().numpy().astype(np.float32)
+            features = self.client.clip_features(
+                pixel_values, self.model_name, self.precision, self.server_device
+            )
+            return torch.from_numpy(features.copy())
+        if self.session is not None:
+            pixel_values = inputs["pixel_values"].cpu().numpy().astype(np.float32)
+            features = self.session.run(None, {"pixel_values": pixel_values})[0]
+            return torch.from_numpy(features).to(self.device)
+        return self.model.get_image_features(**inputs)
+
     def _initialize_projection_xavier(self):
         """
         Initialize projection layer with Xavier uniform distribution.
@@ -150,7 +316,7 @@ class EmbeddingExtractor:
             for crop in sample_crops:
                 inputs = self.processor(images=crop, return_tensors="pt")
                 inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                feat = self.model.get_image_features(**inputs)
+                feat = self._image_features(inputs)
                 features.append(feat.cpu().numpy().squeeze())
 
         features = np.vstack(features)  # (N, clip_dim)
@@ -203,7 +369,7 @@ class EmbeddingExtractor:
             # Extract features
             with torch.no_grad():
                 # Get CLIP visual features
-                features = self.model.get_image_features(**inputs)
+                features = self._image_features(inputs)
 
                 # Apply projection if enabled
                 if self.use_projection:
@@ -227,14 +393,15 @@ class EmbeddingExtractor:
             logger.error(f"Embedding extraction failed: {e}")
             raise ValueError(f"Failed to extract embedding: {e}")
 
-    def extract_batch(self, images: np.ndarray) -> np.ndarray:
+    def extract_batch(self, images: Union[np.ndarray, Sequence[np.ndarray]]) -> np.ndarray:
         """
         Extract embeddings for batch of person crops.
 
         More efficient than calling extract() individually due to batched processing.
 
         Args:
-            images: Batch of RGB images (N, H, W, 3)
+            images: Batch of RGB images (N, H, W, 3), or a list of crops of
+                    different sizes (the CLIP processor resizes each one)
 
         Returns:
             Batch of L2-normalized embeddings (N, embedding_dim)
@@ -252,7 +419,7 @@ class EmbeddingExtractor:
             # Extract features
             with torch.no_grad():
                 # Get CLIP visual features (N, 512)
-                features = self.model.get_image_features(**inputs)
+                features = self._image_features(inputs)
 
                 # Apply projection if enabled
                 if self.use_projection:
@@ -366,7 +533,10 @@ class EmbeddingExtractor:
 
 def create_embedding_extractor(
     model_name: str = "openai/clip-vit-base-patch32",
-    projection_weights_path: Optional[str] = None
+    projection_weights_path: Optional[str] = None,
+    precision: str = "fp32",
+    calibration_dir: Optional[str] = None,
+    server_socket: Optional[str] = None
 ) -> EmbeddingExtractor:
     """
     Factory function to create embedding extractor.
@@ -374,11 +544,17 @@ def create_embedding_extractor(
     Args:
         model_name: HuggingFace model name for CLIP
         projection_weights_path: Path to pretrained projection weights (optional)
+        precision: 'fp32', 'int8_dynamic' or 'int8_static'
+        calibration_dir: Sample person crops for int8_static calibration
+        server_socket: Inference server Unix socket (client mode)
 
     Returns:
         EmbeddingExtractor instance
     """
     return EmbeddingExtractor(
         model_name=model_name,
-        projection_weights_path=projection_weights_path
+        projection_weights_path=projection_weights_path,
+        precision=precision,
+        calibration_dir=calibration_dir,
+        server_socket=server_socket
     )
@@ -14,7 +14,8 @@ from dataclasses import dataclass, asdict
 from app.cv.garment_segmenter import GarmentSegmenter, GarmentRegions, create_segmenter
 from app.cv.color_extractor import ColorExtractor, ColorDescriptor, create_color_extractor
 from app.cv.garment_type_classifier import GarmentTypeClassifier, create_type_classifier
-from app.cv.embedding_extractor import EmbeddingExtractor, create_embedding_extractor
+from app.cv.embedding_extractor import EmbeddingExtractor
+from app.cv.model_registry import get_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -48,21 +49,24 @@ class OutfitDescriptor:
                 "color": self.top.color,
                 "lab": list(self.top.lab),
                 "histogram": self.top.histogram,
-                "confidence": self.top.confidence
+                "confidence": self.top.confidence,
+                "region_quality": self.top.region_quality
             },
             "bottom": {
                 "type": self.bottom.type,
                 "color": self.bottom.color,
                 "lab": list(self.bottom.lab),
                 "histogram": self.bottom.histogram,
-                "confidence": self.bottom.confidence
+                "confidence": self.bottom.confidence,
+                "region_quality": self.bottom.region_quality
             },
             "shoes": {
                 "type": self.shoes.type,
                 "color": self.shoes.color,
                 "lab": list(self.shoes.lab),
                 "histogram": self.shoes.histogram,
-                "confidence": self.shoes.confidence
+                "confidence": self.shoes.confidence,
+                "region_quality": self.shoes.region_quality
             },
             "overall_quality": self.overall_quality,
             "segmentation_method": self.segmentation_method
@@ -74,6 +78,29 @@ class OutfitDescriptor:
 
         return result
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "OutfitDescriptor":
+        """Rebuild an outfit descriptor from to_dict() output."""
+        def garment(values: Dict) -> GarmentDescriptor:
+            return GarmentDescriptor(
+                type=values["type"],
+                color=values["color"],
+                lab=tuple(values.get("lab", (0.0, 0.0, 0.0))),
+                histogram=values.get("histogram", []),
+                confidence=values.get("confidence", 0.0),
+                region_quality=values.get("region_quality", 0.0),
+            )
+
+        embedding = data.get("visual_embedding")
+        return cls(
+            top=garment(data["top"]),
+            bottom=garment(data["bottom"]),
+            shoes=garment(data["shoes"]),
+            overall_quality=data.get("overall_quality", 0.0),
+            segmentation_method=data.get("segmentation_method", "thirds"),
+            visual_embedding=np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+        )
+
 
 class GarmentAnalyzer:
     """
@@ -133,13 +160,17 @@ class GarmentAnalyzer:
         Only initializes CLIP model when first accessed and extract_embeddings=True.
         This prevents unnecessary model loading in restricted/no-network environments
         and reduces memory usage in Celery workers.
+
+        The default extractor comes from the process-wide model registry, so all
+        analyzers in a worker (and, when preloaded, all prefork children) share
+        one CLIP model.
         """
         if not self.extract_embeddings:
             return None
 
         if not self._embedding_extractor_initialized:
-            logger.info("Initializing embedding extractor (lazy load)")
-            self._embedding_extractor_instance = create_embedding_extractor()
+            logger.info("Initializing embedding extractor (lazy load, shared)")
+            self._embedding_extractor_instance = get_model_registry().get_embedding_extractor()
             self._embedding_extractor_initialized = True
 
         return self._embedding_extractor_instance
@@ -173,7 +204,27 @@ class GarmentAnalyzer:
             logger.error(f"Color extraction failed: {e}")
             raise ValueError(f"Failed to extract colors: {e}")
 
-        # Step 3: Classify garment types and create descriptors
+        # Step 3: Extract visual embedding (Phase 3.3)
+        visual_embedding = None
+        if self.extract_embeddings and self.embedding_extractor:
+            try:
+                visual_embedding = self.embedding_extractor.extract(person_crop)
+            except Exception as e:
+                logger.warning(f"Embedding extraction failed: {e}. Continuing without embedding.")
+                visual_embedding = None
+
+        # Step 4: Classify garment types and build the descriptor
+        return self._describe(regions, top_color, bottom_color, shoes_color, visual_embedding)
+
+    def _describe(
+        self,
+        regions: GarmentRegions,
+        top_color: ColorDescriptor,
+        bottom_color: ColorDescriptor,
+        shoes_color: ColorDescriptor,
+        visual_embedding: Optional[np.ndarray]
+    ) -> OutfitDescriptor:
+        """Classify garment types and assemble the outfit descriptor of one crop."""
         # Use heuristic-based type classifier (Phase 3.2)
         top_h, top_w = regions.top.shape[:2]
         top_aspect = top_w / max(top_h, 1)
@@ -227,16 +278,7 @@ class GarmentAnalyzer:
             region_quality=regions.quality_score
         )
 
-        # Step 4: Extract visual embedding (Phase 3.3)
-        visual_embedding = None
-        if self.extract_embeddings and self.embedding_extractor:
-            try:
-                visual_embedding = self.embedding_extractor.extract(person_crop)
-            except Exception as e:
-                logger.warning(f"Embedding extraction failed: {e}. Continuing without embedding.")
-                visual_embedding = None
-
-        # Step 5: Calculate overall quality
+        # Calculate overall quality
         overall_quality = self._calculate_overall_quality(
             regions, top_color, bottom_color, shoes_color
         )
@@ -294,21 +336,59 @@ class GarmentAnalyzer:
         """
         Analyze multiple person crops in batch.
 
+        Runs one color extraction pass over the garment regions of all crops
+        and one CLIP forward pass (EmbeddingExtractor.extract_batch) for all
+        embeddings, so the cost per crop falls with the batch size. Results
+        match analyze() on each crop.
+
         Args:
             person_crops: List of RGB person crop images
 
         Returns:
             List of OutfitDescriptor (None for failed analyses)
         """
-        results = []
+        results: List[Optional[OutfitDescriptor]] = [None] * len(person_crops)
 
+        # Step 1: Segment every crop (thirds: views into the crops)
+        segmented = []
         for i, crop in enumerate(person_crops):
             try:
-                descriptor = self.analyze(crop)
-                results.append(descriptor)
+                segmented.append((i, self.segmenter.segment(crop)))
+            except Exception as e:
+                logger.warning(f"Failed to analyze crop {i}: {e}")
+        if not segmented:
+            return results
+
+        # Step 2: One color pass over all top/bottom/shoes regions
+        colors = self.color_extractor.extract_batch([
+            region
+            for _, regions in segmented
+            for region in (regions.top, regions.bottom, regions.shoes)
+        ])
+        analyzed = []
+        for k, (i, regions) in enumerate(segmented):
+            crop_colors = colors[3 * k:3 * k + 3]
+            if any(color is None for color in crop_colors):
+                logger.warning(f"Failed to analyze crop {i}: color extraction failed")
+                continue
+            analyzed.append((i, regions, crop_colors))
+
+        # Step 3: One embedding batch for the crops that made it this far
+        embeddings: List[Optional[np.ndarray]] = [None] * len(analyzed)
+        if analyzed and self.extract_embeddings and self.embedding_extractor:
+            try:
+                embeddings = list(self.embedding_extractor.extract_batch(
+                    [person_crops[i] for i, _, _ in analyzed]
+                ))
+            except Exception as e:
+                logger.warning(f"Batch embedding extraction failed: {e}. Continuing without embeddings.")
+
+        # Step 4: Classify garment types and build the descriptors
+        for (i, regions, crop_colors), embedding in zip(analyzed, embeddings):
+            try:
+                results[i] = self._describe(regions, *crop_colors, embedding)
             except Exception as e:
                 logger.warning(f"Failed to analyze crop {i}: {e}")
-                results.append(None)
 
         return results
 
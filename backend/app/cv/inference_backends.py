@@ -0,0 +1,719 @@
+"""
+Person Detector Inference Backends
+
+Pluggable inference backends for PersonDetector:
+- torch: Ultralytics YOLO PyTorch model (default, supports cuda/mps)
+- onnx: ONNX Runtime on an exported copy of the YOLO weights
+- openvino: OpenVINO runtime on the same ONNX artifact (Intel CPUs)
+- remote: client of the host's local inference server (app.cv.inference_server),
+  so worker processes share one dynamically batched model
+
+The ONNX model is exported once per (model, input size) and cached on disk,
+so CPU-only cv_analysis workers skip PyTorch at inference time.
+The ONNX backends can also run an INT8 copy of the model (see
+app.cv.quantization), gated on a passing accuracy report.
+Pre/post-processing (letterbox, confidence filtering, NMS) mirrors Ultralytics
+so every backend returns the same boxes for the same input.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.cv.quantization import (
+    QuantizationThresholds,
+    load_calibration_images,
+    quantize_onnx_model,
+    require_gate_pass,
+    validate_detector_precision,
+)
+
+logger = logging.getLogger(__name__)
+
+# COCO class ID for 'person'
+PERSON_CLASS_ID = 0
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+DEFAULT_MODEL_CACHE_DIR = os.environ.get(
+    "CV_MODEL_CACHE_DIR",
+    str(Path.home() / ".cache" / "spatial_intel" / "models"),
+)
+
+
+def letterbox(
+    image: np.ndarray,
+    new_shape: int = 640,
+    stride: int = 32,
+    auto: bool = True,
+) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Resize and pad image to the network input size, keeping aspect ratio.
+
+    Matches Ultralytics' LetterBox transform (grey 114 padding, centred).
+
+    Args:
+        image: Image (H, W, 3)
+        new_shape: Target size of the longer side
+        stride: Model stride; with auto=True padding is only up to a stride multiple
+        auto: Minimal (rectangular) padding instead of a full square
+
+    Returns:
+        Tuple of (padded image, scale ratio, (pad_w, pad_h))
+    """
+    h, w = image.shape[:2]
+    ratio = min(new_shape / h, new_shape / w)
+    new_unpad_w, new_unpad_h = int(round(w * ratio)), int(round(h * ratio))
+
+    pad_w, pad_h = new_shape - new_unpad_w, new_shape - new_unpad_h
+    if auto:
+        pad_w, pad_h = np.mod(pad_w, stride), np.mod(pad_h, stride)
+    pad_w /= 2
+    pad_h /= 2
+
+    if (w, h) != (new_unpad_w, new_unpad_h):
+        image = cv2.resize(image, (new_unpad_w, new_unpad_h), interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    image = cv2.copyMakeBorder(
+        image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+
+    return image, ratio, (pad_w, pad_h)
+
+
+def box_iou_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of [x1, y1, x2, y2] boxes.
+
+    Args:
+        boxes1: (N, 4) array
+        boxes2: (M, 4) array
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+
+    union = area1[:, None] + area2[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float,
+    max_det: int = 300,
+) -> np.ndarray:
+    """
+    Greedy NMS over [x1, y1, x2, y2] boxes.
+
+    Args:
+        boxes: (N, 4) boxes
+        scores: (N,) confidence scores
+        iou_threshold: Boxes overlapping a kept box above this IoU are dropped
+        max_det: Maximum number of boxes to keep
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+
+    while order.size > 0 and len(keep) < max_det:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1:
+            break
+        ious = box_iou_matrix(boxes[best:best + 1], boxes[order[1:]])[0]
+        order = order[1:][ious <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+def box_overlap_matrix(boxes1: np.ndarray, boxes2: np.ndarray, metric: str = "iou") -> np.ndarray:
+    """
+    Pairwise overlap between two sets of [x1, y1, x2, y2] boxes.
+
+    Args:
+        boxes1: (N, 4) array
+        boxes2: (M, 4) array
+        metric: 'iou' (intersection over union) or 'ios' (intersection over
+                the smaller box, which also matches a box truncated at a
+                tile border against the complete box)
+
+    Returns:
+        (N, M) overlap matrix
+    """
+    if metric == "iou":
+        return box_iou_matrix(boxes1, boxes2)
+    if metric != "ios":
+        raise ValueError(f"Unknown overlap metric '{metric}', expected 'iou' or 'ios'")
+
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+
+    smaller = np.minimum(area1[:, None], area2[None, :])
+    return np.where(smaller > 0, intersection / np.maximum(smaller, 1e-9), 0.0)
+
+
+def batched_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    group_ids: np.ndarray,
+    threshold: float,
+    metric: str = "iou",
+) -> np.ndarray:
+    """
+    Greedy NMS over many independent groups (e.g. frames) in one pass.
+
+    Boxes of different groups are shifted apart so they never overlap, the
+    full overlap matrix is computed once, and suppression walks the
+    precomputed matrix instead of recomputing overlaps per kept box.
+
+    Args:
+        boxes: (N, 4) [x1, y1, x2, y2] boxes
+        scores: (N,) confidence scores
+        group_ids: (N,) integer group per box; boxes only suppress their own group
+        threshold: Boxes overlapping a kept box above this value are dropped
+        metric: 'iou' or 'ios' (see box_overlap_matrix)
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Shift each group to its own region of the plane
+    span = float(boxes[:, :4].max()) + 1.0
+    shifted = boxes[:, :4] + (group_ids.astype(np.float64) * span)[:, None]
+
+    order = np.argsort(-scores, kind="stable")
+    suppresses = np.triu(box_overlap_matrix(shifted[order], shifted[order], metric) > threshold, k=1)
+
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep[i + 1:] &= ~suppresses[i, i + 1:]
+
+    return order[keep]
+
+
+def postprocess_yolo_output(
+    output: np.ndarray,
+    conf_threshold: float,
+    iou_threshold: float,
+    max_det: int = 300,
+) -> np.ndarray:
+    """
+    Decode raw YOLOv8 head output for one image into person boxes.
+
+    Args:
+        output: (4 + num_classes, num_anchors) raw output (cx, cy, w, h, class scores)
+        conf_threshold: Minimum person score
+        iou_threshold: NMS IoU threshold
+        max_det: Maximum detections per image
+
+    Returns:
+        (K, 5) array of [x1, y1, x2, y2, confidence] in network input coordinates
+    """
+    predictions = output.T  # (num_anchors, 4 + num_classes)
+    class_scores = predictions[:, 4:]
+
+    # Like Ultralytics: a box belongs to its best class, then the class filter applies
+    best_class = class_scores.argmax(axis=1)
+    person_scores = class_scores[:, PERSON_CLASS_ID]
+    mask = (best_class == PERSON_CLASS_ID) & (person_scores > conf_threshold)
+    if not mask.any():
+        return np.zeros((0, 5), dtype=np.float32)
+
+    cxcywh = predictions[mask, :4]
+    scores = person_scores[mask]
+    boxes = np.empty_like(cxcywh)
+    boxes[:, :2] = cxcywh[:, :2] - cxcywh[:, 2:] / 2
+    boxes[:, 2:] = cxcywh[:, :2] + cxcywh[:, 2:] / 2
+
+    keep = non_max_suppression(boxes, scores, iou_threshold, max_det=max_det)
+    return np.hstack([boxes[keep], scores[keep, None]]).astype(np.float32)
+
+
+def scale_boxes(
+    boxes: np.ndarray,
+    ratio: float,
+    pad: Tuple[float, float],
+    image_shape: Tuple[int, int],
+) -> np.ndarray:
+    """
+    Map boxes from letterboxed input coordinates back to the original image.
+
+    Args:
+        boxes: (K, 5+) array whose first four columns are [x1, y1, x2, y2]
+        ratio: Letterbox scale ratio
+        pad: Letterbox (pad_w, pad_h)
+        image_shape: Original (height, width)
+
+    Returns:
+        Boxes in original image coordinates (modified copy)
+    """
+    boxes = boxes.copy()
+    pad_w, pad_h = round(pad[0] - 0.1), round(pad[1] - 0.1)
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_w) / ratio
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_h) / ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, image_shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, image_shape[0])
+    return boxes
+
+
+def export_onnx_model(
+    model_name: str = "yolov8n.pt",
+    imgsz: int = 640,
+    cache_dir: Optional[str] = None,
+) -> str:
+    """
+    Export YOLO weights to ONNX once and return the cached artifact path.
+
+    The export is written to a temp file and atomically renamed, so concurrent
+    workers racing on a cold cache never load a half-written model.
+
+    Args:
+        model_name: Ultralytics weights (e.g. yolov8n.pt)
+        imgsz: Export input size
+        cache_dir: Artifact directory (default: CV_MODEL_CACHE_DIR or ~/.cache)
+
+    Returns:
+        Path to the cached .onnx file
+    """
+    cache_path = Path(cache_dir or DEFAULT_MODEL_CACHE_DIR)
+    cache_path.mkdir(parents=True, exist_ok=True)
+
+    onnx_path = cache_path / f"{Path(model_name).stem}_{imgsz}_dynamic.onnx"
+    if onnx_path.exists():
+        return str(onnx_path)
+
+    from ultralytics import YOLO
+
+    logger.info(f"Exporting {model_name} to ONNX (imgsz={imgsz}) -> {onnx_path}")
+
+    with tempfile.TemporaryDirectory(dir=cache_path) as temp_dir:
+        # Export next to a private copy of the weights so parallel exports don't collide
+        weights = Path(model_name)
+        if weights.exists():
+            local_weights = Path(temp_dir) / weights.name
+            shutil.copy2(weights, local_weights)
+            model = YOLO(str(local_weights))
+        else:
+            model = YOLO(model_name)  # Ultralytics downloads known model names
+
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=True, verbose=False)
+
+        staged = Path(temp_dir) / "model.onnx"
+        shutil.move(str(exported), staged)
+        os.replace(staged, onnx_path)
+
+    logger.info(f"ONNX model cached: {onnx_path}")
+    return str(onnx_path)
+
+
+def _detect_head_nodes(onnx_path: str) -> List[str]:
+    """
+    Box-decoding nodes of the YOLO Detect head, kept in fp32 when quantizing.
+
+    The head's conv branches (cv2/cv3) quantize well, but the DFL softmax,
+    anchor arithmetic and final concat lose most of the box accuracy in INT8.
+    """
+    import onnx
+
+    graph = onnx.load(onnx_path, load_external_data=False).graph
+    output_name = graph.output[0].name
+    producer = next(n.name for n in graph.node if output_name in n.output)
+    head_prefix = producer.rsplit("/", 1)[0] + "/"  # e.g. '/model.22/'
+
+    return [
+        n.name for n in graph.node
+        if n.name.startswith(head_prefix) and "/cv2." not in n.name and "/cv3." not in n.name
+    ]
+
+
+def quantize_detector_model(
+    fp32_path: str,
+    precision: str,
+    imgsz: int = 640,
+    calibration_dir: Optional[str] = None,
+    max_calibration_images: int = 100,
+) -> str:
+    """
+    Quantize the exported YOLO ONNX model and return the cached artifact path.
+
+    Args:
+        fp32_path: Exported fp32 ONNX model
+        precision: 'fp32' or 'int8_static'
+        imgsz: Network input size used for calibration letterboxing
+        calibration_dir: Folder of sample frames (required for int8_static)
+        max_calibration_images: Calibration frames to use
+
+    Returns:
+        Path to the model for this precision
+
+    Raises:
+        ValueError: For int8_dynamic (see validate_detector_precision)
+    """
+    validate_detector_precision(precision)
+    if precision == "fp32":
+        return fp32_path
+
+    def calibration_inputs():
+        for image in load_calibration_images(calibration_dir, limit=max_calibration_images):
+            letterboxed, _, _ = letterbox(image, imgsz, auto=False)
+            batch = letterboxed[None, ..., ::-1].transpose(0, 3, 1, 2)
+            yield {"images": np.ascontiguousarray(batch, dtype=np.float32) / 255.0}
+
+    return quantize_onnx_model(
+        fp32_path,
+        precision,
+        calibration_inputs=calibration_inputs,
+        calibration_dir=calibration_dir,
+        nodes_to_exclude=_detect_head_nodes(fp32_path),
+    )
+
+
+class DetectionBackend:
+    """
+    Base class for person detection inference backends.
+
+    Subclasses implement predict(), returning for each frame an (K, 5) float
+    array of [x1, y1, x2, y2, confidence] in original image coordinates.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        self.model_name = model_name
+        self.device = device
+
+    def predict(
+        self,
+        frames: List[np.ndarray],
+        conf_threshold: float,
+        iou_threshold: float,
+    ) -> List[np.ndarray]:
+        raise NotImplementedError
+
+
+class TorchBackend(DetectionBackend):
+    """Ultralytics YOLO PyTorch model."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        super().__init__(model_name, device)
+
+        from ultralytics import YOLO
+
+        # Load YOLO model (will download on first run)
+        self.model = YOLO(model_name)
+        self.model.to(device)
+
+    def predict(
+        self,
+        frames: List[np.ndarray],
+        conf_threshold: float,
+        iou_threshold: float,
+    ) -> List[np.ndarray]:
+        results = self.model(
+            frames,
+            classes=[PERSON_CLASS_ID],  # Only detect persons
+            conf=conf_threshold,
+            iou=iou_threshold,
+            device=self.device,
+            verbose=False,  # Suppress YOLO logging
+        )
+
+        outputs = []
+        for result in results:
+            if result.boxes is None or len(result.boxes) == 0:
+                outputs.append(np.zeros((0, 5), dtype=np.float32))
+                continue
+            xyxy = result.boxes.xyxy.cpu().numpy()
+            conf = result.boxes.conf.cpu().numpy()
+            outputs.append(np.hstack([xyxy, conf[:, None]]).astype(np.float32))
+
+        return outputs
+
+
+class OnnxBackend(DetectionBackend):
+    """YOLO exported to ONNX, run with ONNX Runtime."""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        imgsz: int = 640,
+        cache_dir: Optional[str] = None,
+        num_threads: int = 0,
+        onnx_path: Optional[str] = None,
+        precision: str = "fp32",
+        calibration_dir: Optional[str] = None,
+        gate_thresholds: Optional[QuantizationThresholds] = None,
+        enforce_gate: bool = True,
+    ):
+        """
+        Args:
+            model_name: Ultralytics weights to export
+            device: 'cpu' or 'cuda' (CUDA provider used only if installed)
+            imgsz: Network input size
+            cache_dir: ONNX artifact cache directory
+            num_threads: Intra-op threads (0 = runtime default)
+            onnx_path: Use this ONNX file instead of exporting model_name
+            precision: 'fp32' or 'int8_static'
+            calibration_dir: Sample frames for int8_static calibration
+            gate_thresholds: Configured accuracy thresholds for INT8 modes
+            enforce_gate: Refuse INT8 models without a passing gate report
+                          (disabled only by the quantization benchmark)
+
+        Raises:
+            QuantizationGateError: If an INT8 mode has not passed the accuracy gate
+        """
+        super().__init__(model_name, device)
+        validate_detector_precision(precision)
+        self.imgsz = imgsz
+        self.precision = precision
+
+        fp32_path = onnx_path or export_onnx_model(model_name, imgsz, cache_dir)
+        self.onnx_path = quantize_detector_model(fp32_path, precision, imgsz, calibration_dir)
+        if precision != "fp32" and enforce_gate:
+            require_gate_pass(self.onnx_path, gate_thresholds)
+
+        self._load(num_threads)
+
+    def _load(self, num_threads: int):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError(
+                "onnxruntime is not installed. Install with: pip install onnxruntime"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+
+        providers = ["CPUExecutionProvider"]
+        if self.device == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.session = ort.InferenceSession(self.onnx_path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        logger.info(f"ONNX Runtime session ready: {self.onnx_path} ({providers[0]})")
+
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def _preprocess(
+        self, frames: List[np.ndarray]
+    ) -> Tuple[np.ndarray, List[Tuple[float, Tuple[float, float]]]]:
+        """Letterbox frames into one NCHW float32 batch."""
+        # Rectangular (minimal) padding only works when the batch shares one shape
+        same_shape = all(f.shape == frames[0].shape for f in frames)
+
+        images, transforms = [], []
+        for frame in frames:
+            image, ratio, pad = letterbox(frame, self.imgsz, auto=same_shape)
+            images.append(image)
+            transforms.append((ratio, pad))
+
+        batch = np.stack(images)
+        # Ultralytics treats ndarray input as BGR and flips it; mirror that so
+        # every backend sees identical tensors for the same frame.
+        batch = batch[..., ::-1].transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+        return batch, transforms
+
+    def predict(
+        self,
+        frames: List[np.ndarray],
+        conf_threshold: float,
+        iou_threshold: float,
+    ) -> List[np.ndarray]:
+        if not frames:
+            return []
+
+        batch, transforms = self._preprocess(frames)
+        raw = self._infer(batch)
+
+        outputs = []
+        for frame, output, (ratio, pad) in zip(frames, raw, transforms):
+            boxes = postprocess_yolo_output(output, conf_threshold, iou_threshold)
+            outputs.append(scale_boxes(boxes, ratio, pad, frame.shape[:2]))
+        return outputs
+
+
+class OpenVINOBackend(OnnxBackend):
+    """YOLO ONNX artifact compiled with OpenVINO (fastest on Intel CPUs)."""
+
+    name = "openvino"
+
+    def _load(self, num_threads: int):
+        try:
+            import openvino as ov
+        except ImportError:
+            raise RuntimeError("OpenVINO is not installed. Install with: pip install openvino")
+
+        core = ov.Core()
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if num_threads > 0:
+            config["INFERENCE_NUM_THREADS"] = num_threads
+
+        self.compiled_model = core.compile_model(core.read_model(self.onnx_path), "CPU", config)
+        self.output_port = self.compiled_model.output(0)
+        logger.info(f"OpenVINO model compiled: {self.onnx_path}")
+
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        return self.compiled_model([batch])[self.output_port]
+
+
+class RemoteBackend(DetectionBackend):
+    """Detection on the local inference server (no model loaded in this process)."""
+
+    name = "remote"
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        socket_path: Optional[str] = None,
+        server_backend: str = "auto",
+        precision: str = "fp32",
+        timeout: float = 120.0,
+        **kwargs,
+    ):
+        """
+        Initialize remote backend.
+
+        Args:
+            model_name: Weights the server should use
+            device: Device on the server
+            socket_path: Inference server Unix socket
+            server_backend: Backend the server runs ('torch', 'onnx', 'openvino', 'auto')
+            precision: Precision on the server
+            timeout: Per-request timeout in seconds
+            **kwargs: Ignored (local-only backend options)
+        """
+        super().__init__(model_name, device)
+        if not socket_path:
+            raise ValueError("Remote backend needs socket_path")
+
+        from app.cv.inference_client import InferenceClient
+
+        self.server_backend = server_backend
+        self.precision = precision
+        self.client = InferenceClient(socket_path, timeout=timeout)
+
+    def predict(
+        self,
+        frames: List[np.ndarray],
+        conf_threshold: float,
+        iou_threshold: float,
+    ) -> List[np.ndarray]:
+        return self.client.detect(
+            frames,
+            conf_threshold,
+            iou_threshold,
+            model=self.model_name,
+            backend=self.server_backend,
+            device=self.device,
+            precision=self.precision,
+        )
+
+
+def available_backends() -> List[str]:
+    """Return the backends whose runtime is importable in this environment."""
+    import importlib.util
+
+    available = ["torch"]
+    if importlib.util.find_spec("onnxruntime") is not None:
+        available.append("onnx")
+    if importlib.util.find_spec("openvino") is not None:
+        available.append("openvino")
+    return available
+
+
+def resolve_backend(backend: str, device: str, precision: str = "fp32") -> str:
+    """
+    Resolve 'auto' to a concrete backend.
+
+    GPU devices keep the PyTorch path; on CPU prefer OpenVINO, then ONNX Runtime.
+    INT8 precisions always resolve to an ONNX-based backend.
+    'remote' is kept as is (the server resolves its own backend).
+    """
+    validate_detector_precision(precision)
+
+    if backend == "remote":
+        return backend
+    if backend != "auto":
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS} or 'auto'")
+        if backend == "torch" and precision != "fp32":
+            raise ValueError(f"Precision '{precision}' requires the onnx or openvino backend")
+        return backend
+
+    if device != "cpu" and precision == "fp32":
+        return "torch"
+
+    available = available_backends()
+    for candidate in ("openvino", "onnx"):
+        if candidate in available:
+            return candidate
+    if precision != "fp32":
+        raise RuntimeError(f"Precision '{precision}' requires onnxruntime or openvino")
+    return "torch"
+
+
+def create_backend(
+    backend: str,
+    model_name: str = "yolov8n.pt",
+    device: str = "cpu",
+    **kwargs,
+) -> DetectionBackend:
+    """
+    Factory function to create an inference backend.
+
+    Args:
+        backend: 'torch', 'onnx', 'openvino', 'remote' or 'auto'
+        model_name: Ultralytics weights
+        device: Resolved device ('cpu', 'cuda', 'mps')
+        **kwargs: Backend options (imgsz, cache_dir, num_threads, onnx_path,
+                  precision, calibration_dir, gate_thresholds, enforce_gate;
+                  socket_path, server_backend and timeout for 'remote')
+
+    Returns:
+        DetectionBackend instance
+    """
+    backend = resolve_backend(backend, device, kwargs.get("precision", "fp32"))
+
+    if backend == "torch":
+        return TorchBackend(model_name, device)
+    if backend == "remote":
+        return RemoteBackend(model_name, device, **kwargs)
+    if backend == "onnx":
+        return OnnxBackend(model_name, device, **kwargs)
+    return OpenVINOBackend(model_name, device, **kwargs)
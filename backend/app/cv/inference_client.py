@@ -0,0 +1,224 @@
+"""
+Inference Client
+
+Client side of the local inference server (app.cv.inference_server).
+
+Celery worker processes on a host send frames and preprocessed crops to
+one shared inference process over a Unix domain socket instead of each
+loading YOLO/CLIP and running them at batch size 1.
+
+Wire format (both directions):
+- 8-byte header: header length, payload length (network byte order, uint32)
+- JSON header: operation and parameters, plus shape/dtype of each array
+- Payload: the arrays' raw bytes, back to back (no pickling)
+"""
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = struct.Struct("!II")
+
+
+class InferenceServerError(RuntimeError):
+    """The inference server could not be reached or failed a request."""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Connection closed by peer")
+        received += count
+    return buffer
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], arrays: Sequence[np.ndarray] = ()) -> None:
+    """
+    Send a header and arrays as one framed message.
+
+    Args:
+        sock: Connected stream socket
+        header: JSON-serializable header
+        arrays: Arrays to send after the header
+    """
+    arrays = [np.ascontiguousarray(a) for a in arrays]
+    header = dict(header, arrays=[{"shape": list(a.shape), "dtype": a.dtype.str} for a in arrays])
+    header_bytes = json.dumps(header).encode("utf-8")
+    payload_size = sum(a.nbytes for a in arrays)
+
+    sock.sendall(_PREFIX.pack(len(header_bytes), payload_size) + header_bytes)
+    for array in arrays:
+        if array.nbytes:
+            sock.sendall(memoryview(array).cast("B"))
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+    """
+    Receive one framed message.
+
+    Returns:
+        Tuple of (header, arrays)
+
+    Raises:
+        ConnectionError: If the peer closed the connection
+    """
+    header_size, payload_size = _PREFIX.unpack(bytes(_recv_exact(sock, _PREFIX.size)))
+    header = json.loads(bytes(_recv_exact(sock, header_size)).decode("utf-8"))
+    payload = _recv_exact(sock, payload_size)
+
+    arrays = []
+    offset = 0
+    for spec in header.pop("arrays", []):
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays.append(
+            np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(spec["shape"])
+        )
+        offset += count * dtype.itemsize
+    return header, arrays
+
+
+class InferenceClient:
+    """
+    Client for the local inference server.
+
+    One connection per thread, opened lazily, re-opened once if the server
+    restarted, and never reused across fork (each process connects itself).
+
+    Example:
+        >>> client = InferenceClient("/run/cv/inference.sock")
+        >>> boxes = client.detect(frames, conf_threshold=0.5, iou_threshold=0.45)
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 120.0):
+        """
+        Initialize client.
+
+        Args:
+            socket_path: Unix socket the server listens on
+            timeout: Per-request socket timeout in seconds
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None and self._local.pid != os.getpid():
+            sock = None  # Inherited from the parent; leave its stream alone
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise InferenceServerError(f"Cannot reach inference server at {self.socket_path}: {e}")
+            self._local.sock = sock
+            self._local.pid = os.getpid()
+        return sock
+
+    def close(self):
+        """Close this thread's connection."""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            if self._local.pid == os.getpid():
+                sock.close()
+            self._local.sock = None
+
+    def request(
+        self,
+        header: Dict[str, Any],
+        arrays: Sequence[np.ndarray] = (),
+    ) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+        """
+        Send a request and wait for the response.
+
+        Raises:
+            InferenceServerError: If the server is unreachable or the request failed
+        """
+        for attempt in range(2):
+            sock = self._connect()
+            try:
+                send_message(sock, header, arrays)
+                response, response_arrays = recv_message(sock)
+                break
+            except (ConnectionError, BrokenPipeError) as e:
+                self.close()
+                if attempt == 1:
+                    raise InferenceServerError(f"Inference server connection lost: {e}")
+                logger.warning("Inference server connection lost, reconnecting")
+            except socket.timeout:
+                self.close()
+                raise InferenceServerError(f"Inference server timed out after {self.timeout}s")
+
+        if not response.get("ok", False):
+            raise InferenceServerError(response.get("error", "Inference server request failed"))
+        return response, response_arrays
+
+    def detect(
+        self,
+        frames: Sequence[np.ndarray],
+        conf_threshold: float,
+        iou_threshold: float,
+        model: str = "yolov8n.pt",
+        backend: str = "auto",
+        device: str = "cpu",
+        precision: str = "fp32",
+    ) -> List[np.ndarray]:
+        """
+        Person detection on the server.
+
+        Returns:
+            Per-frame (K, 5) arrays [x1, y1, x2, y2, conf]
+        """
+        if len(frames) == 0:
+            return []
+        _, boxes = self.request(
+            {
+                "op": "detect",
+                "model": model,
+                "backend": backend,
+                "device": device,
+                "precision": precision,
+                "conf": conf_threshold,
+                "iou": iou_threshold,
+            },
+            frames,
+        )
+        return boxes
+
+    def clip_features(
+        self,
+        pixel_values: np.ndarray,
+        model: str,
+        precision: str = "fp32",
+        device: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        CLIP image features for preprocessed pixel values (N, 3, H, W).
+
+        Returns:
+            (N, D) float32 features
+        """
+        _, arrays = self.request(
+            {"op": "clip_features", "model": model, "precision": precision, "device": device},
+            [pixel_values.astype(np.float32, copy=False)],
+        )
+        return arrays[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Server batching and model stats."""
+        response, _ = self.request({"op": "stats"})
+        return response["stats"]
@@ -0,0 +1,338 @@
+"""
+Local Inference Server
+
+One process per host that owns the YOLO/CLIP models and serves all Celery
+worker processes over a Unix domain socket (see app.cv.inference_client).
+
+Features:
+- Dynamic batching: requests from all tasks are collected into batches of
+  up to max_batch_size frames/crops, waiting at most max_latency_ms after
+  the first request of a batch
+- One batcher per model key, so different models never share a batch;
+  detection requests with different confidence thresholds share a batch
+  (inferred at the lowest threshold, then filtered per request)
+- A single tuned thread count for inference instead of N oversubscribed
+  worker processes
+- Models loaded through a ModelRegistry (warm-up included)
+
+Run with scripts/run_inference_server.py; workers use it through
+PersonDetector(backend="remote") and EmbeddingExtractor(server_socket=...).
+"""
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.cv.inference_client import recv_message, send_message
+from app.cv.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchRequest:
+    """One client request waiting in a batcher."""
+    items: List[Any]
+    params: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class DynamicBatcher:
+    """
+    Collect requests into batches bounded by size and latency.
+
+    run_batch receives the list of requests of one batch and returns one
+    result per request.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[BatchRequest]], List[Any]],
+        max_batch_size: int = 32,
+        max_latency_ms: float = 10.0,
+        name: str = "batcher",
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            run_batch: Runs one batch of requests
+            max_batch_size: Maximum items (frames/crops) per batch
+            max_latency_ms: Longest time the first request of a batch waits for more
+            name: Thread name, for logs
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[Optional[BatchRequest]]" = queue.Queue()
+        self._carry: Optional[BatchRequest] = None
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+        self.batches = 0
+        self.items = 0
+        self.requests = 0
+
+    def submit(self, items: List[Any], **params) -> Future:
+        """Queue a request; the future resolves to its result."""
+        request = BatchRequest(items=list(items), params=params)
+        self._queue.put(request)
+        return request.future
+
+    def close(self):
+        """Stop the batching thread after the queued requests."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _next_batch(self) -> Optional[List[BatchRequest]]:
+        """Block for the first request, then gather more until full or out of time."""
+        first = self._carry if self._carry is not None else self._queue.get()
+        self._carry = None
+        if first is None:
+            return None
+
+        batch = [first]
+        size = len(first.items)
+        deadline = first.enqueued + self.max_latency
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=max(remaining, 0.0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            if size + len(request.items) > self.max_batch_size:
+                self._carry = request  # Starts the next batch
+                break
+            batch.append(request)
+            size += len(request.items)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                results = self.run_batch(batch)
+                for request, result in zip(batch, results):
+                    request.future.set_result(result)
+            except Exception as e:
+                logger.exception(f"{self.name}: batch failed")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.items += sum(len(r.items) for r in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+class InferenceServer:
+    """
+    Dynamic-batching inference service on a Unix socket.
+
+    Example:
+        >>> server = InferenceServer("/run/cv/inference.sock", max_batch_size=32, num_threads=8)
+        >>> server.serve_forever()
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        max_batch_size: int = 32,
+        max_latency_ms: float = 10.0,
+        num_threads: int = 0,
+        registry: Optional[ModelRegistry] = None,
+        backend_options: Optional[Dict[str, Any]] = None,
+        embedding_options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize server.
+
+        Args:
+            socket_path: Unix socket path to listen on (replaced if stale)
+            max_batch_size: Maximum frames/crops per inference batch
+            max_latency_ms: Batching latency budget per request
+            num_threads: Intra-op threads for inference (0 = runtime default)
+            registry: Model registry (default: a new one for this server)
+            backend_options: Extra detection backend options (e.g. INT8 calibration)
+            embedding_options: Extra EmbeddingExtractor options
+        """
+        self.socket_path = socket_path
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.num_threads = num_threads
+        self.registry = registry if registry is not None else ModelRegistry()
+        self.backend_options = dict(backend_options or {})
+        self.embedding_options = dict(embedding_options or {})
+
+        if num_threads > 0:
+            import torch
+            torch.set_num_threads(num_threads)
+            self.backend_options.setdefault("num_threads", num_threads)
+
+        self._batchers: Dict[Tuple, DynamicBatcher] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def _batcher(self, key: Tuple, run_batch: Callable[[List[BatchRequest]], List[Any]]) -> DynamicBatcher:
+        with self._lock:
+            batcher = self._batchers.get(key)
+            if batcher is None:
+                batcher = DynamicBatcher(
+                    run_batch,
+                    max_batch_size=self.max_batch_size,
+                    max_latency_ms=self.max_latency_ms,
+                    name=f"batcher-{key[0]}-{key[1]}",
+                )
+                self._batchers[key] = batcher
+            return batcher
+
+    def detect(self, header: Dict[str, Any], frames: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched person detection for one request."""
+        key = ("detect", header["model"], header["backend"], header["device"], header["precision"], header["iou"])
+        backend = self.registry.get_detection_backend(
+            header["model"],
+            header["device"],
+            header["backend"],
+            header["precision"],
+            self.backend_options,
+        )
+
+        def run_batch(batch: List[BatchRequest]) -> List[List[np.ndarray]]:
+            # One pass at the lowest threshold; NMS never lets a box below a
+            # request's threshold suppress one above it, so filtering is exact
+            conf = min(r.params["conf"] for r in batch)
+            outputs = backend.predict([f for r in batch for f in r.items], conf, header["iou"])
+
+            results, start = [], 0
+            for request in batch:
+                boxes = outputs[start:start + len(request.items)]
+                start += len(request.items)
+                results.append([b[b[:, 4] >= request.params["conf"]] for b in boxes])
+            return results
+
+        return self._batcher(key, run_batch).submit(frames, conf=header["conf"]).result()
+
+    def clip_features(self, header: Dict[str, Any], pixel_values: np.ndarray) -> np.ndarray:
+        """Batched CLIP image features for one request."""
+        import torch
+
+        key = ("clip_features", header["model"], header["precision"], header.get("device"))
+        extractor = self.registry.get_embedding_extractor(
+            header["model"], header.get("device"), header["precision"], **self.embedding_options
+        )
+
+        def run_batch(batch: List[BatchRequest]) -> List[np.ndarray]:
+            stacked = torch.from_numpy(np.stack([x for r in batch for x in r.items])).to(extractor.device)
+            with torch.no_grad():
+                features = extractor._image_features({"pixel_values": stacked}).cpu().numpy()
+
+            results, start = [], 0
+            for request in batch:
+                results.append(features[start:start + len(request.items)])
+                start += len(request.items)
+            return results
+
+        return self._batcher(key, run_batch).submit(list(pixel_values)).result()
+
+    def handle(self, header: Dict[str, Any], arrays: List[np.ndarray]) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+        """Dispatch one request."""
+        op = header.get("op")
+        if op == "detect":
+            return {"ok": True}, self.detect(header, arrays)
+        if op == "clip_features":
+            return {"ok": True}, [self.clip_features(header, arrays[0])]
+        if op == "stats":
+            return {"ok": True, "stats": self.stats()}, []
+        return {"ok": False, "error": f"Unknown operation '{op}'"}, []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batchers = {"/".join(str(k) for k in key): b.stats() for key, b in self._batchers.items()}
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_latency_ms": self.max_latency_ms,
+            "num_threads": self.num_threads,
+            "batchers": batchers,
+            "registry": self.registry.stats(),
+        }
+
+    def start(self):
+        """Bind the socket (removing a stale one) without serving yet."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        header, arrays = recv_message(self.request)
+                    except (ConnectionError, OSError):
+                        return
+                    try:
+                        response, response_arrays = server.handle(header, arrays)
+                    except Exception as e:
+                        logger.exception("Inference request failed")
+                        response, response_arrays = {"ok": False, "error": f"{type(e).__name__}: {e}"}, []
+                    try:
+                        send_message(self.request, response, response_arrays)
+                    except OSError:
+                        return
+
+        class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self._server = ThreadingUnixServer(self.socket_path, Handler)
+        logger.info(
+            f"Inference server listening on {self.socket_path} "
+            f"(max_batch_size={self.max_batch_size}, max_latency_ms={self.max_latency_ms}, "
+            f"num_threads={self.num_threads or 'default'})"
+        )
+
+    def serve_forever(self):
+        """Serve requests until shutdown()."""
+        if self._server is None:
+            self.start()
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop serving and remove the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            for batcher in self._batchers.values():
+                batcher.close()
+            self._batchers.clear()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
@@ -0,0 +1,315 @@
+"""
+Quality-Driven Keyframe Selection
+
+Chooses which person crops of a track go through garment analysis and CLIP.
+Instead of a fixed interval (first frame, then every 3rd), every crop is
+scored cheaply and only the best N of each track's sliding window of frames
+are analyzed, so occluded, blurred, truncated or tiny crops are skipped.
+
+Crop score (0-1, weighted mean of):
+- Size: visible box height
+- Aspect ratio: closeness of the visible box's w/h to a standing person
+- Truncation: visible fraction of the box, halved when it touches the frame edge
+- Occlusion: 1 - largest fraction of the box covered by another person's box
+- Sharpness: variance of the Laplacian of the (downscaled) grey crop
+
+Crops lower than min_height or less than min_visible inside the frame score
+0. The geometric terms are computed for all tracks of a frame at once; the
+Laplacian only for crops that can still make their window's top N.
+"""
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.cv.byte_tracker import Track
+
+# Tie-breaker for candidates with equal scores (the earlier crop wins)
+_candidate_order = itertools.count()
+
+
+@dataclass
+class CropQualityConfig:
+    """Crop scoring parameters."""
+    min_height: float = 48.0  # Crops lower than this score 0
+    min_visible: float = 0.5  # Crops with less of their box inside the frame score 0
+    target_height: float = 160.0  # Size score saturates at this height
+    ideal_aspect: float = 0.4  # w/h of a standing person
+    max_aspect_ratio_off: float = 2.5  # Factor off ideal_aspect at which the aspect score reaches 0
+    edge_margin: float = 2.0  # Boxes within this many pixels of the border count as truncated
+    sharpness_height: int = 64  # Crops are downscaled to this height before the Laplacian
+    sharpness_norm: float = 100.0  # Laplacian variance scored 1.0
+    size_weight: float = 0.25
+    aspect_weight: float = 0.1
+    truncation_weight: float = 0.2
+    occlusion_weight: float = 0.2
+    sharpness_weight: float = 0.25
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(self.__dict__)
+
+
+class CropQualityScorer:
+    """Cheap per-crop quality score for keyframe selection."""
+
+    def __init__(self, config: Optional[CropQualityConfig] = None):
+        self.config = config or CropQualityConfig()
+        c = self.config
+        self._total_weight = (
+            c.size_weight + c.aspect_weight + c.truncation_weight + c.occlusion_weight + c.sharpness_weight
+        )
+
+    def geometry_scores(self, boxes: np.ndarray, frame_shape: Tuple[int, ...]) -> Dict[str, np.ndarray]:
+        """
+        Size, aspect, truncation and occlusion scores of all boxes in a frame.
+
+        Args:
+            boxes: (N, 4) boxes [x1, y1, x2, y2]
+            frame_shape: Frame shape (H, W, ...)
+
+        Returns:
+            Dict of (N,) arrays: "size", "aspect", "truncation", "occlusion",
+            and "usable" (False for crops that score 0)
+        """
+        c = self.config
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        height, width = frame_shape[:2]
+        area = np.maximum(boxes[:, 2] - boxes[:, 0], 0.0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0.0)
+
+        # Size and aspect of the part inside the frame (what the crop holds)
+        clipped = np.stack([
+            np.clip(boxes[:, 0], 0, width), np.clip(boxes[:, 1], 0, height),
+            np.clip(boxes[:, 2], 0, width), np.clip(boxes[:, 3], 0, height),
+        ], axis=1)
+        visible_w = clipped[:, 2] - clipped[:, 0]
+        visible_h = clipped[:, 3] - clipped[:, 1]
+        visible = np.divide(visible_w * visible_h, area, out=np.zeros_like(area), where=area > 0)
+
+        size = np.clip((visible_h - c.min_height) / max(c.target_height - c.min_height, 1e-6), 0.0, 1.0)
+
+        aspect = np.divide(visible_w, visible_h, out=np.zeros_like(visible_w), where=visible_h > 0)
+        off = np.abs(np.log(np.maximum(aspect, 1e-6) / c.ideal_aspect))
+        aspect_score = np.clip(1.0 - off / np.log(c.max_aspect_ratio_off), 0.0, 1.0)
+
+        touches = (
+            (boxes[:, 0] <= c.edge_margin) | (boxes[:, 1] <= c.edge_margin)
+            | (boxes[:, 2] >= width - c.edge_margin) | (boxes[:, 3] >= height - c.edge_margin)
+        )
+        truncation = visible * np.where(touches, 0.5, 1.0)
+
+        # Largest share of each box covered by another box
+        inter_w = np.clip(
+            np.minimum(boxes[:, None, 2], boxes[None, :, 2]) - np.maximum(boxes[:, None, 0], boxes[None, :, 0]), 0, None
+        )
+        inter_h = np.clip(
+            np.minimum(boxes[:, None, 3], boxes[None, :, 3]) - np.maximum(boxes[:, None, 1], boxes[None, :, 1]), 0, None
+        )
+        covered = np.divide(inter_w * inter_h, area[:, None], out=np.zeros((len(boxes), len(boxes))), where=area[:, None] > 0)
+        np.fill_diagonal(covered, 0.0)
+        occlusion = 1.0 - (covered.max(axis=1) if len(boxes) > 1 else np.zeros(len(boxes)))
+
+        return {
+            "size": size,
+            "aspect": aspect_score,
+            "truncation": truncation,
+            "occlusion": occlusion,
+            "usable": (visible_h >= c.min_height) & (visible >= c.min_visible),
+        }
+
+    def sharpness(self, crop: np.ndarray) -> float:
+        """Sharpness score (0-1) of an RGB crop: Laplacian variance at a fixed height."""
+        c = self.config
+        if crop.size == 0:
+            return 0.0
+        grey = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY) if crop.ndim == 3 else crop
+        height, width = grey.shape[:2]
+        if height > c.sharpness_height:
+            scale = c.sharpness_height / height
+            grey = cv2.resize(grey, (max(1, round(width * scale)), c.sharpness_height), interpolation=cv2.INTER_AREA)
+        variance = float(cv2.Laplacian(grey, cv2.CV_32F).var())
+        return min(1.0, variance / c.sharpness_norm)
+
+    def combine(self, geometry: Dict[str, np.ndarray], sharpness) -> np.ndarray:
+        """
+        Weighted crop score; 0 for unusable crops (too small or mostly outside the frame).
+
+        Args:
+            geometry: geometry_scores() output (or one entry of each)
+            sharpness: Sharpness score(s) (1.0 for an upper bound)
+        """
+        c = self.config
+        score = (
+            c.size_weight * geometry["size"]
+            + c.aspect_weight * geometry["aspect"]
+            + c.truncation_weight * geometry["truncation"]
+            + c.occlusion_weight * geometry["occlusion"]
+            + c.sharpness_weight * np.asarray(sharpness)
+        ) / self._total_weight
+        return np.where(geometry["usable"], score, 0.0)
+
+    def score(self, frame: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        """Full scores of all boxes in a frame."""
+        geometry = self.geometry_scores(boxes, frame.shape)
+        sharpness = np.array([self.sharpness(crop_box(frame, box)) for box in np.asarray(boxes).reshape(-1, 4)])
+        return self.combine(geometry, sharpness)
+
+
+@dataclass
+class Keyframe:
+    """A selected person crop, due for appearance analysis."""
+    track_id: int
+    crop: np.ndarray
+    frame_id: int
+    timestamp: datetime
+    bbox: np.ndarray
+    score: float
+
+
+class KeyframeSelector:
+    """
+    Picks the best keyframes of each track per sliding window of frames.
+
+    A track's window opens at the first frame it is offered and closes
+    `window` frames later; its best `per_window` crops scoring at least
+    min_score are then returned for analysis. A track's first two keyframes
+    (needed for a tracklet) are taken from the best crops whatever their
+    score, so small or poorly visible people still get a tracklet.
+    Candidates are copies, at most `per_window` per live track.
+    """
+
+    def __init__(
+        self,
+        window: int = 3,
+        per_window: int = 1,
+        min_score: float = 0.0,
+        scorer: Optional[CropQualityScorer] = None,
+    ):
+        """
+        Args:
+            window: Frames per selection window
+            per_window: Keyframes analyzed per window (the budget)
+            min_score: Crops scoring lower (or 0) are not analyzed, unless the
+                       track has fewer than two keyframes
+            scorer: Crop scorer (default CropQualityScorer())
+        """
+        self.window = max(1, window)
+        self.per_window = max(1, per_window)
+        self.min_score = min_score
+        self.scorer = scorer or CropQualityScorer()
+
+        # {track_id: (window start frame, min-heap of (score, -order, Keyframe))}
+        self._windows: Dict[int, Tuple[int, List[Tuple[float, int, Keyframe]]]] = {}
+        self._selected: Dict[int, int] = {}  # Keyframes returned per track
+        self.crops_scored = 0
+        self.sharpness_computed = 0
+
+    def select(
+        self,
+        frame: np.ndarray,
+        tracks: Iterable[Track],
+        frame_id: int,
+        timestamp: datetime,
+    ) -> List[Keyframe]:
+        """
+        Offer the crop of every track in a frame.
+
+        Args:
+            frame: RGB frame
+            tracks: Active tracks of the frame
+            frame_id: Frame number
+            timestamp: Frame timestamp
+
+        Returns:
+            Keyframes of the windows that closed (analyze these)
+        """
+        tracks = list(tracks)
+        selected: List[Keyframe] = []
+        if not tracks:
+            return selected
+
+        # Windows due: close before offering this frame's crop
+        for track in tracks:
+            window = self._windows.get(track.track_id)
+            if window is not None and frame_id - window[0] >= self.window:
+                selected.extend(self._close(track.track_id))
+
+        boxes = np.stack([track.bbox for track in tracks]).astype(np.float64)
+        geometry = self.scorer.geometry_scores(boxes, frame.shape)
+        upper_bounds = self.scorer.combine(geometry, 1.0)
+        self.crops_scored += len(tracks)
+
+        for i, track in enumerate(tracks):
+            crop = crop_box(frame, track.bbox)
+            if crop.size == 0:
+                continue  # Box outside the frame
+            start, heap = self._windows.setdefault(track.track_id, (frame_id, []))
+            worst = heap[0][0] if len(heap) >= self.per_window else -1.0
+            if upper_bounds[i] <= worst:
+                continue  # Cannot make the window's top N, even perfectly sharp
+
+            self.sharpness_computed += 1
+            score = float(self.scorer.combine(
+                {key: values[i] for key, values in geometry.items()}, self.scorer.sharpness(crop)
+            ))
+            if score <= worst:
+                continue
+            # Copy: streamed frames reuse their buffer, so a view would be overwritten
+            keyframe = Keyframe(track.track_id, crop.copy(), frame_id, timestamp, track.bbox.copy(), score)
+            entry = (score, -next(_candidate_order), keyframe)
+            if len(heap) < self.per_window:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+
+        return selected
+
+    def close(self, track_ids: Optional[Iterable[int]] = None, forget: bool = False) -> List[Keyframe]:
+        """
+        Close open windows early (track removed, end of video, snapshot).
+
+        Args:
+            track_ids: Tracks to close (default: all)
+            forget: Also drop the tracks' keyframe counts (tracks that ended)
+
+        Returns:
+            Selected keyframes of the closed windows
+        """
+        track_ids = list(self._windows if track_ids is None else track_ids)
+        selected = [keyframe for track_id in track_ids for keyframe in self._close(track_id)]
+        if forget:
+            for track_id in track_ids:
+                self._selected.pop(track_id, None)
+        return selected
+
+    def reset(self) -> None:
+        """Drop all windows and counts."""
+        self._windows.clear()
+        self._selected.clear()
+
+    def _close(self, track_id: int) -> List[Keyframe]:
+        window = self._windows.pop(track_id, None)
+        if window is None:
+            return []
+        ranked = [keyframe for _, _, keyframe in sorted(window[1], reverse=True)]
+        count = self._selected.get(track_id, 0)
+        selected = [
+            keyframe for rank, keyframe in enumerate(ranked)
+            if (keyframe.score > 0 and keyframe.score >= self.min_score) or count + rank < 2
+        ]
+        if selected:
+            self._selected[track_id] = count + len(selected)
+        return sorted(selected, key=lambda keyframe: keyframe.frame_id)
+
+
+def crop_box(frame: np.ndarray, bbox: np.ndarray) -> np.ndarray:
+    """View of the frame inside a box (clipped to the frame)."""
+    x1, y1, x2, y2 = np.asarray(bbox).astype(int)
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+    if x2 <= x1 or y2 <= y1:
+        return frame[0:0, 0:0]
+    return frame[y1:y2, x1:x2]
@@ -0,0 +1,367 @@
+"""
+Model Registry
+
+Process-wide cache of loaded CV models, so Celery tasks stop reloading YOLO
+and CLIP weights on every call.
+
+Features:
+- Entries keyed by (model, backend, device, precision)
+- Detectors share one loaded backend; each caller gets a lightweight
+  PersonDetector with its own thresholds
+- Warm-up inference once per process (tracked by PID, so forked children
+  warm up again without reloading)
+- Prefork sharing: fork-safe models (PyTorch on CPU) are loaded, but not
+  warmed, in the parent worker before the pool forks (an inference there
+  would start thread pools that do not survive fork), and the heap is frozen
+  (gc.freeze) so children share the weight pages copy-on-write instead of
+  each holding a private copy. Recycled children (worker_max_tasks_per_child)
+  re-fork from the parent and start with the models already mapped.
+- ONNX Runtime/OpenVINO sessions and GPU models are not fork-safe and are
+  loaded in each child (worker_process_init) or lazily on first use
+- With server_socket set, detectors and CLIP become clients of the host's
+  inference server and no weights are loaded in the worker at all
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.cv.inference_backends import DetectionBackend, create_backend, resolve_backend
+from app.cv.person_detector import PersonDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DETECTOR_MODEL = "yolov8n.pt"
+DEFAULT_EMBEDDING_MODEL = "openai/clip-vit-base-patch32"
+
+
+class ModelKey(NamedTuple):
+    """Registry key of one loaded model."""
+    model: str
+    backend: str
+    device: str
+    precision: str
+
+
+@dataclass
+class ModelSpec:
+    """A model to preload at worker start."""
+    kind: str  # 'detector' or 'embedding'
+    model: str
+    backend: str = "torch"
+    device: str = "cpu"
+    precision: str = "fp32"
+    options: Dict[str, Any] = field(default_factory=dict)  # Loader options (backend_options, calibration_dir, ...)
+
+    @property
+    def fork_safe(self) -> bool:
+        """Whether the loaded model can be created before fork and used in children."""
+        return self.backend == "torch" and self.device == "cpu" and self.precision == "fp32"
+
+
+@dataclass
+class _Entry:
+    """A loaded model and its bookkeeping."""
+    value: Any
+    warm_up: Optional[Callable[[Any], None]] = None
+    load_seconds: float = 0.0
+    warmup_seconds: float = 0.0
+    warmed_pid: Optional[int] = None
+    hits: int = 0
+
+
+class ModelRegistry:
+    """
+    Cache of loaded models for one process.
+
+    Example:
+        >>> registry = get_model_registry()
+        >>> detector = registry.get_detector("yolov8n.pt", device="cpu", conf_threshold=0.5)
+        >>> extractor = registry.get_embedding_extractor()
+    """
+
+    def __init__(self, server_socket: Optional[str] = None):
+        """
+        Initialize registry.
+
+        Args:
+            server_socket: Local inference server socket; when set, models are
+                           served remotely (see app.cv.inference_server)
+        """
+        self.server_socket = server_socket
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._lock = threading.RLock()
+        self.misses = 0
+
+    def get_or_load(
+        self,
+        key: ModelKey,
+        loader: Callable[[], Any],
+        warm_up: Optional[Callable[[Any], None]] = None,
+        warm: bool = True,
+    ) -> Any:
+        """
+        Return the cached model for a key, loading and warming it on a miss.
+
+        Args:
+            key: Registry key
+            loader: Builds the model
+            warm_up: Runs one inference on the model (optional)
+            warm: Run the warm-up now (False before fork; warm_up() later)
+
+        Returns:
+            Loaded model
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                start = time.perf_counter()
+                entry = _Entry(value=loader(), warm_up=warm_up)
+                entry.load_seconds = time.perf_counter() - start
+                self._entries[key] = entry
+                logger.info(f"Loaded {key} in {entry.load_seconds:.2f}s")
+            else:
+                entry.hits += 1
+
+            if warm:
+                self._warm_up(key, entry)
+            return entry.value
+
+    def _warm_up(self, key: ModelKey, entry: _Entry):
+        """Run the warm-up inference once per process."""
+        if entry.warm_up is None or entry.warmed_pid == os.getpid():
+            return
+        start = time.perf_counter()
+        try:
+            entry.warm_up(entry.value)
+        except Exception as e:
+            logger.warning(f"Warm-up of {key} failed: {e}")
+        entry.warmup_seconds = time.perf_counter() - start
+        entry.warmed_pid = os.getpid()
+
+    def warm_up(self):
+        """Warm every cached model in the current process (e.g. after fork)."""
+        with self._lock:
+            for key, entry in self._entries.items():
+                self._warm_up(key, entry)
+
+    def get_detection_backend(
+        self,
+        model_name: str = DEFAULT_DETECTOR_MODEL,
+        device: str = "cpu",
+        backend: str = "torch",
+        precision: str = "fp32",
+        backend_options: Optional[Dict] = None,
+        warm: bool = True,
+    ) -> DetectionBackend:
+        """
+        Shared detection backend.
+
+        Args:
+            model_name: Ultralytics weights
+            device: Resolved device ('cpu', 'cuda', 'mps')
+            backend: 'torch', 'onnx', 'openvino' or 'auto'
+            precision: 'fp32' or 'int8_static'
+            backend_options: Extra create_backend() options (only used on a miss)
+            warm: Run the warm-up inference now
+
+        Returns:
+            DetectionBackend instance
+        """
+        options = dict(backend_options or {})
+        if precision != "fp32":
+            options["precision"] = precision
+
+        if self.server_socket and backend != "remote":
+            # The server loads and warms the real backend
+            return self.get_or_load(
+                ModelKey(model_name, "remote", device, precision),
+                lambda: create_backend(
+                    "remote", model_name, device,
+                    socket_path=self.server_socket, server_backend=backend, precision=precision,
+                ),
+            )
+
+        resolved = resolve_backend(backend, device, precision)
+        imgsz = options.get("imgsz", 640)
+
+        def warm_up(loaded: DetectionBackend):
+            loaded.predict([np.zeros((imgsz, imgsz, 3), dtype=np.uint8)], 0.5, 0.45)
+
+        return self.get_or_load(
+            ModelKey(model_name, resolved, device, precision),
+            lambda: create_backend(resolved, model_name, device, **options),
+            warm_up,
+            warm,
+        )
+
+    def get_detector(
+        self,
+        model_name: str = DEFAULT_DETECTOR_MODEL,
+        device: str = "cpu",
+        conf_threshold: float = 0.7,
+        iou_threshold: float = 0.45,
+        backend: str = "torch",
+        backend_options: Optional[Dict] = None,
+        precision: str = "fp32",
+    ) -> PersonDetector:
+        """
+        PersonDetector backed by the shared backend for its key.
+
+        Same arguments as create_detector(); thresholds are per detector.
+        """
+        device = PersonDetector._get_device(device)
+        shared = self.get_detection_backend(model_name, device, backend, precision, backend_options)
+        return PersonDetector.from_backend(
+            shared,
+            model_name=model_name,
+            device=device,
+            conf_threshold=conf_threshold,
+            iou_threshold=iou_threshold,
+            precision=precision,
+        )
+
+    def get_embedding_extractor(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        device: Optional[str] = None,
+        precision: str = "fp32",
+        warm: bool = True,
+        **kwargs,
+    ):
+        """
+        Shared EmbeddingExtractor.
+
+        Args:
+            model_name: HuggingFace CLIP model name
+            device: 'cuda', 'cpu' or None (auto)
+            precision: 'fp32', 'int8_dynamic' or 'int8_static' (INT8 runs on CPU)
+            warm: Run the warm-up inference now
+            **kwargs: Extra EmbeddingExtractor options (only used on a miss)
+
+        Returns:
+            EmbeddingExtractor instance
+        """
+        import torch
+
+        from app.cv.embedding_extractor import EmbeddingExtractor
+
+        if self.server_socket:
+            return self.get_or_load(
+                ModelKey(model_name, "remote", device or "auto", precision),
+                lambda: EmbeddingExtractor(
+                    model_name=model_name, device=device, precision=precision,
+                    server_socket=self.server_socket,
+                ),
+            )
+
+        if precision != "fp32":
+            device = "cpu"
+        device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        backend = "torch" if precision == "fp32" else "onnx"
+
+        def warm_up(loaded: EmbeddingExtractor):
+            loaded.extract(np.zeros((256, 128, 3), dtype=np.uint8))
+
+        return self.get_or_load(
+            ModelKey(model_name, backend, device, precision),
+            lambda: EmbeddingExtractor(model_name=model_name, device=device, precision=precision, **kwargs),
+            warm_up,
+            warm,
+        )
+
+    def preload(
+        self,
+        specs: Iterable[ModelSpec],
+        fork_safe_only: bool = False,
+        warm: bool = True,
+    ) -> List[ModelKey]:
+        """
+        Load (and warm) a list of models, logging failures instead of raising.
+
+        Args:
+            specs: Models to load
+            fork_safe_only: Skip models that must not be created before fork
+            warm: Run warm-up inferences (False in a parent about to fork)
+
+        Returns:
+            Keys of the models now cached
+        """
+        for spec in specs:
+            if fork_safe_only and not spec.fork_safe:
+                continue
+            try:
+                if spec.kind == "detector":
+                    self.get_detection_backend(
+                        spec.model, spec.device, spec.backend, spec.precision,
+                        spec.options.get("backend_options"), warm=warm,
+                    )
+                elif spec.kind == "embedding":
+                    self.get_embedding_extractor(
+                        spec.model, spec.device, spec.precision, warm=warm, **spec.options
+                    )
+                else:
+                    raise ValueError(f"Unknown model kind '{spec.kind}'")
+            except Exception as e:
+                logger.warning(f"Could not preload {spec.kind} {spec.model}: {e}")
+
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        """Drop all cached models."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "misses": self.misses,
+                "models": [
+                    {
+                        **key._asdict(),
+                        "hits": entry.hits,
+                        "load_seconds": round(entry.load_seconds, 3),
+                        "warmup_seconds": round(entry.warmup_seconds, 3),
+                        "warmed": entry.warmed_pid == os.getpid(),
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+
+def freeze_for_fork():
+    """
+    Move every object allocated so far into the GC's permanent generation.
+
+    Call in the parent right before forking: the cyclic GC then never writes
+    to the preloaded models' object headers in the children, which would
+    otherwise copy those pages into each child.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+# Global instance
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
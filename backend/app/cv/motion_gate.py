@@ -0,0 +1,202 @@
+"""
+Motion Gate
+
+Cheap frame-differencing gate in front of the person detector.
+
+Most CCTV footage is static for minutes at a time. The gate compares a
+downscaled, blurred grayscale copy of each frame against a running-average
+background model and lets the caller skip YOLO when nothing moved since the
+last frame that was known to be empty.
+
+Skipping rules:
+- Always detect until the first result is recorded
+- Detect whenever motion is found
+- Detect while the last result had people in it (a person standing still
+  produces no motion but must not disappear)
+- Otherwise skip and carry the last (empty) result forward, but force a
+  detection every max_skip_frames as a safety net
+"""
+import logging
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MotionGateConfig:
+    """Motion gate parameters (stored per CameraPin as JSON)."""
+    enabled: bool = True
+    downscale_width: int = 160  # Width of the grayscale comparison image
+    blur_kernel: int = 5  # Gaussian blur to suppress sensor noise / compression artefacts
+    pixel_threshold: int = 25  # Per-pixel intensity change counted as motion (0-255)
+    min_motion_ratio: float = 0.002  # Fraction of changed pixels that counts as motion
+    background_alpha: float = 0.05  # Background running-average learning rate
+    max_skip_frames: int = 30  # Force a detection after this many consecutive skips
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], **defaults) -> "MotionGateConfig":
+        """
+        Build a config from a (partial) JSON dict, ignoring unknown keys.
+
+        Args:
+            data: Per-pin overrides (None = defaults only)
+            **defaults: Base values applied before the overrides
+        """
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in defaults.items() if k in known}
+        values.update({k: v for k, v in (data or {}).items() if k in known})
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class MotionGate:
+    """
+    Decide per frame whether person detection needs to run.
+
+    The gate is split in two so it can sit in a threaded pipeline:
+    measure_motion() runs in frame order next to decoding, while
+    should_detect()/record() run next to inference.
+
+    Example:
+        >>> gate = MotionGate(MotionGateConfig())
+        >>> for frame in frames:
+        ...     if gate.should_detect(gate.measure_motion(frame)):
+        ...         detections = detector.detect(frame)
+        ...         gate.record(detections)
+        ...     else:
+        ...         detections = []  # Last known result was empty
+    """
+
+    def __init__(self, config: Optional[MotionGateConfig] = None):
+        self.config = config or MotionGateConfig()
+        self.reset()
+
+    def reset(self):
+        """Forget the background model and the last result (e.g. at a new video)."""
+        self._background: Optional[np.ndarray] = None
+        self._last_empty = False
+        self._has_result = False
+        self._consecutive_skips = 0
+
+        self.frames_checked = 0
+        self.frames_with_motion = 0
+        self.frames_skipped = 0
+
+    def _prepare(self, image: np.ndarray) -> np.ndarray:
+        """Downscaled, blurred grayscale float32 copy of a frame."""
+        h, w = image.shape[:2]
+        width = min(self.config.downscale_width, w)
+        height = max(1, int(round(h * width / w)))
+
+        small = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY) if small.ndim == 3 else small
+        if self.config.blur_kernel > 1:
+            kernel = self.config.blur_kernel | 1  # Must be odd
+            gray = cv2.GaussianBlur(gray, (kernel, kernel), 0)
+        return gray.astype(np.float32)
+
+    def measure_motion(self, image: np.ndarray) -> bool:
+        """
+        Compare a frame with the background model and update the model.
+
+        Must be called for every frame, in frame order.
+
+        Args:
+            image: RGB frame (H, W, 3)
+
+        Returns:
+            True if the frame differs from the background
+        """
+        self.frames_checked += 1
+        if not self.config.enabled:
+            return True
+
+        gray = self._prepare(image)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray
+            self.frames_with_motion += 1
+            return True
+
+        changed = np.abs(gray - self._background) > self.config.pixel_threshold
+        motion = float(changed.mean()) >= self.config.min_motion_ratio
+
+        cv2.accumulateWeighted(gray, self._background, self.config.background_alpha)
+
+        if motion:
+            self.frames_with_motion += 1
+        return motion
+
+    def would_skip(self, has_motion: bool) -> bool:
+        """
+        Whether should_detect() would skip this frame now (without deciding).
+
+        Args:
+            has_motion: Result of measure_motion() for this frame
+
+        Returns:
+            True if the frame would reuse the last (empty) result
+        """
+        return (
+            self.config.enabled
+            and not has_motion
+            and self._has_result
+            and self._last_empty
+            and self._consecutive_skips < self.config.max_skip_frames
+        )
+
+    def should_detect(self, has_motion: bool) -> bool:
+        """
+        Decide whether to run detection for a measured frame.
+
+        Must be called in frame order, after record() of every earlier
+        detected frame.
+
+        Args:
+            has_motion: Result of measure_motion() for this frame
+
+        Returns:
+            True to run the detector, False to reuse the last (empty) result
+        """
+        if not self.would_skip(has_motion):
+            self._consecutive_skips = 0
+            return True
+
+        self._consecutive_skips += 1
+        self.frames_skipped += 1
+        return False
+
+    def record(self, detections: List) -> None:
+        """Record the detector output for the latest detected frame."""
+        self._has_result = True
+        self._last_empty = len(detections) == 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.config.enabled,
+            "frames_checked": self.frames_checked,
+            "frames_with_motion": self.frames_with_motion,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_checked, 3)
+            if self.frames_checked else 0.0,
+        }
+
+
+def create_motion_gate(config: Optional[Dict[str, Any]] = None, **defaults) -> MotionGate:
+    """
+    Factory function to create a MotionGate from per-pin JSON config.
+
+    Args:
+        config: CameraPin.motion_gate overrides (None = defaults)
+        **defaults: Base values (e.g. enabled from settings)
+
+    Returns:
+        MotionGate instance
+    """
+    return MotionGate(MotionGateConfig.from_dict(config, **defaults))
@@ -3,14 +3,19 @@ Person Detection Service
 
 Detects people in video frames using YOLOv8 or RT-DETR.
 Optimized for CCTV footage with configurable confidence thresholds.
+Inference runs on a pluggable backend (PyTorch, ONNX Runtime or OpenVINO).
+High-resolution frames can be inferred in overlapping tiles (see app.cv.tiling).
 """
 
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 import torch
-from ultralytics import YOLO
 import logging
 
+from app.cv.inference_backends import DetectionBackend, create_backend
+from app.cv.roi import RegionOfInterest
+from app.cv.tiling import TilingConfig, predict_tiled
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +29,19 @@ class PersonDetector:
     - YOLOv8m (medium) - slower, higher accuracy
 
     For MVP, YOLOv8n is recommended (>30 FPS on CPU, >100 FPS on GPU)
+
+    Backends:
+    - torch: Ultralytics PyTorch model (default)
+    - onnx: ONNX Runtime on a cached ONNX export (CPU workers)
+    - openvino: OpenVINO on the same ONNX export (Intel CPUs)
+    - remote: client mode; the host's inference server runs the model
+      (backend_options: socket_path, server_backend)
+    - auto: OpenVINO > ONNX Runtime > PyTorch on CPU, PyTorch on GPU
+
+    Precision ('fp32', 'int8_static') applies to the ONNX-based backends;
+    int8_static loads only after passing the quantization accuracy gate.
+    int8_dynamic is embedding-only and rejected here (it cannot quantize
+    convolutions).
     """
 
     # COCO class ID for 'person'
@@ -34,7 +52,10 @@ class PersonDetector:
         model_name: str = "yolov8n.pt",
         device: str = "cpu",
         conf_threshold: float = 0.7,
-        iou_threshold: float = 0.45
+        iou_threshold: float = 0.45,
+        backend: str = "torch",
+        backend_options: Optional[Dict] = None,
+        precision: str = "fp32"
     ):
         """
         Initialize person detector
@@ -44,21 +65,76 @@ class PersonDetector:
             device: 'cpu', 'cuda', 'mps' (Mac Metal)
             conf_threshold: Confidence threshold (0.0-1.0)
             iou_threshold: IoU threshold for NMS (Non-Maximum Suppression)
+            backend: Inference backend ('torch', 'onnx', 'openvino', 'auto')
+            backend_options: Extra backend options (imgsz, cache_dir, num_threads, onnx_path,
+                             calibration_dir, gate_thresholds)
+            precision: 'fp32' or 'int8_static' (ONNX-based backends only)
+
+        Raises:
+            QuantizationGateError: If an INT8 mode has not passed the accuracy gate
         """
         self.model_name = model_name
         self.device = self._get_device(device)
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
 
-        logger.info(f"Initializing PersonDetector with {model_name} on {self.device}")
+        self.precision = precision
+
+        logger.info(
+            f"Initializing PersonDetector with {model_name} on {self.device} "
+            f"(backend={backend}, precision={precision})"
+        )
+
+        options = dict(backend_options or {})
+        if precision != "fp32":
+            options["precision"] = precision
+        self.backend: DetectionBackend = create_backend(
+            backend, model_name, self.device, **options
+        )
+        self.backend_name = self.backend.name
+
+        # Underlying Ultralytics model (PyTorch backend only)
+        self.model = getattr(self.backend, "model", None)
 
-        # Load YOLO model (will download on first run)
-        self.model = YOLO(model_name)
-        self.model.to(self.device)
+        logger.info(f"PersonDetector initialized successfully (backend={self.backend_name})")
+
+    @classmethod
+    def from_backend(
+        cls,
+        backend: DetectionBackend,
+        model_name: str = "yolov8n.pt",
+        device: str = "cpu",
+        conf_threshold: float = 0.7,
+        iou_threshold: float = 0.45,
+        precision: str = "fp32"
+    ) -> "PersonDetector":
+        """
+        Wrap an already loaded backend (e.g. shared via the model registry).
 
-        logger.info(f"PersonDetector initialized successfully")
+        Args:
+            backend: Loaded DetectionBackend
+            model_name: Weights the backend was built from
+            device: Device the backend runs on
+            conf_threshold: Confidence threshold (0.0-1.0)
+            iou_threshold: IoU threshold for NMS
+            precision: Precision the backend runs at
 
-    def _get_device(self, requested_device: str) -> str:
+        Returns:
+            PersonDetector instance
+        """
+        detector = cls.__new__(cls)
+        detector.model_name = model_name
+        detector.device = device
+        detector.conf_threshold = conf_threshold
+        detector.iou_threshold = iou_threshold
+        detector.precision = precision
+        detector.backend = backend
+        detector.backend_name = backend.name
+        detector.model = getattr(backend, "model", None)
+        return detector
+
+    @staticmethod
+    def _get_device(requested_device: str) -> str:
         """
         Get available device with fallback
 
@@ -76,7 +152,9 @@ class PersonDetector:
     def detect(
         self,
         frame: np.ndarray,
-        conf_threshold: Optional[float] = None
+        conf_threshold: Optional[float] = None,
+        roi: Optional[RegionOfInterest] = None,
+        tiling: Optional[TilingConfig] = None
     ) -> List[Dict]:
         """
         Detect people in a single frame
@@ -84,6 +162,8 @@ class PersonDetector:
         Args:
             frame: RGB image as numpy array (H, W, 3)
             conf_threshold: Optional override for confidence threshold
+            roi: Optional camera ROI; only its bounding rectangle is inferred
+            tiling: Optional tiled inference config for high-resolution frames
 
         Returns:
             List of detections, each containing:
@@ -93,47 +173,14 @@ class PersonDetector:
                 "class": "person"       # Always "person"
             }
         """
-        conf = conf_threshold if conf_threshold is not None else self.conf_threshold
-
-        # Run inference
-        results = self.model(
-            frame,
-            classes=[self.PERSON_CLASS_ID],  # Only detect persons
-            conf=conf,
-            iou=self.iou_threshold,
-            device=self.device,
-            verbose=False  # Suppress YOLO logging
-        )
-
-        detections = []
-
-        # Extract detections
-        for result in results:
-            if result.boxes is None or len(result.boxes) == 0:
-                continue
-
-            for box in result.boxes:
-                # Get bounding box in xyxy format
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-
-                # Convert to xywh format
-                x, y, w, h = int(x1), int(y1), int(x2 - x1), int(y2 - y1)
-
-                # Get confidence
-                confidence = float(box.conf[0].cpu().numpy())
-
-                detections.append({
-                    "bbox": [x, y, w, h],
-                    "confidence": confidence,
-                    "class": "person"
-                })
-
-        return detections
+        return self.detect_batch([frame], conf_threshold=conf_threshold, roi=roi, tiling=tiling)[0]
 
     def detect_batch(
         self,
         frames: List[np.ndarray],
-        conf_threshold: Optional[float] = None
+        conf_threshold: Optional[float] = None,
+        roi: Optional[RegionOfInterest] = None,
+        tiling: Optional[TilingConfig] = None
     ) -> List[List[Dict]]:
         """
         Detect people in multiple frames (batch inference)
@@ -143,42 +190,67 @@ class PersonDetector:
         Args:
             frames: List of RGB images as numpy arrays
             conf_threshold: Optional override for confidence threshold
+            roi: Optional camera ROI. The detector runs on the ROI crop and
+                 boxes are returned in full-frame coordinates, without
+                 those outside the ROI polygons.
+            tiling: Optional tiled inference config. Each frame (or ROI crop)
+                    is cut into overlapping tiles, the tiles of all frames
+                    are inferred together and duplicates are merged.
 
         Returns:
             List of detection lists (one per frame)
         """
         conf = conf_threshold if conf_threshold is not None else self.conf_threshold
 
-        # Run batch inference
-        results = self.model(
-            frames,
-            classes=[self.PERSON_CLASS_ID],
-            conf=conf,
-            iou=self.iou_threshold,
-            device=self.device,
-            verbose=False
-        )
+        if roi is None:
+            # Run batch inference
+            outputs = self._predict(frames, conf, tiling)
+            return [self._to_detections(boxes) for boxes in outputs]
 
-        all_detections = []
+        # Smaller inputs: only the ROI rectangle goes through the network
+        prepared = [roi.prepare(frame) for frame in frames]
+        outputs = self._predict([image for image, _ in prepared], conf, tiling)
 
-        for result in results:
-            detections = []
+        return [
+            self._to_detections(roi.map_boxes(boxes, offset, frame.shape))
+            for frame, (_, offset), boxes in zip(frames, prepared, outputs)
+        ]
 
-            if result.boxes is not None and len(result.boxes) > 0:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    x, y, w, h = int(x1), int(y1), int(x2 - x1), int(y2 - y1)
-                    confidence = float(box.conf[0].cpu().numpy())
+    def _predict(
+        self,
+        images: List[np.ndarray],
+        conf: float,
+        tiling: Optional[TilingConfig]
+    ) -> List[np.ndarray]:
+        """Backend boxes for a batch of images, tiled when configured."""
+        if tiling is None:
+            return self.backend.predict(images, conf, self.iou_threshold)
+        return predict_tiled(self.backend, images, conf, self.iou_threshold, tiling)
+
+    @staticmethod
+    def _to_detections(boxes: np.ndarray) -> List[Dict]:
+        """
+        Convert backend output to the detection dict format
+
+        Args:
+            boxes: (K, 5) array of [x1, y1, x2, y2, confidence]
+
+        Returns:
+            List of detections with XYWH bbox
+        """
+        detections = []
 
-                    detections.append({
-                        "bbox": [x, y, w, h],
-                        "confidence": confidence,
-                        "class": "person"
-                    })
+        for x1, y1, x2, y2, confidence in boxes:
+            # Convert to xywh format
+            x, y, w, h = int(x1), int(y1), int(x2 - x1), int(y2 - y1)
 
-            all_detections.append(detections)
+            detections.append({
+                "bbox": [x, y, w, h],
+                "confidence": float(confidence),
+                "class": "person"
+            })
 
-        return all_detections
+        return detections
 
     def extract_person_crops(
         self,
@@ -265,23 +337,40 @@ class PersonDetector:
             "avg_time_ms": round(avg_time, 2),
             "fps": round(fps, 2),
             "device": str(self.device),
-            "model": self.model_name
+            "model": self.model_name,
+            "backend": self.backend_name,
+            "precision": self.precision
         }
 
 
 def create_detector(
     model_name: str = "yolov8n.pt",
     device: str = "cpu",
-    conf_threshold: float = 0.7
+    conf_threshold: float = 0.7,
+    backend: str = "torch",
+    backend_options: Optional[Dict] = None,
+    precision: str = "fp32"
 ) -> PersonDetector:
     """
     Factory function to create PersonDetector instance
 
     This is the recommended way to instantiate the detector,
     as it handles device selection and logging.
+
+    Args:
+        model_name: YOLOv8 model name
+        device: 'cpu', 'cuda', 'mps'
+        conf_threshold: Confidence threshold (0.0-1.0)
+        backend: 'torch', 'onnx', 'openvino' or 'auto'
+        backend_options: Extra backend options (imgsz, cache_dir, num_threads, onnx_path,
+                         calibration_dir, gate_thresholds)
+        precision: 'fp32' or 'int8_static'
     """
     return PersonDetector(
         model_name=model_name,
         device=device,
-        conf_threshold=conf_threshold
+        conf_threshold=conf_threshold,
+        backend=backend,
+        backend_options=backend_options,
+        precision=precision
     )
@@ -0,0 +1,488 @@
+"""
+INT8 Quantization and Accuracy Gate
+
+Post-training INT8 quantization of ONNX models (YOLO detector, CLIP vision
+tower) with ONNX Runtime, plus the accuracy-regression gate that decides
+whether a quantized mode may be used in production.
+
+Precisions:
+- fp32: Original model
+- int8_dynamic: Weights quantized offline, activations quantized per batch at runtime.
+  Embedding (CLIP) only: it quantizes linear layers, since the ConvInteger ops
+  it would make of convolutions have no ONNX Runtime CPU kernel, which leaves
+  an all-conv detector unchanged
+- int8_static: Weights and activations quantized, activation ranges calibrated
+  from a local folder of sample frames/crops
+
+Gate workflow:
+1. scripts/benchmark_quantization.py runs each mode against the fp32 baseline
+   (speedup, detection recall, embedding cosine drift)
+2. The result is written next to the quantized artifact as <model>.gate.json
+3. Backends refuse to load a quantized artifact whose gate report is missing
+   or failed (QuantizationGateError)
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8_dynamic", "int8_static")  # int8_dynamic: embedding only
+DETECTOR_PRECISIONS = ("fp32", "int8_static")
+# Op types int8_dynamic quantizes unless told otherwise
+DYNAMIC_OP_TYPES = ["MatMul", "Gemm"]
+
+CALIBRATION_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class QuantizationGateError(RuntimeError):
+    """Raised when a quantized mode has not passed the accuracy gate."""
+
+
+@dataclass
+class QuantizationThresholds:
+    """Minimum accuracy (and speedup) a quantized mode must keep relative to fp32."""
+    min_detection_recall: float = 0.95
+    max_embedding_cosine_drift: float = 0.02  # Mean (1 - cosine similarity)
+    min_speedup: float = 1.0  # A mode slower than fp32 is never worth its accuracy loss
+
+
+@dataclass
+class QuantizationReport:
+    """Benchmark and gate result for one quantized mode."""
+    component: str  # 'detector' or 'embedding'
+    precision: str
+    artifact: str
+    samples: int
+    fp32_ms: float
+    quantized_ms: float
+    metrics: Dict[str, float]
+    thresholds: Dict[str, float]
+    failures: List[str] = field(default_factory=list)
+
+    @property
+    def speedup(self) -> float:
+        return self.fp32_ms / self.quantized_ms if self.quantized_ms else 0.0
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["speedup"] = round(self.speedup, 3)
+        data["passed"] = self.passed
+        return data
+
+
+def validate_precision(precision: str):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+
+def validate_detector_precision(precision: str):
+    validate_precision(precision)
+    if precision not in DETECTOR_PRECISIONS:
+        raise ValueError(
+            f"Precision '{precision}' is not supported for the detector: dynamic INT8 leaves "
+            f"its convolutions in fp32. Use 'int8_static' (calibrated) instead"
+        )
+
+
+def list_calibration_files(calibration_dir: str) -> List[Path]:
+    """
+    List calibration images in a folder, sorted by name.
+
+    Raises:
+        FileNotFoundError: If the folder does not exist
+        ValueError: If it contains no images
+    """
+    folder = Path(calibration_dir)
+    if not folder.is_dir():
+        raise FileNotFoundError(f"Calibration folder not found: {calibration_dir}")
+
+    files = sorted(
+        p for p in folder.iterdir()
+        if p.is_file() and p.suffix.lower() in CALIBRATION_EXTENSIONS
+    )
+    if not files:
+        raise ValueError(f"No calibration images ({', '.join(CALIBRATION_EXTENSIONS)}) in {calibration_dir}")
+    return files
+
+
+def load_calibration_images(calibration_dir: str, limit: Optional[int] = None) -> List[np.ndarray]:
+    """
+    Load calibration frames/crops from a local folder as RGB arrays.
+
+    Args:
+        calibration_dir: Folder of .jpg/.png images
+        limit: Maximum number of images to load
+
+    Returns:
+        List of RGB images (H, W, 3)
+    """
+    import cv2
+
+    images = []
+    for path in list_calibration_files(calibration_dir)[:limit]:
+        image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning(f"Skipping unreadable calibration image: {path}")
+            continue
+        images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return images
+
+
+def calibration_fingerprint(calibration_dir: str) -> str:
+    """Short hash of the calibration set (file names, sizes, mtimes)."""
+    digest = hashlib.sha1()
+    for path in list_calibration_files(calibration_dir):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+    return digest.hexdigest()[:10]
+
+
+def quantized_model_path(fp32_path: str, precision: str, calibration_dir: Optional[str] = None) -> str:
+    """
+    Cache path for a quantized copy of an ONNX model.
+
+    Static artifacts are keyed by the calibration set, so re-calibrating on
+    different data never reuses stale activation ranges.
+    """
+    validate_precision(precision)
+    base = Path(fp32_path)
+    suffix = precision
+    if precision == "int8_static":
+        if not calibration_dir:
+            raise ValueError("int8_static quantization requires a calibration_dir")
+        suffix = f"{precision}_{calibration_fingerprint(calibration_dir)}"
+    return str(base.with_name(f"{base.stem}_{suffix}.onnx"))
+
+
+def quantize_onnx_model(
+    fp32_path: str,
+    precision: str,
+    calibration_inputs: Optional[Callable[[], Iterable[Dict[str, np.ndarray]]]] = None,
+    calibration_dir: Optional[str] = None,
+    nodes_to_exclude: Optional[List[str]] = None,
+    op_types_to_quantize: Optional[List[str]] = None,
+) -> str:
+    """
+    Quantize an ONNX model to INT8 once and return the cached artifact path.
+
+    Args:
+        fp32_path: Source fp32 ONNX model
+        precision: 'int8_dynamic' or 'int8_static'
+        calibration_inputs: Callable returning an iterable of model feeds
+                            (required for int8_static)
+        calibration_dir: Calibration folder (used for the static cache key)
+        nodes_to_exclude: Node names kept in fp32 (e.g. box decoding)
+        op_types_to_quantize: Restrict quantization to these op types
+                              (int8_dynamic defaults to DYNAMIC_OP_TYPES)
+
+    Returns:
+        Path to the quantized .onnx file (fp32_path for precision='fp32')
+    """
+    validate_precision(precision)
+    if precision == "fp32":
+        return fp32_path
+
+    output_path = quantized_model_path(fp32_path, precision, calibration_dir)
+    if os.path.exists(output_path):
+        return output_path
+
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    logger.info(f"Quantizing {fp32_path} ({precision}) -> {output_path}")
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as temp_dir:
+        # Shape inference + graph cleanup improves the quantizer's node coverage
+        prepared = os.path.join(temp_dir, "prepared.onnx")
+        quant_pre_process(fp32_path, prepared, skip_symbolic_shape=True)
+
+        staged = os.path.join(temp_dir, "quantized.onnx")
+        if precision == "int8_dynamic":
+            quantize_dynamic(
+                prepared,
+                staged,
+                weight_type=QuantType.QInt8,
+                nodes_to_exclude=nodes_to_exclude,
+                op_types_to_quantize=op_types_to_quantize or DYNAMIC_OP_TYPES,
+            )
+        else:
+            if calibration_inputs is None:
+                raise ValueError("int8_static quantization requires calibration inputs")
+
+            class _Reader(CalibrationDataReader):
+                def __init__(self):
+                    self._feeds = iter(calibration_inputs())
+
+                def get_next(self):
+                    return next(self._feeds, None)
+
+            quantize_static(
+                prepared,
+                staged,
+                _Reader(),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+                nodes_to_exclude=nodes_to_exclude,
+                op_types_to_quantize=op_types_to_quantize,
+            )
+
+        os.replace(staged, output_path)
+
+    logger.info(f"Quantized model cached in {time.perf_counter() - start:.1f}s: {output_path}")
+    return output_path
+
+
+def detection_recall(
+    reference: List[np.ndarray],
+    candidate: List[np.ndarray],
+    iou_threshold: float = 0.5,
+) -> float:
+    """
+    Fraction of fp32 detections reproduced by the quantized model.
+
+    Boxes are matched greedily per frame, highest reference confidence first.
+
+    Args:
+        reference: Per-frame (K, 5) fp32 detections [x1, y1, x2, y2, conf]
+        candidate: Per-frame (K, 5) quantized detections
+        iou_threshold: Minimum IoU for a match
+
+    Returns:
+        Recall in [0, 1] (1.0 if the reference has no detections)
+    """
+    from app.cv.inference_backends import box_iou_matrix
+
+    total, matched = 0, 0
+    for ref, cand in zip(reference, candidate):
+        total += len(ref)
+        if not len(ref) or not len(cand):
+            continue
+
+        iou = box_iou_matrix(ref[:, :4], cand[:, :4])
+        used = np.zeros(len(cand), dtype=bool)
+        for i in np.argsort(-ref[:, 4]):
+            overlaps = np.where(used, -1.0, iou[i])
+            j = int(overlaps.argmax())
+            if overlaps[j] >= iou_threshold:
+                used[j] = True
+                matched += 1
+
+    return matched / total if total else 1.0
+
+
+def embedding_cosine_drift(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Cosine drift (1 - cosine similarity) between fp32 and quantized embeddings.
+
+    Args:
+        reference: (N, D) fp32 embeddings
+        candidate: (N, D) quantized embeddings
+
+    Returns:
+        Dict with mean and max drift
+    """
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    drift = 1.0 - np.sum(reference * candidate, axis=1)
+    return {"mean_cosine_drift": float(drift.mean()), "max_cosine_drift": float(drift.max())}
+
+
+def _time_ms(fn: Callable, inputs: List, repeats: int) -> float:
+    """Average wall time per input item in milliseconds (after one warm-up call)."""
+    fn(inputs[:1])
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(inputs)
+    return (time.perf_counter() - start) / (repeats * len(inputs)) * 1000
+
+
+def evaluate_detector(
+    baseline,
+    candidate,
+    precision: str,
+    frames: List[np.ndarray],
+    thresholds: QuantizationThresholds,
+    conf_threshold: float = 0.25,
+    iou_threshold: float = 0.45,
+    batch_size: int = 8,
+    repeats: int = 3,
+) -> QuantizationReport:
+    """
+    Compare a quantized detector backend against the fp32 baseline.
+
+    Args:
+        baseline: fp32 DetectionBackend
+        candidate: Quantized DetectionBackend
+        precision: Candidate precision
+        frames: Evaluation frames (RGB)
+        thresholds: Gate thresholds
+        conf_threshold: Detection confidence threshold
+        iou_threshold: NMS IoU threshold
+        batch_size: Frames per predict() call
+        repeats: Timing repetitions
+
+    Returns:
+        QuantizationReport (passed=False if recall or speedup is below threshold)
+    """
+    def run(backend, images):
+        outputs = []
+        for i in range(0, len(images), batch_size):
+            outputs.extend(backend.predict(images[i:i + batch_size], conf_threshold, iou_threshold))
+        return outputs
+
+    recall = detection_recall(run(baseline, frames), run(candidate, frames))
+    report = QuantizationReport(
+        component="detector",
+        precision=precision,
+        artifact=candidate.onnx_path,
+        samples=len(frames),
+        fp32_ms=_time_ms(lambda x: run(baseline, x), frames, repeats),
+        quantized_ms=_time_ms(lambda x: run(candidate, x), frames, repeats),
+        metrics={"detection_recall": round(recall, 4)},
+        thresholds={"min_detection_recall": thresholds.min_detection_recall},
+    )
+    if recall < thresholds.min_detection_recall:
+        report.failures.append(
+            f"detection recall {recall:.4f} < {thresholds.min_detection_recall}"
+        )
+    _check_speedup(report, thresholds)
+    return report
+
+
+def evaluate_embedding(
+    baseline,
+    candidate,
+    precision: str,
+    crops: List[np.ndarray],
+    thresholds: QuantizationThresholds,
+    repeats: int = 3,
+) -> QuantizationReport:
+    """
+    Compare a quantized EmbeddingExtractor against the fp32 baseline.
+
+    Args:
+        baseline: fp32 EmbeddingExtractor
+        candidate: Quantized EmbeddingExtractor
+        precision: Candidate precision
+        crops: Evaluation person crops (RGB)
+        thresholds: Gate thresholds
+        repeats: Timing repetitions
+
+    Returns:
+        QuantizationReport (passed=False if mean drift exceeds, or speedup is
+        below, the threshold)
+    """
+    drift = embedding_cosine_drift(baseline.extract_batch(crops), candidate.extract_batch(crops))
+    report = QuantizationReport(
+        component="embedding",
+        precision=precision,
+        artifact=candidate.onnx_path,
+        samples=len(crops),
+        fp32_ms=_time_ms(baseline.extract_batch, crops, repeats),
+        quantized_ms=_time_ms(candidate.extract_batch, crops, repeats),
+        metrics={k: round(v, 6) for k, v in drift.items()},
+        thresholds={"max_embedding_cosine_drift": thresholds.max_embedding_cosine_drift},
+    )
+    if drift["mean_cosine_drift"] > thresholds.max_embedding_cosine_drift:
+        report.failures.append(
+            f"mean cosine drift {drift['mean_cosine_drift']:.4f} > "
+            f"{thresholds.max_embedding_cosine_drift}"
+        )
+    _check_speedup(report, thresholds)
+    return report
+
+
+def _check_speedup(report: QuantizationReport, thresholds: QuantizationThresholds):
+    report.thresholds["min_speedup"] = thresholds.min_speedup
+    if report.speedup < thresholds.min_speedup:
+        report.failures.append(f"speedup {report.speedup:.2f}x < {thresholds.min_speedup}x")
+
+
+def gate_report_path(artifact: str) -> str:
+    return f"{artifact}.gate.json"
+
+
+def write_gate_report(report: QuantizationReport) -> str:
+    """Persist a gate report next to its quantized artifact (atomic write)."""
+    path = gate_report_path(report.artifact)
+    staged = f"{path}.tmp.{os.getpid()}"
+    with open(staged, "w") as f:
+        json.dump(report.to_dict(), f, indent=2)
+    os.replace(staged, path)
+    return path
+
+
+def require_gate_pass(artifact: str, thresholds: Optional[QuantizationThresholds] = None) -> Dict:
+    """
+    Refuse to use a quantized artifact that has not passed the accuracy gate.
+
+    Args:
+        artifact: Quantized ONNX model path
+        thresholds: Currently configured thresholds; a report produced under
+                    looser thresholds is re-checked against these
+
+    Returns:
+        The stored gate report
+
+    Raises:
+        QuantizationGateError: If the report is missing, failed, or below the
+                               configured thresholds
+    """
+    path = gate_report_path(artifact)
+    if not os.path.exists(path):
+        raise QuantizationGateError(
+            f"No accuracy gate report for {artifact}. "
+            "Run scripts/benchmark_quantization.py to validate this mode first."
+        )
+
+    with open(path) as f:
+        report = json.load(f)
+
+    if not report.get("passed"):
+        raise QuantizationGateError(
+            f"Quantized model {artifact} failed the accuracy gate: {report.get('failures')}"
+        )
+
+    if thresholds is not None:
+        metrics = report.get("metrics", {})
+        recall = metrics.get("detection_recall")
+        drift = metrics.get("mean_cosine_drift")
+        if recall is not None and recall < thresholds.min_detection_recall:
+            raise QuantizationGateError(
+                f"{artifact}: detection recall {recall} below configured "
+                f"{thresholds.min_detection_recall}"
+            )
+        if drift is not None and drift > thresholds.max_embedding_cosine_drift:
+            raise QuantizationGateError(
+                f"{artifact}: cosine drift {drift} above configured "
+                f"{thresholds.max_embedding_cosine_drift}"
+            )
+        if report.get("speedup", 0.0) < thresholds.min_speedup:
+            raise QuantizationGateError(
+                f"{artifact}: speedup {report.get('speedup')}x below configured "
+                f"{thresholds.min_speedup}x"
+            )
+
+    return report
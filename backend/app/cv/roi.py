@@ -0,0 +1,222 @@
+"""
+Region of Interest (ROI)
+
+Per-camera polygons marking where people can actually appear (walkable
+floor), so the detector skips ceilings, shop windows and sky.
+
+Polygons are stored on CameraPin.roi_polygons in normalized [0, 1]
+coordinates, so one definition works for the original video and any proxy
+or downscaled decode of it.
+
+Inference modes:
+- crop: run the detector on the bounding rectangle of all polygons
+- mask: same rectangle, with pixels outside the polygons filled grey
+
+Boxes are mapped back to full-frame coordinates, and boxes whose foot point
+(bottom centre) lies outside every polygon are dropped as false positives.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ROI_MODES = ("crop", "mask")
+
+# Letterbox padding grey used by YOLO, so masked pixels look like padding
+MASK_FILL_VALUE = 114
+
+
+@dataclass
+class _RoiGeometry:
+    """ROI polygons resolved for one frame size."""
+    polygons: List[np.ndarray]  # Pixel polygons (N, 2) int32, full-frame coordinates
+    rect: Tuple[int, int, int, int]  # x1, y1, x2, y2 of the inference crop
+    outside_mask: Optional[np.ndarray] = None  # Crop-sized bool mask, True outside polygons
+
+
+class RegionOfInterest:
+    """
+    Camera ROI: crop/mask frames before inference and map boxes back.
+
+    Example:
+        >>> roi = RegionOfInterest([[(0.0, 0.4), (1.0, 0.4), (1.0, 1.0), (0.0, 1.0)]])
+        >>> image, offset = roi.prepare(frame)
+        >>> boxes = backend.predict([image], conf, iou)[0]
+        >>> boxes = roi.map_boxes(boxes, offset, frame.shape)
+    """
+
+    def __init__(
+        self,
+        polygons: Sequence[Sequence[Sequence[float]]],
+        mode: str = "crop",
+        padding: float = 0.02,
+        filter_outside: bool = True,
+    ):
+        """
+        Initialize ROI.
+
+        Args:
+            polygons: One or more polygons of normalized (x, y) points in [0, 1]
+            mode: 'crop' (bounding rectangle) or 'mask' (rectangle + grey fill outside)
+            padding: Margin added around the bounding rectangle, as a fraction of frame size,
+                     so people straddling the ROI edge are not cut in half
+            filter_outside: Drop boxes whose foot point lies outside every polygon
+
+        Raises:
+            ValueError: If a polygon is malformed or the mode is unknown
+        """
+        if mode not in ROI_MODES:
+            raise ValueError(f"Unknown ROI mode '{mode}', expected one of {ROI_MODES}")
+        if not polygons:
+            raise ValueError("ROI needs at least one polygon")
+
+        self.polygons = []
+        for polygon in polygons:
+            points = np.asarray(polygon, dtype=np.float64)
+            if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+                raise ValueError(f"ROI polygon needs at least 3 (x, y) points, got {polygon}")
+            if points.min() < 0.0 or points.max() > 1.0:
+                raise ValueError("ROI polygon points must be normalized to [0, 1]")
+            self.polygons.append(points)
+
+        self.mode = mode
+        self.padding = padding
+        self.filter_outside = filter_outside
+        self._geometry_cache: Dict[Tuple[int, int], _RoiGeometry] = {}
+
+    @classmethod
+    def from_config(
+        cls,
+        polygons: Optional[Sequence[Sequence[Sequence[float]]]],
+        **kwargs,
+    ) -> Optional["RegionOfInterest"]:
+        """
+        Build an ROI from CameraPin.roi_polygons (None/empty = whole frame).
+
+        Args:
+            polygons: Stored polygons
+            **kwargs: mode, padding, filter_outside
+
+        Returns:
+            RegionOfInterest or None
+        """
+        if not polygons:
+            return None
+        return cls(polygons, **kwargs)
+
+    def geometry(self, frame_shape: Tuple[int, ...]) -> _RoiGeometry:
+        """Resolve polygons and crop rectangle for a frame size (cached)."""
+        h, w = frame_shape[:2]
+        cached = self._geometry_cache.get((h, w))
+        if cached is not None:
+            return cached
+
+        scale = np.array([w, h], dtype=np.float64)
+        pixel_polygons = [np.round(p * scale).astype(np.int32) for p in self.polygons]
+
+        points = np.vstack(pixel_polygons)
+        pad_x, pad_y = int(round(self.padding * w)), int(round(self.padding * h))
+        x1 = max(0, int(points[:, 0].min()) - pad_x)
+        y1 = max(0, int(points[:, 1].min()) - pad_y)
+        x2 = min(w, int(points[:, 0].max()) + pad_x)
+        y2 = min(h, int(points[:, 1].max()) + pad_y)
+
+        geometry = _RoiGeometry(polygons=pixel_polygons, rect=(x1, y1, x2, y2))
+        if self.mode == "mask":
+            inside = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+            cv2.fillPoly(inside, [p - np.array([x1, y1], dtype=np.int32) for p in pixel_polygons], 1)
+            geometry.outside_mask = inside == 0
+
+        self._geometry_cache[(h, w)] = geometry
+        return geometry
+
+    def coverage(self, frame_shape: Tuple[int, ...]) -> float:
+        """Fraction of the frame area that is sent to the detector."""
+        x1, y1, x2, y2 = self.geometry(frame_shape).rect
+        return (x2 - x1) * (y2 - y1) / float(frame_shape[0] * frame_shape[1])
+
+    def crop(self, image: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        View of the ROI bounding rectangle (no copy).
+
+        Returns:
+            Tuple of (cropped view, (x_offset, y_offset))
+        """
+        x1, y1, x2, y2 = self.geometry(image.shape).rect
+        return image[y1:y2, x1:x2], (x1, y1)
+
+    def prepare(self, image: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        Detector input for a frame: the ROI crop, masked in 'mask' mode.
+
+        Returns:
+            Tuple of (detector input, (x_offset, y_offset))
+        """
+        cropped, offset = self.crop(image)
+        if self.mode == "mask":
+            cropped = cropped.copy()
+            cropped[self.geometry(image.shape).outside_mask] = MASK_FILL_VALUE
+        return cropped, offset
+
+    def contains_points(self, points: np.ndarray, frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Test full-frame (x, y) points against the ROI polygons.
+
+        Args:
+            points: (K, 2) pixel coordinates
+            frame_shape: Frame (H, W, ...)
+
+        Returns:
+            (K,) bool array, True if a point is inside (or on) any polygon
+        """
+        polygons = self.geometry(frame_shape).polygons
+        inside = np.zeros(len(points), dtype=bool)
+        for i, (x, y) in enumerate(points):
+            inside[i] = any(
+                cv2.pointPolygonTest(polygon, (float(x), float(y)), False) >= 0
+                for polygon in polygons
+            )
+        return inside
+
+    def map_boxes(
+        self,
+        boxes: np.ndarray,
+        offset: Tuple[int, int],
+        frame_shape: Tuple[int, ...],
+    ) -> np.ndarray:
+        """
+        Map detector boxes from ROI-crop to full-frame coordinates.
+
+        Args:
+            boxes: (K, 5+) array whose first four columns are [x1, y1, x2, y2]
+            offset: (x_offset, y_offset) returned by prepare()
+            frame_shape: Original frame (H, W, ...)
+
+        Returns:
+            Boxes in full-frame coordinates, without those outside the ROI
+            when filter_outside is set
+        """
+        if len(boxes) == 0:
+            return boxes
+
+        boxes = boxes.copy()
+        boxes[:, [0, 2]] += offset[0]
+        boxes[:, [1, 3]] += offset[1]
+
+        if self.filter_outside:
+            feet = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+            boxes = boxes[self.contains_points(feet, frame_shape)]
+
+        return boxes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "polygons": [p.tolist() for p in self.polygons],
+            "mode": self.mode,
+            "padding": self.padding,
+            "filter_outside": self.filter_outside,
+        }
@@ -0,0 +1,226 @@
+"""
+Tiled (Sliced) Inference
+
+High-resolution cameras (4K and up) get downscaled to the 640px detector
+input, which shrinks distant people below the size YOLO can find. Tiled
+mode cuts each frame into overlapping detector-sized slices instead.
+
+Features:
+- Overlapping tiles of a fixed size, aligned to the frame edges so every
+  tile has the same shape
+- Tiles of all frames in a batch sent to the backend in one forward pass
+  (split into chunks of max_batch_tiles)
+- Optional downscaled full-frame pass for people too large for one tile
+- Duplicates across tile borders merged with vectorized batched NMS
+- Per-pin config; 'auto' switches tiling on by video resolution
+"""
+import logging
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.cv.inference_backends import batched_nms
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TilingConfig:
+    """Tiled inference parameters (stored per CameraPin as JSON)."""
+    enabled: Optional[bool] = None  # None = auto, by video resolution
+    min_long_side: int = 2560  # Auto mode: tile videos whose longer side is at least this
+    tile_size: int = 640  # Square tile edge in pixels (matches the detector input)
+    overlap: float = 0.2  # Fraction of the tile shared with its neighbour
+    include_full_frame: bool = True  # Also run a downscaled whole-frame pass
+    merge_metric: str = "ios"  # Overlap metric for merging ('ios' or 'iou')
+    merge_threshold: float = 0.6  # Overlap above which the lower-scored box is dropped
+    max_batch_tiles: int = 32  # Tiles per backend forward pass
+
+    def __post_init__(self):
+        if self.tile_size < 32:
+            raise ValueError(f"tile_size must be at least 32 pixels, got {self.tile_size}")
+        if not 0.0 <= self.overlap < 1.0:
+            raise ValueError(f"overlap must be in [0, 1), got {self.overlap}")
+        if self.merge_metric not in ("ios", "iou"):
+            raise ValueError(f"Unknown merge_metric '{self.merge_metric}', expected 'ios' or 'iou'")
+        if self.max_batch_tiles < 1:
+            raise ValueError("max_batch_tiles must be positive")
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], **defaults) -> "TilingConfig":
+        """
+        Build a config from a (partial) JSON dict, ignoring unknown keys.
+
+        Null overrides fall back to the defaults (stored pin settings keep
+        unset optional fields as null).
+
+        Args:
+            data: Per-pin overrides (None = defaults only)
+            **defaults: Base values applied before the overrides
+        """
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in defaults.items() if k in known}
+        values.update({k: v for k, v in (data or {}).items() if k in known and v is not None})
+        return cls(**values)
+
+    def applies_to(self, width: int, height: int) -> bool:
+        """Whether a video of this resolution should be tiled."""
+        if self.enabled is not None:
+            return self.enabled
+        return max(width, height) >= self.min_long_side
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def resolve_tiling(
+    config: Optional[Dict[str, Any]],
+    width: Optional[int],
+    height: Optional[int],
+    **defaults,
+) -> Optional[TilingConfig]:
+    """
+    Tiling config for a video, or None when it should run untiled.
+
+    Args:
+        config: CameraPin.tiling overrides (None = auto with defaults)
+        width: Video width in pixels (None = unknown, never auto-tiled)
+        height: Video height in pixels
+        **defaults: Base values (e.g. from settings)
+
+    Returns:
+        TilingConfig or None
+    """
+    tiling = TilingConfig.from_dict(config, **defaults)
+    if tiling.enabled is None and not (width and height):
+        return None
+    if not tiling.applies_to(width or 0, height or 0):
+        return None
+    return tiling
+
+
+def _axis_starts(length: int, tile: int, stride: int) -> List[int]:
+    """Tile start offsets along one axis, with the last tile flush to the edge."""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def compute_tiles(
+    frame_shape: Tuple[int, ...],
+    tile_size: int,
+    overlap: float,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Overlapping tile rectangles covering a frame.
+
+    Every tile is tile_size x tile_size (clipped to the frame when the frame
+    is smaller), so all tiles of a video share one shape and batch together.
+
+    Args:
+        frame_shape: Frame (H, W, ...)
+        tile_size: Tile edge in pixels
+        overlap: Fraction of the tile shared with its neighbour
+
+    Returns:
+        List of (x1, y1, x2, y2) rectangles, row-major
+    """
+    h, w = frame_shape[:2]
+    stride = max(1, int(round(tile_size * (1.0 - overlap))))
+    tile_w, tile_h = min(tile_size, w), min(tile_size, h)
+
+    return [
+        (x, y, x + tile_w, y + tile_h)
+        for y in _axis_starts(h, tile_h, stride)
+        for x in _axis_starts(w, tile_w, stride)
+    ]
+
+
+def merge_detections(
+    boxes: Sequence[np.ndarray],
+    threshold: float,
+    metric: str = "ios",
+) -> List[np.ndarray]:
+    """
+    Merge duplicate boxes within each frame with one batched NMS call.
+
+    Args:
+        boxes: Per-frame (K, 5) arrays [x1, y1, x2, y2, conf] in frame coordinates
+        threshold: Overlap above which the lower-scored box is dropped
+        metric: 'ios' or 'iou'
+
+    Returns:
+        Per-frame (K', 5) arrays, highest confidence first
+    """
+    counts = [len(b) for b in boxes]
+    if sum(counts) == 0:
+        return [np.zeros((0, 5), dtype=np.float32) for _ in boxes]
+
+    stacked = np.concatenate([b for b in boxes if len(b)], axis=0)
+    group_ids = np.repeat(np.arange(len(boxes)), counts)
+
+    keep = batched_nms(stacked[:, :4], stacked[:, 4], group_ids, threshold, metric)
+    kept_groups = group_ids[keep]
+
+    return [stacked[keep[kept_groups == i]] for i in range(len(boxes))]
+
+
+def predict_tiled(
+    backend,
+    frames: Sequence[np.ndarray],
+    conf_threshold: float,
+    iou_threshold: float,
+    config: TilingConfig,
+) -> List[np.ndarray]:
+    """
+    Run a detection backend over overlapping tiles of several frames.
+
+    Args:
+        backend: DetectionBackend
+        frames: RGB frames (H, W, 3) of the same size
+        conf_threshold: Minimum confidence
+        iou_threshold: NMS IoU threshold inside each tile
+        config: Tiling parameters
+
+    Returns:
+        Per-frame (K, 5) arrays [x1, y1, x2, y2, conf] in frame coordinates
+    """
+    if not frames:
+        return []
+
+    tiles: List[np.ndarray] = []
+    owners: List[int] = []
+    offsets: List[Tuple[int, int]] = []
+    for index, frame in enumerate(frames):
+        for x1, y1, x2, y2 in compute_tiles(frame.shape, config.tile_size, config.overlap):
+            tiles.append(frame[y1:y2, x1:x2])
+            owners.append(index)
+            offsets.append((x1, y1))
+
+    tile_boxes: List[np.ndarray] = []
+    for start in range(0, len(tiles), config.max_batch_tiles):
+        tile_boxes.extend(
+            backend.predict(tiles[start:start + config.max_batch_tiles], conf_threshold, iou_threshold)
+        )
+
+    per_frame: List[List[np.ndarray]] = [[] for _ in frames]
+    for boxes, owner, (dx, dy) in zip(tile_boxes, owners, offsets):
+        if len(boxes):
+            boxes = boxes.copy()
+            boxes[:, [0, 2]] += dx
+            boxes[:, [1, 3]] += dy
+            per_frame[owner].append(boxes)
+
+    if config.include_full_frame:
+        for index, boxes in enumerate(backend.predict(list(frames), conf_threshold, iou_threshold)):
+            if len(boxes):
+                per_frame[index].append(boxes)
+
+    candidates = [
+        np.concatenate(parts, axis=0).astype(np.float32) if parts else np.zeros((0, 5), dtype=np.float32)
+        for parts in per_frame
+    ]
+    return merge_detections(candidates, config.merge_threshold, config.merge_metric)
@@ -0,0 +1,255 @@
+"""
+Bounded Per-Track Appearance State
+
+Holds what TrackletGenerator needs from a track's keyframe observations to
+build its tracklet, without keeping the observations themselves:
+
+- Outfit vote counters (most frequent type/color per garment) and the first
+  outfit as the descriptor template
+- Online mean embedding (running sum and count)
+- Bounding box statistics for physique (aspect ratio and height sums)
+- First/last observation timestamps, and the observed frame numbers and
+  boxes (20 bytes per keyframe, needed to stitch chunked tracking and to
+  re-analyze cached tracks)
+- The top-K person crops by quality, copied and downscaled, for debugging
+  and keyframe export
+
+Memory per track is fixed apart from the frame numbers and boxes, however
+long the track lives (an hour at 1 FPS is ~1200 keyframes = ~24 KB).
+"""
+import heapq
+import itertools
+from array import array
+from collections import Counter
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.cv.garment_analyzer import OutfitDescriptor
+
+GARMENTS = ("top", "bottom", "shoes")
+
+# Tie-breaker for crops with equal scores (older crops are replaced first)
+_crop_order = itertools.count()
+
+
+class TrackAppearance:
+    """Running appearance aggregates of one track plus its best K crops."""
+
+    def __init__(self, max_crops: int = 3, crop_height: int = 128):
+        """
+        Args:
+            max_crops: Crops to keep (highest quality first; 0 keeps none)
+            crop_height: Kept crops are downscaled to at most this height
+        """
+        self.max_crops = max_crops
+        self.crop_height = crop_height
+
+        self.num_observations = 0
+        self.frame_ids = array("i")
+        self.boxes = array("f")  # [x1, y1, x2, y2] per observation, flattened
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+
+        self.template: Optional[OutfitDescriptor] = None
+        self.votes: Dict[str, Counter] = {
+            f"{garment}.{attribute}": Counter()
+            for garment in GARMENTS
+            for attribute in ("type", "color")
+        }
+
+        self.embedding_sum: Optional[np.ndarray] = None
+        self.embedding_count = 0
+
+        self.bbox_count = 0
+        self.height_sum = 0.0
+        self.aspect_sum = 0.0
+        self.aspect_count = 0
+
+        # Min-heap of (score, order, frame_id, crop): the worst kept crop is first
+        self._crops: List[Tuple[float, int, int, np.ndarray]] = []
+
+    @property
+    def last_frame(self) -> Optional[int]:
+        """Frame number of the latest observation."""
+        return self.frame_ids[-1] if self.frame_ids else None
+
+    def add(
+        self,
+        outfit: OutfitDescriptor,
+        frame_id: int,
+        timestamp: datetime,
+        bbox: np.ndarray,
+        crop: Optional[np.ndarray] = None,
+        crop_score: Optional[float] = None,
+    ) -> None:
+        """
+        Fold one keyframe observation into the aggregates.
+
+        Args:
+            outfit: Outfit analysis of the keyframe crop
+            frame_id: Frame number
+            timestamp: Frame timestamp
+            bbox: Track box [x1, y1, x2, y2] in the frame
+            crop: Person crop (kept only if it ranks in the top K)
+            crop_score: Crop ranking score (default: the outfit's overall quality)
+        """
+        self.num_observations += 1
+        self.frame_ids.append(int(frame_id))
+        self.boxes.extend(float(v) for v in bbox)
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+
+        if self.template is None:
+            self.template = replace(outfit, visual_embedding=None)
+        for garment in GARMENTS:
+            descriptor = getattr(outfit, garment)
+            if descriptor:
+                self.votes[f"{garment}.type"][descriptor.type] += 1
+                self.votes[f"{garment}.color"][descriptor.color] += 1
+
+        if outfit.visual_embedding is not None:
+            embedding = np.asarray(outfit.visual_embedding, dtype=np.float64)
+            self.embedding_sum = embedding.copy() if self.embedding_sum is None else self.embedding_sum + embedding
+            self.embedding_count += 1
+
+        x1, y1, x2, y2 = (float(v) for v in bbox)
+        width, height = x2 - x1, y2 - y1
+        self.bbox_count += 1
+        self.height_sum += height
+        if height > 0:
+            self.aspect_sum += width / height
+            self.aspect_count += 1
+
+        if crop is not None and self.max_crops > 0:
+            score = outfit.overall_quality if crop_score is None else crop_score
+            self._keep_crop(float(score), int(frame_id), crop)
+
+    def _keep_crop(self, score: float, frame_id: int, crop: np.ndarray) -> None:
+        if len(self._crops) >= self.max_crops and score <= self._crops[0][0]:
+            return  # Not better than the worst kept crop: skip the copy
+        entry = (score, next(_crop_order), frame_id, self._shrink(crop))
+        if len(self._crops) < self.max_crops:
+            heapq.heappush(self._crops, entry)
+        else:
+            heapq.heapreplace(self._crops, entry)
+
+    def _shrink(self, crop: np.ndarray) -> np.ndarray:
+        """Own copy of the crop, at most crop_height pixels high."""
+        height, width = crop.shape[:2]
+        if height <= self.crop_height:
+            return np.array(crop, copy=True)
+        scale = self.crop_height / height
+        return cv2.resize(crop, (max(1, round(width * scale)), self.crop_height), interpolation=cv2.INTER_AREA)
+
+    def best_crops(self) -> List[Tuple[int, np.ndarray]]:
+        """Kept crops as (frame_id, crop), best first."""
+        return [(frame_id, crop) for _, _, frame_id, crop in sorted(self._crops, reverse=True)]
+
+    def observation_boxes(self) -> List[List[float]]:
+        """Boxes of the observations, in frame_ids order."""
+        return np.asarray(self.boxes, dtype=np.float32).reshape(-1, 4).tolist()
+
+    def aggregate_outfit(self) -> Optional[OutfitDescriptor]:
+        """
+        Outfit with the most frequent type and color of each garment.
+
+        Uses the first observation as the template (as its LAB values,
+        histograms and confidences); ties go to the value seen first.
+        """
+        if self.template is None:
+            return None
+        garments = {}
+        for garment in GARMENTS:
+            descriptor = getattr(self.template, garment)
+            types, colors = self.votes[f"{garment}.type"], self.votes[f"{garment}.color"]
+            garments[garment] = replace(
+                descriptor,
+                type=types.most_common(1)[0][0] if types else "unknown",
+                color=colors.most_common(1)[0][0] if colors else "unknown",
+            )
+        return replace(self.template, **garments)
+
+    def mean_embedding(self) -> Optional[np.ndarray]:
+        """L2-normalized mean of the observed embeddings (None without embeddings)."""
+        if not self.embedding_count:
+            return None
+        mean = self.embedding_sum / self.embedding_count
+        return (mean / np.linalg.norm(mean)).astype(np.float32)
+
+    def physique(self) -> Tuple[str, float]:
+        """
+        Non-biometric physique attributes from the observed boxes.
+
+        Returns:
+            Tuple of (height_category, aspect_ratio)
+        """
+        if not self.bbox_count:
+            return "medium", 0.5
+
+        aspect_ratio = self.aspect_sum / self.aspect_count if self.aspect_count else 0.5
+
+        # Estimate height category from average bbox height
+        # TODO: Calibrate per camera using reference objects
+        avg_height = self.height_sum / self.bbox_count
+        if avg_height < 100:
+            height_category = "short"
+        elif avg_height > 200:
+            height_category = "tall"
+        else:
+            height_category = "medium"
+
+        return height_category, float(aspect_ratio)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the track's appearance state."""
+        size = self.frame_ids.itemsize * len(self.frame_ids) + self.boxes.itemsize * len(self.boxes)
+        if self.embedding_sum is not None:
+            size += self.embedding_sum.nbytes
+        return size + sum(crop.nbytes for _, _, _, crop in self._crops)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable aggregates (crops are not included)."""
+        return {
+            "num_observations": self.num_observations,
+            "frame_ids": self.frame_ids.tolist(),
+            "boxes": self.boxes.tolist(),
+            "first_timestamp": self.first_timestamp.isoformat() if self.first_timestamp else None,
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp else None,
+            "template": self.template.to_dict() if self.template else None,
+            "votes": {key: dict(counter) for key, counter in self.votes.items()},
+            "embedding_sum": self.embedding_sum.tolist() if self.embedding_sum is not None else None,
+            "embedding_count": self.embedding_count,
+            "bbox_count": self.bbox_count,
+            "height_sum": self.height_sum,
+            "aspect_sum": self.aspect_sum,
+            "aspect_count": self.aspect_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_crops: int = 3, crop_height: int = 128) -> "TrackAppearance":
+        """Rebuild from to_dict() output (without crops)."""
+        appearance = cls(max_crops=max_crops, crop_height=crop_height)
+        appearance.num_observations = data["num_observations"]
+        appearance.frame_ids = array("i", data["frame_ids"])
+        appearance.boxes = array("f", data.get("boxes", []))
+        if data["first_timestamp"]:
+            appearance.first_timestamp = datetime.fromisoformat(data["first_timestamp"])
+        if data["last_timestamp"]:
+            appearance.last_timestamp = datetime.fromisoformat(data["last_timestamp"])
+        if data["template"]:
+            appearance.template = OutfitDescriptor.from_dict(data["template"])
+        for key, counts in data["votes"].items():
+            appearance.votes[key] = Counter(counts)
+        if data["embedding_sum"] is not None:
+            appearance.embedding_sum = np.asarray(data["embedding_sum"], dtype=np.float64)
+        appearance.embedding_count = data["embedding_count"]
+        appearance.bbox_count = data["bbox_count"]
+        appearance.height_sum = data["height_sum"]
+        appearance.aspect_sum = data["aspect_sum"]
+        appearance.aspect_count = data["aspect_count"]
+        return appearance
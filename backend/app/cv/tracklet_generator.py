@@ -16,11 +16,22 @@ Key Features:
 - Visual embedding aggregation
 - Tracklet quality scoring
 - Temporal consistency validation
+- Serializable generator state (get_state/load_state) for resuming in
+  another process, or in the next video of the same pin
+- Bounded memory per live track (running appearance aggregates and the
+  top-K crops, see TrackAppearance)
+- Optional streaming of finished tracklets to a TrackletSink in batches,
+  instead of collecting them until the end of the video
+- Quality-driven keyframes: crops are scored cheaply and only the best per
+  sliding window of frames are analyzed (see KeyframeSelector)
+- Precomputed detections (e.g. from the stage cache) in place of the
+  detector, and re-analysis of known tracks' keyframes without tracking
+  (analyze_track_appearance)
 """
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Iterable, List, Dict, Optional
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 import numpy as np
 import cv2
 
@@ -28,6 +39,12 @@ from app.cv.byte_tracker import ByteTracker, Detection, Track, TrackState, creat
 from app.cv.person_detector import PersonDetector, create_detector
 from app.cv.garment_analyzer import GarmentAnalyzer, OutfitDescriptor, create_garment_analyzer
 from app.cv.embedding_extractor import EmbeddingExtractor
+from app.cv.motion_gate import MotionGate
+from app.cv.roi import RegionOfInterest
+from app.cv.tiling import TilingConfig
+from app.cv.track_appearance import TrackAppearance
+from app.cv.keyframe_selector import Keyframe, KeyframeSelector, crop_box
+from app.cv.tracklet_sink import TrackletSink
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +83,8 @@ class Tracklet:
     confidence: float  # Average detection confidence
     quality: float  # Overall tracklet quality (0-1)
     num_observations: int  # Number of frames where person detected
+    observation_frames: List[int] = field(default_factory=list)  # Frame IDs of the appearance observations
+    observation_boxes: List[List[float]] = field(default_factory=list)  # Track box of each observation
 
     # Metadata
     created_at: datetime = field(default_factory=datetime.utcnow)
@@ -84,21 +103,54 @@ class Tracklet:
             "t_in": self.t_in.isoformat(),
             "t_out": self.t_out.isoformat(),
             "duration_seconds": self.duration_seconds,
+            "bbox_sequence": [np.asarray(bbox).tolist() for bbox in self.bbox_sequence],
+            "frame_sequence": [int(frame_id) for frame_id in self.frame_sequence],
             "avg_bbox": self.avg_bbox.tolist(),
+            # Aggregated outfit (type, color, LAB, histogram per garment);
+            # the aggregated embedding is stored once, below
             "outfit": {
-                "top": {"type": self.outfit.top.type, "color": self.outfit.top.color},
-                "bottom": {"type": self.outfit.bottom.type, "color": self.outfit.bottom.color},
-                "shoes": {"type": self.outfit.shoes.type, "color": self.outfit.shoes.color},
+                key: value for key, value in self.outfit.to_dict().items()
+                if key != "visual_embedding"
             },
-            "visual_embedding": self.visual_embedding.tolist(),  # 512D list
+            "visual_embedding": (  # 512D list
+                self.visual_embedding.tolist() if self.visual_embedding is not None else None
+            ),
             "height_category": self.height_category,
             "aspect_ratio": self.aspect_ratio,
             "confidence": self.confidence,
             "quality": self.quality,
             "num_observations": self.num_observations,
+            "observation_frames": [int(frame_id) for frame_id in self.observation_frames],
+            "observation_boxes": [np.asarray(bbox).tolist() for bbox in self.observation_boxes],
             "created_at": self.created_at.isoformat()
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Tracklet":
+        """Rebuild a tracklet from to_dict() output."""
+        embedding = data.get("visual_embedding")
+        return cls(
+            track_id=data["track_id"],
+            camera_id=data["camera_id"],
+            mall_id=data["mall_id"],
+            t_in=datetime.fromisoformat(data["t_in"]),
+            t_out=datetime.fromisoformat(data["t_out"]),
+            duration_seconds=data["duration_seconds"],
+            bbox_sequence=[np.asarray(bbox, dtype=np.float32) for bbox in data.get("bbox_sequence", [])],
+            frame_sequence=list(data.get("frame_sequence", [])),
+            avg_bbox=np.asarray(data["avg_bbox"]),
+            outfit=OutfitDescriptor.from_dict(data["outfit"]),
+            visual_embedding=np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+            height_category=data["height_category"],
+            aspect_ratio=data["aspect_ratio"],
+            confidence=data["confidence"],
+            quality=data["quality"],
+            num_observations=data["num_observations"],
+            observation_frames=list(data.get("observation_frames", [])),
+            observation_boxes=list(data.get("observation_boxes", [])),
+            created_at=datetime.fromisoformat(data["created_at"]),
+        )
+
 
 class TrackletGenerator:
     """
@@ -114,8 +166,8 @@ class TrackletGenerator:
     Workflow:
     1. Detect persons in frame
     2. Update tracker with detections
-    3. For each active track, extract person crop
-    4. Analyze outfit and extract embedding
+    3. Score each active track's crop; queue the best crops of each track's keyframe window
+    4. Analyze outfits and extract embeddings for all queued crops in one batch
     5. Aggregate appearance descriptors across track lifetime
     6. Generate tracklet when track ends
     """
@@ -128,7 +180,15 @@ class TrackletGenerator:
         garment_analyzer: GarmentAnalyzer,
         tracker: ByteTracker,
         extract_embeddings: bool = True,
-        frame_sample_rate: float = 1.0  # FPS for analysis
+        frame_sample_rate: float = 1.0,  # FPS for analysis
+        motion_gate: Optional[MotionGate] = None,
+        roi: Optional[RegionOfInterest] = None,
+        tiling: Optional[TilingConfig] = None,
+        appearance_batch_frames: int = 1,
+        max_keyframe_crops: int = 3,
+        keyframe_crop_height: int = 128,
+        sink: Optional[TrackletSink] = None,
+        keyframe_selector: Optional[KeyframeSelector] = None
     ):
         """
         Initialize tracklet generator.
@@ -141,6 +201,18 @@ class TrackletGenerator:
             tracker: ByteTrack tracker instance
             extract_embeddings: Whether to extract visual embeddings
             frame_sample_rate: FPS for processing (default: 1.0 for 1 FPS)
+            motion_gate: Skip detection on motionless frames after an empty result
+            roi: Camera region of interest (detect only inside the ROI polygons)
+            tiling: Tiled inference config for high-resolution cameras
+            appearance_batch_frames: Frames whose keyframe crops are analyzed
+                                     together (1 = one batch per frame; more
+                                     fills larger batches in sparse scenes)
+            max_keyframe_crops: Best crops kept per live track (0 = none)
+            keyframe_crop_height: Kept crops are downscaled to this height
+            sink: Write finished tracklets here (batched) instead of
+                  collecting them in completed_tracklets
+            keyframe_selector: Picks the crops to analyze (default: the best
+                               crop of every 3 frames per track)
         """
         self.camera_id = camera_id
         self.mall_id = mall_id
@@ -149,15 +221,29 @@ class TrackletGenerator:
         self.tracker = tracker
         self.extract_embeddings = extract_embeddings
         self.frame_sample_rate = frame_sample_rate
-
-        # Track appearance cache: {track_id: {"outfits": [], "embeddings": [], "crops": []}}
-        self.track_appearances: Dict[int, Dict] = {}
-
-        # Completed tracklets
+        self.motion_gate = motion_gate
+        self.roi = roi
+        self.tiling = tiling
+
+        # Track appearance aggregates: {track_id: TrackAppearance}
+        self.max_keyframe_crops = max_keyframe_crops
+        self.keyframe_crop_height = keyframe_crop_height
+        self.track_appearances: Dict[int, TrackAppearance] = {}
+
+        # Keyframe crops waiting for batched appearance analysis, and each queued track's last frame
+        self.keyframe_selector = keyframe_selector or KeyframeSelector()
+        self.appearance_batch_frames = max(1, appearance_batch_frames)
+        self._pending_appearance: List[Keyframe] = []
+        self._pending_frames: Dict[int, int] = {}
+        self._pending_since = 0  # frame_count when the oldest queued crop was taken
+
+        # Completed tracklets (not collected when streaming to a sink)
+        self.sink = sink
         self.completed_tracklets: List[Tracklet] = []
 
-        # Frame counter
+        # Frame counter, and the detections of the last processed frame (for caching)
         self.frame_count = 0
+        self.last_detections: List[Dict] = []
 
         logger.info(
             f"TrackletGenerator initialized for camera={camera_id}, "
@@ -168,7 +254,8 @@ class TrackletGenerator:
         self,
         frame: np.ndarray,
         timestamp: datetime,
-        frame_id: int
+        frame_id: int,
+        detections: Optional[List[Dict]] = None
     ) -> List[Track]:
         """
         Process a single video frame.
@@ -177,14 +264,29 @@ class TrackletGenerator:
             frame: RGB video frame (H, W, 3)
             timestamp: Frame timestamp
             frame_id: Frame number
+            detections: This frame's person detections from an earlier run
+                        (e.g. the stage cache); skips the motion gate and the
+                        detector. The frame is still needed for the keyframe crops.
 
         Returns:
             List of active tracks after processing
         """
         self.frame_count += 1
 
-        # Step 1: Detect persons
-        detections = self.person_detector.detect(frame)
+        # Step 1: Detect persons (unless given, or the motion gate says nothing changed)
+        if detections is None:
+            run_detector = True
+            if self.motion_gate is not None:
+                gate_image = frame if self.roi is None else self.roi.crop(frame)[0]
+                run_detector = self.motion_gate.should_detect(self.motion_gate.measure_motion(gate_image))
+
+            if run_detector:
+                detections = self.person_detector.detect(frame, roi=self.roi, tiling=self.tiling)
+                if self.motion_gate is not None:
+                    self.motion_gate.record(detections)
+            else:
+                detections = []  # Last known result was empty
+        self.last_detections = detections
 
         # Convert to ByteTracker Detection format
         byte_detections = [
@@ -199,66 +301,136 @@ class TrackletGenerator:
         # Step 2: Update tracker
         active_tracks = self.tracker.update(byte_detections)
 
-        # Step 3: Extract appearance for each active track
-        for track in active_tracks:
-            # Extract person crop from bounding box
-            x1, y1, x2, y2 = track.bbox.astype(int)
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
-
-            if x2 <= x1 or y2 <= y1:
-                continue  # Invalid crop
-
-            person_crop = frame[y1:y2, x1:x2]
-
-            # Analyze outfit every N frames to save compute (e.g., every 3 frames = 3 sec at 1 FPS)
-            if track.track_id not in self.track_appearances:
-                self.track_appearances[track.track_id] = {
-                    "outfits": [],
-                    "embeddings": [],
-                    "crops": [],
-                    "frame_ids": [],  # Frame IDs for keyframe sampling
-                    "timestamps": [],  # Datetime timestamps for t_in/t_out
-                    "bboxes": []
-                }
+        # Step 3: Score every track's crop; queue the best of each closed keyframe window
+        # (e.g. the sharpest, least occluded crop of 3 frames = 3 sec at 1 FPS)
+        self._queue_keyframes(self.keyframe_selector.select(frame, active_tracks, frame_id, timestamp))
 
-            # Sample keyframes for appearance extraction (e.g., every 3 frames)
-            if len(self.track_appearances[track.track_id]["crops"]) == 0 or \
-               (frame_id - self.track_appearances[track.track_id]["frame_ids"][-1]) >= 3:
-
-                # Analyze garment and extract embedding
-                try:
-                    outfit = self.garment_analyzer.analyze(person_crop)
-
-                    # Store appearance data
-                    self.track_appearances[track.track_id]["outfits"].append(outfit)
-                    if outfit.visual_embedding is not None:
-                        self.track_appearances[track.track_id]["embeddings"].append(
-                            outfit.visual_embedding
-                        )
-                    self.track_appearances[track.track_id]["crops"].append(person_crop)
-                    self.track_appearances[track.track_id]["frame_ids"].append(frame_id)
-                    self.track_appearances[track.track_id]["timestamps"].append(timestamp)
-                    self.track_appearances[track.track_id]["bboxes"].append(track.bbox.copy())
-
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to analyze outfit for track {track.track_id}: {e}"
-                    )
+        # Analyze all queued crops at once (every appearance_batch_frames frames)
+        if self._pending_appearance and \
+           self.frame_count - self._pending_since + 1 >= self.appearance_batch_frames:
+            self.flush_appearance()
 
         # Step 4: Finalize removed tracks (generate tracklets)
+        self._finalize_removed_tracks(timestamp)
+
+        return active_tracks
+
+    def skip_frames(self, count: int, timestamp: datetime) -> None:
+        """
+        Advance tracking over frames that were not recorded (e.g. the gap
+        between two consecutive videos of a pin).
+
+        Live tracks age as if nothing was detected: they are lost, and removed
+        (finalized into tracklets) once the gap exceeds the tracker's buffer.
+
+        Args:
+            count: Number of missing frames (at the analysis frame rate)
+            timestamp: Timestamp for tracklets finalized during the gap
+        """
+        for _ in range(count):
+            self.tracker.update([])
+            self._finalize_removed_tracks(timestamp)
+
+    def _queue_keyframes(self, keyframes: List[Keyframe]) -> None:
+        """Queue selected keyframe crops for batched appearance analysis."""
+        for keyframe in keyframes:
+            if keyframe.track_id not in self.track_appearances:
+                self.track_appearances[keyframe.track_id] = TrackAppearance(
+                    max_crops=self.max_keyframe_crops,
+                    crop_height=self.keyframe_crop_height,
+                )
+            if not self._pending_appearance:
+                self._pending_since = self.frame_count
+            self._pending_appearance.append(keyframe)
+            self._pending_frames[keyframe.track_id] = keyframe.frame_id
+
+    def flush_appearance(self) -> None:
+        """
+        Analyze all queued keyframe crops in one batch and add the results
+        to their tracks.
+
+        One GarmentAnalyzer.analyze_batch call: a single color pass and a
+        single CLIP forward pass for every person due for a keyframe, instead
+        of one per person. Crops that fail analysis are dropped (the track is
+        sampled again on a later frame).
+        """
+        pending, self._pending_appearance = self._pending_appearance, []
+        self._pending_frames.clear()
+        if not pending:
+            return
+
+        try:
+            outfits = self.garment_analyzer.analyze_batch([keyframe.crop for keyframe in pending])
+        except Exception as e:
+            logger.warning(f"Failed to analyze outfits of {len(pending)} crops: {e}")
+            return
+
+        for keyframe, outfit in zip(pending, outfits):
+            appearance = self.track_appearances.get(keyframe.track_id)
+            if appearance is None:
+                continue  # Track finalized meanwhile
+            if outfit is None:
+                logger.warning(f"Failed to analyze outfit for track {keyframe.track_id}")
+                continue
+
+            # Fold into the running aggregates (the crop is kept only if its score ranks in the top K)
+            appearance.add(
+                outfit, keyframe.frame_id, keyframe.timestamp, keyframe.bbox,
+                crop=keyframe.crop, crop_score=keyframe.score,
+            )
+
+    def _finalize_removed_tracks(self, timestamp: datetime) -> None:
+        """Create tracklets for tracks the tracker removed in the last update."""
+        # Their open keyframe windows and queued crops are part of their tracklets
+        self._queue_keyframes(self.keyframe_selector.close(
+            [track.track_id for track in self.tracker.removed_tracks], forget=True
+        ))
+        if any(track.track_id in self._pending_frames for track in self.tracker.removed_tracks):
+            self.flush_appearance()
+
         for track in self.tracker.removed_tracks:
             if track.track_id in self.track_appearances:
                 tracklet = self._create_tracklet(track, timestamp)
                 if tracklet is not None:
-                    self.completed_tracklets.append(tracklet)
+                    self._emit(tracklet)
                 # Clean up appearance cache
                 del self.track_appearances[track.track_id]
 
         # Clear removed tracks
         self.tracker.removed_tracks.clear()
 
-        return active_tracks
+    def _emit(self, tracklet: Tracklet) -> None:
+        """Hand a finished tracklet to the sink, or collect it."""
+        if self.sink is not None:
+            self.sink.write(tracklet.to_dict())
+        else:
+            self.completed_tracklets.append(tracklet)
+
+    def process_frames(
+        self,
+        frames: Iterable,
+        start_time: datetime
+    ) -> List[Tracklet]:
+        """
+        Process a stream of frames and finalize tracks at the end.
+
+        Consumes frames lazily, so it works directly with the in-memory iterator
+        from FFmpegService.stream_frames() (or load_extracted_frames() when debugging).
+
+        Args:
+            frames: Iterable of VideoFrame-like objects exposing
+                    `image` (RGB), `timestamp_seconds` and `frame_number`
+            start_time: Wall-clock time of the first frame (e.g. video.recorded_at)
+
+        Returns:
+            List of completed tracklets
+        """
+        timestamp = start_time
+        for video_frame in frames:
+            timestamp = start_time + timedelta(seconds=video_frame.timestamp_seconds)
+            self.process_frame(video_frame.image, timestamp, video_frame.frame_number)
+
+        return self.finalize_all_tracks(timestamp)
 
     def _create_tracklet(self, track: Track, current_timestamp: datetime) -> Optional[Tracklet]:
         """
@@ -275,33 +447,29 @@ class TrackletGenerator:
             logger.debug(f"Track {track.track_id} has no appearance data, skipping tracklet")
             return None
 
-        appearance_data = self.track_appearances[track.track_id]
+        appearance = self.track_appearances[track.track_id]
 
         # Require minimum observations
-        if len(appearance_data["outfits"]) < 2:
-            logger.debug(f"Track {track.track_id} has insufficient observations ({len(appearance_data['outfits'])}), skipping")
+        if appearance.num_observations < 2:
+            logger.debug(f"Track {track.track_id} has insufficient observations ({appearance.num_observations}), skipping")
             return None
 
         # Aggregate outfit descriptors (use most frequent type/color)
-        outfit = self._aggregate_outfits(appearance_data["outfits"])
+        outfit = appearance.aggregate_outfit()
 
-        # Aggregate visual embeddings (mean pooling)
-        visual_embedding = None
-        if self.extract_embeddings and appearance_data["embeddings"]:
-            visual_embedding = np.mean(appearance_data["embeddings"], axis=0)
-            # Re-normalize after averaging
-            visual_embedding = visual_embedding / np.linalg.norm(visual_embedding)
+        # Aggregate visual embeddings (running mean, re-normalized)
+        visual_embedding = appearance.mean_embedding() if self.extract_embeddings else None
 
         # Calculate physique attributes
-        height_category, aspect_ratio = self._estimate_physique(appearance_data["bboxes"])
+        height_category, aspect_ratio = appearance.physique()
 
         # Calculate quality score
-        quality = self._calculate_quality(track, appearance_data)
+        quality = self._calculate_quality(track, appearance)
 
         # Calculate timestamps from cached appearance data
-        if appearance_data["timestamps"]:
-            t_in = appearance_data["timestamps"][0]  # First observation timestamp
-            t_out = appearance_data["timestamps"][-1]  # Last observation timestamp
+        if appearance.first_timestamp is not None:
+            t_in = appearance.first_timestamp  # First observation timestamp
+            t_out = appearance.last_timestamp  # Last observation timestamp
             duration_sec = (t_out - t_in).total_seconds()
         else:
             # Fallback if no timestamps (shouldn't happen with >=2 observations)
@@ -317,7 +485,7 @@ class TrackletGenerator:
             t_out=t_out,
             duration_seconds=duration_sec,
             bbox_sequence=[bbox.tolist() for bbox in track.bbox_history],
-            frame_sequence=track.frame_history.copy(),
+            frame_sequence=track.frame_history.tolist(),
             avg_bbox=track.average_bbox,
             outfit=outfit,
             visual_embedding=visual_embedding,
@@ -325,7 +493,9 @@ class TrackletGenerator:
             aspect_ratio=aspect_ratio,
             confidence=track.average_confidence,
             quality=quality,
-            num_observations=len(appearance_data["outfits"])
+            num_observations=appearance.num_observations,
+            observation_frames=appearance.frame_ids.tolist(),
+            observation_boxes=appearance.observation_boxes(),
         )
 
         logger.info(
@@ -335,87 +505,7 @@ class TrackletGenerator:
 
         return tracklet
 
-    def _aggregate_outfits(self, outfits: List[OutfitDescriptor]) -> OutfitDescriptor:
-        """
-        Aggregate multiple outfit observations into single descriptor.
-
-        Uses mode (most frequent) for type/color selection.
-
-        Args:
-            outfits: List of outfit descriptors from track
-
-        Returns:
-            Aggregated outfit descriptor
-        """
-        from collections import Counter
-
-        # Aggregate top
-        top_types = [o.top.type for o in outfits if o.top]
-        top_colors = [o.top.color for o in outfits if o.top]
-        top_type = Counter(top_types).most_common(1)[0][0] if top_types else "unknown"
-        top_color = Counter(top_colors).most_common(1)[0][0] if top_colors else "unknown"
-
-        # Aggregate bottom
-        bottom_types = [o.bottom.type for o in outfits if o.bottom]
-        bottom_colors = [o.bottom.color for o in outfits if o.bottom]
-        bottom_type = Counter(bottom_types).most_common(1)[0][0] if bottom_types else "unknown"
-        bottom_color = Counter(bottom_colors).most_common(1)[0][0] if bottom_colors else "unknown"
-
-        # Aggregate shoes
-        shoe_types = [o.shoes.type for o in outfits if o.shoes]
-        shoe_colors = [o.shoes.color for o in outfits if o.shoes]
-        shoe_type = Counter(shoe_types).most_common(1)[0][0] if shoe_types else "unknown"
-        shoe_color = Counter(shoe_colors).most_common(1)[0][0] if shoe_colors else "unknown"
-
-        # Return aggregated outfit (using first outfit as template)
-        outfit = outfits[0]
-        outfit.top.type = top_type
-        outfit.top.color = top_color
-        outfit.bottom.type = bottom_type
-        outfit.bottom.color = bottom_color
-        outfit.shoes.type = shoe_type
-        outfit.shoes.color = shoe_color
-
-        return outfit
-
-    def _estimate_physique(self, bboxes: List[np.ndarray]) -> Tuple[str, float]:
-        """
-        Estimate non-biometric physique attributes from bounding boxes.
-
-        Args:
-            bboxes: List of bounding boxes [[x1, y1, x2, y2], ...]
-
-        Returns:
-            Tuple of (height_category, aspect_ratio)
-        """
-        if not bboxes:
-            return "medium", 0.5
-
-        # Calculate average aspect ratio (width/height)
-        aspect_ratios = []
-        for bbox in bboxes:
-            x1, y1, x2, y2 = bbox
-            w, h = x2 - x1, y2 - y1
-            if h > 0:
-                aspect_ratios.append(w / h)
-
-        avg_aspect_ratio = np.mean(aspect_ratios) if aspect_ratios else 0.5
-
-        # Estimate height category from average bbox height
-        # TODO: Calibrate per camera using reference objects
-        heights = [bbox[3] - bbox[1] for bbox in bboxes]
-        avg_height = np.mean(heights)
-
-        if avg_height < 100:
-            height_category = "short"
-        elif avg_height > 200:
-            height_category = "tall"
-        else:
-            height_category = "medium"
-
-        return height_category, float(avg_aspect_ratio)
-
-    def _calculate_quality(self, track: Track, appearance_data: Dict) -> float:
+    def _calculate_quality(self, track: Track, appearance: TrackAppearance) -> float:
         """
         Calculate tracklet quality score (0-1).
 
@@ -426,13 +516,13 @@ class TrackletGenerator:
 
         Args:
             track: Track object
-            appearance_data: Appearance data dictionary
+            appearance: Track's appearance aggregates
 
         Returns:
             Quality score (0-1)
         """
         # Factor 1: Observation count (normalize to 0-1, saturate at 10 observations)
-        obs_score = min(1.0, len(appearance_data["outfits"]) / 10.0)
+        obs_score = min(1.0, appearance.num_observations / 10.0)
 
         # Factor 2: Detection confidence
         conf_score = track.average_confidence
@@ -449,43 +539,250 @@ class TrackletGenerator:
         """
         Finalize all remaining tracks (called at end of video).
 
+        With a sink, the remaining tracklets are written to it and it is
+        flushed (closing it is up to its owner).
+
         Args:
             timestamp: Final timestamp
 
         Returns:
-            List of completed tracklets
+            List of completed tracklets (empty with a sink)
         """
+        self._queue_keyframes(self.keyframe_selector.close())
+        self.flush_appearance()
+
         # Mark all tracks as removed
         all_tracks = self.tracker.get_all_tracks()
         for track in all_tracks:
             track.state = TrackState.REMOVED  # Force removal
             tracklet = self._create_tracklet(track, timestamp)
             if tracklet is not None:
-                self.completed_tracklets.append(tracklet)
+                self._emit(tracklet)
 
         # Clear cache
         self.track_appearances.clear()
         self.tracker.reset()
+        self.keyframe_selector.reset()
+        if self.sink is not None:
+            self.sink.flush()
 
         return self.completed_tracklets
 
     def get_tracklets(self) -> List[Tracklet]:
-        """Get all completed tracklets"""
+        """Get all completed tracklets (those not written to the sink)"""
         return self.completed_tracklets
 
+    def get_state(self) -> Dict[str, Any]:
+        """
+        JSON-serializable snapshot of the tracking state.
+
+        Holds the tracker (live tracks and counters), the per-track appearance
+        aggregates and the completed tracklets not collected yet, so a
+        generator in another process can continue with load_state(). Kept
+        person crops are not included (they are only kept for debugging), and
+        the motion gate starts over, which only means its first frame is
+        detected. Open keyframe windows are closed early (their best crops
+        are analyzed). With a sink, it is flushed first, so the snapshot and
+        the sink together hold every tracklet.
+
+        Returns:
+            Dict for load_state()
+        """
+        self._queue_keyframes(self.keyframe_selector.close())
+        self.flush_appearance()
+        if self.sink is not None:
+            self.sink.flush()
+        return {
+            "camera_id": self.camera_id,
+            "mall_id": self.mall_id,
+            "frame_count": self.frame_count,
+            "tracker": self.tracker.to_dict(),
+            "track_appearances": {
+                str(track_id): appearance.to_dict()
+                for track_id, appearance in self.track_appearances.items()
+            },
+            "completed_tracklets": [tracklet.to_dict() for tracklet in self.completed_tracklets],
+        }
+
+    def load_state(self, state: Dict[str, Any], frame_offset: int = 0) -> None:
+        """
+        Continue from a get_state() snapshot (replaces the current state).
+
+        Models and configuration (detector, garment analyzer, ROI, tiling)
+        stay those of this generator; the tracker is rebuilt from the snapshot
+        with the parameters it was created with.
+
+        Args:
+            state: Output of get_state()
+            frame_offset: Added to every frame number of the snapshot, to
+                          continue in a video whose frame numbers start over
+                          (e.g. -last_frame of the previous video)
+        """
+        if frame_offset:
+            state = shift_state_frames(state, frame_offset)
+        self.tracker = ByteTracker.from_dict(state["tracker"])
+        self.frame_count = state["frame_count"]
+        self.track_appearances = {
+            int(track_id): TrackAppearance.from_dict(
+                appearance,
+                max_crops=self.max_keyframe_crops,
+                crop_height=self.keyframe_crop_height,
+            )
+            for track_id, appearance in state["track_appearances"].items()
+        }
+        self.completed_tracklets = []
+        for tracklet in state["completed_tracklets"]:
+            self._emit(Tracklet.from_dict(tracklet))
+        self._pending_appearance.clear()
+        self._pending_frames.clear()
+        self.keyframe_selector.reset()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        logger.info(
+            f"TrackletGenerator state loaded: {len(self.tracker.get_all_tracks())} live tracks, "
+            f"next track ID {self.tracker.next_id}"
+        )
+
     def reset(self):
         """Reset generator state"""
         self.tracker.reset()
         self.track_appearances.clear()
         self.completed_tracklets.clear()
+        self._pending_appearance.clear()
+        self._pending_frames.clear()
+        self.keyframe_selector.reset()
         self.frame_count = 0
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
         logger.info("TrackletGenerator reset")
 
 
+def shift_state_frames(state: Dict[str, Any], offset: int) -> Dict[str, Any]:
+    """
+    Copy of a TrackletGenerator.get_state() snapshot with every frame number
+    moved by `offset`.
+
+    Args:
+        state: Output of TrackletGenerator.get_state()
+        offset: Frames to add (negative to move the snapshot before frame 1)
+
+    Returns:
+        Shifted snapshot (the input is not modified)
+    """
+    def shift(frames: List[int]) -> List[int]:
+        return [int(frame) + offset for frame in frames]
+
+    tracker = state["tracker"]
+    return {
+        **state,
+        "tracker": {
+            **tracker,
+            "tracks": [
+                {
+                    **track,
+                    "frame_id": track["frame_id"] + offset,
+                    "frame_history": shift(track["frame_history"]),
+                }
+                for track in tracker["tracks"]
+            ],
+        },
+        "track_appearances": {
+            track_id: {**appearance, "frame_ids": shift(appearance["frame_ids"])}
+            for track_id, appearance in state["track_appearances"].items()
+        },
+        "completed_tracklets": [
+            {
+                **tracklet,
+                "frame_sequence": shift(tracklet.get("frame_sequence", [])),
+                "observation_frames": shift(tracklet.get("observation_frames", [])),
+            }
+            for tracklet in state["completed_tracklets"]
+        ],
+    }
+
+
+# Tracklet fields computed by garment analysis and CLIP (the rest comes from tracking)
+APPEARANCE_FIELDS = ("outfit", "visual_embedding")
+
+
+def analyze_track_appearance(
+    frames: Iterable,
+    tracklets: List[Dict[str, Any]],
+    garment_analyzer: GarmentAnalyzer,
+    start_time: datetime,
+    extract_embeddings: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Appearance of tracks that are already known, without detection or tracking.
+
+    Re-analyzes the keyframes a TrackletGenerator run selected for each
+    tracklet (observation_frames and observation_boxes): the crops are cut
+    from the frames as during tracking, analyzed in one
+    GarmentAnalyzer.analyze_batch call per frame and aggregated the same way,
+    so e.g. a new CLIP model reuses the tracks. Tracks left with fewer than
+    two analyzed crops get no appearance (TrackletGenerator drops them too).
+
+    Args:
+        frames: Iterable of VideoFrame-like objects (image, timestamp_seconds,
+                frame_number) covering the observation frames
+        tracklets: Tracklet dicts (Tracklet.to_dict(); APPEARANCE_FIELDS not needed)
+        garment_analyzer: Garment analysis pipeline
+        start_time: Wall-clock time of the first frame
+        extract_embeddings: Whether to aggregate visual embeddings
+
+    Returns:
+        One dict per analyzed track: track_id and APPEARANCE_FIELDS as in Tracklet.to_dict()
+    """
+    due: Dict[int, List] = {}  # {frame_number: [(track_id, bbox)]}
+    appearances: Dict[int, TrackAppearance] = {}
+    for tracklet in tracklets:
+        appearances[tracklet["track_id"]] = TrackAppearance(max_crops=0)
+        for frame_id, bbox in zip(tracklet["observation_frames"], tracklet["observation_boxes"]):
+            due.setdefault(int(frame_id), []).append((tracklet["track_id"], np.asarray(bbox, dtype=np.float32)))
+
+    for video_frame in frames:
+        observations = due.pop(video_frame.frame_number, None)
+        if not observations:
+            continue
+        timestamp = start_time + timedelta(seconds=video_frame.timestamp_seconds)
+        try:
+            outfits = garment_analyzer.analyze_batch(
+                [crop_box(video_frame.image, bbox).copy() for _, bbox in observations]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to analyze outfits of {len(observations)} crops: {e}")
+            continue
+        for (track_id, bbox), outfit in zip(observations, outfits):
+            if outfit is not None:
+                appearances[track_id].add(outfit, video_frame.frame_number, timestamp, bbox)
+
+    results = []
+    for track_id, appearance in appearances.items():
+        if appearance.num_observations < 2:
+            continue
+        embedding = appearance.mean_embedding() if extract_embeddings else None
+        results.append({
+            "track_id": track_id,
+            "outfit": {
+                key: value for key, value in appearance.aggregate_outfit().to_dict().items()
+                if key != "visual_embedding"
+            },
+            "visual_embedding": embedding.tolist() if embedding is not None else None,
+        })
+    return results
+
+
 def create_tracklet_generator(
     camera_id: str,
     mall_id: str,
-    extract_embeddings: bool = True
+    extract_embeddings: bool = True,
+    motion_gate: Optional[MotionGate] = None,
+    roi: Optional[RegionOfInterest] = None,
+    tiling: Optional[TilingConfig] = None,
+    appearance_batch_frames: int = 1,
+    max_keyframe_crops: int = 3,
+    sink: Optional[TrackletSink] = None,
+    keyframe_selector: Optional[KeyframeSelector] = None
 ) -> TrackletGenerator:
     """
     Factory function to create TrackletGenerator with default components.
@@ -494,6 +791,13 @@ def create_tracklet_generator(
         camera_id: Camera identifier
         mall_id: Mall identifier
         extract_embeddings: Whether to extract visual embeddings
+        motion_gate: Optional motion gate (e.g. from the pin's motion_gate config)
+        roi: Optional region of interest (e.g. from the pin's roi_polygons)
+        tiling: Optional tiling config (e.g. from resolve_tiling() for the pin)
+        appearance_batch_frames: Frames whose keyframe crops are analyzed together
+        max_keyframe_crops: Best crops kept per live track (0 = none)
+        sink: Optional destination for finished tracklets (see app.cv.tracklet_sink)
+        keyframe_selector: Optional keyframe selection (window, budget, min score)
 
     Returns:
         TrackletGenerator instance
@@ -509,5 +813,12 @@ def create_tracklet_generator(
         person_detector=person_detector,
         garment_analyzer=garment_analyzer,
         tracker=tracker,
-        extract_embeddings=extract_embeddings
+        extract_embeddings=extract_embeddings,
+        motion_gate=motion_gate,
+        roi=roi,
+        tiling=tiling,
+        appearance_batch_frames=appearance_batch_frames,
+        max_keyframe_crops=max_keyframe_crops,
+        sink=sink,
+        keyframe_selector=keyframe_selector
     )
@@ -0,0 +1,191 @@
+"""
+Streaming Tracklet Sinks
+
+Destinations for finished tracklets, written in batches while tracking runs
+(TrackletGenerator(sink=...)) instead of being collected until the end of the
+video. Tracklets that were flushed survive a worker failure, memory stays flat
+however long the video is, and readers can see partial results of a running job.
+
+Implementations:
+- MemoryTrackletSink: keeps the tracklets in a list (tests, scripts)
+- ObjectStoreTrackletSink: one object per batch (gzipped NDJSON, or Parquet
+  with pyarrow installed) under a prefix; read back with read_tracklet_parts()
+- DatabaseTrackletSink (app.tasks.analysis_tasks): bulk-inserts Tracklet rows
+
+Tracklets are passed as Tracklet.to_dict() dicts, the form every sink persists.
+"""
+import gzip
+import io
+import json
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SINK_FORMATS = ("ndjson", "parquet")
+
+
+class TrackletSink:
+    """
+    Base class: buffers tracklets and writes them in batches.
+
+    Subclasses implement _write_batch(). A batch is written once batch_size
+    tracklets are buffered, or on the next write once the oldest buffered
+    tracklet has waited max_wait_seconds (so sparse scenes still show up
+    promptly), and on flush()/close().
+    """
+
+    def __init__(self, batch_size: int = 50, max_wait_seconds: Optional[float] = None):
+        """
+        Args:
+            batch_size: Tracklets per write
+            max_wait_seconds: Write a partial batch once its oldest tracklet
+                              is this old (None = only full batches)
+        """
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self.written = 0
+        self.batches = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffered_since = 0.0
+
+    def write(self, tracklet: Dict[str, Any]) -> None:
+        """Add one finished tracklet (Tracklet.to_dict())."""
+        if not self._buffer:
+            self._buffered_since = time.monotonic()
+        self._buffer.append(tracklet)
+        if len(self._buffer) >= self.batch_size or (
+            self.max_wait_seconds is not None
+            and time.monotonic() - self._buffered_since >= self.max_wait_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered tracklets (if any)."""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self._write_batch(batch)
+        self.written += len(batch)
+        self.batches += 1
+        logger.debug(f"{type(self).__name__}: wrote {len(batch)} tracklets ({self.written} total)")
+
+    def close(self) -> None:
+        """Flush the remaining tracklets."""
+        self.flush()
+
+    def _write_batch(self, tracklets: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def __enter__(self) -> "TrackletSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Also on errors: whatever was finished is kept
+        self.close()
+
+
+class MemoryTrackletSink(TrackletSink):
+    """Collects written tracklets in memory (`tracklets`)."""
+
+    def __init__(self, batch_size: int = 50, max_wait_seconds: Optional[float] = None):
+        super().__init__(batch_size, max_wait_seconds)
+        self.tracklets: List[Dict[str, Any]] = []
+
+    def _write_batch(self, tracklets: List[Dict[str, Any]]) -> None:
+        self.tracklets.extend(tracklets)
+
+
+class ObjectStoreTrackletSink(TrackletSink):
+    """
+    Writes each batch as its own object, `{prefix}/part_00000.ndjson.gz`,
+    `part_00001...` (object stores cannot append).
+
+    Parquet parts (`.parquet`) need pyarrow, which is not a base requirement.
+    """
+
+    def __init__(
+        self,
+        storage,
+        prefix: str,
+        format: str = "ndjson",
+        batch_size: int = 50,
+        max_wait_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            storage: StorageService (upload_bytes)
+            prefix: Object key prefix of the parts
+            format: "ndjson" (gzipped) or "parquet"
+            batch_size: Tracklets per part
+            max_wait_seconds: Write a partial part once its oldest tracklet is this old
+        """
+        if format not in SINK_FORMATS:
+            raise ValueError(f"Unknown tracklet sink format: {format} (expected one of {SINK_FORMATS})")
+        if format == "parquet":
+            _require_pyarrow()
+        super().__init__(batch_size, max_wait_seconds)
+        self.storage = storage
+        self.prefix = prefix.rstrip("/")
+        self.format = format
+        self.paths: List[str] = []
+
+    def _write_batch(self, tracklets: List[Dict[str, Any]]) -> None:
+        path = part_path(self.prefix, len(self.paths), self.format)
+        if self.format == "parquet":
+            data, content_type = _encode_parquet(tracklets), "application/vnd.apache.parquet"
+            metadata = None
+        else:
+            data = gzip.compress("".join(json.dumps(t) + "\n" for t in tracklets).encode("utf-8"))
+            content_type, metadata = "application/x-ndjson", {"content-encoding": "gzip"}
+        self.storage.upload_bytes(data, path, content_type=content_type, metadata=metadata)
+        self.paths.append(path)
+
+
+def part_path(prefix: str, index: int, format: str = "ndjson") -> str:
+    """Object key of one ObjectStoreTrackletSink part."""
+    suffix = ".parquet" if format == "parquet" else ".ndjson.gz"
+    return f"{prefix.rstrip('/')}/part_{index:05d}{suffix}"
+
+
+def read_tracklet_parts(storage, paths: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Tracklets of ObjectStoreTrackletSink parts, one part in memory at a time.
+
+    Args:
+        storage: StorageService (download_bytes)
+        paths: Part object keys (format taken from the suffix)
+
+    Yields:
+        Tracklet dicts in write order
+    """
+    for path in paths:
+        data = storage.download_bytes(path)
+        if path.endswith(".parquet"):
+            yield from _decode_parquet(data)
+        else:
+            for line in gzip.decompress(data).decode("utf-8").splitlines():
+                if line:
+                    yield json.loads(line)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is not installed. Install with: pip install pyarrow")
+    return pyarrow
+
+
+def _encode_parquet(tracklets: List[Dict[str, Any]]) -> bytes:
+    pa = _require_pyarrow()
+    buffer = io.BytesIO()
+    pa.parquet.write_table(pa.Table.from_pylist(tracklets), buffer)
+    return buffer.getvalue()
+
+
+def _decode_parquet(data: bytes) -> List[Dict[str, Any]]:
+    pa = _require_pyarrow()
+    return pa.parquet.read_table(io.BytesIO(data)).to_pylist()
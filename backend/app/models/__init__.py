@@ -4,7 +4,7 @@ SQLAlchemy ORM models.
 from app.models.user import User, UserRole
 from app.models.mall import Mall, Store, Tenant
 from app.models.camera import CameraPin, Video, ProcessingJob
-from app.models.cv_pipeline import VisitorProfile, Tracklet, Association, Journey
+from app.models.cv_pipeline import VisitorProfile, Tracklet, Association, Journey, StageResult
 
 __all__ = [
     # User models
@@ -23,4 +23,5 @@ __all__ = [
     "Tracklet",
     "Association",
     "Journey",
+    "StageResult",
 ]
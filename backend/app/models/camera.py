@@ -42,6 +42,11 @@ class CameraPin(Base):
     camera_fps = Column(Integer, nullable=False, default=15)
     camera_note = Column(Text, nullable=True)
 
+    # CV settings
+    motion_gate = Column(JSONB, nullable=True)  # Motion gate overrides, see app.cv.motion_gate.MotionGateConfig
+    roi_polygons = Column(JSONB, nullable=True)  # [[[x, y], ...], ...] normalized walkable-area polygons
+    tiling = Column(JSONB, nullable=True)  # Tiled inference overrides, see app.cv.tiling.TilingConfig
+
     # Timestamps
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -91,6 +96,9 @@ class Video(Base):
     height = Column(Integer, nullable=True)
     fps = Column(sa.Numeric(5, 2), nullable=True)
     codec = Column(String(50), nullable=True)
+    has_audio = Column(Boolean, nullable=True)
+    probe_metadata = Column(JSONB, nullable=True)  # Full FFmpegService.extract_metadata() result (exact duration, start time)
+    keyframe_times = Column(JSONB, nullable=True)  # Keyframe presentation times, for segmented decoding
 
     # Upload metadata (operator-provided)
     recorded_at = Column(DateTime, nullable=True, index=True)  # Actual CCTV recording timestamp
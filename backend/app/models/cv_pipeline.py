@@ -4,7 +4,7 @@ Computer vision pipeline models (future use - Phase 3+).
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, DateTime, Date, Integer, Float, ARRAY, Index, ForeignKey
+from sqlalchemy import Column, String, DateTime, Date, Integer, BigInteger, Float, ARRAY, Index, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -143,3 +143,39 @@ class Journey(Base):
 
     def __repr__(self):
         return f"<Journey {self.id} ({self.confidence:.2f})>"
+
+
+class StageResult(Base):
+    """
+    Index entry of a cached CV stage result (see app.services.stage_cache_service).
+
+    The result itself lives in object storage; this row maps the content key
+    (video checksum, stage, model version, parameters) to its object.
+    """
+    __tablename__ = "stage_results"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Content key
+    checksum_sha256 = Column(String(64), nullable=False, index=True)  # Source video content
+    stage = Column(String(50), nullable=False)  # detections | tracks | appearance
+    model_version = Column(String(255), nullable=False)
+    params_hash = Column(String(64), nullable=False)  # SHA256 of canonical params (incl. upstream stage key)
+    params = Column(JSONB, nullable=False)
+
+    # Stored result
+    object_path = Column(String(512), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False, default=0)
+    source_video_id = Column(UUID(as_uuid=True), ForeignKey('videos.id', ondelete='SET NULL'), nullable=True)
+
+    # Usage
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('checksum_sha256', 'stage', 'model_version', 'params_hash', name='uq_stage_result_key'),
+    )
+
+    def __repr__(self):
+        return f"<StageResult {self.stage} {self.checksum_sha256[:12]} {self.params_hash[:12]}>"
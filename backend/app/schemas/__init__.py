@@ -24,6 +24,8 @@ from app.schemas.camera import (
     CameraPin,
     CameraPinCreate,
     CameraPinUpdate,
+    MotionGateSettings,
+    TilingSettings,
     Video,
     VideoCreate,
     VideoUpdate,
@@ -75,6 +77,8 @@ __all__ = [
     "CameraPin",
     "CameraPinCreate",
     "CameraPinUpdate",
+    "MotionGateSettings",
+    "TilingSettings",
     "Video",
     "VideoCreate",
     "VideoUpdate",
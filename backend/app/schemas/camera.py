@@ -2,13 +2,53 @@
 Pydantic schemas for CameraPin and Video models.
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 
 
 # CameraPin schemas
+class MotionGateSettings(BaseModel):
+    """Per-pin motion gate settings (skip detection on static footage)."""
+    enabled: bool = True
+    downscale_width: int = Field(default=160, ge=32, le=1920)
+    blur_kernel: int = Field(default=5, ge=0, le=31)
+    pixel_threshold: int = Field(default=25, ge=1, le=255, description="Per-pixel intensity change counted as motion")
+    min_motion_ratio: float = Field(default=0.002, ge=0.0, le=1.0, description="Fraction of changed pixels that counts as motion")
+    background_alpha: float = Field(default=0.05, gt=0.0, le=1.0, description="Background model learning rate")
+    max_skip_frames: int = Field(default=30, ge=0, description="Force a detection after this many skipped frames")
+
+
+class TilingSettings(BaseModel):
+    """Per-pin tiled inference settings (high-resolution cameras)."""
+    enabled: Optional[bool] = Field(default=None, description="None = auto, by video resolution")
+    min_long_side: Optional[int] = Field(default=None, ge=320, description="Auto mode threshold (default from settings)")
+    tile_size: int = Field(default=640, ge=32, le=4096)
+    overlap: float = Field(default=0.2, ge=0.0, lt=1.0, description="Fraction of a tile shared with its neighbour")
+    include_full_frame: bool = Field(default=True, description="Also run a downscaled whole-frame pass")
+    merge_metric: str = Field(default="ios", pattern="^(ios|iou)$")
+    merge_threshold: float = Field(default=0.6, gt=0.0, le=1.0)
+    max_batch_tiles: int = Field(default=32, ge=1, le=256)
+
+
+# Region of interest: polygons of normalized (x, y) points in [0, 1]
+RoiPolygons = List[List[Tuple[float, float]]]
+
+
+def validate_roi_polygons(polygons: Optional[RoiPolygons]) -> Optional[RoiPolygons]:
+    """Each polygon needs 3+ points inside the unit square."""
+    if polygons is None:
+        return None
+    for polygon in polygons:
+        if len(polygon) < 3:
+            raise ValueError("ROI polygon must have at least 3 points")
+        for x, y in polygon:
+            if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+                raise ValueError("ROI polygon points must be normalized to [0, 1]")
+    return polygons
+
+
 class CameraPinBase(BaseModel):
     """Base camera pin schema."""
     name: str
@@ -26,6 +66,16 @@ class CameraPinCreate(CameraPinBase):
     store_id: Optional[UUID] = None
     camera_fps: int = Field(default=15, ge=1, le=60)
     camera_note: Optional[str] = None
+    motion_gate: Optional[MotionGateSettings] = None
+    tiling: Optional[TilingSettings] = None
+    roi_polygons: Optional[RoiPolygons] = Field(
+        None, description="Walkable-area polygons, normalized (x, y) points in [0, 1]"
+    )
+
+    @field_validator('roi_polygons')
+    @classmethod
+    def check_roi_polygons(cls, v: Optional[RoiPolygons]) -> Optional[RoiPolygons]:
+        return validate_roi_polygons(v)
 
 
 class CameraPinUpdate(BaseModel):
@@ -40,6 +90,14 @@ class CameraPinUpdate(BaseModel):
     store_id: Optional[UUID] = None
     camera_fps: Optional[int] = Field(None, ge=1, le=60)
     camera_note: Optional[str] = None
+    motion_gate: Optional[MotionGateSettings] = None
+    tiling: Optional[TilingSettings] = None
+    roi_polygons: Optional[RoiPolygons] = None
+
+    @field_validator('roi_polygons')
+    @classmethod
+    def check_roi_polygons(cls, v: Optional[RoiPolygons]) -> Optional[RoiPolygons]:
+        return validate_roi_polygons(v)
 
 
 class CameraPin(CameraPinBase):
@@ -50,6 +108,9 @@ class CameraPin(CameraPinBase):
     store_id: Optional[UUID] = None
     camera_fps: int
     camera_note: Optional[str] = None
+    motion_gate: Optional[MotionGateSettings] = None
+    tiling: Optional[TilingSettings] = None
+    roi_polygons: Optional[RoiPolygons] = None
     created_at: datetime
     updated_at: datetime
 
@@ -310,6 +371,7 @@ class VideoDetailResponse(BaseModel):
     fps: Optional[float] = None
     duration_seconds: Optional[float] = None
     codec: Optional[str] = None
+    has_audio: Optional[bool] = None
 
     # Processing status
     processing_status: str = Field(
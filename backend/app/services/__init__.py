@@ -13,6 +13,8 @@ from app.services.upload_service import get_upload_service, UploadService
 from app.services.job_service import get_job_service, JobService
 from app.services.ffmpeg_service import get_ffmpeg_service, FFmpegService
 from app.services.video_service import get_video_service, VideoService
+from app.services.stage_cache_service import get_stage_cache_service, StageCacheService
+from app.services.video_cache_service import get_video_cache_service, VideoCacheService
 
 __all__ = [
     "hash_password",
@@ -31,4 +33,8 @@ __all__ = [
     "FFmpegService",
     "get_video_service",
     "VideoService",
+    "get_stage_cache_service",
+    "StageCacheService",
+    "get_video_cache_service",
+    "VideoCacheService",
 ]
@@ -5,24 +5,261 @@ Handles:
 - Proxy video generation (480p, 10fps)
 - Video metadata extraction (FFprobe)
 - Thumbnail generation
+- Raw frame streaming for CV analysis (Phase 3), optionally downscaled
+  in FFmpeg to the detector input size
+- Parallel decoding of long videos in keyframe-aligned segments, merged
+  back into one ordered frame stream
+- Single-decode ingest: proxy and thumbnails written by the same FFmpeg
+  process that streams the CV frames
+- Probe cache, so one task never runs ffprobe twice on the same file
+- Remote (HTTP) inputs, e.g. presigned object URLs, read with range
+  requests as FFmpeg needs them instead of downloaded up front
 """
+import bisect
+import math
 import os
+import re
 import logging
+import queue
 import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 from datetime import timedelta
 
 import ffmpeg
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# showinfo filter log line, e.g. "[Parsed_showinfo_1 @ 0x..] n:   3 pts: 3000 pts_time:3 ..."
+_SHOWINFO_PTS_RE = re.compile(r"Parsed_showinfo.*\bpts:\s*(-?\d+)\s+pts_time:\s*(-?[0-9.]+)")
+# showinfo time base, e.g. "[Parsed_showinfo_1 @ 0x..] config in time_base: 1/12800, ..."
+# (pts_time is printed with 6 significant digits, too coarse for long videos)
+_SHOWINFO_TIME_BASE_RE = re.compile(r"Parsed_showinfo.*config in time_base:\s*(\d+)/(\d+)")
+
+# Segmented decoding: each segment decodes this far past its end, so frames
+# reordered around the cut are not lost (duplicates are dropped when merging)
+_SEGMENT_OVERLAP_SECONDS = 0.5
+_MIN_SEGMENT_SECONDS = 10.0
+
+# Input options for HTTP inputs: resume with a new range request if the
+# connection drops mid-file (long decodes outlive idle/proxy timeouts)
+_REMOTE_INPUT_OPTIONS = {"reconnect": 1, "reconnect_delay_max": 30}
+
+
+def is_remote_input(input_path: str) -> bool:
+    """Whether input_path is a URL FFmpeg reads over HTTP(S)."""
+    return input_path.startswith(("http://", "https://"))
+
+
+def input_exists(input_path: str) -> bool:
+    """Local files must exist; remote inputs are checked by FFmpeg itself."""
+    return is_remote_input(input_path) or os.path.exists(input_path)
+
+
+def log_name(input_path: str) -> str:
+    """Input path for log lines (presigned URLs without their signature)."""
+    return input_path.split("?", 1)[0] if is_remote_input(input_path) else input_path
+
+
+def open_input(input_path: str, **kwargs):
+    """ffmpeg.input() with reconnect options for remote inputs."""
+    if is_remote_input(input_path):
+        kwargs = {**_REMOTE_INPUT_OPTIONS, **kwargs}
+    return ffmpeg.input(input_path, **kwargs)
+
+
+@dataclass
+class VideoFrame:
+    """
+    Single decoded frame yielded by FFmpegService.stream_frames().
+
+    Attributes:
+        frame_number: 1-based index of the sampled frame (matches extract_frames numbering)
+        timestamp_seconds: Presentation time relative to the start of the video
+        pts_time: Raw presentation timestamp reported by FFmpeg
+        image: RGB image (H, W, 3) uint8. When streamed, this is a view over a
+               reusable buffer - copy it if it must outlive the next few frames.
+        scale: (x, y) original-resolution pixels per image pixel, for frames
+               decoded downscaled or from the proxy (boxes found on `image`
+               are multiplied by it to get original coordinates)
+    """
+    frame_number: int
+    timestamp_seconds: float
+    pts_time: float
+    image: np.ndarray
+    scale: Tuple[float, float] = (1.0, 1.0)
+
+
+class ProbeCache:
+    """
+    LRU cache of ffprobe results.
+
+    Local files are keyed by path + mtime + size, so a rewritten file is
+    probed again, and URLs by their path without the query string. Callers
+    that know the stored object a temp file was downloaded from pass a
+    source_key (e.g. "<object key>@<etag>" or the content checksum)
+    instead, which also matches across temp directories.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(input_path: str, kind: str, source_key: Optional[str] = None) -> Tuple:
+        """Cache key of one kind of probe (format/streams, packets) of a file."""
+        if source_key is not None:
+            return (kind, "source", source_key)
+        if is_remote_input(input_path):
+            # Presigned URLs differ per signature; the object path identifies the file
+            return (kind, "url", input_path.split("?", 1)[0])
+        stat = os.stat(input_path)
+        return (kind, "file", os.path.realpath(input_path), stat.st_mtime_ns, stat.st_size)
+
+    def get_or_probe(self, key: Tuple, probe: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Cached result for key, running probe() on a miss (errors are not cached)."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = probe()
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass
+class SideOutputs:
+    """
+    Files written alongside the CV frame stream by FFmpegService.stream_frames().
+
+    The decoded video is split inside FFmpeg, so the proxy and thumbnails
+    cost an encode each but no extra decode. They are complete only once the
+    frame stream has been exhausted (partial files are removed on failure).
+
+    Attributes:
+        proxy_path: Output path of the proxy video
+        thumbnails: (timestamp_seconds, output_path) of each thumbnail
+        proxy_height: Proxy height in pixels (width keeps the aspect ratio)
+        proxy_fps: Proxy frame rate
+        preset: x264 preset for the proxy
+        crf: x264 Constant Rate Factor for the proxy
+        thumbnail_width: Thumbnail width in pixels (height keeps the aspect ratio)
+        has_audio: Whether the input has an audio stream to carry into the proxy
+    """
+    proxy_path: str
+    thumbnails: List[Tuple[float, str]]
+    proxy_height: int = 480
+    proxy_fps: int = 10
+    preset: str = "medium"
+    crf: int = 28
+    thumbnail_width: int = 320
+    has_audio: bool = False
+
+    @property
+    def paths(self) -> List[str]:
+        return [self.proxy_path, *(path for _, path in self.thumbnails)]
+
+
+def scaled_frame_size(width: int, height: int, max_size: Optional[int]) -> Tuple[int, int]:
+    """
+    Frame size with the long side capped at max_size (aspect kept, even dimensions).
+
+    Args:
+        width: Source width
+        height: Source height
+        max_size: Maximum long side (None = keep the source size)
+
+    Returns:
+        Tuple of (width, height)
+    """
+    if not max_size or max(width, height) <= max_size:
+        return width, height
+    ratio = max_size / max(width, height)
+    # Rounded down to even sizes (required by yuv420p scaling), never above max_size
+    return max(2, int(width * ratio) // 2 * 2), max(2, int(height * ratio) // 2 * 2)
+
+
+def frame_bucket(pts_time: float, fps: float, start_time: float = 0.0) -> int:
+    """Sampling interval (of length 1/fps from start_time) a frame falls into."""
+    return math.floor((pts_time - start_time) * fps + 1e-6)
+
+
+def bucket_select_expr(fps: float, start_time: float = 0.0) -> str:
+    """
+    FFmpeg `select` expression keeping the first frame of every 1/fps interval.
+
+    Unlike the prev_selected_t rule used for single-process streaming, the
+    choice depends only on a frame's own and previous timestamps, so segments
+    decoded independently pick the same frames as one pass over the file.
+    """
+    bucket = f"floor((%s-{start_time:.6f})*{fps:.6f}+0.000001)"
+    return f"isnan(prev_t)+gt({bucket % 't'},{bucket % 'prev_t'})"
+
+
+def plan_segments(
+    start_time: float,
+    duration: float,
+    count: int,
+    keyframes: Optional[List[float]] = None,
+) -> List[Tuple[Optional[float], Optional[float]]]:
+    """
+    Split a video timeline into ranges for parallel decoding.
+
+    Cut points are spread evenly and moved to the nearest keyframe, so each
+    segment's input-side seek lands on a keyframe and no frames are decoded
+    twice (without keyframes the seek is still frame-accurate, just slower).
+
+    Args:
+        start_time: First presentation time
+        duration: Video duration in seconds
+        count: Target number of segments
+        keyframes: Sorted keyframe presentation times (optional)
+
+    Returns:
+        List of (start, end) times; the first start and last end are None
+        (decode from the beginning / to the end of the file)
+    """
+    end_time = start_time + duration
+    cuts = []
+    for i in range(1, count):
+        cut = start_time + duration * i / count
+        if keyframes:
+            pos = bisect.bisect_left(keyframes, cut)
+            neighbours = keyframes[max(0, pos - 1):pos + 1]
+            cut = min(neighbours, key=lambda k: abs(k - cut))
+        if start_time < cut < end_time and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+
+    bounds: List[Optional[float]] = [None, *cuts, None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
 
 class FFmpegService:
     """Service for FFmpeg video processing operations."""
 
     def __init__(self):
         """Initialize FFmpeg service."""
+        self.probe_cache = ProbeCache()
+
         # Verify FFmpeg is installed
         try:
             ffmpeg.probe("dummy", cmd="ffmpeg")
@@ -34,12 +271,21 @@ class FFmpegService:
                 "FFmpeg is not installed. Install with: brew install ffmpeg (macOS) or apt-get install ffmpeg (Linux)"
             )
 
-    def extract_metadata(self, input_path: str) -> Dict[str, Any]:
+    def _probe(self, input_path: str, source_key: Optional[str] = None) -> Dict[str, Any]:
+        """ffmpeg.probe() of the format and streams, through the probe cache."""
+        return self.probe_cache.get_or_probe(
+            ProbeCache.key(input_path, "streams", source_key),
+            lambda: ffmpeg.probe(input_path),
+        )
+
+    def extract_metadata(self, input_path: str, source_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Extract video metadata using FFprobe.
 
         Args:
             input_path: Path to video file
+            source_key: Identity of the stored object the file was downloaded
+                        from (probe cache key instead of path/mtime/size)
 
         Returns:
             Dict with metadata:
@@ -50,19 +296,21 @@ class FFmpegService:
             - codec: str
             - bitrate: int (bps)
             - file_size_bytes: int
+            - start_time_seconds: float
+            - has_audio: bool
 
         Raises:
             FFmpegError: If FFprobe fails
             FileNotFoundError: If input file doesn't exist
         """
-        if not os.path.exists(input_path):
+        if not input_exists(input_path):
             raise FileNotFoundError(f"Video file not found: {input_path}")
 
         try:
-            logger.info(f"Extracting metadata from: {input_path}")
+            logger.info(f"Extracting metadata from: {log_name(input_path)}")
 
             # Probe video file
-            probe = ffmpeg.probe(input_path)
+            probe = self._probe(input_path, source_key)
 
             # Get video stream
             video_stream = next(
@@ -79,6 +327,8 @@ class FFmpegService:
                 "duration_seconds": float(probe["format"].get("duration", 0)),
                 "bitrate": int(probe["format"].get("bit_rate", 0)),
                 "file_size_bytes": int(probe["format"].get("size", 0)),
+                "start_time_seconds": float(probe["format"].get("start_time", 0) or 0),
+                "has_audio": any(s["codec_type"] == "audio" for s in probe["streams"]),
             }
 
             # Calculate FPS (handle variable frame rate)
@@ -100,6 +350,49 @@ class FFmpegService:
             logger.error(f"FFprobe error: {e.stderr.decode() if e.stderr else str(e)}")
             raise
 
+    def extract_keyframe_times(self, input_path: str, source_key: Optional[str] = None) -> List[float]:
+        """
+        Presentation times of the video stream's keyframes.
+
+        Reads packet flags only (no decoding), so it is cheap even for
+        multi-hour recordings.
+
+        Args:
+            input_path: Path to video file
+            source_key: Identity of the stored object the file was downloaded
+                        from (probe cache key instead of path/mtime/size)
+
+        Returns:
+            Sorted keyframe times in seconds
+
+        Raises:
+            FFmpegError: If FFprobe fails
+            FileNotFoundError: If input file doesn't exist
+        """
+        if not input_exists(input_path):
+            raise FileNotFoundError(f"Video file not found: {input_path}")
+
+        try:
+            probe = self.probe_cache.get_or_probe(
+                ProbeCache.key(input_path, "packets", source_key),
+                lambda: ffmpeg.probe(
+                    input_path,
+                    select_streams="v:0",
+                    show_entries="packet=pts_time,flags",
+                ),
+            )
+        except ffmpeg.Error as e:
+            logger.error(f"FFprobe error: {e.stderr.decode() if e.stderr else str(e)}")
+            raise
+
+        keyframes = sorted(
+            float(packet["pts_time"])
+            for packet in probe.get("packets", [])
+            if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+        )
+        logger.info(f"Found {len(keyframes)} keyframes in {log_name(input_path)}")
+        return keyframes
+
     def generate_proxy(
         self,
         input_path: str,
@@ -108,6 +401,7 @@ class FFmpegService:
         target_fps: int = 10,
         preset: str = "medium",
         crf: int = 28,
+        source_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Generate proxy video (low-res, low-fps for streaming).
@@ -119,6 +413,8 @@ class FFmpegService:
             target_fps: Target frame rate (default: 10)
             preset: FFmpeg preset (ultrafast, fast, medium, slow) - default: medium
             crf: Constant Rate Factor for quality (18-28, lower=better) - default: 28
+            source_key: Identity of the stored object input_path was downloaded
+                        from (probe cache key instead of path/mtime/size)
 
         Returns:
             Dict with proxy metadata:
@@ -133,12 +429,12 @@ class FFmpegService:
             FFmpegError: If encoding fails
             FileNotFoundError: If input file doesn't exist
         """
-        if not os.path.exists(input_path):
+        if not input_exists(input_path):
             raise FileNotFoundError(f"Input video not found: {input_path}")
 
         try:
             logger.info(
-                f"Generating proxy: {input_path} -> {output_path} "
+                f"Generating proxy: {log_name(input_path)} -> {output_path} "
                 f"({target_height}p @ {target_fps}fps)"
             )
 
@@ -146,12 +442,12 @@ class FFmpegService:
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
             # Detect if input has audio stream (CCTV footage often doesn't)
-            probe = ffmpeg.probe(input_path)
+            probe = self._probe(input_path, source_key)
             has_audio = any(s["codec_type"] == "audio" for s in probe["streams"])
             logger.info(f"Input has audio stream: {has_audio}")
 
             # Build FFmpeg command
-            stream = ffmpeg.input(input_path)
+            stream = open_input(input_path)
 
             # Scale video: maintain aspect ratio, set height
             stream = ffmpeg.filter(stream, "scale", -2, target_height)
@@ -223,12 +519,12 @@ class FFmpegService:
             FFmpegError: If thumbnail generation fails
             FileNotFoundError: If input file doesn't exist
         """
-        if not os.path.exists(input_path):
+        if not input_exists(input_path):
             raise FileNotFoundError(f"Input video not found: {input_path}")
 
         try:
             logger.info(
-                f"Generating thumbnail: {input_path} -> {output_path} "
+                f"Generating thumbnail: {log_name(input_path)} -> {output_path} "
                 f"(t={timestamp_seconds}s, width={width}px)"
             )
 
@@ -236,7 +532,7 @@ class FFmpegService:
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
             # Build FFmpeg command
-            stream = ffmpeg.input(input_path, ss=timestamp_seconds)
+            stream = open_input(input_path, ss=timestamp_seconds)
 
             # Scale to target width (maintain aspect ratio)
             stream = ffmpeg.filter(stream, "scale", width, -1)
@@ -255,19 +551,7 @@ class FFmpegService:
 
             logger.info(f"Thumbnail generated successfully: {output_path}")
 
-            # Get file size
-            file_size = os.path.getsize(output_path)
-
-            # Get dimensions using FFprobe
-            probe = ffmpeg.probe(output_path)
-            video_stream = probe["streams"][0]
-
-            return {
-                "width": int(video_stream["width"]),
-                "height": int(video_stream["height"]),
-                "file_size_bytes": file_size,
-                "timestamp_seconds": timestamp_seconds,
-            }
+            return self._thumbnail_info(output_path, timestamp_seconds)
 
         except ffmpeg.Error as e:
             logger.error(f"FFmpeg thumbnail error: {e.stderr.decode() if e.stderr else str(e)}")
@@ -276,6 +560,41 @@ class FFmpegService:
                 os.remove(output_path)
             raise
 
+    def _thumbnail_info(self, output_path: str, timestamp_seconds: float) -> Dict[str, Any]:
+        """Size and dimensions of a generated thumbnail."""
+        # Get file size
+        file_size = os.path.getsize(output_path)
+
+        # Get dimensions using FFprobe
+        probe = self._probe(output_path)
+        video_stream = probe["streams"][0]
+
+        return {
+            "width": int(video_stream["width"]),
+            "height": int(video_stream["height"]),
+            "file_size_bytes": file_size,
+            "timestamp_seconds": timestamp_seconds,
+        }
+
+    def describe_side_outputs(self, side_outputs: SideOutputs) -> Dict[str, Any]:
+        """
+        Metadata of the files written by a completed stream_frames() pass.
+
+        Args:
+            side_outputs: The SideOutputs passed to stream_frames()
+
+        Returns:
+            Dict with "proxy" (as returned by generate_proxy) and "thumbnails"
+            (list, as returned by generate_thumbnail)
+        """
+        return {
+            "proxy": self.extract_metadata(side_outputs.proxy_path),
+            "thumbnails": [
+                self._thumbnail_info(path, timestamp)
+                for timestamp, path in side_outputs.thumbnails
+            ],
+        }
+
     def extract_frames(
         self,
         input_path: str,
@@ -287,8 +606,8 @@ class FFmpegService:
         """
         Extract frames from video at specified fps.
 
-        Optimized for CV analysis (Phase 3): extracts frames at 1 fps by default
-        for person detection and tracking.
+        Writes JPEGs to disk, so it is kept for debugging and frame inspection.
+        The CV pipeline streams frames in memory via stream_frames() instead.
 
         Args:
             input_path: Path to video file
@@ -312,7 +631,7 @@ class FFmpegService:
             ... )
             ['/tmp/frames/frame_000001.jpg', '/tmp/frames/frame_000002.jpg', ...]
         """
-        if not os.path.exists(input_path):
+        if not input_exists(input_path):
             raise FileNotFoundError(f"Input video not found: {input_path}")
 
         try:
@@ -324,7 +643,7 @@ class FFmpegService:
             expected_frames = int(metadata["duration_seconds"] * fps)
 
             logger.info(
-                f"Extracting frames at {fps} fps from {input_path} "
+                f"Extracting frames at {fps} fps from {log_name(input_path)} "
                 f"(duration: {metadata['duration_seconds']:.1f}s, "
                 f"expected frames: ~{expected_frames})"
             )
@@ -333,7 +652,7 @@ class FFmpegService:
             output_path = os.path.join(output_dir, output_pattern)
 
             # Build FFmpeg command
-            stream = ffmpeg.input(input_path)
+            stream = open_input(input_path)
 
             # Apply fps filter to sample frames
             stream = ffmpeg.filter(stream, "fps", fps=fps)
@@ -364,12 +683,560 @@ class FFmpegService:
             logger.error(f"FFmpeg frame extraction error: {e.stderr.decode() if e.stderr else str(e)}")
             raise
 
-    def validate_video(self, input_path: str) -> Tuple[bool, Optional[str]]:
+    def stream_frames(
+        self,
+        input_path: str,
+        fps: float = 1.0,
+        buffer_count: int = 2,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_size: Optional[int] = None,
+        source_size: Optional[Tuple[int, int]] = None,
+        workers: int = 1,
+        keyframes: Optional[List[float]] = None,
+        max_buffered_frames: int = 512,
+        side_outputs: Optional[SideOutputs] = None,
+        time_range: Optional[Tuple[float, Optional[float]]] = None,
+    ) -> Iterator[VideoFrame]:
+        """
+        Stream sampled frames from FFmpeg's stdout as raw RGB arrays.
+
+        Replaces the extract_frames() JPEG round trip for CV analysis: frames are
+        decoded once into a small ring of preallocated buffers and never touch disk.
+        Frames are sampled with a `select` filter so each frame keeps its source
+        pts (accurate for variable frame rate CCTV exports), and timestamps are
+        read from the `showinfo` filter.
+
+        With max_size, sampled frames are downscaled inside FFmpeg (after the
+        `select` filter, so only kept frames are scaled) before the RGB pipe:
+        a 4K stream then moves ~20x fewer bytes per frame and the detector
+        skips its own resize. Frames report the factor back to original
+        coordinates in VideoFrame.scale.
+
+        With workers > 1, the timeline is split into keyframe-aligned segments
+        decoded by parallel FFmpeg processes (input-side -ss/-to seeking) and
+        merged back in order, so decode time drops roughly with the number of
+        cores. Sampling then keeps the first frame of every 1/fps interval
+        (see bucket_select_expr), and segmented frames own their images.
+        Up to max_buffered_frames decoded frames are held while waiting for
+        the consumer, which bounds memory (frames x width x height x 3 bytes).
+
+        With side_outputs, the same FFmpeg process also encodes the proxy and
+        thumbnails from the decoded frames (a split filter graph), so a fresh
+        upload is decoded once for all three. This always runs a single pass.
+
+        With time_range, only that window of the timeline is decoded (one
+        process, input-side seeking) and frames are bucket-sampled as in
+        segmented mode, with frame_number = sampling interval index + 1, so
+        the windows of one video (e.g. chunked tracking) agree on frame
+        numbers and timestamps wherever they overlap.
+
+        Args:
+            input_path: Path to video file
+            fps: Frames per second to sample (default: 1.0 for CV analysis)
+            buffer_count: Number of reusable frame buffers. A yielded frame's image
+                          stays valid until `buffer_count` further frames are read.
+            metadata: Optional pre-extracted metadata (skips an extra ffprobe call)
+            max_size: Downscale frames so the long side is at most this (e.g. the
+                      detector input size); None decodes at full resolution
+            source_size: (width, height) of the original when input_path is a
+                         derived file such as the proxy, so VideoFrame.scale maps
+                         to the original's coordinates
+            workers: Parallel FFmpeg processes (1 = single pass over the file)
+            keyframes: Keyframe times for segment cuts (probed when omitted)
+            max_buffered_frames: Decoded frames buffered across segments
+                                 (segmented mode only)
+            side_outputs: Proxy and thumbnails to write during the same decode
+            time_range: (start, end) seconds relative to the start of the
+                        video; frames of the sampling intervals starting in
+                        [start, end) are streamed (end None = to the end)
+
+        Returns:
+            Iterator of VideoFrame objects in presentation order
+
+        Raises:
+            FFmpegError: If decoding fails
+            FileNotFoundError: If input file doesn't exist
+
+        Example:
+            >>> for frame in ffmpeg_service.stream_frames("video.mp4", fps=1.0):
+            ...     detections = detector.detect(frame.image)
+        """
+        if not input_exists(input_path):
+            raise FileNotFoundError(f"Input video not found: {input_path}")
+        if fps <= 0:
+            raise ValueError(f"fps must be positive, got {fps}")
+        if buffer_count < 1:
+            raise ValueError(f"buffer_count must be >= 1, got {buffer_count}")
+
+        if metadata is None:
+            metadata = self.extract_metadata(input_path)
+
+        width, height = scaled_frame_size(metadata["width"], metadata["height"], max_size)
+        source_width, source_height = source_size or (metadata["width"], metadata["height"])
+        scale = (source_width / width, source_height / height)
+
+        logger.info(
+            f"Streaming frames at {fps} fps from {log_name(input_path)} "
+            f"({metadata['width']}x{metadata['height']}"
+            + (f" -> {width}x{height}" if (width, height) != (metadata["width"], metadata["height"]) else "")
+            + f", expected frames: ~{int(metadata['duration_seconds'] * fps)})"
+        )
+
+        start_time = metadata.get("start_time_seconds", 0.0)
+        scale_input = (width, height) != (metadata["width"], metadata["height"])
+
+        if time_range is not None:
+            if side_outputs is not None:
+                raise ValueError("time_range cannot be combined with side_outputs")
+            return self._iter_window_frames(
+                input_path,
+                time_range,
+                width=width,
+                height=height,
+                fps=fps,
+                start_time=start_time,
+                buffer_count=buffer_count,
+                scale_input=scale_input,
+                frame_scale=scale,
+            )
+
+        if side_outputs is not None:
+            if workers > 1:
+                logger.info("Side outputs need the whole file in one pass, not decoding in segments")
+            workers = 1
+            for path in side_outputs.paths:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        if workers > 1:
+            # Short segments keep the frames buffered for the ordered merge bounded
+            segment_frames = max(1, max_buffered_frames // (2 * workers))
+            segment_seconds = max(_MIN_SEGMENT_SECONDS, segment_frames / fps)
+            count = math.ceil(metadata["duration_seconds"] / segment_seconds)
+            if count > 1:
+                if keyframes is None:
+                    try:
+                        keyframes = self.extract_keyframe_times(input_path)
+                    except (ffmpeg.Error, FileNotFoundError) as e:  # FFprobe failed or missing
+                        logger.warning(f"Keyframe probe failed, cutting segments at nominal times: {e}")
+                segments = plan_segments(start_time, metadata["duration_seconds"], count, keyframes)
+                logger.info(
+                    f"Segmented decode: {len(segments)} segments of ~{segment_seconds:.0f}s "
+                    f"on {workers} workers"
+                )
+                return self._iter_segmented_frames(
+                    input_path,
+                    segments,
+                    width=width,
+                    height=height,
+                    fps=fps,
+                    start_time=start_time,
+                    workers=workers,
+                    scale_input=scale_input,
+                    frame_scale=scale,
+                )
+
+        return self._iter_raw_frames(
+            input_path,
+            width=width,
+            height=height,
+            fps=fps,
+            start_time=start_time,
+            buffer_count=buffer_count,
+            scale_input=scale_input,
+            frame_scale=scale,
+            side_outputs=side_outputs,
+        )
+
+    def _iter_segmented_frames(
+        self,
+        input_path: str,
+        segments: List[Tuple[Optional[float], Optional[float]]],
+        width: int,
+        height: int,
+        fps: float,
+        start_time: float,
+        workers: int,
+        scale_input: bool,
+        frame_scale: Tuple[float, float],
+    ) -> Iterator[VideoFrame]:
+        """
+        Decode segments on a pool of FFmpeg processes and yield their frames in order.
+
+        Each segment is decoded in full into owned arrays; at most 2 x workers
+        segments are queued or waiting for the consumer. Frames whose sampling
+        interval was already emitted (segment overlap, or a segment starting
+        mid-interval) are dropped, so the merged stream matches a single
+        bucket-sampled pass.
+        """
+        stop = threading.Event()
+        select_expr = bucket_select_expr(fps, start_time)
+        decode_threads = max(1, (os.cpu_count() or 1) // workers)
+
+        def decode_segment(segment: Tuple[Optional[float], Optional[float]]) -> List[Tuple[float, np.ndarray]]:
+            start, end = segment
+            frames = []
+            raw_frames = self._iter_raw_frames(
+                input_path,
+                width=width,
+                height=height,
+                fps=fps,
+                start_time=start_time,
+                buffer_count=1,
+                scale_input=scale_input,
+                select_expr=select_expr,
+                seek=(start, end + _SEGMENT_OVERLAP_SECONDS if end is not None else None),
+                decode_threads=decode_threads,
+            )
+            try:
+                for frame in raw_frames:
+                    if stop.is_set():
+                        break
+                    frames.append((frame.pts_time, frame.image.copy()))
+            finally:
+                raw_frames.close()  # Kills FFmpeg if we stopped early
+            return frames
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg-segment")
+        pending: "deque[Future]" = deque()
+        next_segment = 0
+        frame_number = 0
+        last_bucket: Optional[int] = None
+
+        try:
+            while next_segment < len(segments) and len(pending) < 2 * workers:
+                pending.append(executor.submit(decode_segment, segments[next_segment]))
+                next_segment += 1
+
+            while pending:
+                segment_frames = pending.popleft().result()
+                if next_segment < len(segments):
+                    pending.append(executor.submit(decode_segment, segments[next_segment]))
+                    next_segment += 1
+
+                for pts_time, image in segment_frames:
+                    bucket = frame_bucket(pts_time, fps, start_time)
+                    if last_bucket is not None and bucket <= last_bucket:
+                        continue
+                    last_bucket = bucket
+                    frame_number += 1
+                    yield VideoFrame(
+                        frame_number=frame_number,
+                        timestamp_seconds=round(max(0.0, pts_time - start_time), 3),
+                        pts_time=pts_time,
+                        image=image,
+                        scale=frame_scale,
+                    )
+
+        finally:
+            # Consumer done, stopped early or a segment failed: stop the rest
+            stop.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        logger.info(
+            f"Segmented frame streaming complete: {frame_number} frames "
+            f"from {len(segments)} segments of {log_name(input_path)}"
+        )
+
+    def _iter_window_frames(
+        self,
+        input_path: str,
+        time_range: Tuple[float, Optional[float]],
+        width: int,
+        height: int,
+        fps: float,
+        start_time: float,
+        buffer_count: int,
+        scale_input: bool,
+        frame_scale: Tuple[float, float],
+    ) -> Iterator[VideoFrame]:
+        """
+        Decode one window of the timeline, numbering frames by sampling interval.
+
+        The select expression and bucket filter are those of the segmented
+        merge, so a frame streamed by two overlapping windows is the same
+        frame with the same frame_number in both.
+        """
+        range_start, range_end = time_range
+        first_bucket = frame_bucket(start_time + range_start, fps, start_time)
+        end_bucket = None
+        seek_end = None
+        if range_end is not None:
+            end_bucket = frame_bucket(start_time + range_end, fps, start_time)
+            seek_end = start_time + range_end + _SEGMENT_OVERLAP_SECONDS
+        raw_frames = self._iter_raw_frames(
+            input_path,
+            width=width,
+            height=height,
+            fps=fps,
+            start_time=start_time,
+            buffer_count=buffer_count,
+            scale_input=scale_input,
+            frame_scale=frame_scale,
+            select_expr=bucket_select_expr(fps, start_time),
+            seek=(start_time + range_start, seek_end),
+        )
+        last_bucket: Optional[int] = None
+        try:
+            for frame in raw_frames:
+                bucket = frame_bucket(frame.pts_time, fps, start_time)
+                if bucket < first_bucket or (last_bucket is not None and bucket <= last_bucket):
+                    continue
+                if end_bucket is not None and bucket >= end_bucket:
+                    break
+                last_bucket = bucket
+                frame.frame_number = bucket + 1
+                yield frame
+        finally:
+            raw_frames.close()  # Kills FFmpeg when the window ends before the file
+
+    def _iter_raw_frames(
+        self,
+        input_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        start_time: float,
+        buffer_count: int,
+        scale_input: bool = False,
+        frame_scale: Tuple[float, float] = (1.0, 1.0),
+        select_expr: Optional[str] = None,
+        seek: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        decode_threads: Optional[int] = None,
+        side_outputs: Optional[SideOutputs] = None,
+    ) -> Iterator[VideoFrame]:
+        """
+        Run FFmpeg with a rawvideo stdout pipe and yield frames as they arrive.
+
+        width/height are the output frame size; scale_input inserts a scale
+        filter to produce it from a larger source. seek=(start, end) decodes
+        only that range (input-side -ss/-to, source timestamps kept).
+        side_outputs adds the proxy/thumbnail outputs to the same process.
+        """
+        # Keep the first frame, then every frame at least 1/fps after the last kept one.
+        # The small tolerance avoids skipping a frame due to float rounding of t.
+        interval = 1.0 / fps
+        if select_expr is None:
+            select_expr = f"isnan(prev_selected_t)+gte(t-prev_selected_t,{interval - 0.001:.6f})"
+
+        input_kwargs: Dict[str, Any] = {}
+        global_args = ["-hide_banner", "-nostats"]
+        if seek is not None:
+            seek_start, seek_end = seek
+            if seek_start is not None:
+                input_kwargs["ss"] = f"{seek_start:.6f}"
+            if seek_end is not None:
+                input_kwargs["to"] = f"{seek_end:.6f}"
+            global_args.append("-copyts")  # Absolute timestamps for the ordered merge
+        if decode_threads is not None:
+            input_kwargs["threads"] = decode_threads
+
+        source = open_input(input_path, **input_kwargs)
+        stream = source
+        extra_outputs = []
+        if side_outputs is not None:
+            # One decode feeds the CV branch, the proxy and every thumbnail
+            branches = source.video.split()
+            stream = branches[0]
+            extra_outputs = self._side_output_streams(source, branches, side_outputs, start_time)
+            global_args.append("-y")
+
+        stream = ffmpeg.filter(stream, "select", select_expr)
+        if scale_input:
+            stream = ffmpeg.filter(stream, "scale", width, height, flags="area")
+        stream = ffmpeg.filter(stream, "showinfo")
+        stream = ffmpeg.output(
+            stream,
+            "pipe:",
+            format="rawvideo",
+            pix_fmt="rgb24",
+            vsync="passthrough",  # Keep source pts, never duplicate frames
+        )
+        if extra_outputs:
+            stream = ffmpeg.merge_outputs(stream, *extra_outputs)
+        process = ffmpeg.run_async(
+            stream.global_args(*global_args),
+            pipe_stdout=True,
+            pipe_stderr=True,
+        )
+
+        # Drain stderr on a thread: it carries the showinfo pts lines, and an
+        # undrained pipe would eventually block FFmpeg.
+        pts_queue: "queue.Queue[Optional[float]]" = queue.Queue()
+        stderr_tail: deque = deque(maxlen=50)
+
+        def _read_stderr():
+            time_base = None
+            for raw_line in iter(process.stderr.readline, b""):
+                line = raw_line.decode(errors="replace").rstrip()
+                match = _SHOWINFO_PTS_RE.search(line)
+                if match:
+                    if time_base is not None:
+                        pts_queue.put(int(match.group(1)) * time_base)
+                    else:
+                        pts_queue.put(float(match.group(2)))
+                    continue
+                match = _SHOWINFO_TIME_BASE_RE.search(line)
+                if match and int(match.group(2)):
+                    time_base = int(match.group(1)) / int(match.group(2))
+                else:
+                    stderr_tail.append(line)
+            pts_queue.put(None)
+
+        stderr_thread = threading.Thread(target=_read_stderr, daemon=True)
+        stderr_thread.start()
+
+        frame_bytes = width * height * 3
+        buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(buffer_count)]
+        frame_number = 0
+        completed = False
+
+        try:
+            while True:
+                buffer = buffers[frame_number % buffer_count]
+                if not self._read_exact(process.stdout, memoryview(buffer).cast("B"), frame_bytes):
+                    break
+
+                pts_time = pts_queue.get()
+                if pts_time is None:
+                    # stderr closed before reporting this frame's pts; fall back to nominal
+                    pts_time = start_time + frame_number * interval
+
+                frame_number += 1
+                yield VideoFrame(
+                    frame_number=frame_number,
+                    timestamp_seconds=round(max(0.0, pts_time - start_time), 3),
+                    pts_time=pts_time,
+                    image=buffer,
+                    scale=frame_scale,
+                )
+
+            completed = True
+
+        finally:
+            if not completed:
+                # Consumer stopped early (or errored) - don't leave FFmpeg running
+                process.kill()
+            process.stdout.close()
+            return_code = process.wait()
+            stderr_thread.join(timeout=5)
+            process.stderr.close()
+            if side_outputs is not None and (not completed or return_code != 0):
+                # Clean up partial output files
+                for path in side_outputs.paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+        if return_code != 0:
+            stderr_text = "\n".join(stderr_tail)
+            logger.error(f"FFmpeg frame streaming error: {stderr_text}")
+            raise ffmpeg.Error("ffmpeg", b"", stderr_text.encode())
+
+        logger.info(f"Frame streaming complete: {frame_number} frames from {log_name(input_path)}")
+
+    @staticmethod
+    def _side_output_streams(
+        source,
+        branches,
+        side_outputs: SideOutputs,
+        start_time: float = 0.0,
+    ) -> List[Any]:
+        """
+        Proxy and thumbnail outputs fed from branches[1:] of a split decode.
+
+        Filters and encoder settings match generate_proxy() and
+        generate_thumbnail().
+        """
+        proxy = ffmpeg.filter(branches[1], "scale", -2, side_outputs.proxy_height)
+        proxy = ffmpeg.filter(proxy, "fps", fps=side_outputs.proxy_fps)
+        proxy_params = {
+            "vcodec": "libx264",
+            "preset": side_outputs.preset,
+            "crf": side_outputs.crf,
+            "movflags": "faststart",
+            "pix_fmt": "yuv420p",
+        }
+        if side_outputs.has_audio:
+            proxy_params["acodec"] = "aac"
+            proxy_params["audio_bitrate"] = "64k"
+            outputs = [ffmpeg.output(proxy, source.audio, side_outputs.proxy_path, **proxy_params)]
+        else:
+            outputs = [ffmpeg.output(proxy, side_outputs.proxy_path, an=None, **proxy_params)]
+
+        for i, (timestamp, path) in enumerate(side_outputs.thumbnails, start=2):
+            # First frame at or after the timestamp (the decode is not seeked)
+            thumbnail = ffmpeg.filter(
+                branches[i], "select", f"isnan(prev_selected_t)*gte(t,{start_time + timestamp:.6f})"
+            )
+            thumbnail = ffmpeg.filter(thumbnail, "scale", side_outputs.thumbnail_width, -1)
+            outputs.append(ffmpeg.output(thumbnail, path, vframes=1, format="image2", qscale=2))
+
+        return outputs
+
+    @staticmethod
+    def _read_exact(pipe, view: memoryview, size: int) -> bool:
+        """
+        Fill `view` with exactly `size` bytes from `pipe`.
+
+        Returns:
+            True if a full frame was read, False on clean EOF
+
+        Raises:
+            RuntimeError: If the stream ends mid-frame
+        """
+        read = 0
+        while read < size:
+            n = pipe.readinto(view[read:size])
+            if not n:
+                if read == 0:
+                    return False
+                raise RuntimeError(f"Truncated frame from FFmpeg ({read}/{size} bytes)")
+            read += n
+        return True
+
+    def load_extracted_frames(
+        self,
+        frame_paths: List[str],
+        fps: float = 1.0,
+    ) -> Iterator[VideoFrame]:
+        """
+        Iterate JPEG frames written by extract_frames() as VideoFrame objects.
+
+        Debug counterpart of stream_frames(): lets the CV pipeline run on frames
+        dumped to disk (e.g. to inspect what the detector saw). Timestamps are
+        nominal (index / fps) since JPEG files carry no pts.
+
+        Args:
+            frame_paths: Sorted frame paths returned by extract_frames()
+            fps: Rate the frames were extracted at
+
+        Returns:
+            Iterator of VideoFrame objects with RGB images
+        """
+        import cv2
+
+        for i, frame_path in enumerate(frame_paths):
+            frame = cv2.imread(frame_path)
+            if frame is None:
+                logger.warning(f"Failed to read frame: {frame_path}")
+                continue
+
+            yield VideoFrame(
+                frame_number=i + 1,
+                timestamp_seconds=round(i / fps, 3),
+                pts_time=i / fps,
+                image=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
+            )
+
+    def validate_video(self, input_path: str, source_key: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Validate that file is a valid video.
 
         Args:
             input_path: Path to video file
+            source_key: Identity of the stored object the file was downloaded
+                        from (probe cache key instead of path/mtime/size)
 
         Returns:
             Tuple of (is_valid, error_message)
@@ -377,11 +1244,11 @@ class FFmpegService:
             - error_message: None if valid, error string if invalid
         """
         try:
-            if not os.path.exists(input_path):
+            if not input_exists(input_path):
                 return False, "File does not exist"
 
-            # Try to probe the file
-            probe = ffmpeg.probe(input_path)
+            # Try to probe the file (cached for the extract_metadata call that follows)
+            probe = self._probe(input_path, source_key)
 
             # Check for video stream
             video_stream = next(
@@ -2,7 +2,9 @@
 Processing job service for background task management.
 
 Handles:
-- Job creation and tracking
+- Job creation and tracking (proxy generation, or proxy generation fused
+  with CV analysis for fresh uploads)
+- Chunked tracking jobs (parallel chunk tasks plus a stitching step)
 - Job status queries
 - Job cancellation
 - Job result retrieval
@@ -12,11 +14,14 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from uuid import UUID, uuid4
 
+from fastapi import Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
 
+from app.core.database import get_db
 from app.models import ProcessingJob, Video
 from app.core.celery_app import celery_app
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -125,6 +130,147 @@ class JobService:
 
         return job
 
+    def queue_ingest(
+        self,
+        video_id: UUID,
+        priority: int = 5,
+    ) -> ProcessingJob:
+        """
+        Queue proxy generation and CV analysis of a fresh upload as one task.
+
+        A single detect_persons_in_video task downloads and decodes the
+        original once, writing the proxy and thumbnail from the same decode
+        that feeds the detector. Both jobs are tracked separately.
+
+        Args:
+            video_id: Video UUID
+            priority: Task priority (1-10, default 5)
+
+        Returns:
+            The proxy_generation ProcessingJob record with celery_task_id
+        """
+        proxy_job = self.create_job(video_id=video_id, job_type="proxy_generation")
+        cv_job = self.create_job(video_id=video_id, job_type="cv_analysis")
+
+        # Update video processing_status to reflect that processing has been queued
+        video = self.db.query(Video).filter(Video.id == video_id).first()
+        if video:
+            video.processing_status = "processing"
+            video.processing_job_id = str(proxy_job.id)
+
+        # Queue Celery task
+        from app.tasks.analysis_tasks import detect_persons_in_video
+
+        task = detect_persons_in_video.apply_async(
+            kwargs={
+                "video_id": str(video_id),
+                "job_id": str(cv_job.id),
+                "proxy_job_id": str(proxy_job.id),
+            },
+            queue="cv_analysis",
+            priority=priority,
+        )
+
+        # Update jobs with Celery task ID
+        proxy_job.celery_task_id = task.id
+        cv_job.celery_task_id = task.id
+        self.db.commit()
+        self.db.refresh(proxy_job)
+
+        logger.info(
+            f"Queued ingest: proxy_job_id={proxy_job.id}, cv_job_id={cv_job.id}, "
+            f"task_id={task.id}, video_id={video_id}"
+        )
+
+        return proxy_job
+
+    def queue_tracking(
+        self,
+        video_id: UUID,
+        priority: int = 5,
+        analysis_fps: float = 1.0,
+        chunk_seconds: Optional[float] = None,
+        overlap_seconds: Optional[float] = None,
+        **task_options,
+    ) -> ProcessingJob:
+        """
+        Queue tracklet generation for a video, split into parallel chunks.
+
+        The video is cut into overlapping time windows (plan_chunks), each
+        tracked by a track_video_chunk task on any cv_analysis worker; a
+        chord runs stitch_tracking_chunks once all chunks are done, which
+        links tracks across the boundaries and completes the job. Videos
+        shorter than one chunk are a single chunk.
+
+        Args:
+            video_id: Video UUID
+            priority: Task priority (1-10, default 5)
+            analysis_fps: Frame sampling rate
+            chunk_seconds: Chunk length (default CV_TRACKING_CHUNK_SECONDS)
+            overlap_seconds: Lookahead shared by neighbouring chunks
+                             (default CV_TRACKING_CHUNK_OVERLAP_SECONDS)
+            **task_options: Extra track_video_chunk arguments (device,
+                            conf_threshold, extract_embeddings)
+
+        Returns:
+            cv_tracking ProcessingJob record with celery_task_id (the chord)
+
+        Raises:
+            ValueError: If video doesn't exist
+        """
+        from celery import chord
+
+        from app.cv.chunk_stitching import plan_chunks
+        from app.tasks.analysis_tasks import stitch_tracking_chunks, track_video_chunk
+
+        video = self.db.query(Video).filter(Video.id == video_id).first()
+        if not video:
+            raise ValueError(f"Video {video_id} not found")
+
+        duration = (video.probe_metadata or {}).get("duration_seconds", video.duration_seconds)
+        chunks = plan_chunks(
+            float(duration) if duration else None,
+            analysis_fps,
+            chunk_seconds or settings.CV_TRACKING_CHUNK_SECONDS,
+            settings.CV_TRACKING_CHUNK_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds,
+        )
+
+        job = self.create_job(video_id=video_id, job_type="cv_tracking")
+        header = [
+            track_video_chunk.s(
+                video_id=str(video_id),
+                job_id=str(job.id),
+                chunk=chunk.to_dict(),
+                analysis_fps=analysis_fps,
+                **task_options,
+            ).set(queue="cv_analysis", priority=priority)
+            for chunk in chunks
+        ]
+        callback = stitch_tracking_chunks.s(
+            video_id=str(video_id),
+            job_id=str(job.id),
+        ).set(queue="cv_analysis", priority=priority)
+        try:
+            result = chord(header)(callback)
+        except Exception as e:
+            # Leave no pending job behind that would block a retry
+            job.status = "failed"
+            job.error_message = f"Failed to queue task: {str(e)}"
+            self.db.commit()
+            raise
+
+        job.celery_task_id = result.id
+        job.result_data = {"chunks": len(chunks)}
+        self.db.commit()
+        self.db.refresh(job)
+
+        logger.info(
+            f"Queued tracking: job_id={job.id}, video_id={video_id}, "
+            f"chunks={len(chunks)}, task_id={result.id}"
+        )
+
+        return job
+
     # ========================================================================
     # Job Queries
     # ========================================================================
@@ -314,7 +460,7 @@ class JobService:
         return count
 
 
-def get_job_service(db: Session) -> JobService:
+def get_job_service(db: Session = Depends(get_db)) -> JobService:
     """
     Dependency for getting job service instance.
 
@@ -0,0 +1,344 @@
+"""
+Content-addressed cache of per-stage CV results.
+
+Handles:
+- Stage keys: (video checksum_sha256, stage, model version, parameters),
+  chained so a stage's key includes the key of the stage it consumes
+  (tracks depend on detections, appearance on tracks)
+- Results stored as gzipped JSON in object storage under the key digest
+- A small DB index (stage_results) mapping keys to objects, with hit counts
+
+Re-running analysis with unchanged inputs reuses the stored result instead of
+recomputing it (also across Celery retries), and identical re-uploads share
+results because the key depends on the video content, not its ID.
+"""
+import gzip
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import StageResult
+from app.services.storage_service import StorageService, get_storage_service
+
+logger = logging.getLogger(__name__)
+
+# Cached stages
+STAGE_DETECTIONS = "detections"  # Frame-level person detections
+STAGE_TRACKS = "tracks"  # Within-camera tracks (consumes detections)
+STAGE_APPEARANCE = "appearance"  # Per-track appearance descriptors (consumes tracks)
+
+
+def _json_default(value: Any) -> Any:
+    """Encode numpy and datetime values in stage results and params."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Path)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def canonical_json(value: Any) -> str:
+    """Deterministic JSON encoding (sorted keys, no whitespace)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=_json_default)
+
+
+@dataclass(frozen=True)
+class StageKey:
+    """Content key of one stage result."""
+    checksum_sha256: str
+    stage: str
+    model_version: str
+    params_hash: str
+    params: Dict[str, Any] = field(compare=False, hash=False)
+
+    @property
+    def digest(self) -> str:
+        """SHA256 of the whole key (object name and upstream reference)."""
+        raw = "|".join((self.checksum_sha256, self.stage, self.model_version, self.params_hash))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def object_path(self, prefix: str = "stage_cache") -> str:
+        """Object storage key of the result."""
+        return f"{prefix}/{self.checksum_sha256}/{self.stage}/{self.digest}.json.gz"
+
+
+def stage_key(
+    checksum_sha256: str,
+    stage: str,
+    model_version: str,
+    params: Optional[Dict[str, Any]] = None,
+    upstream: Optional[StageKey] = None,
+) -> StageKey:
+    """
+    Build the key of a stage result.
+
+    Args:
+        checksum_sha256: Source video content checksum
+        stage: Stage name (STAGE_DETECTIONS, STAGE_TRACKS, STAGE_APPEARANCE)
+        model_version: Model (or algorithm) version producing the result
+        params: Parameters that change the result (not batch sizes, devices, ...)
+        upstream: Key of the stage whose result this stage consumes; any
+                  change upstream then invalidates this stage too
+
+    Returns:
+        StageKey
+    """
+    params = dict(params or {})
+    if upstream is not None:
+        params["upstream"] = upstream.digest
+    params = json.loads(canonical_json(params))  # Normalized (numpy -> lists, tuples -> lists)
+    params_hash = hashlib.sha256(canonical_json(params).encode("utf-8")).hexdigest()
+    return StageKey(
+        checksum_sha256=checksum_sha256,
+        stage=stage,
+        model_version=model_version,
+        params_hash=params_hash,
+        params=params,
+    )
+
+
+@lru_cache(maxsize=32)
+def _file_fingerprint(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def model_version(model_name: str) -> str:
+    """
+    Version string of a model for stage keys.
+
+    Local weight files are fingerprinted by content, so replacing the weights
+    under the same name invalidates cached results; hub names (e.g. a CLIP
+    model ID or weights not downloaded yet) are used as is.
+    """
+    path = Path(model_name)
+    if path.is_file():
+        stat = path.stat()
+        return f"{path.stem}:{_file_fingerprint(str(path.resolve()), stat.st_mtime_ns, stat.st_size)}"
+    return model_name
+
+
+class StageCacheService:
+    """Service for reading and writing cached stage results."""
+
+    def __init__(
+        self,
+        db: Session,
+        storage: Optional[StorageService] = None,
+        prefix: Optional[str] = None,
+    ):
+        """
+        Initialize stage cache service.
+
+        Args:
+            db: Database session (stage_results index)
+            storage: Object storage (default: the shared storage service)
+            prefix: Object key prefix (default: CV_STAGE_CACHE_PREFIX)
+        """
+        self.db = db
+        self._storage = storage
+        self.prefix = prefix or settings.CV_STAGE_CACHE_PREFIX
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def storage(self) -> StorageService:
+        if self._storage is None:
+            self._storage = get_storage_service()
+        return self._storage
+
+    def _lookup(self, key: StageKey) -> Optional[StageResult]:
+        return (
+            self.db.query(StageResult)
+            .filter(
+                StageResult.checksum_sha256 == key.checksum_sha256,
+                StageResult.stage == key.stage,
+                StageResult.model_version == key.model_version,
+                StageResult.params_hash == key.params_hash,
+            )
+            .first()
+        )
+
+    # ========================================================================
+    # Read / Write
+    # ========================================================================
+
+    def get(self, key: StageKey) -> Optional[Any]:
+        """
+        Cached result for a key.
+
+        Args:
+            key: Stage key
+
+        Returns:
+            The stored result, or None on a miss (index entries whose object
+            is gone are dropped)
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            logger.info(f"Stage cache miss: {key.stage} {key.digest[:12]}")
+            return None
+
+        try:
+            data = self.storage.download_bytes(entry.object_path)
+        except FileNotFoundError:
+            logger.warning(f"Stage cache object missing, dropping index entry: {entry.object_path}")
+            self.db.delete(entry)
+            self.db.commit()
+            self.misses += 1
+            return None
+
+        result = json.loads(gzip.decompress(data).decode("utf-8"))
+
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_used_at = datetime.utcnow()
+        self.db.commit()
+
+        self.hits += 1
+        logger.info(
+            f"Stage cache hit: {key.stage} {key.digest[:12]} "
+            f"(hits={entry.hit_count}, size={entry.size_bytes} bytes)"
+        )
+        return result
+
+    def put(
+        self,
+        key: StageKey,
+        result: Any,
+        source_video_id: Optional[UUID] = None,
+    ) -> StageResult:
+        """
+        Store a result under its key.
+
+        Writing the same key twice (e.g. two workers racing) is harmless: the
+        object name is the key digest and the index insert is idempotent.
+
+        Args:
+            key: Stage key
+            result: JSON-serializable result (numpy arrays and datetimes allowed)
+            source_video_id: Video the result was computed from (informational)
+
+        Returns:
+            StageResult index entry
+        """
+        data = gzip.compress(canonical_json(result).encode("utf-8"), compresslevel=6)
+        object_path = key.object_path(self.prefix)
+
+        self.storage.upload_bytes(
+            data,
+            object_path,
+            content_type="application/json",
+            metadata={"stage": key.stage, "content-encoding": "gzip"},
+        )
+
+        entry = self._lookup(key)
+        if entry is None:
+            entry = StageResult(
+                checksum_sha256=key.checksum_sha256,
+                stage=key.stage,
+                model_version=key.model_version,
+                params_hash=key.params_hash,
+                params=key.params,
+                object_path=object_path,
+                size_bytes=len(data),
+                source_video_id=source_video_id,
+                hit_count=0,
+            )
+            try:
+                with self.db.begin_nested():
+                    self.db.add(entry)
+            except IntegrityError:
+                entry = self._lookup(key)  # Stored concurrently by another worker
+        else:
+            entry.object_path = object_path
+            entry.size_bytes = len(data)
+        self.db.commit()
+
+        logger.info(f"Stage cache stored: {key.stage} {key.digest[:12]} ({len(data)} bytes) -> {object_path}")
+        return entry
+
+    def get_or_compute(
+        self,
+        key: StageKey,
+        compute: Callable[[], Any],
+        source_video_id: Optional[UUID] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Cached result for a key, computing and storing it on a miss.
+
+        Returns:
+            Tuple of (result, cache_hit)
+        """
+        result = self.get(key)
+        if result is not None:
+            return result, True
+
+        result = compute()
+        self.put(key, result, source_video_id=source_video_id)
+        return result, False
+
+    # ========================================================================
+    # Maintenance
+    # ========================================================================
+
+    def invalidate(self, checksum_sha256: str, stage: Optional[str] = None) -> int:
+        """
+        Drop cached results of a video (optionally of one stage).
+
+        Args:
+            checksum_sha256: Source video checksum
+            stage: Only this stage (default: all stages)
+
+        Returns:
+            Number of results removed
+        """
+        query = self.db.query(StageResult).filter(StageResult.checksum_sha256 == checksum_sha256)
+        if stage is not None:
+            query = query.filter(StageResult.stage == stage)
+
+        entries = query.all()
+        for entry in entries:
+            try:
+                self.storage.delete_file(entry.object_path)
+            except RuntimeError as e:
+                logger.warning(f"Could not delete cached object {entry.object_path}: {e}")
+            self.db.delete(entry)
+        self.db.commit()
+
+        logger.info(f"Invalidated {len(entries)} cached stage results for checksum={checksum_sha256}")
+        return len(entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def get_stage_cache_service(db: Session) -> StageCacheService:
+    """
+    Dependency for getting stage cache service instance.
+
+    Args:
+        db: Database session
+
+    Returns:
+        StageCacheService instance
+    """
+    return StageCacheService(db)
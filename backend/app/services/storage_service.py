@@ -4,34 +4,113 @@ Object storage service for video file management.
 Provides a unified interface for S3-compatible storage (MinIO/AWS S3):
 - Bucket initialization and management
 - Multipart upload with presigned URLs
-- File upload/download operations
+- File upload/download operations, parallelized for large objects
 - Signed URL generation for secure access
+
+Objects larger than STORAGE_TRANSFER_PART_SIZE are moved as concurrent
+ranged GETs / multipart PUT parts over one shared connection pool, so a
+transfer is not limited to a single TCP stream. Each part is retried on its
+own, and content is checked end to end: uploads send each part's MD5 and
+compare the object's ETag, and downloads verify the SHA-256 recorded at
+upload (or passed by the caller).
 """
+import base64
+import hashlib
+import io
 import logging
-from typing import Dict, List, Optional, Tuple
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from datetime import timedelta
 from urllib.parse import urlparse
 
+import certifi
+import urllib3
 from minio import Minio
+from minio.datatypes import Part
 from minio.error import S3Error
 from minio.commonconfig import ENABLED
+from minio.helpers import normalize_headers
 from minio.versioningconfig import VersioningConfig
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+_MIN_PART_SIZE = 5 * 1024 ** 2  # S3 minimum for all but the last part
+_STREAM_CHUNK_SIZE = 1024 ** 2
+_RETRY_BACKOFF_SECONDS = 0.5
+# Object metadata key holding the content SHA-256 (x-amz-meta-sha256)
+SHA256_METADATA_KEY = "sha256"
+# S3 errors that a retry cannot fix
+_FATAL_S3_CODES = {"NoSuchKey", "NoSuchBucket", "NoSuchUpload", "AccessDenied", "PreconditionFailed"}
+
+
+def _connection_pool(maxsize: int) -> urllib3.PoolManager:
+    """
+    HTTP connection pool shared by all requests of a StorageService.
+
+    Same settings as MinIO's default pool, sized so that every transfer
+    worker keeps its own connection alive.
+    """
+    timeout = timedelta(minutes=5).seconds
+    return urllib3.PoolManager(
+        timeout=urllib3.util.Timeout(connect=timeout, read=timeout),
+        maxsize=max(10, maxsize),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+    )
+
+
+def part_ranges(size: int, part_size: int) -> List[Tuple[int, int, int]]:
+    """
+    Split an object into transfer parts.
+
+    Returns:
+        List of (part_number, offset, length), part numbers 1-indexed
+    """
+    return [
+        (number, offset, min(part_size, size - offset))
+        for number, offset in enumerate(range(0, size, part_size), start=1)
+    ]
+
+
+def multipart_etag(part_md5s: Sequence[bytes]) -> str:
+    """ETag S3 assigns to a multipart object: MD5 of the part MD5s, plus the part count."""
+    return f"{hashlib.md5(b''.join(part_md5s)).hexdigest()}-{len(part_md5s)}"
+
+
+def file_digests(file_path: str) -> Tuple[str, str]:
+    """SHA-256 and MD5 hex digests of a file, in one read."""
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_STREAM_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            md5.update(chunk)
+    return sha256.hexdigest(), md5.hexdigest()
+
 
 class StorageService:
     """S3-compatible object storage service using MinIO."""
 
     def __init__(self):
         """Initialize MinIO client."""
+        self.part_size = max(settings.STORAGE_TRANSFER_PART_SIZE, _MIN_PART_SIZE)
+        self.concurrency = max(1, settings.STORAGE_TRANSFER_CONCURRENCY)
+        self.retries = max(1, settings.STORAGE_TRANSFER_RETRIES)
         self.client = Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
             secure=settings.MINIO_SECURE,
+            http_client=_connection_pool(self.concurrency),
         )
         self.bucket_name = settings.MINIO_BUCKET
         self.initialized = False
@@ -274,7 +353,11 @@ class StorageService:
         metadata: Optional[Dict[str, str]] = None,
     ) -> Dict[str, str]:
         """
-        Upload a file directly to storage.
+        Upload a file to storage.
+
+        Files larger than one part are uploaded as a parallel multipart
+        upload. The file's SHA-256 is stored as object metadata, and the
+        object's ETag is checked against the MD5s of the bytes sent.
 
         Args:
             file_path: Local file path
@@ -283,7 +366,11 @@ class StorageService:
             metadata: Optional custom metadata
 
         Returns:
-            Dict with "object_name", "etag", "size"
+            Dict with "object_name", "etag", "version_id", "size", "sha256"
+
+        Raises:
+            RuntimeError: If the upload fails or the stored object does not
+                          match the file
 
         Example:
             result = storage.upload_file(
@@ -294,23 +381,43 @@ class StorageService:
         self.ensure_initialized()
 
         try:
-            result = self.client.fput_object(
-                self.bucket_name,
-                object_name,
-                file_path,
-                content_type=content_type,
-                metadata=metadata,
-            )
-
-            logger.info(f"✅ Uploaded file: {object_name}")
+            size = os.path.getsize(file_path)
+            sha256, md5 = file_digests(file_path)
+            metadata = {**(metadata or {}), SHA256_METADATA_KEY: sha256}
+
+            if size > self.part_size:
+                result, expected_etag = self._upload_parts(
+                    file_path, object_name, size, content_type, metadata
+                )
+            else:
+                result = self.client.fput_object(
+                    self.bucket_name,
+                    object_name,
+                    file_path,
+                    content_type=content_type,
+                    metadata=metadata,
+                    part_size=self.part_size,  # Single PUT
+                )
+                expected_etag = md5
+
+            if settings.STORAGE_VERIFY_ETAG and result.etag != expected_etag:
+                self.client.remove_object(self.bucket_name, object_name)
+                raise RuntimeError(
+                    f"Stored object does not match {file_path}: "
+                    f"etag {result.etag}, expected {expected_etag}"
+                )
+
+            logger.info(f"✅ Uploaded file: {object_name} ({size} bytes)")
 
             return {
-                "object_name": result.object_name,
+                "object_name": object_name,
                 "etag": result.etag,
                 "version_id": result.version_id if result.version_id else None,
+                "size": size,
+                "sha256": sha256,
             }
 
-        except S3Error as e:
+        except (S3Error, urllib3.exceptions.HTTPError) as e:
             logger.error(f"Failed to upload file: {e}")
             raise RuntimeError(f"File upload failed: {e}")
 
@@ -318,17 +425,29 @@ class StorageService:
         self,
         object_name: str,
         file_path: str,
+        expected_sha256: Optional[str] = None,
     ) -> str:
         """
         Download a file from storage.
 
+        Objects larger than one part are fetched with parallel ranged GETs,
+        pinned to the object's ETag so a concurrent overwrite cannot mix
+        versions. The result is verified against expected_sha256, or else
+        the SHA-256 recorded by upload_file; on any failure the partial file
+        is removed.
+
         Args:
             object_name: S3 object key
             file_path: Local destination path
+            expected_sha256: Content checksum to verify (e.g. the checksum
+                             declared at upload for originals)
 
         Returns:
             file_path: Path to downloaded file
 
+        Raises:
+            RuntimeError: If the download fails or the checksum does not match
+
         Example:
             path = storage.download_file(
                 "videos/recording.mp4",
@@ -337,20 +456,245 @@ class StorageService:
         """
         self.ensure_initialized()
 
+        writing = verified = False
         try:
-            self.client.fget_object(
-                self.bucket_name,
-                object_name,
-                file_path,
+            stat = self.client.stat_object(self.bucket_name, object_name)
+            writing = True
+            expected_sha256 = expected_sha256 or (stat.metadata or {}).get(
+                f"x-amz-meta-{SHA256_METADATA_KEY}"
             )
 
-            logger.info(f"✅ Downloaded file: {object_name} -> {file_path}")
+            if stat.size > self.part_size:
+                self._download_parts(object_name, file_path, stat.size, stat.etag)
+            else:
+                self.client.fget_object(
+                    self.bucket_name,
+                    object_name,
+                    file_path,
+                )
+
+            if expected_sha256:
+                sha256, _ = file_digests(file_path)
+                if sha256 != expected_sha256.lower():
+                    raise RuntimeError(
+                        f"Checksum mismatch for {object_name}: "
+                        f"sha256 {sha256}, expected {expected_sha256}"
+                    )
+
+            verified = True
+            logger.info(f"✅ Downloaded file: {object_name} -> {file_path} ({stat.size} bytes)")
             return file_path
 
-        except S3Error as e:
+        except (S3Error, urllib3.exceptions.HTTPError, OSError) as e:
             logger.error(f"Failed to download file: {e}")
             raise RuntimeError(f"File download failed: {e}")
 
+        finally:
+            if writing and not verified and os.path.exists(file_path):
+                os.remove(file_path)  # No partial or unverified files
+
+    def _upload_parts(
+        self,
+        file_path: str,
+        object_name: str,
+        size: int,
+        content_type: str,
+        metadata: Dict[str, str],
+    ) -> Tuple[Any, str]:
+        """
+        Parallel multipart upload of a local file.
+
+        Holds up to `concurrency` parts in memory at a time.
+
+        Returns:
+            (CompleteMultipartUploadResult, expected multipart ETag)
+        """
+        headers = normalize_headers(metadata)
+        headers["Content-Type"] = content_type
+        upload_id = self.client._create_multipart_upload(self.bucket_name, object_name, headers)
+
+        try:
+            with open(file_path, "rb") as f:
+                fd = f.fileno()
+                uploaded = self._run_parts(
+                    lambda part: self._upload_part(fd, object_name, upload_id, *part),
+                    part_ranges(size, self.part_size),
+                )
+            result = self.client._complete_multipart_upload(
+                self.bucket_name,
+                object_name,
+                upload_id,
+                [Part(number, etag) for number, (etag, _) in enumerate(uploaded, start=1)],
+            )
+        except BaseException:
+            try:
+                self.client._abort_multipart_upload(self.bucket_name, object_name, upload_id)
+            except S3Error as e:
+                logger.warning(f"Failed to abort multipart upload of {object_name}: {e}")
+            raise
+
+        logger.debug(f"Uploaded {object_name} in {len(uploaded)} parts")
+        return result, multipart_etag([md5 for _, md5 in uploaded])
+
+    def _upload_part(
+        self,
+        fd: int,
+        object_name: str,
+        upload_id: str,
+        part_number: int,
+        offset: int,
+        length: int,
+    ) -> Tuple[str, bytes]:
+        """Upload one part; the server rejects it if its Content-MD5 does not match."""
+        data = os.pread(fd, length, offset)
+        md5 = hashlib.md5(data).digest()
+        headers = {"Content-MD5": base64.b64encode(md5).decode()}
+        etag = self._with_retries(
+            lambda: self.client._upload_part(
+                self.bucket_name, object_name, data, headers, upload_id, part_number
+            ),
+            f"part {part_number} of {object_name}",
+        )
+        return etag, md5
+
+    def _download_parts(self, object_name: str, file_path: str, size: int, etag: str) -> None:
+        """Parallel ranged download into a preallocated file."""
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._run_parts(
+                lambda part: self._with_retries(
+                    lambda: self._download_range(fd, object_name, etag, *part[1:]),
+                    f"part {part[0]} of {object_name}",
+                ),
+                part_ranges(size, self.part_size),
+            )
+        finally:
+            os.close(fd)
+        logger.debug(f"Downloaded {object_name} in {-(-size // self.part_size)} parts")
+
+    def _download_range(self, fd: int, object_name: str, etag: str, offset: int, length: int) -> None:
+        """Fetch one byte range and write it at its offset."""
+        response = self.client.get_object(
+            self.bucket_name,
+            object_name,
+            offset=offset,
+            length=length,
+            request_headers={"If-Match": f'"{etag}"'},
+        )
+        written = 0
+        try:
+            for chunk in response.stream(_STREAM_CHUNK_SIZE):
+                os.pwrite(fd, chunk, offset + written)
+                written += len(chunk)
+        finally:
+            response.close()
+            response.release_conn()
+        if written != length:
+            raise IOError(f"Short read at offset {offset}: {written} of {length} bytes")
+
+    def _run_parts(
+        self,
+        transfer: Callable[[Tuple[int, int, int]], Any],
+        parts: List[Tuple[int, int, int]],
+    ) -> List[Any]:
+        """Run part transfers concurrently; the first failure cancels the rest."""
+        pool = ThreadPoolExecutor(
+            max_workers=min(self.concurrency, len(parts)),
+            thread_name_prefix="storage-part",
+        )
+        try:
+            return list(pool.map(transfer, parts))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _with_retries(self, operation: Callable[[], Any], description: str) -> Any:
+        """Run one part transfer, retrying transient failures with backoff."""
+        for attempt in range(1, self.retries + 1):
+            try:
+                return operation()
+            except (S3Error, urllib3.exceptions.HTTPError, OSError) as e:
+                if attempt == self.retries or (
+                    isinstance(e, S3Error) and e.code in _FATAL_S3_CODES
+                ):
+                    raise
+                logger.warning(f"Retrying {description} (attempt {attempt}/{self.retries}): {e}")
+                time.sleep(_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+    def upload_bytes(
+        self,
+        data: bytes,
+        object_name: str,
+        content_type: str = "application/octet-stream",
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Upload an in-memory object (e.g. a cached CV result).
+
+        Args:
+            data: Object content
+            object_name: S3 object key
+            content_type: MIME type
+            metadata: Optional custom metadata
+
+        Returns:
+            Dict with "object_name", "etag", "version_id"
+        """
+        self.ensure_initialized()
+
+        try:
+            result = self.client.put_object(
+                self.bucket_name,
+                object_name,
+                io.BytesIO(data),
+                length=len(data),
+                content_type=content_type,
+                metadata=metadata,
+            )
+
+            logger.debug(f"Uploaded object: {object_name} ({len(data)} bytes)")
+
+            return {
+                "object_name": result.object_name,
+                "etag": result.etag,
+                "version_id": result.version_id if result.version_id else None,
+            }
+
+        except S3Error as e:
+            logger.error(f"Failed to upload object: {e}")
+            raise RuntimeError(f"Object upload failed: {e}")
+
+    def download_bytes(self, object_name: str) -> bytes:
+        """
+        Download an object into memory.
+
+        Args:
+            object_name: S3 object key
+
+        Returns:
+            Object content
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        self.ensure_initialized()
+
+        response = None
+        try:
+            response = self.client.get_object(self.bucket_name, object_name)
+            return response.read()
+
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotFoundError(object_name)
+            logger.error(f"Failed to download object: {e}")
+            raise RuntimeError(f"Object download failed: {e}")
+
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
     # ========================================================================
     # Signed URL Operations (for secure video streaming)
     # ========================================================================
@@ -440,6 +784,29 @@ class StorageService:
             logger.error(f"Failed to check file existence: {e}")
             raise RuntimeError(f"File existence check failed: {e}")
 
+    def list_files(self, prefix: str) -> List[str]:
+        """
+        List the object keys under a prefix (recursively), in key order.
+
+        Args:
+            prefix: Object key prefix (e.g. "cv_results/<mall>/<video>/tracking/")
+
+        Returns:
+            object_names: Matching object keys
+
+        Example:
+            parts = storage.list_files(f"{results_dir}/tracklets/")
+        """
+        self.ensure_initialized()
+
+        try:
+            objects = self.client.list_objects(self.bucket_name, prefix=prefix, recursive=True)
+            return sorted(obj.object_name for obj in objects)
+
+        except S3Error as e:
+            logger.error(f"Failed to list files: {e}")
+            raise RuntimeError(f"File listing failed: {e}")
+
     def get_file_metadata(self, object_name: str) -> Dict[str, any]:
         """
         Get file metadata (size, content-type, etag, etc).
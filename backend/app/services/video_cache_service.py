@@ -0,0 +1,235 @@
+"""
+Worker-local, content-addressed disk cache of source videos.
+
+Handles:
+- Entries keyed by content (checksum_sha256, or the object's etag), so proxy
+  generation, metadata extraction and CV analysis of one upload download it
+  once per host instead of once per task
+- Atomic fills (download to a temp name, then rename) serialized per key with
+  cross-process file locks, so concurrent tasks on a host share one download
+- Size-bounded LRU eviction that never removes an entry another task is reading
+- Hit/miss/eviction counters shared by all worker processes of the host
+
+Locking uses flock() on one lock file per entry: a fill holds it
+exclusively, readers hold it shared while they use the file, and eviction
+only takes entries whose lock it can get exclusively without waiting.
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STAT_COUNTERS = ("hits", "misses", "evictions", "bytes_downloaded", "bytes_evicted")
+_KEY_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class VideoCacheService:
+    """Size-bounded LRU cache of downloaded videos on the worker's local disk."""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: Cache root (shared by all worker processes on the host)
+            max_bytes: Total size of cached videos to keep
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.objects_dir = self.cache_dir / "objects"
+        self.locks_dir = self.cache_dir / "locks"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.locks_dir.mkdir(parents=True, exist_ok=True)
+        self._index_lock_path = self.cache_dir / "index.lock"
+        self._stats_path = self.cache_dir / "stats.json"
+
+    def entry_path(self, key: str, suffix: str = ".mp4") -> Path:
+        """Local path of a cache entry."""
+        return self.objects_dir / f"{_KEY_RE.sub('_', key)}{suffix}"
+
+    @contextmanager
+    def open(
+        self,
+        key: str,
+        download: Callable[[str], Any],
+        suffix: str = ".mp4",
+    ) -> Iterator[str]:
+        """
+        Local path of the cached video, downloading it on a miss.
+
+        The entry is protected from eviction until the context exits.
+
+        Args:
+            key: Content key (e.g. "sha256-<checksum>" or "etag-<etag>")
+            download: Called with a temp path to write the video to on a miss
+            suffix: File extension of the entry (FFmpeg probes by content, so
+                    this only helps humans inspecting the cache)
+
+        Yields:
+            Path of the cached file
+        """
+        path = self.entry_path(key, suffix)
+        lock_path = self._lock_path(path)
+        with open(lock_path, "a+") as lock_file:
+            # Exclusive while checking/filling: a concurrent task asking for the
+            # same key waits here and then finds the finished entry
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if path.exists():
+                    # LRU order is the lock file's mtime (the entry's own mtime
+                    # stays stable, it is part of FFmpeg probe cache keys)
+                    os.utime(lock_path)
+                    self._update_stats(hits=1)
+                    logger.info(f"Video cache hit: {key}")
+                else:
+                    self._fill(path, download)
+                    logger.info(f"Video cache miss: {key} ({path.stat().st_size} bytes downloaded)")
+                    self._evict(keep=path)
+
+                # Readers share the lock; eviction skips entries it cannot lock
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+                yield str(path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _fill(self, path: Path, download: Callable[[str], Any]) -> None:
+        """Download to a temp name next to the entry and rename it into place."""
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.part")
+        try:
+            download(str(temp_path))
+            os.replace(temp_path, path)
+            os.utime(self._lock_path(path))
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        self._update_stats(misses=1, bytes_downloaded=path.stat().st_size)
+
+    def _evict(self, keep: Path) -> None:
+        """Remove least recently used entries until the cache fits max_bytes."""
+        with self._index_lock():
+            entries = []
+            for entry in self.objects_dir.iterdir():
+                if entry.name.startswith("."):
+                    continue  # Fill in progress
+                try:
+                    size = entry.stat().st_size
+                    last_used = self._lock_path(entry).stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                entries.append((last_used, size, entry))
+
+            total = sum(size for _, size, _ in entries)
+            evicted = evicted_bytes = 0
+            for _, size, entry in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                if entry == keep:
+                    continue
+                with open(self._lock_path(entry), "a+") as lock_file:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # In use by another task
+                    try:
+                        entry.unlink(missing_ok=True)
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                total -= size
+                evicted += 1
+                evicted_bytes += size
+                logger.info(f"Video cache evicted {entry.name} ({size} bytes)")
+
+            if evicted:
+                self._update_stats(locked=True, evictions=evicted, bytes_evicted=evicted_bytes)
+            if total > self.max_bytes:
+                logger.warning(
+                    f"Video cache holds {total} bytes (max {self.max_bytes}): "
+                    f"remaining entries are in use"
+                )
+
+    def _lock_path(self, entry: Path) -> Path:
+        return self.locks_dir / f"{entry.name}.lock"
+
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Host-wide lock for eviction and the stats file."""
+        with open(self._index_lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _update_stats(self, locked: bool = False, **increments: int) -> None:
+        """Add to the shared counters (locked=True if the index lock is held)."""
+        if not locked:
+            with self._index_lock():
+                self._update_stats(locked=True, **increments)
+            return
+
+        stats = self._read_counters()
+        for name, value in increments.items():
+            stats[name] = stats.get(name, 0) + value
+        stats["updated_at"] = time.time()
+        temp_path = self._stats_path.with_name(f".stats.{os.getpid()}.json")
+        temp_path.write_text(json.dumps(stats))
+        os.replace(temp_path, self._stats_path)
+
+    def _read_counters(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self._stats_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {name: 0 for name in _STAT_COUNTERS}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache counters and current usage, for tuning max_bytes.
+
+        Returns:
+            Dict with hits, misses, evictions, bytes_downloaded, bytes_evicted
+            (since the cache directory was created), hit_rate, entries,
+            size_bytes and max_bytes
+        """
+        with self._index_lock():
+            stats = {name: 0 for name in _STAT_COUNTERS}
+            stats.update(self._read_counters())
+        sizes = []
+        for entry in self.objects_dir.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                sizes.append(entry.stat().st_size)
+            except FileNotFoundError:
+                continue  # Evicted meanwhile
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else None,
+            "entries": len(sizes),
+            "size_bytes": sum(sizes),
+            "max_bytes": self.max_bytes,
+        })
+        return stats
+
+
+# Singleton instance
+_video_cache_service: Optional[VideoCacheService] = None
+
+
+def get_video_cache_service() -> Optional[VideoCacheService]:
+    """Get the worker's video cache (None when VIDEO_CACHE_DIR is not set)."""
+    global _video_cache_service
+    if not settings.VIDEO_CACHE_DIR:
+        return None
+    if _video_cache_service is None:
+        _video_cache_service = VideoCacheService(
+            settings.VIDEO_CACHE_DIR,
+            settings.VIDEO_CACHE_MAX_BYTES,
+        )
+    return _video_cache_service
@@ -8,26 +8,64 @@ Celery tasks for CV operations:
 - Within-camera tracking (Phase 3.4)
 - Cross-camera re-identification (Phase 4)
 """
+import gzip
 import logging
 import os
 import tempfile
+from collections import deque
+from contextlib import ExitStack
+from datetime import datetime, timedelta
 from uuid import UUID
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import json
 
 from celery import Task
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert
 import numpy as np
-import cv2
 
 from app.core.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
-from app.models import Video, ProcessingJob
+from app.models import CameraPin, Video, ProcessingJob, Tracklet
 from app.services.storage_service import get_storage_service
-from app.services.ffmpeg_service import get_ffmpeg_service
-from app.cv.person_detector import create_detector
+from app.services.ffmpeg_service import SideOutputs, get_ffmpeg_service
+from app.services.stage_cache_service import (
+    STAGE_APPEARANCE,
+    STAGE_DETECTIONS,
+    STAGE_TRACKS,
+    StageCacheService,
+    StageKey,
+    get_stage_cache_service,
+    model_version,
+    stage_key,
+)
+from app.cv.model_registry import ModelSpec, get_model_registry
+from app.cv.byte_tracker import create_byte_tracker
+from app.cv.chunk_stitching import (
+    BoundaryObservations,
+    TrackingChunk,
+    relabel_tracking_state,
+    stitch_chunks,
+)
+from app.cv.detection_pipeline import create_detection_pipeline
+from app.cv.garment_analyzer import create_garment_analyzer
+from app.cv.keyframe_selector import KeyframeSelector
+from app.cv.tracklet_generator import APPEARANCE_FIELDS, TrackletGenerator, analyze_track_appearance
+from app.cv.tracklet_sink import ObjectStoreTrackletSink, TrackletSink, read_tracklet_parts
+from app.cv.motion_gate import create_motion_gate
+from app.cv.roi import RegionOfInterest
+from app.cv.tiling import TilingConfig, resolve_tiling
+from app.cv.quantization import QuantizationThresholds
+from app.tasks.video_tasks import (
+    fail_proxy_job,
+    fetch_video_input,
+    probe_original,
+    proxy_side_outputs,
+    publish_proxy_outputs,
+    video_cache_stats,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +89,322 @@ class DatabaseTask(Task):
             self._db = None
 
 
+def _quantization_thresholds() -> QuantizationThresholds:
+    """Configured INT8 accuracy gate."""
+    return QuantizationThresholds(
+        min_detection_recall=settings.CV_QUANT_MIN_DETECTION_RECALL,
+        max_embedding_cosine_drift=settings.CV_QUANT_MAX_EMBEDDING_COSINE_DRIFT,
+        min_speedup=settings.CV_QUANT_MIN_SPEEDUP,
+    )
+
+
+def _detector_backend_options(precision: str) -> Optional[Dict[str, Any]]:
+    """Backend options for a detector precision (INT8 needs calibration and gate settings)."""
+    if precision == "fp32":
+        return None
+    return {
+        "calibration_dir": settings.CV_CALIBRATION_DIR,
+        "gate_thresholds": _quantization_thresholds(),
+    }
+
+
+def cv_preload_specs() -> List[ModelSpec]:
+    """Models the worker model registry loads at worker start (from settings)."""
+    precision = settings.CV_DETECTOR_PRECISION
+    specs = [
+        ModelSpec(
+            kind="detector",
+            model=settings.CV_DETECTOR_MODEL,
+            backend="auto" if precision != "fp32" and backend == "torch" else backend,
+            device=settings.CV_PRELOAD_DEVICE,
+            precision=precision,
+            options={"backend_options": _detector_backend_options(precision)},
+        )
+        for backend in settings.CV_PRELOAD_DETECTOR_BACKENDS
+    ]
+    if settings.CV_PRELOAD_EMBEDDINGS:
+        specs.append(ModelSpec(
+            kind="embedding",
+            model=settings.CV_EMBEDDING_MODEL,
+            device=settings.CV_PRELOAD_DEVICE,
+            precision=settings.CV_EMBEDDING_PRECISION,
+            options={
+                "calibration_dir": settings.CV_CALIBRATION_DIR,
+                "gate_thresholds": _quantization_thresholds(),
+            },
+        ))
+    return specs
+
+
+ANALYSIS_SOURCES = ("original", "scaled", "proxy")
+
+
+def _resolve_frame_source(
+    requested: str,
+    video: Video,
+    tiling: Optional[TilingConfig],
+) -> str:
+    """
+    Frame source the detection stage actually decodes.
+
+    Args:
+        requested: 'original', 'scaled' or 'proxy'
+        video: Video record (proxy_path and original width/height)
+        tiling: Tiling config resolved for the original resolution
+
+    Returns:
+        'original', 'scaled' or 'proxy'
+    """
+    if requested not in ANALYSIS_SOURCES:
+        raise ValueError(f"Unknown analysis source '{requested}', expected one of {ANALYSIS_SOURCES}")
+    if tiling is not None:
+        return "original"  # Tiles exist to keep small people at full resolution
+    if requested == "proxy" and not (video.proxy_path and video.width and video.height):
+        # Boxes are mapped back with the original size, so it must be known
+        logger.info("Proxy or original size not available, decoding the original downscaled instead")
+        return "scaled"
+    return requested
+
+
+def _publish_side_outputs(
+    task: "DatabaseTask",
+    video: Video,
+    proxy_job: ProcessingJob,
+    storage,
+    ffmpeg,
+    side_outputs: SideOutputs,
+    metadata: Dict[str, Any],
+) -> None:
+    """Upload the proxy and thumbnail written during the detection decode."""
+    outputs = ffmpeg.describe_side_outputs(side_outputs)
+    publish_proxy_outputs(
+        task.db, video, proxy_job, storage,
+        proxy_local_path=side_outputs.proxy_path,
+        thumbnail_local_path=side_outputs.thumbnails[0][1],
+        metadata=metadata,
+        proxy_metadata=outputs["proxy"],
+        thumbnail_metadata=outputs["thumbnails"][0],
+    )
+
+
+def _run_detection_stage(
+    task: "DatabaseTask",
+    job: ProcessingJob,
+    video: Video,
+    storage,
+    ffmpeg,
+    temp_dir_path: Path,
+    inputs: ExitStack,
+    detector,
+    motion_gate,
+    roi: Optional[RegionOfInterest],
+    detection_key: Callable,
+    source: str,
+    stage_cache: Optional[StageCacheService],
+    cache_key: Optional[StageKey],
+    reuse_cached: bool,
+    analysis_fps: float,
+    debug_dump_frames: bool,
+    batch_size: int,
+    prefetch_frames: int,
+    proxy_job: Optional[ProcessingJob] = None,
+) -> Tuple[Dict[str, Any], Optional[TilingConfig], str]:
+    """
+    Download the video (or its proxy) and run (or reuse) the detection stage.
+
+    With proxy_job (a fresh upload), the original is validated and probed
+    here, and the proxy and thumbnail are encoded by the same FFmpeg process
+    that streams the detection frames, then published to complete proxy_job.
+
+    Returns:
+        Tuple of (detection stage result, tiling config used, frame source
+        used). The stage result holds "detections", "statistics" and
+        "pipeline" and is independent of the video/job IDs, so it can be
+        shared by re-uploads. Boxes are in original-resolution coordinates
+        whatever the frame source.
+    """
+    # Download video (or the proxy) from S3, stream it (STREAMING_INPUT_ENABLED)
+    # or reuse the worker's cached copy (VIDEO_CACHE_DIR); inputs keeps it
+    # available until the task is done
+    if source == "proxy":
+        video_input = inputs.enter_context(fetch_video_input(
+            storage, video.proxy_path, temp_dir_path / f"proxy_{video.id}.mp4",
+        ))
+    else:
+        video_input = inputs.enter_context(fetch_video_input(
+            storage, video.original_path, temp_dir_path / f"video_{video.id}.mp4",
+            checksum_sha256=video.checksum_sha256,
+        ))
+
+    # Update progress
+    job.progress_percent = 10
+    task.db.commit()
+
+    # Open frame source at analysis_fps
+    # Frames are streamed from FFmpeg as raw RGB arrays; the JPEG dump is
+    # only used when debugging what the detector sees.
+    # The original's metadata is probed once and stored on the video record
+    if source == "proxy":
+        metadata = ffmpeg.extract_metadata(video_input)
+    else:
+        metadata = probe_original(ffmpeg, video, video_input)
+        task.db.commit()
+    expected_frames = max(1, int(metadata["duration_seconds"] * analysis_fps))
+
+    side_outputs = None
+    if proxy_job is not None:
+        side_outputs = proxy_side_outputs(temp_dir_path, video, metadata)
+
+    if source == "proxy":
+        source_size = (video.width, video.height)
+        if metadata.get("fps") and metadata["fps"] < analysis_fps:
+            logger.warning(
+                f"Proxy has {metadata['fps']:.1f} fps, below analysis_fps={analysis_fps}; "
+                f"frames are sampled at the proxy rate"
+            )
+    else:
+        source_size = (metadata["width"], metadata["height"])
+    tiling, source, probed_key = detection_key(*source_size)
+    stream_kwargs = {
+        "input_path": video_input,
+        "fps": analysis_fps,
+        "metadata": metadata,
+        # Downscaled in FFmpeg to the detector input size; boxes are
+        # mapped back to original coordinates by the pipeline
+        "max_size": settings.CV_ANALYSIS_MAX_SIZE if source == "scaled" else None,
+        "source_size": source_size,
+        "side_outputs": side_outputs,
+    }
+
+    if probed_key is not None and reuse_cached and probed_key != cache_key:
+        # Dimensions were unknown (or stale) before probing
+        cached = stage_cache.get(probed_key)
+        if cached is not None:
+            if side_outputs is None:
+                logger.info("Reusing cached detections, skipping decode")
+            else:
+                logger.info("Reusing cached detections, decoding only for the proxy and thumbnail")
+                deque(ffmpeg.stream_frames(**stream_kwargs), maxlen=0)
+                _publish_side_outputs(task, video, proxy_job, storage, ffmpeg, side_outputs, metadata)
+            return cached, tiling, source
+
+    pipeline = create_detection_pipeline(
+        detector,
+        batch_size=batch_size,
+        prefetch_frames=prefetch_frames,
+        motion_gate=motion_gate,
+        roi=roi,
+        tiling=tiling,
+    )
+    if roi is not None:
+        logger.info(
+            f"ROI inference ({roi.mode}): "
+            f"{roi.coverage((metadata['height'], metadata['width'])):.0%} of the frame"
+        )
+    if tiling is not None:
+        logger.info(
+            f"Tiled inference for {metadata['width']}x{metadata['height']} video "
+            f"(tile_size={tiling.tile_size}, overlap={tiling.overlap})"
+        )
+
+    if debug_dump_frames:
+        # detect_persons_in_video rejects debug_dump_frames with a proxy job
+        logger.info(f"Extracting frames to disk at {analysis_fps} fps (debug mode)")
+        frames_dir = temp_dir_path / "frames"
+        frame_paths = ffmpeg.extract_frames(
+            input_path=video_input,
+            output_dir=str(frames_dir),
+            fps=analysis_fps,
+            quality=2,  # High quality for CV analysis
+        )
+        frames = ffmpeg.load_extracted_frames(frame_paths, fps=analysis_fps)
+    else:
+        logger.info(
+            f"Streaming frames at {analysis_fps} fps from the {source} video"
+            + (" (also writing the proxy and thumbnail)" if side_outputs is not None else "")
+        )
+        frames = ffmpeg.stream_frames(
+            buffer_count=pipeline.required_buffer_count,
+            workers=settings.CV_DECODE_WORKERS,
+            keyframes=video.keyframe_times if source != "proxy" else None,
+            **stream_kwargs,
+        )
+
+    # Update progress
+    job.progress_percent = 20
+    task.db.commit()
+
+    # Run detection: decode thread -> micro-batched inference -> results here
+    logger.info(
+        f"Running person detection on frames "
+        f"(batch_size={batch_size}, prefetch={prefetch_frames})"
+    )
+    all_detections = []
+    frames_with_people = 0
+    total_people_detected = 0
+
+    for i, result in enumerate(pipeline.run(frames)):
+        detections = result.detections
+
+        # Store detections with frame metadata
+        frame_result = {
+            "frame_number": result.frame_number,
+            "timestamp_seconds": round(result.timestamp_seconds, 2),
+            "detections": detections,
+            "person_count": len(detections),
+            "skipped": result.skipped,
+        }
+        all_detections.append(frame_result)
+
+        # Update statistics
+        if len(detections) > 0:
+            frames_with_people += 1
+            total_people_detected += len(detections)
+
+        # Update progress periodically (every 10 frames)
+        if i % 10 == 0:
+            progress = 20 + int(min(i / expected_frames, 1.0) * 70)  # 20% to 90%
+            job.progress_percent = progress
+            task.db.commit()
+            logger.info(
+                f"Detection progress: {i}/~{expected_frames} frames "
+                f"({progress}%), decode queue depth "
+                f"{pipeline.stats.decode_queue.max_depth}/{prefetch_frames}"
+            )
+
+    # The frame stream is exhausted, so the proxy and thumbnail are complete
+    if side_outputs is not None:
+        _publish_side_outputs(task, video, proxy_job, storage, ffmpeg, side_outputs, metadata)
+
+    total_frames = len(all_detections)
+    pipeline_stats = pipeline.stats.to_dict()
+    logger.info(
+        f"Analyzed {total_frames} frames ({pipeline.stats.frames_skipped} skipped by "
+        f"motion gate), pipeline stats: {pipeline_stats}"
+    )
+
+    detection_stage = {
+        "pipeline": pipeline_stats,
+        "statistics": {
+            "total_frames": total_frames,
+            "frames_with_people": frames_with_people,
+            "frames_detected": pipeline.stats.frames_detected,
+            "frames_skipped": pipeline.stats.frames_skipped,
+            "total_detections": total_people_detected,
+            "avg_people_per_frame": round(
+                total_people_detected / total_frames, 2
+            ) if total_frames > 0 else 0,
+        },
+        "detections": all_detections,
+    }
+
+    # Store right away so a retry after a later failure skips this stage
+    if probed_key is not None:
+        stage_cache.put(probed_key, detection_stage, source_video_id=video.id)
+
+    return detection_stage, tiling, source
+
+
 @celery_app.task(
     bind=True,
     base=DatabaseTask,
@@ -65,17 +419,32 @@ def detect_persons_in_video(
     device: str = "cpu",
     conf_threshold: float = 0.7,
     analysis_fps: float = 1.0,
+    debug_dump_frames: bool = False,
+    batch_size: int = 8,
+    prefetch_frames: int = 16,
+    backend: str = "torch",
+    precision: Optional[str] = None,
+    force_recompute: bool = False,
+    source: Optional[str] = None,
+    proxy_job_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Detect people in video frames at 1 fps (Phase 3.1).
 
     This task:
-    1. Downloads video from S3
-    2. Extracts frames at analysis_fps (default 1 fps)
-    3. Runs YOLOv8n person detection on each frame
+    1. Downloads video from S3 (unless the detection stage for this video
+       content and these parameters is already in the stage cache)
+    2. Streams raw frames from FFmpeg at analysis_fps (default 1 fps)
+    3. Runs YOLOv8n person detection in micro-batches, overlapped with decoding,
+       skipping motionless frames per the camera pin's motion gate and
+       inferring only inside the pin's ROI polygons
     4. Stores detection results as JSON
     5. Updates job status with progress
 
+    With proxy_job_id (queued by JobService.queue_ingest for a fresh upload),
+    the same download and decode also produce the proxy and thumbnail and
+    complete that proxy_generation job, replacing generate_proxy_video.
+
     In Phase 3.4, this will be extended to include within-camera tracking
     and tracklet generation.
 
@@ -85,6 +454,20 @@ def detect_persons_in_video(
         device: Device for inference ('cpu', 'cuda', 'mps')
         conf_threshold: Confidence threshold for detections (0.0-1.0)
         analysis_fps: Frame extraction rate for analysis (default 1.0)
+        debug_dump_frames: Extract frames to a temp dir as JPEGs instead of
+                           streaming them (debug only, much slower)
+        batch_size: Frames per detect_batch() call
+        prefetch_frames: Decoded frames buffered ahead of inference
+        backend: Inference backend ('torch', 'onnx', 'openvino', 'auto')
+        precision: Detector precision ('fp32' or 'int8_static'); defaults
+                   to CV_DETECTOR_PRECISION. int8_static must have passed
+                   the quantization accuracy gate.
+        force_recompute: Ignore cached stage results (they are still refreshed)
+        source: Frames to detect on ('original', 'scaled' or 'proxy');
+                defaults to CV_ANALYSIS_SOURCE. Boxes are always reported
+                in original-resolution coordinates.
+        proxy_job_id: proxy_generation ProcessingJob UUID (as string) to
+                      complete from the same decode (fresh uploads)
 
     Returns:
         Dict with detection results and statistics
@@ -115,97 +498,140 @@ def detect_persons_in_video(
         job.started_at = func.now()
         job.celery_task_id = self.request.id
         job.progress_percent = 0
+
+        # Proxy generation fused into this decode (skipped if a previous
+        # attempt already published the proxy)
+        proxy_job = None
+        if proxy_job_id:
+            if debug_dump_frames:
+                raise ValueError("debug_dump_frames cannot be combined with proxy_job_id")
+            proxy_job = self.db.query(ProcessingJob).filter(ProcessingJob.id == UUID(proxy_job_id)).first()
+            if not proxy_job:
+                raise ValueError(f"ProcessingJob {proxy_job_id} not found")
+            if proxy_job.status == "completed":
+                proxy_job = None
+            else:
+                proxy_job.status = "running"
+                proxy_job.started_at = func.now()
+                proxy_job.celery_task_id = self.request.id
         self.db.commit()
 
         # Get services
         storage = get_storage_service()
         ffmpeg = get_ffmpeg_service()
+        # Stage-result cache (keyed by video content, so identical re-uploads
+        # and Celery retries reuse finished stages); the JPEG debug path is
+        # never cached since its frames differ from the streamed ones
+        stage_cache = None
+        if settings.CV_STAGE_CACHE_ENABLED and not debug_dump_frames:
+            if video.checksum_sha256:
+                stage_cache = get_stage_cache_service(self.db)
+            else:
+                logger.info("Video has no checksum_sha256, stage cache disabled for this run")
 
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir_path = Path(temp_dir)
-
-            # 1. Download video from S3
-            logger.info(f"Downloading video from S3: {video.original_path}")
-            video_local_path = temp_dir_path / f"video_{video.id}.mp4"
-            storage.download_file(video.original_path, str(video_local_path))
-
-            # Update progress
-            job.progress_percent = 10
-            self.db.commit()
+        # 1. Initialize person detector
+        precision = precision or settings.CV_DETECTOR_PRECISION
+        logger.info(
+            f"Initializing PersonDetector on device: {device}, backend: {backend}, "
+            f"precision: {precision}"
+        )
+        if precision != "fp32" and backend == "torch":
+            backend = "auto"  # INT8 runs on the ONNX-based backends
+        # Weights come from the worker's model registry (preloaded at worker start)
+        detector = get_model_registry().get_detector(
+            model_name=settings.CV_DETECTOR_MODEL,
+            device=device,
+            conf_threshold=conf_threshold,
+            backend=backend,
+            backend_options=_detector_backend_options(precision),
+            precision=precision,
+        )
+        # Per-pin motion gate (pins without config use the global default)
+        # and region of interest (pins without polygons use the whole frame)
+        pin = self.db.query(CameraPin).filter(CameraPin.id == video.pin_id).first()
+        motion_gate = create_motion_gate(
+            pin.motion_gate if pin else None,
+            enabled=settings.CV_MOTION_GATE_ENABLED,
+        )
+        roi = RegionOfInterest.from_config(
+            pin.roi_polygons if pin else None,
+            mode=settings.CV_ROI_MODE,
+        )
 
-            # 2. Extract frames at analysis_fps
-            logger.info(f"Extracting frames at {analysis_fps} fps")
-            frames_dir = temp_dir_path / "frames"
-            frames_dir.mkdir(exist_ok=True)
+        # The JPEG debug path works on full-resolution frames
+        requested_source = "original" if debug_dump_frames else (source or settings.CV_ANALYSIS_SOURCE)
 
-            frame_paths = ffmpeg.extract_frames(
-                input_path=str(video_local_path),
-                output_dir=str(frames_dir),
-                fps=analysis_fps,
-                quality=2,  # High quality for CV analysis
+        def detection_key(width: Optional[int], height: Optional[int]):
+            """Tiling and frame source for the video size, and the detection stage key (None without cache)."""
+            # High-resolution video is inferred in overlapping tiles
+            # (pins without config switch on by resolution)
+            tiling = resolve_tiling(
+                pin.tiling if pin else None,
+                width,
+                height,
+                min_long_side=settings.CV_TILING_MIN_LONG_SIDE,
+            )
+            frame_source = _resolve_frame_source(requested_source, video, tiling)
+            if stage_cache is None:
+                return tiling, frame_source, None
+            return tiling, frame_source, stage_key(
+                video.checksum_sha256,
+                STAGE_DETECTIONS,
+                model_version(settings.CV_DETECTOR_MODEL),
+                {
+                    "backend": detector.backend_name,
+                    "precision": precision,
+                    "conf_threshold": conf_threshold,
+                    "iou_threshold": detector.iou_threshold,
+                    "analysis_fps": analysis_fps,
+                    "motion_gate": motion_gate.config.to_dict(),
+                    "roi": roi.to_dict() if roi else None,
+                    "tiling": tiling.to_dict() if tiling else None,
+                    "source": frame_source,
+                    "max_size": settings.CV_ANALYSIS_MAX_SIZE if frame_source == "scaled" else None,
+                },
             )
 
-            total_frames = len(frame_paths)
-            logger.info(f"Extracted {total_frames} frames for analysis")
+        # With the dimensions already probed (proxy generation stores them),
+        # a cached result is found without downloading the video at all
+        # (and the frame source is chosen before downloading)
+        detection_stage = None
+        cache_key = None
+        frame_source = _resolve_frame_source(requested_source, video, None)
+        if video.width and video.height and proxy_job is None:
+            tiling, frame_source, cache_key = detection_key(video.width, video.height)
+            if cache_key is not None and not force_recompute:
+                detection_stage = stage_cache.get(cache_key)
 
-            # Update progress
-            job.progress_percent = 30
-            self.db.commit()
+        # Create temporary directory for processing
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as inputs:
+            temp_dir_path = Path(temp_dir)
 
-            # 3. Initialize person detector
-            logger.info(f"Initializing PersonDetector on device: {device}")
-            detector = create_detector(
-                model_name="yolov8n.pt",
-                device=device,
-                conf_threshold=conf_threshold,
-            )
+            # 2-4. Download, decode and detect (unless the stage is cached)
+            if detection_stage is None:
+                detection_stage, tiling, frame_source = _run_detection_stage(
+                    self, job, video, storage, ffmpeg, temp_dir_path, inputs,
+                    detector=detector,
+                    motion_gate=motion_gate,
+                    roi=roi,
+                    detection_key=detection_key,
+                    source=frame_source,
+                    stage_cache=stage_cache,
+                    cache_key=cache_key,
+                    reuse_cached=not force_recompute,
+                    analysis_fps=analysis_fps,
+                    debug_dump_frames=debug_dump_frames,
+                    batch_size=batch_size,
+                    prefetch_frames=prefetch_frames,
+                    proxy_job=proxy_job,
+                )
+            else:
+                logger.info("Reusing cached detections, skipping download and decode")
 
-            # 4. Run detection on each frame
-            logger.info("Running person detection on frames")
-            all_detections = []
-            frames_with_people = 0
-            total_people_detected = 0
-
-            for i, frame_path in enumerate(frame_paths):
-                # Read frame
-                frame = cv2.imread(frame_path)
-                if frame is None:
-                    logger.warning(f"Failed to read frame: {frame_path}")
-                    continue
-
-                # Convert BGR to RGB (YOLOv8 expects RGB)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                # Run detection
-                detections = detector.detect(frame_rgb)
-
-                # Store detections with frame metadata
-                frame_number = i + 1
-                frame_timestamp = i / analysis_fps  # Timestamp from 0 (first frame at t=0)
-
-                frame_result = {
-                    "frame_number": frame_number,
-                    "timestamp_seconds": round(frame_timestamp, 2),
-                    "detections": detections,
-                    "person_count": len(detections),
-                }
-                all_detections.append(frame_result)
-
-                # Update statistics
-                if len(detections) > 0:
-                    frames_with_people += 1
-                    total_people_detected += len(detections)
-
-                # Update progress periodically (every 10 frames)
-                if i % 10 == 0:
-                    progress = 30 + int((i / total_frames) * 60)  # 30% to 90%
-                    job.progress_percent = progress
-                    self.db.commit()
-                    logger.info(
-                        f"Detection progress: {i}/{total_frames} frames "
-                        f"({progress}%)"
-                    )
+            pipeline_stats = detection_stage["pipeline"]
+            statistics = detection_stage["statistics"]
+            total_frames = statistics["total_frames"]
+            total_people_detected = statistics["total_detections"]
 
             # Update progress
             job.progress_percent = 90
@@ -219,20 +645,21 @@ def detect_persons_in_video(
                 "video_id": str(video.id),
                 "job_id": str(job.id),
                 "analysis_params": {
-                    "model": "yolov8n",
+                    "model": Path(settings.CV_DETECTOR_MODEL).stem,
                     "device": device,
                     "conf_threshold": conf_threshold,
                     "analysis_fps": analysis_fps,
+                    "batch_size": batch_size,
+                    "backend": detector.backend_name,
+                    "precision": precision,
+                    "motion_gate": motion_gate.config.to_dict(),
+                    "roi": roi.to_dict() if roi else None,
+                    "tiling": tiling.to_dict() if tiling else None,
+                    "source": frame_source,
                 },
-                "statistics": {
-                    "total_frames": total_frames,
-                    "frames_with_people": frames_with_people,
-                    "total_detections": total_people_detected,
-                    "avg_people_per_frame": round(
-                        total_people_detected / total_frames, 2
-                    ) if total_frames > 0 else 0,
-                },
-                "detections": all_detections,
+                "pipeline": pipeline_stats,
+                "statistics": statistics,
+                "detections": detection_stage["detections"],
             }
 
             # Save to local file
@@ -264,6 +691,13 @@ def detect_persons_in_video(
             "status": "success",
             "detection_results_path": results_s3_path,
             "statistics": detection_results["statistics"],
+            "pipeline": pipeline_stats,
+            "stage_cache": {
+                STAGE_DETECTIONS: (
+                    "disabled" if stage_cache is None else "hit" if stage_cache.hits else "miss"
+                ),
+            },
+            "video_cache": video_cache_stats(),
         }
         self.db.commit()
 
@@ -296,6 +730,11 @@ def detect_persons_in_video(
             job.error_message = str(e)
             self.db.commit()
 
+        if proxy_job_id:
+            proxy_job = self.db.query(ProcessingJob).filter(ProcessingJob.id == UUID(proxy_job_id)).first()
+            if proxy_job and proxy_job.status != "completed":
+                fail_proxy_job(self.db, video_uuid, proxy_job.id, e)
+
         # Retry on transient errors
         if self.request.retries < self.max_retries:
             logger.info(
@@ -308,6 +747,699 @@ def detect_persons_in_video(
         raise
 
 
+def _create_tracklet_generator(
+    db: Session,
+    video: Video,
+    device: str,
+    conf_threshold: float,
+    analysis_fps: float,
+    extract_embeddings: bool,
+    sink: Optional[TrackletSink] = None,
+) -> TrackletGenerator:
+    """Tracklet generator for a video, with the pin's motion gate, ROI and tiling."""
+    precision = settings.CV_DETECTOR_PRECISION
+    # Weights come from the worker's model registry (preloaded at worker start)
+    detector = get_model_registry().get_detector(
+        model_name=settings.CV_DETECTOR_MODEL,
+        device=device,
+        conf_threshold=conf_threshold,
+        backend="auto" if precision != "fp32" else "torch",  # INT8 runs on the ONNX-based backends
+        backend_options=_detector_backend_options(precision),
+        precision=precision,
+    )
+    pin = db.query(CameraPin).filter(CameraPin.id == video.pin_id).first()
+    return TrackletGenerator(
+        camera_id=str(video.pin_id),
+        mall_id=str(video.mall_id),
+        person_detector=detector,
+        garment_analyzer=create_garment_analyzer(extract_embeddings=extract_embeddings),
+        tracker=create_byte_tracker(),
+        extract_embeddings=extract_embeddings,
+        frame_sample_rate=analysis_fps,
+        motion_gate=create_motion_gate(
+            pin.motion_gate if pin else None,
+            enabled=settings.CV_MOTION_GATE_ENABLED,
+        ),
+        roi=RegionOfInterest.from_config(
+            pin.roi_polygons if pin else None,
+            mode=settings.CV_ROI_MODE,
+        ),
+        tiling=resolve_tiling(
+            pin.tiling if pin else None,
+            video.width,
+            video.height,
+            min_long_side=settings.CV_TILING_MIN_LONG_SIDE,
+        ),
+        appearance_batch_frames=settings.CV_APPEARANCE_BATCH_FRAMES,
+        max_keyframe_crops=settings.CV_TRACK_KEYFRAME_CROPS,
+        keyframe_crop_height=settings.CV_TRACK_KEYFRAME_CROP_HEIGHT,
+        sink=sink,
+        keyframe_selector=KeyframeSelector(
+            window=settings.CV_KEYFRAME_WINDOW_FRAMES,
+            per_window=settings.CV_KEYFRAMES_PER_WINDOW,
+            min_score=settings.CV_KEYFRAME_MIN_SCORE,
+        ),
+    )
+
+
+def tracking_stage_keys(
+    checksum_sha256: str,
+    generator: TrackletGenerator,
+    chunk: TrackingChunk,
+    extract_embeddings: bool,
+) -> Dict[str, StageKey]:
+    """
+    Stage cache keys of one tracking chunk.
+
+    The detections of the chunk's frames key the tracks (tracker and
+    keyframe selection, which picks the crops to analyze), and the tracks key
+    their appearance (garment analysis and CLIP). A tracker-only change
+    therefore reuses the detections, and an embedding-only change the tracks.
+
+    Args:
+        checksum_sha256: Video content checksum
+        generator: The chunk's tracklet generator (detector, gate, ROI, tiling, tracker)
+        chunk: Tracked window
+        extract_embeddings: Whether CLIP embeddings are extracted
+
+    Returns:
+        Dict of StageKey by stage (STAGE_DETECTIONS, STAGE_TRACKS, STAGE_APPEARANCE)
+    """
+    detector = generator.person_detector
+    detections = stage_key(
+        checksum_sha256,
+        STAGE_DETECTIONS,
+        model_version(detector.model_name),
+        {
+            "backend": detector.backend_name,
+            "precision": detector.precision,
+            "conf_threshold": detector.conf_threshold,
+            "iou_threshold": detector.iou_threshold,
+            "analysis_fps": generator.frame_sample_rate,
+            "motion_gate": generator.motion_gate.config.to_dict() if generator.motion_gate else None,
+            "roi": generator.roi.to_dict() if generator.roi else None,
+            "tiling": generator.tiling.to_dict() if generator.tiling else None,
+            "source": "original",
+            "frames": [chunk.start_frame, chunk.window_end_frame],
+        },
+    )
+    selector = generator.keyframe_selector
+    tracks = stage_key(
+        checksum_sha256,
+        STAGE_TRACKS,
+        "bytetrack",
+        {
+            "tracker": generator.tracker.to_dict()["params"],
+            "keyframes": {
+                "window": selector.window,
+                "per_window": selector.per_window,
+                "min_score": selector.min_score,
+                "scorer": selector.scorer.config.to_dict(),
+            },
+            "chunk": chunk.to_dict(),  # Boundary frames
+        },
+        upstream=detections,
+    )
+    appearance = stage_key(
+        checksum_sha256,
+        STAGE_APPEARANCE,
+        model_version(settings.CV_EMBEDDING_MODEL) if extract_embeddings else "garments",
+        {"embedding_precision": settings.CV_EMBEDDING_PRECISION if extract_embeddings else None},
+        upstream=tracks,
+    )
+    return {STAGE_DETECTIONS: detections, STAGE_TRACKS: tracks, STAGE_APPEARANCE: appearance}
+
+
+def video_start_time(video: Video) -> datetime:
+    """Wall-clock time of the first frame (recording time, else upload time)."""
+    return video.recorded_at or video.uploaded_at
+
+
+def tracking_chunk_path(video: Video, chunk_index: int) -> str:
+    """Object key of one chunk's tracking result."""
+    return f"cv_results/{video.mall_id}/{video.id}/tracking/chunk_{chunk_index:04d}.json.gz"
+
+
+def tracklet_parts_prefix(video: Video, chunk_index: Optional[int] = None) -> str:
+    """
+    Object key prefix of the tracklets streamed by the chunk tasks
+    (ObjectStoreTrackletSink parts, chunk-local track IDs).
+
+    Without chunk_index, the prefix of all chunks of the video.
+    """
+    prefix = f"cv_results/{video.mall_id}/{video.id}/tracking/tracklets/"
+    return prefix if chunk_index is None else f"{prefix}chunk_{chunk_index:04d}"
+
+
+def tracking_state_path(video: Video) -> str:
+    """Object key of the tracking state at the end of a video (carry-over into the pin's next video)."""
+    return f"cv_results/{video.mall_id}/{video.id}/tracking/end_state.json.gz"
+
+
+def _upload_json_gz(storage, data: Dict[str, Any], path: str) -> None:
+    storage.upload_bytes(
+        gzip.compress(json.dumps(data).encode("utf-8")),
+        path,
+        content_type="application/json",
+        metadata={"content-encoding": "gzip"},
+    )
+
+
+def _download_json_gz(storage, path: str) -> Dict[str, Any]:
+    return json.loads(gzip.decompress(storage.download_bytes(path)).decode("utf-8"))
+
+
+def load_carry_over(db: Session, storage, video: Video, analysis_fps: float) -> Optional[Dict[str, Any]]:
+    """
+    Tracking state to continue from, saved at the end of the pin's preceding video.
+
+    Only used when that video ended at most track_buffer frames before this
+    one starts (anyone still tracked then may still be in view) and was
+    tracked at the same frame rate. Videos without recorded_at have no
+    reliable order and never carry over.
+
+    Returns:
+        Dict with video_id, state (TrackletGenerator.get_state() in the
+        previous video's global track IDs), last_frame, end_time and
+        missed_frames (frames between the two videos), or None
+    """
+    if video.recorded_at is None:
+        return None
+    previous = (
+        db.query(Video)
+        .filter(
+            Video.pin_id == video.pin_id,
+            Video.id != video.id,
+            Video.recorded_at.isnot(None),
+            Video.recorded_at < video.recorded_at,
+        )
+        .order_by(Video.recorded_at.desc())
+        .first()
+    )
+    if previous is None:
+        return None
+
+    try:
+        saved = _download_json_gz(storage, tracking_state_path(previous))
+    except FileNotFoundError:
+        logger.info(f"No tracking state for previous video {previous.id} (not tracked yet), starting fresh")
+        return None
+    if saved["analysis_fps"] != analysis_fps:
+        logger.info(f"Previous video {previous.id} was tracked at {saved['analysis_fps']} FPS, starting fresh")
+        return None
+
+    end_time = datetime.fromisoformat(saved["end_time"])
+    gap_frames = round((video_start_time(video) - end_time).total_seconds() * analysis_fps)
+    missed_frames = max(gap_frames - 1, 0)
+    track_buffer = saved["state"]["tracker"]["params"]["track_buffer"]
+    if gap_frames < 0 or missed_frames > track_buffer:
+        logger.info(
+            f"Previous video {previous.id} ended {gap_frames} frames before this one "
+            f"(track buffer {track_buffer}), starting fresh"
+        )
+        return None
+
+    return {
+        "video_id": str(previous.id),
+        "state": saved["state"],
+        "last_frame": saved["last_frame"],
+        "end_time": end_time,
+        "missed_frames": missed_frames,
+    }
+
+
+def tracklet_row(video: Video, tracklet: Dict[str, Any]) -> Dict[str, Any]:
+    """Tracklet column values for a tracklet dict (Tracklet.to_dict() of app.cv.tracklet_generator)."""
+    return dict(
+        mall_id=video.mall_id,
+        pin_id=video.pin_id,
+        video_id=video.id,
+        track_id=tracklet["track_id"],
+        t_in=datetime.fromisoformat(tracklet["t_in"]),
+        t_out=datetime.fromisoformat(tracklet["t_out"]),
+        outfit_vec=tracklet["visual_embedding"] or [],
+        outfit_json=tracklet["outfit"],
+        physique={
+            "height_category": tracklet["height_category"],
+            "aspect_ratio": tracklet["aspect_ratio"],
+        },
+        box_stats={
+            "avg_bbox": tracklet["avg_bbox"],
+            "confidence": tracklet["confidence"],
+            "num_observations": tracklet["num_observations"],
+            "duration_seconds": tracklet["duration_seconds"],
+        },
+        quality=float(np.clip(tracklet["quality"], 0.0, 1.0)),
+    )
+
+
+class DatabaseTrackletSink(TrackletSink):
+    """
+    Tracklet sink inserting a video's Tracklet rows, one bulk INSERT per batch.
+
+    Rows are not added to the session (no ORM objects are kept). With
+    commit=False the batches become visible with the caller's commit, so a
+    replacement of earlier rows stays atomic.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        video: Video,
+        batch_size: int = 50,
+        max_wait_seconds: Optional[float] = None,
+        commit: bool = False,
+    ):
+        super().__init__(batch_size, max_wait_seconds)
+        self.db = db
+        self.video = video
+        self.commit = commit
+
+    def _write_batch(self, tracklets: List[Dict[str, Any]]) -> None:
+        self.db.execute(insert(Tracklet), [tracklet_row(self.video, tracklet) for tracklet in tracklets])
+        if self.commit:
+            self.db.commit()
+
+
+def _fail_job(db: Session, job_id: UUID, error: Exception) -> None:
+    job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+    if job and job.status != "failed":
+        job.status = "failed"
+        job.completed_at = func.now()
+        job.error_message = str(error)
+        db.commit()
+
+
+@celery_app.task(
+    bind=True,
+    base=DatabaseTask,
+    name="app.tasks.analysis_tasks.track_video_chunk",
+    max_retries=2,
+    default_retry_delay=60,
+)
+def track_video_chunk(
+    self,
+    video_id: str,
+    job_id: str,
+    chunk: Dict[str, Any],
+    device: str = "cpu",
+    conf_threshold: float = 0.7,
+    analysis_fps: float = 1.0,
+    extract_embeddings: Optional[bool] = None,
+) -> str:
+    """
+    Track people through one time window of a video (chunked tracking, Phase 3.4).
+
+    Part of the chord queued by JobService.queue_tracking: every chunk runs
+    detection, tracking and appearance extraction over its own frames plus
+    a lookahead into the next chunk, on whichever worker picks it up.
+    Finished tracklets (chunk-local track IDs) are streamed to object
+    storage in batches while the chunk runs (tracklet_parts_prefix), so
+    they are kept if the worker dies and GET /analysis/videos/{id}/tracklets
+    shows them before the job completes. Tracks still alive at the end of
+    the window are finalized, and the result stores the part keys together
+    with the boxes of every track in the frames shared with the
+    neighbouring chunks, for stitch_tracking_chunks.
+
+    With CV_TRACKING_CARRY_OVER, the first chunk continues the tracks alive
+    at the end of the pin's preceding video (see load_carry_over), and the
+    last chunk also stores the tracking state before its tracks are
+    finalized, for the pin's next video.
+
+    With CV_STAGE_CACHE_ENABLED, the chunk's detections, tracks and track
+    appearance are cached as chained stages (tracking_stage_keys): a rerun
+    with another tracker configuration skips detection, one with another
+    embedding model only re-analyzes the cached tracks' keyframes, and an
+    unchanged rerun does not decode the video at all. Chunks continuing or
+    saving tracking state (carry-over) cache their detections only.
+
+    Args:
+        video_id: Video UUID (as string)
+        job_id: cv_tracking ProcessingJob UUID (as string)
+        chunk: TrackingChunk.to_dict() of the window to track
+        device: Device for inference ('cpu', 'cuda', 'mps')
+        conf_threshold: Confidence threshold for detections (0.0-1.0)
+        analysis_fps: Frame sampling rate (must match the chunk plan)
+        extract_embeddings: Extract CLIP embeddings (default: CV_PRELOAD_EMBEDDINGS,
+                            i.e. where the CLIP model is available)
+
+    Returns:
+        Object key of the chunk result (gzipped JSON)
+    """
+    video_uuid = UUID(video_id)
+    job_uuid = UUID(job_id)
+    tracking_chunk = TrackingChunk.from_dict(chunk)
+    if extract_embeddings is None:
+        extract_embeddings = settings.CV_PRELOAD_EMBEDDINGS
+
+    logger.info(
+        f"Tracking chunk {tracking_chunk.index}: video_id={video_id}, job_id={job_id}, "
+        f"frames {tracking_chunk.start_frame}-{tracking_chunk.window_end_frame or 'end'}"
+    )
+
+    try:
+        video = self.db.query(Video).filter(Video.id == video_uuid).first()
+        if not video:
+            raise ValueError(f"Video {video_id} not found")
+        job = self.db.query(ProcessingJob).filter(ProcessingJob.id == job_uuid).first()
+        if not job:
+            raise ValueError(f"ProcessingJob {job_id} not found")
+        if job.status == "pending":
+            job.status = "running"
+            job.started_at = func.now()
+            job.progress_percent = 0
+        self.db.commit()
+
+        storage = get_storage_service()
+        ffmpeg = get_ffmpeg_service()
+        parts_prefix = tracklet_parts_prefix(video, tracking_chunk.index)
+        for path in storage.list_files(f"{parts_prefix}/"):  # Left by a failed attempt
+            storage.delete_file(path)
+        sink = ObjectStoreTrackletSink(
+            storage,
+            parts_prefix,
+            format=settings.CV_TRACKLET_SINK_FORMAT,
+            batch_size=settings.CV_TRACKLET_SINK_BATCH_SIZE,
+            max_wait_seconds=settings.CV_TRACKLET_SINK_MAX_WAIT_SECONDS,
+        )
+        generator = _create_tracklet_generator(
+            self.db, video, device, conf_threshold, analysis_fps, extract_embeddings, sink=sink
+        )
+        boundary = BoundaryObservations(tracking_chunk)
+        start_time = video_start_time(video)
+        timestamp = start_time
+        frame_count = last_frame = 0
+
+        carry_over = None
+        if tracking_chunk.index == 0 and settings.CV_TRACKING_CARRY_OVER:
+            carry_over = load_carry_over(self.db, storage, video, analysis_fps)
+        if carry_over is not None:
+            # The previous video's last frame becomes frame -missed_frames of this one
+            generator.load_state(
+                carry_over["state"],
+                frame_offset=-(carry_over["last_frame"] + carry_over["missed_frames"]),
+            )
+            carried_track_ids = [track.track_id for track in generator.tracker.get_all_tracks()]
+            generator.skip_frames(carry_over["missed_frames"], carry_over["end_time"])
+            logger.info(
+                f"Continuing {len(carried_track_ids)} tracks from video {carry_over['video_id']} "
+                f"({carry_over['missed_frames']} frames apart)"
+            )
+
+        # Stage cache: detections of the chunk's frames, its tracks (chained to
+        # the detections) and their appearance (chained to the tracks). Chunks
+        # continuing the previous video's tracks or saving the state for the
+        # next one cache only detections: their tracks depend on that state.
+        stage_cache = keys = tracks = appearance = detections = None
+        stage_status = dict.fromkeys((STAGE_DETECTIONS, STAGE_TRACKS, STAGE_APPEARANCE), "disabled")
+        saves_state = tracking_chunk.end_frame is None and settings.CV_TRACKING_CARRY_OVER
+        caches_tracks = carry_over is None and not saves_state
+        if settings.CV_STAGE_CACHE_ENABLED and video.checksum_sha256:
+            stage_cache = get_stage_cache_service(self.db)
+            keys = tracking_stage_keys(video.checksum_sha256, generator, tracking_chunk, extract_embeddings)
+            if caches_tracks:
+                tracks = stage_cache.get(keys[STAGE_TRACKS])
+                stage_status[STAGE_TRACKS] = "miss" if tracks is None else "hit"
+                if tracks is not None:
+                    appearance = stage_cache.get(keys[STAGE_APPEARANCE])
+                stage_status[STAGE_APPEARANCE] = "miss" if appearance is None else "hit"
+            if tracks is None:
+                detections = stage_cache.get(keys[STAGE_DETECTIONS])
+                stage_status[STAGE_DETECTIONS] = "miss" if detections is None else "hit"
+            else:
+                stage_status[STAGE_DETECTIONS] = "unused"
+
+        if tracks is None or appearance is None:
+            with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as inputs:
+                video_input = inputs.enter_context(fetch_video_input(
+                    storage, video.original_path, Path(temp_dir) / f"video_{video.id}.mp4",
+                    checksum_sha256=video.checksum_sha256,
+                ))
+                metadata = probe_original(ffmpeg, video, video_input)
+                self.db.commit()
+
+                # Frame numbers are sampling intervals, identical in every chunk
+                frames = ffmpeg.stream_frames(
+                    video_input,
+                    fps=analysis_fps,
+                    metadata=metadata,
+                    time_range=tracking_chunk.time_range(analysis_fps),
+                )
+                if tracks is not None:
+                    # Cached tracks: only their keyframes are analyzed again
+                    appearance = {"tracks": analyze_track_appearance(
+                        frames, tracks["tracklets"], generator.garment_analyzer, start_time, extract_embeddings
+                    )}
+                    stage_cache.put(keys[STAGE_APPEARANCE], appearance, source_video_id=video.id)
+                else:
+                    cached_detections = recorded = None
+                    if detections is not None:
+                        cached_detections = {
+                            frame["frame_number"]: frame["detections"] for frame in detections["frames"]
+                        }
+                    elif keys is not None:
+                        recorded = []
+                    for frame in frames:
+                        timestamp = start_time + timedelta(seconds=frame.timestamp_seconds)
+                        generator.process_frame(
+                            frame.image, timestamp, frame.frame_number,
+                            detections=(
+                                cached_detections.get(frame.frame_number, [])
+                                if cached_detections is not None else None
+                            ),
+                        )
+                        boundary.record(frame.frame_number, generator.tracker.get_all_tracks())
+                        if recorded is not None:
+                            recorded.append({
+                                "frame_number": frame.frame_number,
+                                "detections": generator.last_detections,
+                            })
+                        frame_count += 1
+                        last_frame = frame.frame_number
+                    if recorded is not None:
+                        stage_cache.put(keys[STAGE_DETECTIONS], {"frames": recorded}, source_video_id=video.id)
+
+        end_state = None
+        if tracks is not None:
+            by_track = {item["track_id"]: item for item in appearance["tracks"]}
+            for tracklet in tracks["tracklets"]:
+                if tracklet["track_id"] in by_track:  # Tracks without analyzed keyframes are dropped
+                    sink.write({**tracklet, **{key: by_track[tracklet["track_id"]][key] for key in APPEARANCE_FIELDS}})
+            sink.close()
+            frame_count = tracks["frames"]
+            observations = tracks["observations"]
+        else:
+            if saves_state and frame_count:
+                end_state = generator.get_state()
+                end_state["completed_tracklets"] = []  # Finalized below, part of this video's results
+            generator.finalize_all_tracks(timestamp)
+            sink.close()
+            observations = boundary.to_dict()
+            if keys is not None and caches_tracks:
+                tracklets = list(read_tracklet_parts(storage, sink.paths))
+                stage_cache.put(keys[STAGE_TRACKS], {
+                    "frames": frame_count,
+                    "observations": observations,
+                    "tracklets": [
+                        {key: value for key, value in tracklet.items() if key not in APPEARANCE_FIELDS}
+                        for tracklet in tracklets
+                    ],
+                }, source_video_id=video.id)
+                stage_cache.put(keys[STAGE_APPEARANCE], {"tracks": [
+                    {"track_id": tracklet["track_id"], **{key: tracklet[key] for key in APPEARANCE_FIELDS}}
+                    for tracklet in tracklets
+                ]}, source_video_id=video.id)
+        result = {
+            "chunk": tracking_chunk.to_dict(),
+            "frames": frame_count,
+            "tracklet_parts": sink.paths,
+            "tracklet_count": sink.written,
+            "observations": observations,
+            "stage_cache": stage_status,
+        }
+        if carry_over is not None:
+            result["carry_over"] = {
+                "video_id": carry_over["video_id"],
+                "track_ids": carried_track_ids,
+                "next_id": carry_over["state"]["tracker"]["next_id"],
+            }
+        if end_state is not None:
+            result["end_state"] = {
+                "state": end_state,
+                "analysis_fps": analysis_fps,
+                "last_frame": last_frame,
+                "end_time": timestamp.isoformat(),
+            }
+        result_path = tracking_chunk_path(video, tracking_chunk.index)
+        _upload_json_gz(storage, result, result_path)
+
+        logger.info(
+            f"Tracked chunk {tracking_chunk.index}: {frame_count} frames, "
+            f"{sink.written} tracklets in {sink.batches} parts -> {result_path}"
+        )
+        return result_path
+
+    except Exception as e:
+        logger.error(f"Chunk tracking failed: video_id={video_id}, chunk={tracking_chunk.index}, error={e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        _fail_job(self.db, job_uuid, e)
+        raise
+
+
+@celery_app.task(
+    bind=True,
+    base=DatabaseTask,
+    name="app.tasks.analysis_tasks.stitch_tracking_chunks",
+    max_retries=2,
+    default_retry_delay=60,
+)
+def stitch_tracking_chunks(
+    self,
+    chunk_paths: List[str],
+    video_id: str,
+    job_id: str,
+) -> Dict[str, Any]:
+    """
+    Reduce step of chunked tracking: stitch chunk results into the video's tracklets.
+
+    Receives the results of all track_video_chunk tasks (chord callback),
+    reads the tracklets they streamed, links tracks across chunk
+    boundaries (IoU in the overlap plus appearance), assigns video-wide
+    track IDs, merges and deduplicates the tracklets, stores them as JSON
+    and as Tracklet rows (bulk-inserted in batches, replacing those of a
+    previous run) and completes the job.
+
+    Tracks continued from the pin's previous video keep their track IDs,
+    and their tracklets replace the previous video's rows for the same
+    people (one tracklet across the file boundary instead of two). The
+    last chunk's end state is saved in global track IDs for the next video.
+
+    Args:
+        chunk_paths: Object keys returned by the chunk tasks
+        video_id: Video UUID (as string)
+        job_id: cv_tracking ProcessingJob UUID (as string)
+
+    Returns:
+        Dict with the tracklets path and stitching statistics
+    """
+    video_uuid = UUID(video_id)
+    job_uuid = UUID(job_id)
+
+    try:
+        video = self.db.query(Video).filter(Video.id == video_uuid).first()
+        if not video:
+            raise ValueError(f"Video {video_id} not found")
+        job = self.db.query(ProcessingJob).filter(ProcessingJob.id == job_uuid).first()
+        if not job:
+            raise ValueError(f"ProcessingJob {job_id} not found")
+
+        storage = get_storage_service()
+        chunk_results = sorted(
+            (_download_json_gz(storage, path) for path in chunk_paths),
+            key=lambda result: result["chunk"]["index"],
+        )
+        for result in chunk_results:
+            result["tracklets"] = list(read_tracklet_parts(storage, result["tracklet_parts"]))
+        carry_over = chunk_results[0].get("carry_over")
+        first_track_id = carry_over["next_id"] if carry_over else 1
+        tracklets, stitching, track_ids = stitch_chunks(
+            chunk_results,
+            iou_weight=settings.CV_TRACKING_STITCH_IOU_WEIGHT,
+            min_score=settings.CV_TRACKING_STITCH_MIN_SCORE,
+            first_track_id=first_track_id,
+            carried_track_ids=carry_over["track_ids"] if carry_over else (),
+        )
+        total_frames = sum(result["frames"] for result in chunk_results)
+        stage_cache = {}  # {stage: {status: chunks}}
+        for result in chunk_results:
+            for stage, status in result.get("stage_cache", {}).items():
+                counts = stage_cache.setdefault(stage, {})
+                counts[status] = counts.get(status, 0) + 1
+        continued_track_ids = sorted(
+            {tracklet["track_id"] for tracklet in tracklets} & set(carry_over["track_ids"] if carry_over else ())
+        )
+
+        results_path = f"cv_results/{video.mall_id}/{video.id}/tracklets.json"
+        storage.upload_bytes(
+            json.dumps({
+                "video_id": str(video.id),
+                "job_id": str(job.id),
+                "stitching": stitching,
+                "tracklets": tracklets,
+            }).encode("utf-8"),
+            results_path,
+            content_type="application/json",
+        )
+
+        self.db.query(Tracklet).filter(Tracklet.video_id == video.id).delete(synchronize_session=False)
+        if continued_track_ids:
+            # Those tracklets now span both videos
+            self.db.query(Tracklet).filter(
+                Tracklet.video_id == UUID(carry_over["video_id"]),
+                Tracklet.track_id.in_(continued_track_ids),
+            ).delete(synchronize_session=False)
+        # Same transaction as the deletes: readers see the old rows until the commit below
+        sink = DatabaseTrackletSink(self.db, video, batch_size=settings.CV_TRACKLET_SINK_BATCH_SIZE)
+        for tracklet in tracklets:
+            sink.write(tracklet)
+        sink.close()
+
+        end_state = chunk_results[-1].get("end_state")
+        if end_state is not None:
+            last_index = chunk_results[-1]["chunk"]["index"]
+            end_state["state"] = relabel_tracking_state(
+                end_state["state"],
+                {local_id: track_id for (index, local_id), track_id in track_ids.items() if index == last_index},
+                next_id=max([first_track_id, *(tracklet["track_id"] + 1 for tracklet in tracklets)]),
+            )
+            _upload_json_gz(storage, {"video_id": str(video.id), **end_state}, tracking_state_path(video))
+
+        job.status = "completed"
+        job.completed_at = func.now()
+        job.progress_percent = 100
+        job.result_data = {
+            "status": "success",
+            "tracklets_path": results_path,
+            "tracklet_count": len(tracklets),
+            "total_frames": total_frames,
+            "stitching": stitching,
+            "stage_cache": stage_cache,
+            "carry_over": {
+                "previous_video_id": carry_over["video_id"],
+                "continued_tracks": len(continued_track_ids),
+            } if carry_over else None,
+        }
+        self.db.commit()
+
+        # The streamed tracklets are now in tracklets.json and the Tracklet rows
+        for path in [*chunk_paths, *(p for result in chunk_results for p in result["tracklet_parts"])]:
+            try:
+                storage.delete_file(path)
+            except Exception as e:
+                logger.warning(f"Failed to delete chunk result {path}: {e}")
+
+        logger.info(
+            f"✅ Tracking completed: video_id={video_id}, tracklets={len(tracklets)}, "
+            f"chunks={stitching['chunks']}, boundary links={stitching['boundary_links']}"
+        )
+        return {
+            "status": "completed",
+            "video_id": video_id,
+            "job_id": job_id,
+            "tracklets_path": results_path,
+            "stitching": stitching,
+        }
+
+    except Exception as e:
+        self.db.rollback()
+        logger.error(f"❌ Tracklet stitching failed: video_id={video_id}, error={e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        _fail_job(self.db, job_uuid, e)
+        raise
+
+
 @celery_app.task(
     bind=True,
     base=DatabaseTask,
@@ -5,25 +5,38 @@ Celery tasks for video operations:
 - Proxy video generation (480p, 10fps)
 - Video metadata extraction
 - Thumbnail generation
+
+Proxy and thumbnail publishing is shared with the single-decode ingest path
+(analysis_tasks.detect_persons_in_video with proxy_job_id).
 """
 import logging
 import os
 import tempfile
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
 from uuid import UUID
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 from pathlib import Path
 
 from celery import Task
 from sqlalchemy.orm import Session
 
 from app.core.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models import Video, ProcessingJob
 from app.services.storage_service import get_storage_service
-from app.services.ffmpeg_service import get_ffmpeg_service
+from app.services.ffmpeg_service import SideOutputs, get_ffmpeg_service, is_remote_input
+from app.services.video_cache_service import get_video_cache_service
 
 logger = logging.getLogger(__name__)
 
+PROXY_HEIGHT = 480
+PROXY_FPS = 10
+PROXY_PRESET = "medium"  # Balance speed/quality
+PROXY_CRF = 28  # Medium quality for proxy
+THUMBNAIL_WIDTH = 320
+
 
 class DatabaseTask(Task):
     """Base task with database session management."""
@@ -44,6 +57,218 @@ class DatabaseTask(Task):
             self._db = None
 
 
+@contextmanager
+def fetch_video_input(
+    storage,
+    object_name: str,
+    local_path: Path,
+    checksum_sha256: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    FFmpeg input for a stored video, valid until the context exits.
+
+    With the worker video cache (VIDEO_CACHE_DIR), this is the cached copy,
+    downloaded once per host and shared by every task on it, keyed by
+    checksum_sha256 (or the object's etag). Otherwise, with
+    STREAMING_INPUT_ENABLED, it is a presigned URL: FFmpeg reads the object
+    with HTTP range requests as it decodes, so processing starts without
+    waiting for a full download and nothing lands on temp disk. Otherwise the
+    object is downloaded to local_path.
+
+    Downloads are verified against checksum_sha256 (the checksum declared
+    when the original was uploaded).
+    """
+    cache = get_video_cache_service()
+    if cache is not None:
+        if checksum_sha256:
+            cache_key = f"sha256-{checksum_sha256}"
+        else:
+            cache_key = f"etag-{storage.get_file_metadata(object_name)['etag']}"
+        with cache.open(
+            cache_key,
+            lambda path: storage.download_file(object_name, path, expected_sha256=checksum_sha256),
+            suffix=Path(object_name).suffix or ".mp4",
+        ) as cached_path:
+            yield cached_path
+        return
+
+    if settings.STREAMING_INPUT_ENABLED:
+        logger.info(f"Streaming video from S3: {object_name}")
+        yield storage.generate_presigned_get_url(
+            object_name,
+            expires=timedelta(hours=settings.STREAMING_INPUT_URL_EXPIRY_HOURS),
+        )
+        return
+
+    logger.info(f"Downloading video from S3: {object_name}")
+    storage.download_file(object_name, str(local_path), expected_sha256=checksum_sha256)
+    yield str(local_path)
+
+
+def video_cache_stats() -> Optional[Dict[str, Any]]:
+    """Worker video cache counters for job results (None when the cache is off)."""
+    cache = get_video_cache_service()
+    return cache.stats() if cache is not None else None
+
+
+def thumbnail_timestamp(duration_seconds: float) -> float:
+    """Thumbnail time: 5 seconds, or the halfway point if the video is shorter."""
+    return min(5.0, duration_seconds / 2)
+
+
+def apply_video_metadata(
+    video: Video,
+    metadata: Dict[str, Any],
+    keyframes: Optional[List[float]] = None,
+) -> None:
+    """Copy probed metadata of the original onto the Video record."""
+    video.width = metadata["width"]
+    video.height = metadata["height"]
+    video.fps = metadata["fps"]
+    video.duration_seconds = metadata["duration_seconds"]
+    video.codec = metadata["codec"]
+    video.has_audio = metadata.get("has_audio")
+    video.probe_metadata = metadata
+    if keyframes is not None:
+        video.keyframe_times = keyframes
+
+
+def original_source_key(video: Video) -> Optional[str]:
+    """Probe cache key of the original's content (None = key by local file)."""
+    return f"sha256:{video.checksum_sha256}" if video.checksum_sha256 else None
+
+
+def probe_original(ffmpeg, video: Video, local_path: str) -> Dict[str, Any]:
+    """
+    Metadata of the downloaded (or streamed) original, probed once per video.
+
+    The first call validates the file, probes it (including the keyframe
+    index) and stores the results on the Video row; later tasks read them
+    from there. The caller commits. The keyframe index needs a pass over
+    every packet, so it is skipped for streamed originals (segmented
+    decoding probes it on demand).
+
+    Raises:
+        ValueError: If the file is not a valid video
+    """
+    if video.probe_metadata:
+        return video.probe_metadata
+
+    source_key = original_source_key(video)
+    is_valid, error_msg = ffmpeg.validate_video(local_path, source_key=source_key)
+    if not is_valid:
+        raise ValueError(f"Invalid video file: {error_msg}")
+
+    logger.info("Extracting video metadata")
+    metadata = ffmpeg.extract_metadata(local_path, source_key=source_key)
+    keyframes = None
+    if not is_remote_input(local_path):
+        try:
+            keyframes = ffmpeg.extract_keyframe_times(local_path, source_key=source_key)
+        except Exception as e:
+            # Only used to cut segments for parallel decoding, which can do without
+            logger.warning(f"Keyframe probe failed: {e}")
+
+    apply_video_metadata(video, metadata, keyframes)
+    return metadata
+
+
+def proxy_side_outputs(temp_dir_path: Path, video: Video, metadata: Dict[str, Any]) -> SideOutputs:
+    """Proxy and thumbnail to write while the original is decoded for CV analysis."""
+    return SideOutputs(
+        proxy_path=str(temp_dir_path / f"proxy_{video.id}.mp4"),
+        thumbnails=[(
+            thumbnail_timestamp(metadata["duration_seconds"]),
+            str(temp_dir_path / f"thumb_{video.id}.jpg"),
+        )],
+        proxy_height=PROXY_HEIGHT,
+        proxy_fps=PROXY_FPS,
+        preset=PROXY_PRESET,
+        crf=PROXY_CRF,
+        thumbnail_width=THUMBNAIL_WIDTH,
+        has_audio=metadata.get("has_audio", False),
+    )
+
+
+def publish_proxy_outputs(
+    db: Session,
+    video: Video,
+    job: ProcessingJob,
+    storage,
+    proxy_local_path: str,
+    thumbnail_local_path: str,
+    metadata: Dict[str, Any],
+    proxy_metadata: Dict[str, Any],
+    thumbnail_metadata: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Upload a generated proxy and thumbnail and complete the proxy job.
+
+    Returns:
+        Job result_data
+    """
+    # Upload proxy to S3
+    proxy_s3_path = video.original_path.replace("/original/", "/proxy/")
+    logger.info(f"Uploading proxy video to S3: {proxy_s3_path}")
+    storage.upload_file(proxy_local_path, proxy_s3_path)
+
+    # Upload thumbnail to S3
+    thumbnail_s3_path = f"thumbnails/{video.mall_id}/{video.id}.jpg"
+    logger.info(f"Uploading thumbnail to S3: {thumbnail_s3_path}")
+    storage.upload_file(
+        thumbnail_local_path,
+        thumbnail_s3_path,
+        content_type="image/jpeg"  # Correct MIME type for thumbnails
+    )
+
+    # Update video record with proxy path
+    video.proxy_path = proxy_s3_path
+    # Note: thumbnail_path column doesn't exist in Video model
+    # Thumbnail is tracked in job result_data for now
+    video.processing_status = "completed"
+    video.processing_completed_at = db.execute("SELECT NOW()").scalar()
+    db.commit()
+
+    # Update job status
+    job.status = "completed"
+    job.completed_at = db.execute("SELECT NOW()").scalar()
+    job.result_data = {
+        "status": "success",
+        "proxy_path": proxy_s3_path,
+        "thumbnail_path": thumbnail_s3_path,
+        "metadata": {
+            "original": metadata,
+            "proxy": proxy_metadata,
+            "thumbnail": thumbnail_metadata,
+        },
+        "video_cache": video_cache_stats(),
+    }
+    db.commit()
+
+    logger.info(
+        f"✅ Proxy generation completed: video_id={video.id}, "
+        f"proxy={proxy_s3_path}, thumbnail={thumbnail_s3_path}"
+    )
+    return job.result_data
+
+
+def fail_proxy_job(db: Session, video_uuid: UUID, job_uuid: UUID, error: Exception) -> None:
+    """Mark the video's processing and its proxy job as failed."""
+    # Update video processing_status to failed
+    video = db.query(Video).filter(Video.id == video_uuid).first()
+    if video:
+        video.processing_status = "failed"
+        video.processing_error = str(error)
+
+    # Update job status to failed
+    job = db.query(ProcessingJob).filter(ProcessingJob.id == job_uuid).first()
+    if job:
+        job.status = "failed"
+        job.completed_at = db.execute("SELECT NOW()").scalar()
+        job.error_message = str(error)
+        db.commit()
+
+
 @celery_app.task(
     bind=True,
     base=DatabaseTask,
@@ -98,29 +323,18 @@ def generate_proxy_video(
         ffmpeg = get_ffmpeg_service()
 
         # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as inputs:
             temp_dir_path = Path(temp_dir)
 
-            # 1. Download original video from S3
-            logger.info(f"Downloading original video from S3: {video.original_path}")
-            original_local_path = temp_dir_path / f"original_{video.id}.mp4"
-            storage.download_file(video.original_path, str(original_local_path))
-
-            # Validate video file
-            is_valid, error_msg = ffmpeg.validate_video(str(original_local_path))
-            if not is_valid:
-                raise ValueError(f"Invalid video file: {error_msg}")
-
-            # 2. Extract metadata from original video
-            logger.info("Extracting video metadata")
-            metadata = ffmpeg.extract_metadata(str(original_local_path))
-
-            # Update video with metadata
-            video.width = metadata["width"]
-            video.height = metadata["height"]
-            video.fps = metadata["fps"]
-            video.duration_seconds = metadata["duration_seconds"]
-            video.codec = metadata["codec"]
+            # 1. Download original video from S3 (or stream it, or reuse the worker's cached copy)
+            original_input = inputs.enter_context(fetch_video_input(
+                storage, video.original_path, temp_dir_path / f"original_{video.id}.mp4",
+                checksum_sha256=video.checksum_sha256,
+            ))
+
+            # 2. Validate and extract metadata from original video
+            # (stored on the video record, so later tasks don't re-probe)
+            metadata = probe_original(ffmpeg, video, original_input)
             self.db.commit()
 
             # 3. Generate proxy video (480p, 10fps)
@@ -128,94 +342,47 @@ def generate_proxy_video(
             proxy_local_path = temp_dir_path / f"proxy_{video.id}.mp4"
 
             proxy_metadata = ffmpeg.generate_proxy(
-                input_path=str(original_local_path),
+                input_path=original_input,
                 output_path=str(proxy_local_path),
-                target_height=480,
-                target_fps=10,
-                preset="medium",  # Balance speed/quality
-                crf=28,  # Medium quality for proxy
+                target_height=PROXY_HEIGHT,
+                target_fps=PROXY_FPS,
+                preset=PROXY_PRESET,
+                crf=PROXY_CRF,
+                source_key=original_source_key(video),
             )
 
-            # 4. Upload proxy to S3
-            proxy_s3_path = video.original_path.replace("/original/", "/proxy/")
-            logger.info(f"Uploading proxy video to S3: {proxy_s3_path}")
-            storage.upload_file(str(proxy_local_path), proxy_s3_path)
-
-            # 5. Generate thumbnail (at 5 seconds)
+            # 4. Generate thumbnail (at 5 seconds)
             logger.info("Generating thumbnail")
             thumbnail_local_path = temp_dir_path / f"thumb_{video.id}.jpg"
 
-            # Use 5 seconds or halfway point if video is shorter
-            thumbnail_timestamp = min(5.0, metadata["duration_seconds"] / 2)
-
             thumbnail_metadata = ffmpeg.generate_thumbnail(
-                input_path=str(original_local_path),
+                input_path=original_input,
                 output_path=str(thumbnail_local_path),
-                timestamp_seconds=thumbnail_timestamp,
-                width=320,
+                timestamp_seconds=thumbnail_timestamp(metadata["duration_seconds"]),
+                width=THUMBNAIL_WIDTH,
             )
 
-            # Upload thumbnail to S3
-            thumbnail_s3_path = f"thumbnails/{video.mall_id}/{video.id}.jpg"
-            logger.info(f"Uploading thumbnail to S3: {thumbnail_s3_path}")
-            storage.upload_file(
-                str(thumbnail_local_path),
-                thumbnail_s3_path,
-                content_type="image/jpeg"  # Correct MIME type for thumbnails
+            # 5. Upload proxy and thumbnail to S3, complete the job
+            result_data = publish_proxy_outputs(
+                self.db, video, job, storage,
+                proxy_local_path=str(proxy_local_path),
+                thumbnail_local_path=str(thumbnail_local_path),
+                metadata=metadata,
+                proxy_metadata=proxy_metadata,
+                thumbnail_metadata=thumbnail_metadata,
             )
 
-            # Update video record with proxy path
-            video.proxy_path = proxy_s3_path
-            # Note: thumbnail_path column doesn't exist in Video model
-            # Thumbnail is tracked in job result_data for now
-            video.processing_status = "completed"
-            video.processing_completed_at = self.db.execute("SELECT NOW()").scalar()
-            self.db.commit()
-
-        # Update job status
-        job.status = "completed"
-        job.completed_at = self.db.execute("SELECT NOW()").scalar()
-        job.result_data = {
-            "status": "success",
-            "proxy_path": proxy_s3_path,
-            "thumbnail_path": thumbnail_s3_path,
-            "metadata": {
-                "original": metadata,
-                "proxy": proxy_metadata,
-                "thumbnail": thumbnail_metadata,
-            },
-        }
-        self.db.commit()
-
-        logger.info(
-            f"✅ Proxy generation completed: video_id={video_id}, "
-            f"proxy={proxy_s3_path}, thumbnail={thumbnail_s3_path}"
-        )
-
         return {
             "status": "completed",
             "video_id": str(video.id),
             "job_id": str(job.id),
-            "proxy_path": proxy_s3_path,
-            "thumbnail_path": thumbnail_s3_path,
+            "proxy_path": result_data["proxy_path"],
+            "thumbnail_path": result_data["thumbnail_path"],
         }
 
     except Exception as e:
         logger.error(f"❌ Proxy generation failed: video_id={video_id}, error={e}")
-
-        # Update video processing_status to failed
-        video = self.db.query(Video).filter(Video.id == video_uuid).first()
-        if video:
-            video.processing_status = "failed"
-            video.processing_error = str(e)
-
-        # Update job status to failed
-        job = self.db.query(ProcessingJob).filter(ProcessingJob.id == job_uuid).first()
-        if job:
-            job.status = "failed"
-            job.completed_at = self.db.execute("SELECT NOW()").scalar()
-            job.error_message = str(e)
-            self.db.commit()
+        fail_proxy_job(self.db, video_uuid, job_uuid, e)
 
         # Retry on transient errors
         if self.request.retries < self.max_retries:
@@ -241,6 +408,9 @@ def extract_video_metadata(
     """
     Extract video metadata using FFprobe.
 
+    Videos probed before (e.g. by proxy generation) are answered from the
+    stored metadata without downloading.
+
     Args:
         video_id: Video UUID (as string)
 
@@ -256,28 +426,26 @@ def extract_video_metadata(
         if not video:
             raise ValueError(f"Video {video_id} not found")
 
+        if video.probe_metadata:
+            logger.info("Using stored probe metadata")
+            return video.probe_metadata
+
         # Get services
         storage = get_storage_service()
         ffmpeg = get_ffmpeg_service()
 
         # Create temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as inputs:
             temp_dir_path = Path(temp_dir)
 
-            # Download video from S3
-            logger.info(f"Downloading video from S3: {video.original_path}")
-            local_path = temp_dir_path / f"video_{video.id}.mp4"
-            storage.download_file(video.original_path, str(local_path))
-
-            # Extract metadata
-            metadata = ffmpeg.extract_metadata(str(local_path))
+            # Download video from S3 (or stream it, or reuse the worker's cached copy)
+            video_input = inputs.enter_context(fetch_video_input(
+                storage, video.original_path, temp_dir_path / f"video_{video.id}.mp4",
+                checksum_sha256=video.checksum_sha256,
+            ))
 
-            # Update video record
-            video.width = metadata["width"]
-            video.height = metadata["height"]
-            video.fps = metadata["fps"]
-            video.duration_seconds = metadata["duration_seconds"]
-            video.codec = metadata["codec"]
+            # Extract metadata and update video record
+            metadata = probe_original(ffmpeg, video, video_input)
             self.db.commit()
 
             logger.info(
@@ -327,18 +495,21 @@ def generate_thumbnail(
         ffmpeg = get_ffmpeg_service()
 
         # Create temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as inputs:
             temp_dir_path = Path(temp_dir)
 
-            # Download video from S3
-            logger.info(f"Downloading video from S3: {video.original_path}")
-            video_local_path = temp_dir_path / f"video_{video.id}.mp4"
-            storage.download_file(video.original_path, str(video_local_path))
+            # Download video from S3 (or stream it, the thumbnail seek then
+            # fetching only the bytes around the timestamp; or reuse the
+            # worker's cached copy)
+            video_input = inputs.enter_context(fetch_video_input(
+                storage, video.original_path, temp_dir_path / f"video_{video.id}.mp4",
+                checksum_sha256=video.checksum_sha256,
+            ))
 
             # Generate thumbnail
             thumbnail_local_path = temp_dir_path / f"thumb_{video.id}.jpg"
             thumbnail_metadata = ffmpeg.generate_thumbnail(
-                input_path=str(video_local_path),
+                input_path=video_input,
                 output_path=str(thumbnail_local_path),
                 timestamp_seconds=timestamp_seconds,
                 width=320,
@@ -0,0 +1,332 @@
+"""
+Unit tests for the ByteTrack tracker.
+
+Tests:
+- Vectorized pairwise IoU against the scalar definition
+- Spatially gated sparse assignment against the dense assignment
+- Ring buffer histories
+- Track API on its own and backed by the tracker's track table
+- Track lifecycle: confirmation, loss, recovery, removal
+- Identity stability in crowded scenes
+- State serialization: a restored tracker continues identically
+"""
+import json
+
+import numpy as np
+import pytest
+
+from app.cv.byte_tracker import (
+    ByteTracker,
+    Detection,
+    RingBuffer,
+    Track,
+    TrackState,
+    dense_assignment,
+    gated_assignment,
+    iou_matrix,
+    overlapping_pairs,
+)
+
+
+def scalar_iou(a, b):
+    """Reference IoU of two [x1, y1, x2, y2] boxes."""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def crowd(num_persons, num_frames, seed=0, miss_rate=0.0):
+    """Per-frame detections of people walking on a grid without crossing (ground-truth id = index)."""
+    rng = np.random.default_rng(seed)
+    origins = np.stack([
+        (np.arange(num_persons) % 20) * 120.0,
+        (np.arange(num_persons) // 20) * 210.0,
+    ], axis=1)
+    velocity = rng.uniform(-0.5, 0.5, size=(num_persons, 2)) + [2.0, 0.0]
+    frames = []
+    for frame_id in range(num_frames):
+        frame = []
+        for person in range(num_persons):
+            if rng.random() < miss_rate:
+                continue
+            x, y = origins[person] + velocity[person] * frame_id
+            frame.append((person, Detection(bbox=[x, y, x + 80, y + 200], confidence=0.9, frame_id=frame_id)))
+        frames.append(frame)
+    return frames
+
+
+def clustered_boxes(num_boxes, rng, frame=(1920, 1080), jitter=25.0):
+    """Person-sized boxes with heavy local overlap (groups of people)."""
+    centers = rng.uniform([0, 0], frame, size=(num_boxes // 4 + 1, 2))
+    xy = centers[rng.integers(0, len(centers), num_boxes)] + rng.normal(0, jitter, size=(num_boxes, 2))
+    wh = rng.uniform([40, 100], [90, 220], size=(num_boxes, 2))
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def box(x, frame_id=0, confidence=0.9):
+    return Detection(bbox=[x, 100, x + 50, 200], confidence=confidence, frame_id=frame_id)
+
+
+class TestIoUMatrix:
+    """Test vectorized pairwise IoU."""
+
+    def test_matches_scalar_iou(self):
+        rng = np.random.default_rng(1)
+        xy = rng.uniform(0, 200, size=(30, 2))
+        a = np.hstack([xy[:12], xy[:12] + rng.uniform(10, 80, size=(12, 2))])
+        b = np.hstack([xy[12:], xy[12:] + rng.uniform(10, 80, size=(18, 2))])
+
+        iou = iou_matrix(a, b)
+
+        assert iou.shape == (12, 18)
+        expected = [[scalar_iou(p, q) for q in b] for p in a]
+        np.testing.assert_allclose(iou, expected, rtol=1e-5, atol=1e-6)
+
+    def test_known_values(self):
+        iou = iou_matrix(
+            [[100, 100, 200, 200]],
+            [[100, 100, 200, 200], [150, 100, 250, 200], [300, 300, 400, 400], [150, 150, 250, 250]],
+        )
+        np.testing.assert_allclose(iou[0], [1.0, 1 / 3, 0.0, 2500 / 17500], rtol=1e-5)
+
+    def test_empty_and_degenerate(self):
+        assert iou_matrix(np.empty((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+        assert iou_matrix([[5, 5, 5, 5]], [[5, 5, 5, 5]])[0, 0] == 0.0
+
+    def test_scalar_helper(self):
+        assert ByteTracker._iou(np.array([0, 0, 10, 10]), np.array([5, 0, 15, 10])) == pytest.approx(1 / 3)
+
+
+class TestGatedAssignment:
+    """Test sparse assignment on the overlap graph."""
+
+    def test_overlapping_pairs_match_brute_force(self):
+        rng = np.random.default_rng(2)
+        a, b = clustered_boxes(120, rng), clustered_boxes(150, rng)
+
+        a_idx, b_idx = overlapping_pairs(a, b)
+
+        expected = set(zip(*np.nonzero(iou_matrix(a, b) > 0)))
+        assert set(zip(a_idx.tolist(), b_idx.tolist())) == expected
+        assert len(expected) > 0
+
+    def test_touching_boxes_do_not_overlap(self):
+        a_idx, _ = overlapping_pairs([[0, 0, 10, 10]], [[10, 0, 20, 10], [0, 10, 10, 20]])
+        assert len(a_idx) == 0
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_identical_to_dense(self, seed):
+        rng = np.random.default_rng(seed)
+        tracks = clustered_boxes(300, rng)
+        detections = tracks + rng.normal(0, 12, size=tracks.shape).astype(np.float32)
+        detections = detections[rng.permutation(len(detections))[:280]]
+
+        for threshold in (0.5, 0.35):
+            dense = dense_assignment(tracks, detections, threshold)
+            gated = gated_assignment(tracks, detections, threshold)
+            np.testing.assert_array_equal(gated[0], dense[0])
+            np.testing.assert_array_equal(gated[1], dense[1])
+
+    def test_no_overlap(self):
+        rows, cols = gated_assignment([[0, 0, 10, 10]], [[50, 50, 60, 60]], 0.5)
+        assert len(rows) == len(cols) == 0
+
+    def test_tracker_results_match_dense_path(self):
+        frames = crowd(300, 20, seed=3, miss_rate=0.05)
+        gated, dense = ByteTracker(gated=True), ByteTracker(gated=False)
+
+        for frame in frames:
+            detections = [det for _, det in frame]
+            gated_ids = [(t.track_id, t.bbox.tolist()) for t in gated.update(detections)]
+            dense_ids = [(t.track_id, t.bbox.tolist()) for t in dense.update(detections)]
+            assert gated_ids == dense_ids
+
+
+class TestRingBuffer:
+    """Test fixed-size histories."""
+
+    def test_overwrites_oldest(self):
+        history = RingBuffer(3, dtype=np.int64)
+        for value in range(5):
+            history.append(value)
+
+        assert len(history) == 3
+        assert history.tolist() == [2, 3, 4]
+        assert history[0] == 2 and history[-1] == 4
+        assert list(history) == [2, 3, 4]
+
+    def test_rows_and_numpy_interop(self):
+        history = RingBuffer(2, (4,), np.float32)
+        history.append([0, 0, 2, 2])
+        history.append([2, 2, 4, 4])
+        history.append([4, 4, 6, 6])
+
+        np.testing.assert_array_equal(np.mean(history, axis=0), [3, 3, 5, 5])
+        assert [row.tolist() for row in history] == [[2, 2, 4, 4], [4, 4, 6, 6]]
+
+    def test_no_slot_dict(self):
+        with pytest.raises(AttributeError):
+            RingBuffer(2).extra = 1
+
+
+class TestTrack:
+    """Test the Track API."""
+
+    def test_standalone_track(self):
+        track = Track(track_id=7, bbox=[0, 0, 10, 20], confidence=0.8, frame_id=1)
+
+        for frame_id in range(2, 40):
+            track.update(Detection(bbox=[frame_id, 0, frame_id + 10, 20], confidence=0.6, frame_id=frame_id))
+
+        assert track.state == TrackState.TRACKED
+        assert track.hits == 38
+        assert len(track.bbox_history) == 30
+        assert track.frame_history.tolist() == list(range(10, 40))
+        assert track.average_confidence == pytest.approx(0.6)
+        np.testing.assert_allclose(track.average_bbox, [24.5, 0, 34.5, 20])
+
+    def test_mark_missed(self):
+        track = Track(track_id=1, bbox=[0, 0, 10, 20], confidence=0.8, frame_id=1, state=TrackState.TRACKED)
+
+        for _ in range(4):
+            track.mark_missed()
+        assert track.state == TrackState.LOST
+        for _ in range(7):
+            track.mark_missed()
+        assert track.state == TrackState.REMOVED
+
+
+class TestByteTracker:
+    """Test tracker association and lifecycle."""
+
+    def test_track_confirmed_after_three_hits(self):
+        tracker = ByteTracker()
+
+        assert tracker.update([box(100, 1)]) == []
+        assert tracker.update([box(102, 2)]) == []
+        active = tracker.update([box(104, 3)])
+
+        assert [t.track_id for t in active] == [1]
+        assert active[0].hits == 3
+        np.testing.assert_array_equal(active[0].bbox, [104, 100, 154, 200])
+
+    def test_unconfirmed_track_dropped_on_miss(self):
+        tracker = ByteTracker()
+        tracker.update([box(100, 1)])
+        tracker.update([])
+
+        assert tracker.get_all_tracks() == []
+        assert [t.track_id for t in tracker.removed_tracks] == [1]
+
+    def test_lost_track_recovered_with_same_id(self):
+        tracker = ByteTracker()
+        for frame_id in range(1, 4):
+            tracker.update([box(100, frame_id)])
+        for frame_id in range(4, 9):
+            tracker.update([])
+
+        assert [t.track_id for t in tracker.lost_tracks] == [1]
+        active = tracker.update([box(101, 9)])
+
+        assert [t.track_id for t in active] == [1]
+        assert tracker.lost_tracks == []
+
+    def test_track_removed_after_buffer(self):
+        tracker = ByteTracker(track_buffer=5)
+        for frame_id in range(1, 4):
+            tracker.update([box(100, frame_id)])
+        for frame_id in range(4, 10):
+            tracker.update([])
+
+        assert tracker.get_all_tracks() == []
+        removed = tracker.removed_tracks
+        assert [t.track_id for t in removed] == [1]
+        # Removed tracks keep their data after the table is compacted
+        assert removed[0].state == TrackState.REMOVED
+        assert removed[0].frame_history.tolist() == [1, 2, 3]
+        np.testing.assert_array_equal(removed[0].bbox, [100, 100, 150, 200])
+
+    def test_low_confidence_detection_keeps_track(self):
+        tracker = ByteTracker()
+        for frame_id in range(1, 4):
+            tracker.update([box(100, frame_id)])
+
+        active = tracker.update([box(102, 4, confidence=0.3)])
+
+        assert [t.track_id for t in active] == [1]
+        assert active[0].time_since_update == 0
+
+    def test_removal_keeps_other_tracks_consistent(self):
+        tracker = ByteTracker(track_buffer=2)
+        for frame_id in range(1, 4):
+            tracker.update([box(0, frame_id), box(300, frame_id), box(600, frame_id)])
+        for frame_id in range(4, 8):
+            active = tracker.update([box(300, frame_id), box(600, frame_id)])
+
+        assert [t.track_id for t in tracker.removed_tracks] == [1]
+        assert [t.track_id for t in active] == [2, 3]
+        np.testing.assert_array_equal(active[1].bbox, [600, 100, 650, 200])
+
+    @pytest.mark.parametrize("num_persons", [150])
+    def test_crowded_scene_identities(self, num_persons):
+        tracker = ByteTracker()
+        ids = {}
+        for frame in crowd(num_persons, 30, miss_rate=0.05):
+            for track in tracker.update([det for _, det in frame]):
+                if track.time_since_update:
+                    continue  # Missed this frame (still reported until LOST)
+                person = next(p for p, det in frame if np.array_equal(det.bbox, track.bbox))
+                ids.setdefault(person, set()).add(track.track_id)
+
+        assert len(ids) == num_persons
+        assert all(len(track_ids) == 1 for track_ids in ids.values())
+
+    def test_reset(self):
+        tracker = ByteTracker()
+        for frame_id in range(1, 4):
+            tracker.update([box(100, frame_id)])
+
+        tracker.reset()
+
+        assert tracker.get_all_tracks() == []
+        assert tracker.next_id == 1
+        tracker.update([box(100, 1)])
+        assert [t.track_id for t in tracker.tracked_tracks] == [1]
+
+
+class TestSerialization:
+    """Test tracker state snapshots."""
+
+    def test_track_round_trip(self):
+        track = Track(track_id=3, bbox=[0, 0, 10, 20], confidence=0.8, frame_id=1)
+        for frame_id in range(2, 6):
+            track.update(Detection(bbox=[frame_id, 0, frame_id + 10, 20], confidence=0.7, frame_id=frame_id))
+        track.mark_missed()
+
+        restored = Track.from_dict(json.loads(json.dumps(track.to_dict())))
+
+        assert restored.to_dict() == track.to_dict()
+        assert restored.state == TrackState.TRACKED
+        assert restored.frame_history.tolist() == [1, 2, 3, 4, 5]
+
+    def test_restored_tracker_continues_identically(self):
+        frames = crowd(60, 30, seed=4, miss_rate=0.1)
+        tracker = ByteTracker(track_buffer=5)
+        for frame in frames[:15]:
+            tracker.update([det for _, det in frame])
+        tracker.removed_tracks.clear()  # Collected by the caller every frame
+
+        restored = ByteTracker.from_dict(json.loads(json.dumps(tracker.to_dict())))
+
+        assert restored.next_id == tracker.next_id
+        assert restored.track_buffer == 5
+        for frame in frames[15:]:
+            detections = [det for _, det in frame]
+            expected = [(t.track_id, t.bbox.tolist(), t.hits) for t in tracker.update(detections)]
+            actual = [(t.track_id, t.bbox.tolist(), t.hits) for t in restored.update(detections)]
+            assert actual == expected
+        assert [t.track_id for t in restored.removed_tracks] == [t.track_id for t in tracker.removed_tracks]
@@ -0,0 +1,301 @@
+"""
+Unit tests for chunked tracking.
+
+Tests:
+- Chunk planning (owned ranges, lookahead, open-ended last chunk)
+- Boundary observations recorded only in shared frames
+- Boundary matching by IoU and appearance
+- Tracklet merging without double-counting shared frames
+- End to end: chunks tracked independently stitch into one tracklet per person
+- Carry-over: tracks continued from the previous video keep their IDs, and
+  the end state is relabeled into global IDs
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.cv.byte_tracker import ByteTracker, Detection
+from app.cv.chunk_stitching import (
+    BoundaryObservations,
+    TrackingChunk,
+    match_boundary,
+    merge_tracklets,
+    plan_chunks,
+    relabel_tracking_state,
+    stitch_chunks,
+)
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+def walkers(num_persons, num_frames, seed=0):
+    """{frame_number: [(person, bbox)]} of people walking side by side, with enter/exit times."""
+    rng = np.random.default_rng(seed)
+    enter = rng.integers(1, num_frames // 2, size=num_persons)
+    leave = np.minimum(enter + rng.integers(20, num_frames, size=num_persons), num_frames + 1)
+    frames = {}
+    for frame in range(1, num_frames + 1):
+        frames[frame] = [
+            (person, [person * 150.0 + frame, 100.0, person * 150.0 + frame + 80, 300.0])
+            for person in range(num_persons)
+            if enter[person] <= frame < leave[person]
+        ]
+    return frames
+
+
+def tracklet(track_id, frames, boxes, embedding=None, confidence=0.9):
+    """Minimal Tracklet.to_dict() record."""
+    return {
+        "track_id": track_id,
+        "camera_id": "cam",
+        "mall_id": "mall",
+        "t_in": (START + timedelta(seconds=frames[0] - 1)).isoformat(),
+        "t_out": (START + timedelta(seconds=frames[-1] - 1)).isoformat(),
+        "duration_seconds": float(frames[-1] - frames[0]),
+        "bbox_sequence": boxes[-30:],
+        "frame_sequence": frames[-30:],
+        "avg_bbox": np.mean(boxes, axis=0).tolist(),
+        "outfit": {"top": {"type": "tee", "color": "blue"}},
+        "visual_embedding": embedding,
+        "height_category": "tall",
+        "aspect_ratio": 0.4,
+        "confidence": confidence,
+        "quality": 0.8,
+        "num_observations": len(frames),
+        "observation_frames": list(frames),
+        "observation_boxes": list(boxes),
+        "created_at": START.isoformat(),
+    }
+
+
+def track_chunk(chunk, frames, tracker=None):
+    """Track one chunk on its own, like track_video_chunk."""
+    tracker = tracker or ByteTracker()
+    boundary = BoundaryObservations(chunk)
+    history = {}
+    last = max(frames) + 1 if chunk.window_end_frame is None else chunk.window_end_frame
+    for frame in range(chunk.start_frame, last):
+        tracker.update([Detection(bbox=bbox, confidence=0.9, frame_id=frame) for _, bbox in frames[frame]])
+        tracks = tracker.get_all_tracks()
+        boundary.record(frame, tracks)
+        for track in tracks:
+            if track.time_since_update == 0:
+                history.setdefault(track.track_id, []).append((frame, track.bbox.tolist()))
+
+    tracklets = [
+        tracklet(track_id, [f for f, _ in observations], [b for _, b in observations])
+        for track_id, observations in history.items()
+        if len(observations) >= 2
+    ]
+    return {"chunk": chunk.to_dict(), "tracklets": tracklets, "observations": boundary.to_dict()}
+
+
+class TestPlanChunks:
+    """Test splitting a video into tracking chunks."""
+
+    def test_overlapping_windows(self):
+        chunks = plan_chunks(900, fps=1.0, chunk_seconds=300, overlap_seconds=20)
+
+        assert [(c.start_frame, c.end_frame, c.window_end_frame) for c in chunks] == [
+            (1, 301, 321), (301, 601, 621), (601, None, None),
+        ]
+        assert [c.head_end_frame for c in chunks] == [1, 321, 621]
+        assert chunks[1].time_range(1.0) == (300.0, 620.0)
+        assert chunks[2].time_range(1.0) == (600.0, None)
+
+    def test_short_video_is_one_chunk(self):
+        assert plan_chunks(310, fps=1.0, chunk_seconds=300, overlap_seconds=20) == [
+            TrackingChunk(0, 1, None, None, 1)
+        ]
+        assert len(plan_chunks(None, fps=1.0, chunk_seconds=300, overlap_seconds=20)) == 1
+
+    def test_frame_rate_scales_frames(self):
+        chunks = plan_chunks(80, fps=2.0, chunk_seconds=40, overlap_seconds=5)
+
+        assert [(c.start_frame, c.end_frame) for c in chunks] == [(1, 81), (81, None)]
+        assert chunks[0].time_range(2.0) == (0.0, 45.0)
+
+    def test_round_trip(self):
+        chunk = plan_chunks(900, fps=1.0, chunk_seconds=300, overlap_seconds=20)[1]
+        assert TrackingChunk.from_dict(chunk.to_dict()) == chunk
+
+
+class TestBoundaryMatching:
+    """Test recording and matching tracks in chunk overlaps."""
+
+    def test_records_only_shared_frames(self):
+        chunk = TrackingChunk(1, 11, 21, 26, 16)
+        tracker = ByteTracker()
+        boundary = BoundaryObservations(chunk)
+        for frame in range(11, 26):
+            tracker.update([Detection(bbox=[frame, 0, frame + 50, 100], confidence=0.9, frame_id=frame)])
+            boundary.record(frame, tracker.get_all_tracks())
+
+        rows = boundary.to_dict()["1"]
+        assert [row[0] for row in rows] == [11, 12, 13, 14, 15, 21, 22, 23, 24, 25]
+        assert rows[0][1:] == [11, 0, 61, 100]
+
+    def test_matches_by_iou(self):
+        previous = {1: {5: np.array([0, 0, 50, 100])}, 2: {5: np.array([200, 0, 250, 100])}}
+        following = {7: {5: np.array([202, 0, 252, 100])}, 8: {5: np.array([1, 0, 51, 100])}}
+
+        matches = match_boundary(previous, following, {}, {})
+
+        assert sorted((a, b) for a, b, _ in matches) == [(1, 8), (2, 7)]
+
+    def test_appearance_breaks_spatial_ties(self):
+        box = np.array([0, 0, 50, 100])
+        previous = {1: {5: box}, 2: {5: box}}
+        following = {3: {5: box}, 4: {5: box}}
+        red, blue = np.array([1.0, 0.0]), np.array([0.0, 1.0])
+
+        matches = match_boundary(previous, following, {1: red, 2: blue}, {3: blue, 4: red})
+
+        assert sorted((a, b) for a, b, _ in matches) == [(1, 4), (2, 3)]
+
+    def test_rejects_weak_matches(self):
+        previous = {1: {5: np.array([0, 0, 50, 100])}}
+        following = {2: {5: np.array([40, 0, 90, 100])}, 3: {6: np.array([0, 0, 50, 100])}}
+
+        assert match_boundary(previous, following, {}, {}) == []
+
+
+class TestMergeTracklets:
+    """Test merging one person's tracklets from consecutive chunks."""
+
+    def test_shared_frames_count_once(self):
+        boxes = [[f, 0.0, f + 50.0, 100.0] for f in range(1, 41)]
+        first = tracklet(4, list(range(1, 26)), boxes[:25], embedding=[1.0, 0.0])
+        second = tracklet(2, list(range(21, 41)), boxes[20:], embedding=[0.0, 1.0])
+
+        merged = merge_tracklets([first, second], track_id=9)
+
+        assert merged["track_id"] == 9
+        assert merged["num_observations"] == 40
+        assert merged["observation_frames"] == list(range(1, 41))
+        assert merged["observation_boxes"] == boxes
+        assert merged["frame_sequence"] == list(range(11, 41))
+        assert merged["bbox_sequence"][-1] == boxes[-1]
+        assert merged["t_in"] == first["t_in"] and merged["t_out"] == second["t_out"]
+        assert merged["duration_seconds"] == 39.0
+        np.testing.assert_allclose(np.linalg.norm(merged["visual_embedding"]), 1.0)
+        assert merged["visual_embedding"][0] > merged["visual_embedding"][1]  # First part has more observations
+
+    def test_single_part_gets_global_id(self):
+        part = tracklet(4, [1, 2], [[0, 0, 1, 1], [0, 0, 1, 1]])
+        assert merge_tracklets([part], track_id=1) == {**part, "track_id": 1}
+
+
+class TestStitchChunks:
+    """Test stitching independently tracked chunks."""
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_one_tracklet_per_person(self, seed):
+        frames = walkers(num_persons=12, num_frames=120, seed=seed)
+        chunks = plan_chunks(120, fps=1.0, chunk_seconds=30, overlap_seconds=8)
+        results = [track_chunk(chunk, frames) for chunk in chunks]
+
+        tracklets, stats, _ = stitch_chunks(results)
+
+        assert stats["chunks"] == 4
+        assert stats["tracklets"] == len(tracklets) == 12
+        assert [t["track_id"] for t in tracklets] == list(range(1, 13))
+        # One person per tracklet (x1 = 150 * person + frame), every person once
+        persons = [
+            {round((bbox[0] - frame) / 150) for frame, bbox in zip(t["frame_sequence"], t["bbox_sequence"])}
+            for t in tracklets
+        ]
+        assert all(len(p) == 1 for p in persons)
+        assert set().union(*persons) == set(range(12))
+        # Frames seen by two chunks are counted once
+        total = sum(len(people) for people in frames.values())
+        assert sum(t["num_observations"] for t in tracklets) == total
+
+    def test_lookahead_only_tracklets_dropped(self):
+        # A person visible only in chunk 0's lookahead and too briefly for chunk 1
+        frames = {f: [] for f in range(1, 41)}
+        for f in (22, 23, 24):
+            frames[f] = [(0, [100.0, 100.0, 180.0, 300.0])]
+        chunks = plan_chunks(40, fps=1.0, chunk_seconds=20, overlap_seconds=5)
+        first = track_chunk(chunks[0], frames)
+        second = track_chunk(chunks[1], frames)
+        second["tracklets"] = []  # Discarded there (e.g. too few observations)
+
+        tracklets, stats, _ = stitch_chunks([first, second])
+
+        assert tracklets == []
+        assert stats["dropped_lookahead_tracklets"] == 1
+
+    def test_single_chunk_passes_through(self):
+        frames = walkers(num_persons=3, num_frames=30)
+        (chunk,) = plan_chunks(30, fps=1.0, chunk_seconds=60, overlap_seconds=5)
+        result = track_chunk(chunk, frames)
+
+        tracklets, stats, _ = stitch_chunks([result])
+
+        assert len(tracklets) == len(result["tracklets"]) == 3
+        assert stats["boundary_links"] == 0
+
+
+class TestCarryOver:
+    """Test continuing tracks from the previous video of a pin."""
+
+    def test_continued_tracks_keep_ids(self):
+        frames = walkers(num_persons=6, num_frames=60, seed=1)
+        # Previous video: frames 1-30, tracked in one piece
+        previous = ByteTracker()
+        previous_ids = {}
+        for frame in range(1, 31):
+            previous.update([Detection(bbox=bbox, confidence=0.9, frame_id=frame) for _, bbox in frames[frame]])
+            for track in previous.get_all_tracks():
+                if track.time_since_update == 0:
+                    previous_ids[round((track.bbox[0] - frame) / 150)] = track.track_id
+        state = previous.to_dict()
+        carried = [track["track_id"] for track in state["tracks"]]
+        # This video: frames 31-60, numbered from 1, its first chunk continues the tracker
+        following = {f - 30: people for f, people in frames.items() if f > 30}
+        chunks = plan_chunks(30, fps=1.0, chunk_seconds=15, overlap_seconds=5)
+        results = [
+            track_chunk(chunk, following, tracker=ByteTracker.from_dict(state) if chunk.index == 0 else None)
+            for chunk in chunks
+        ]
+
+        tracklets, _, track_ids = stitch_chunks(
+            results, first_track_id=state["next_id"], carried_track_ids=carried
+        )
+
+        at_boundary = {person for person, _ in frames[30]} & {person for person, _ in frames[31]}
+        assert at_boundary
+        by_person = {
+            round((t["bbox_sequence"][-1][0] - t["frame_sequence"][-1] - 30) / 150): t["track_id"]
+            for t in tracklets
+        }
+        assert len(by_person) == len(tracklets)
+        for person, track_id in by_person.items():
+            if person in at_boundary:
+                assert track_id == previous_ids[person]
+            else:
+                assert track_id >= state["next_id"]
+        assert {track_ids[(0, t)] for t in carried if (0, t) in track_ids} <= set(by_person.values())
+
+    def test_relabel_end_state(self):
+        state = {
+            "frame_count": 30,
+            "tracker": {
+                "params": {},
+                "next_id": 5,
+                "frame_id": 30,
+                "tracks": [{"track_id": 2}, {"track_id": 4}],
+            },
+            "track_appearances": {"2": {"frame_ids": [28]}, "4": {"frame_ids": [30]}},
+            "completed_tracklets": [{"track_id": 1}],
+        }
+
+        relabeled = relabel_tracking_state(state, {2: 17, 3: 18}, next_id=19)
+
+        assert [t["track_id"] for t in relabeled["tracker"]["tracks"]] == [17, 19]
+        assert relabeled["tracker"]["next_id"] == 20
+        assert relabeled["track_appearances"] == {"17": {"frame_ids": [28]}, "19": {"frame_ids": [30]}}
+        assert relabeled["completed_tracklets"] == []
+        assert state["tracker"]["tracks"][0]["track_id"] == 2  # Input unchanged
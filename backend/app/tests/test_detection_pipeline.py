@@ -0,0 +1,111 @@
+"""
+Unit tests for the batched detection pipeline.
+
+Tests:
+- In-order results across micro-batches
+- Batch sizing and queue statistics
+- Error propagation from decode and inference stages
+- Early termination by the consumer
+- Boxes mapped back from downscaled frames
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.cv.detection_pipeline import DetectionPipeline
+
+
+class FakeDetector:
+    """Detector stub that tags each detection with the frame's pixel value."""
+
+    def __init__(self, fail_on_batch: int = -1):
+        self.batch_sizes = []
+        self.fail_on_batch = fail_on_batch
+
+    def detect_batch(self, frames):
+        if len(self.batch_sizes) == self.fail_on_batch:
+            raise RuntimeError("inference failed")
+        self.batch_sizes.append(len(frames))
+        return [[{"bbox": [0, 0, 1, 1], "confidence": 0.9, "value": int(f[0, 0, 0])}] for f in frames]
+
+
+def make_frames(count: int):
+    for i in range(count):
+        yield SimpleNamespace(
+            frame_number=i + 1,
+            timestamp_seconds=float(i),
+            image=np.full((4, 4, 3), i % 256, dtype=np.uint8),
+        )
+
+
+class TestDetectionPipeline:
+    """Test staged decode/inference pipeline."""
+
+    def test_results_in_frame_order(self):
+        detector = FakeDetector()
+        pipeline = DetectionPipeline(detector, batch_size=4, prefetch_frames=8)
+
+        results = list(pipeline.run(make_frames(50)))
+
+        assert [r.frame_number for r in results] == list(range(1, 51))
+        assert [r.detections[0]["value"] for r in results] == list(range(50))
+        assert max(detector.batch_sizes) <= 4
+        assert sum(detector.batch_sizes) == 50
+
+    def test_stats_reported(self):
+        pipeline = DetectionPipeline(FakeDetector(), batch_size=4, prefetch_frames=8)
+        list(pipeline.run(make_frames(20)))
+
+        stats = pipeline.stats.to_dict()
+        assert stats["frames_decoded"] == 20
+        assert stats["frames_detected"] == 20
+        assert stats["decode_queue"]["capacity"] == 8
+        assert stats["decode_queue"]["max_depth"] <= 8
+
+    def test_required_buffer_count(self):
+        pipeline = DetectionPipeline(FakeDetector(), batch_size=8, prefetch_frames=16)
+        assert pipeline.required_buffer_count == 26
+
+    def test_decode_error_propagates(self):
+        def failing_frames():
+            yield from make_frames(3)
+            raise IOError("decode failed")
+
+        pipeline = DetectionPipeline(FakeDetector(), batch_size=2)
+        with pytest.raises(IOError, match="decode failed"):
+            list(pipeline.run(failing_frames()))
+
+    def test_inference_error_propagates(self):
+        pipeline = DetectionPipeline(FakeDetector(fail_on_batch=1), batch_size=2)
+        with pytest.raises(RuntimeError, match="inference failed"):
+            list(pipeline.run(make_frames(10)))
+
+    def test_consumer_can_stop_early(self):
+        pipeline = DetectionPipeline(FakeDetector(), batch_size=2, prefetch_frames=4)
+
+        for result in pipeline.run(make_frames(10_000)):
+            if result.frame_number == 5:
+                break
+
+        assert pipeline.stats.frames_decoded < 10_000
+
+    def test_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            DetectionPipeline(FakeDetector(), batch_size=0)
+
+    def test_boxes_scaled_to_original_resolution(self):
+        frames = [
+            SimpleNamespace(
+                frame_number=1,
+                timestamp_seconds=0.0,
+                image=np.zeros((4, 4, 3), dtype=np.uint8),
+                scale=(3.0, 2.0),
+            )
+        ]
+        pipeline = DetectionPipeline(FakeDetector(), batch_size=2)
+
+        results = list(pipeline.run(frames))
+
+        assert results[0].detections[0]["bbox"] == [0.0, 0.0, 3.0, 2.0]
+        assert results[0].detections[0]["confidence"] == 0.9
@@ -0,0 +1,327 @@
+"""
+Unit tests for FFmpeg service frame streaming.
+
+Tests in-memory frame streaming used by the CV pipeline:
+- Raw frame decoding and pts timestamps
+- Buffer reuse and early termination
+- Downscaled decoding with the scale back to original coordinates
+- Parallel segmented decoding merged back in order
+- Time windows numbered consistently with each other
+- Proxy and thumbnails written by the same decode
+- Probe cache keyed by file identity or stored-object key
+- Remote (presigned URL) inputs
+- Error handling for truncated/missing input
+"""
+import io
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from app.services import ffmpeg_service as ffmpeg_module
+from app.services.ffmpeg_service import (
+    FFmpegService,
+    ProbeCache,
+    SideOutputs,
+    frame_bucket,
+    input_exists,
+    is_remote_input,
+    log_name,
+    plan_segments,
+    scaled_frame_size,
+)
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="FFmpeg binary not installed"
+)
+
+WIDTH, HEIGHT, SOURCE_FPS, DURATION = 64, 48, 10, 3
+
+
+@pytest.fixture
+def ffmpeg_service():
+    """FFmpeg service without the constructor's installation probe."""
+    service = FFmpegService.__new__(FFmpegService)
+    service.probe_cache = ProbeCache()
+    return service
+
+
+@pytest.fixture
+def sample_video(tmp_path):
+    """Generate a short synthetic test video."""
+    path = tmp_path / "sample.mp4"
+    subprocess.run(
+        [
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc=size={WIDTH}x{HEIGHT}:rate={SOURCE_FPS}",
+            "-t", str(DURATION), "-pix_fmt", "yuv420p", str(path),
+        ],
+        check=True,
+    )
+    return str(path)
+
+
+def sample_metadata():
+    return {
+        "width": WIDTH,
+        "height": HEIGHT,
+        "fps": float(SOURCE_FPS),
+        "duration_seconds": float(DURATION),
+        "start_time_seconds": 0.0,
+    }
+
+
+@requires_ffmpeg
+class TestStreamFrames:
+    """Test raw frame streaming from FFmpeg stdout."""
+
+    def test_streams_frames_at_requested_fps(self, ffmpeg_service, sample_video):
+        """Frames are sampled at analysis fps with pts-based timestamps."""
+        frames = [
+            (f.frame_number, f.timestamp_seconds, f.image.shape)
+            for f in ffmpeg_service.stream_frames(sample_video, fps=2.0, metadata=sample_metadata())
+        ]
+
+        assert [n for n, _, _ in frames] == list(range(1, 7))
+        assert [t for _, t, _ in frames] == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+        assert all(shape == (HEIGHT, WIDTH, 3) for _, _, shape in frames)
+
+    def test_reuses_frame_buffers(self, ffmpeg_service, sample_video):
+        """Images are views over a fixed ring of buffers."""
+        images = [
+            f.image
+            for f in ffmpeg_service.stream_frames(
+                sample_video, fps=2.0, buffer_count=2, metadata=sample_metadata()
+            )
+        ]
+
+        assert images[0] is images[2]
+        assert images[0] is not images[1]
+
+    def test_downscaled_frames_report_scale(self, ffmpeg_service, sample_video):
+        """Frames decoded with max_size are smaller and carry the scale factor."""
+        frames = [
+            (f.image.shape, f.scale)
+            for f in ffmpeg_service.stream_frames(sample_video, fps=2.0, metadata=sample_metadata(), max_size=32)
+        ]
+
+        assert len(frames) == 6
+        assert all(shape == (24, 32, 3) for shape, _ in frames)
+        assert frames[0][1] == (2.0, 2.0)
+
+    def test_source_size_maps_to_original(self, ffmpeg_service, sample_video):
+        """A derived file (proxy) reports scale relative to the original size."""
+        frame = next(
+            ffmpeg_service.stream_frames(
+                sample_video, fps=1.0, metadata=sample_metadata(), source_size=(WIDTH * 4, HEIGHT * 4)
+            )
+        )
+
+        assert frame.image.shape == (HEIGHT, WIDTH, 3)
+        assert frame.scale == (4.0, 4.0)
+
+    def test_early_close_stops_ffmpeg(self, ffmpeg_service, sample_video):
+        """Closing the iterator early terminates the FFmpeg process cleanly."""
+        frames = ffmpeg_service.stream_frames(sample_video, fps=10.0, metadata=sample_metadata())
+        first = next(frames)
+        frames.close()
+
+        assert first.frame_number == 1
+
+    def test_segmented_decode_matches_single_pass(self, ffmpeg_service, sample_video, monkeypatch):
+        """Parallel segments merge into the same ordered frames as one pass."""
+        monkeypatch.setattr(ffmpeg_module, "_MIN_SEGMENT_SECONDS", 1.0)
+        frames = list(
+            ffmpeg_service.stream_frames(
+                sample_video, fps=2.0, metadata=sample_metadata(), workers=2, max_buffered_frames=4
+            )
+        )
+
+        assert [f.frame_number for f in frames] == list(range(1, 7))
+        assert [f.timestamp_seconds for f in frames] == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+        assert frames[0].image is not frames[2].image
+
+    def test_time_range_windows_agree(self, ffmpeg_service, sample_video):
+        """Overlapping windows stream the same frames, numbered by sampling interval."""
+        def window(start, end):
+            return [
+                (f.frame_number, f.timestamp_seconds)
+                for f in ffmpeg_service.stream_frames(
+                    sample_video, fps=2.0, metadata=sample_metadata(), time_range=(start, end)
+                )
+            ]
+
+        assert window(0.0, 2.0) == [(1, 0.0), (2, 0.5), (3, 1.0), (4, 1.5)]
+        assert window(1.0, 3.0) == [(3, 1.0), (4, 1.5), (5, 2.0), (6, 2.5)]
+
+    def test_side_outputs_written_in_same_pass(self, ffmpeg_service, sample_video, tmp_path):
+        """The proxy and thumbnail come from the decode that streams the frames."""
+        side_outputs = SideOutputs(
+            proxy_path=str(tmp_path / "proxy.mp4"),
+            thumbnails=[(1.0, str(tmp_path / "thumb.jpg"))],
+            proxy_height=24,
+            proxy_fps=5,
+            preset="ultrafast",
+            thumbnail_width=32,
+        )
+        frames = list(
+            ffmpeg_service.stream_frames(
+                sample_video, fps=2.0, metadata=sample_metadata(), side_outputs=side_outputs
+            )
+        )
+        outputs = ffmpeg_service.describe_side_outputs(side_outputs)
+
+        assert len(frames) == 6
+        assert (outputs["proxy"]["width"], outputs["proxy"]["height"]) == (32, 24)
+        assert outputs["proxy"]["fps"] == 5.0
+        assert outputs["thumbnails"][0]["width"] == 32
+
+    def test_side_outputs_removed_on_early_close(self, ffmpeg_service, sample_video, tmp_path):
+        """A partial proxy is not left behind when the consumer stops early."""
+        side_outputs = SideOutputs(proxy_path=str(tmp_path / "proxy.mp4"), thumbnails=[], preset="ultrafast")
+        frames = ffmpeg_service.stream_frames(
+            sample_video, fps=10.0, metadata=sample_metadata(), side_outputs=side_outputs
+        )
+        next(frames)
+        frames.close()
+
+        assert not (tmp_path / "proxy.mp4").exists()
+
+    def test_missing_file(self, ffmpeg_service):
+        """Missing input is rejected before FFmpeg is started."""
+        with pytest.raises(FileNotFoundError):
+            ffmpeg_service.stream_frames("/nonexistent/video.mp4", metadata=sample_metadata())
+
+
+class TestScaledFrameSize:
+    """Test downscaled frame dimensions."""
+
+    def test_long_side_capped_with_even_dimensions(self):
+        assert scaled_frame_size(3840, 2160, 640) == (640, 360)
+        assert scaled_frame_size(1080, 1920, 640) == (360, 640)
+        assert scaled_frame_size(1000, 750, 333) == (332, 248)
+
+    def test_small_or_unlimited_kept(self):
+        assert scaled_frame_size(640, 480, 640) == (640, 480)
+        assert scaled_frame_size(3840, 2160, None) == (3840, 2160)
+
+
+class TestProbeCache:
+    """Test the ffprobe result cache."""
+
+    def test_hit_for_unchanged_file(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"x" * 10)
+        cache = ProbeCache()
+        calls = []
+
+        def probe():
+            calls.append(1)
+            return {"streams": []}
+
+        first = cache.get_or_probe(ProbeCache.key(str(path), "streams"), probe)
+        second = cache.get_or_probe(ProbeCache.key(str(path), "streams"), probe)
+
+        assert first is second
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_rewritten_file_is_probed_again(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(b"x" * 10)
+        key = ProbeCache.key(str(path), "streams")
+        path.write_bytes(b"x" * 20)
+
+        assert ProbeCache.key(str(path), "streams") != key
+
+    def test_source_key_ignores_local_path(self, tmp_path):
+        assert ProbeCache.key("/tmp/a/video.mp4", "streams", "sha256:abc") == ProbeCache.key(
+            "/tmp/b/video.mp4", "streams", "sha256:abc"
+        )
+        assert ProbeCache.key("/tmp/a.mp4", "streams", "k") != ProbeCache.key("/tmp/a.mp4", "packets", "k")
+
+    def test_presigned_urls_share_a_key(self):
+        first = ProbeCache.key("http://minio:9000/bucket/a.mp4?X-Amz-Signature=1", "streams")
+        second = ProbeCache.key("http://minio:9000/bucket/a.mp4?X-Amz-Signature=2", "streams")
+
+        assert first == second == ("streams", "url", "http://minio:9000/bucket/a.mp4")
+
+    def test_lru_eviction_and_errors_not_cached(self):
+        cache = ProbeCache(max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.get_or_probe(("streams", "source", name), lambda: {"name": name})
+        assert cache.get_or_probe(("streams", "source", "a"), lambda: {"name": "fresh"}) == {"name": "fresh"}
+
+        def failing_probe():
+            raise RuntimeError("ffprobe failed")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_probe(("streams", "source", "d"), failing_probe)
+        assert cache.get_or_probe(("streams", "source", "d"), lambda: {"ok": True}) == {"ok": True}
+
+
+@requires_ffmpeg
+class TestProbeCacheIntegration:
+    """Test probe sharing between FFmpegService calls."""
+
+    def test_validate_then_extract_probes_once(self, ffmpeg_service, sample_video):
+        assert ffmpeg_service.validate_video(sample_video) == (True, None)
+        metadata = ffmpeg_service.extract_metadata(sample_video)
+
+        assert metadata["has_audio"] is False
+        assert (ffmpeg_service.probe_cache.hits, ffmpeg_service.probe_cache.misses) == (1, 1)
+
+
+class TestRemoteInput:
+    """Test handling of presigned URL inputs."""
+
+    def test_detects_urls(self):
+        assert is_remote_input("https://minio/bucket/video.mp4?X-Amz-Signature=abc")
+        assert not is_remote_input("/tmp/video.mp4")
+
+    def test_remote_inputs_skip_existence_check(self):
+        assert input_exists("http://minio:9000/bucket/video.mp4")
+        assert not input_exists("/nonexistent/video.mp4")
+
+    def test_log_name_drops_signature(self):
+        assert log_name("http://minio:9000/bucket/v.mp4?X-Amz-Signature=abc") == "http://minio:9000/bucket/v.mp4"
+        assert log_name("/tmp/v.mp4") == "/tmp/v.mp4"
+
+
+class TestPlanSegments:
+    """Test keyframe-aligned segment planning."""
+
+    def test_even_cuts_without_keyframes(self):
+        assert plan_segments(0.0, 30.0, 3) == [(None, 10.0), (10.0, 20.0), (20.0, None)]
+
+    def test_cuts_snap_to_nearest_keyframe(self):
+        keyframes = [0.0, 4.0, 8.5, 12.0, 19.0, 22.0]
+        assert plan_segments(0.0, 30.0, 3, keyframes) == [(None, 8.5), (8.5, 19.0), (19.0, None)]
+
+    def test_duplicate_cuts_collapse(self):
+        """Sparse keyframes never produce empty or out-of-range segments."""
+        assert plan_segments(0.0, 30.0, 4, [0.0, 15.0]) == [(None, 15.0), (15.0, None)]
+        assert plan_segments(0.0, 30.0, 3, [0.0]) == [(None, None)]
+
+    def test_frame_bucket(self):
+        assert [frame_bucket(t, 2.0) for t in (0.0, 0.4, 0.5, 0.99, 1.0)] == [0, 0, 1, 1, 2]
+        assert frame_bucket(10.5, 1.0, start_time=10.0) == 0
+
+
+class TestReadExact:
+    """Test exact-size reads from the FFmpeg pipe."""
+
+    def test_reads_full_frame(self):
+        buffer = np.zeros(6, dtype=np.uint8)
+        assert FFmpegService._read_exact(io.BytesIO(bytes(range(6))), memoryview(buffer), 6)
+        assert buffer.tolist() == [0, 1, 2, 3, 4, 5]
+
+    def test_clean_eof(self):
+        buffer = np.zeros(6, dtype=np.uint8)
+        assert not FFmpegService._read_exact(io.BytesIO(b""), memoryview(buffer), 6)
+
+    def test_truncated_frame(self):
+        buffer = np.zeros(6, dtype=np.uint8)
+        with pytest.raises(RuntimeError, match="Truncated frame"):
+            FFmpegService._read_exact(io.BytesIO(b"abc"), memoryview(buffer), 6)
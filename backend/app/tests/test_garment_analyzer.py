@@ -0,0 +1,117 @@
+"""
+Unit tests for batched garment analysis.
+
+Tests:
+- Batched color extraction matches per-region extraction
+- analyze_batch matches analyze() with one embedding batch per call
+- Failed crops in a batch do not affect the others
+"""
+import numpy as np
+import pytest
+
+from app.cv.color_extractor import ColorExtractor
+from app.cv.garment_analyzer import GarmentAnalyzer
+
+
+def random_crops(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for h, w in sizes]
+
+
+def rounded(value):
+    """Outfit dict with floats rounded (batched spreads may differ in the last bits)."""
+    if isinstance(value, dict):
+        return {key: rounded(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [rounded(v) for v in value]
+    return round(value, 9) if isinstance(value, float) else value
+
+
+class FakeEmbeddingExtractor:
+    """Embedding extractor stub: mean color as a unit vector, counting calls."""
+
+    def __init__(self):
+        self.single_calls = 0
+        self.batch_sizes = []
+
+    @staticmethod
+    def _embed(image):
+        vector = image.reshape(-1, 3).mean(axis=0).astype(np.float32) + 1.0
+        return vector / np.linalg.norm(vector)
+
+    def extract(self, image):
+        self.single_calls += 1
+        return self._embed(image)
+
+    def extract_batch(self, images):
+        self.batch_sizes.append(len(images))
+        return np.stack([self._embed(image) for image in images])
+
+
+class TestColorBatch:
+    """Test one-pass color extraction over many regions."""
+
+    def test_matches_single_extraction(self):
+        extractor = ColorExtractor()
+        regions = random_crops([(40, 20), (3, 2), (1, 7), (64, 30), (12, 12)])
+        regions.append(np.full((20, 10, 3), (30, 60, 200), dtype=np.uint8))
+        regions.append(regions[0][::2, 1::3])  # Non-contiguous view
+
+        batched = extractor.extract_batch(regions)
+
+        for region, descriptor in zip(regions, batched):
+            expected = extractor.extract(region)
+            assert descriptor.color_name == expected.color_name
+            assert descriptor.lab == expected.lab
+            np.testing.assert_allclose(descriptor.histogram, expected.histogram, rtol=1e-6)
+            assert descriptor.confidence == pytest.approx(expected.confidence)
+
+    def test_invalid_regions_are_none(self):
+        extractor = ColorExtractor()
+        (valid,) = random_crops([(20, 10)])
+
+        batched = extractor.extract_batch([np.zeros((0, 5, 3), dtype=np.uint8), valid, None])
+
+        assert batched[0] is None and batched[2] is None
+        assert batched[1].lab == extractor.extract(valid).lab
+        assert extractor.extract_batch([]) == []
+
+
+class TestAnalyzeBatch:
+    """Test batched outfit analysis."""
+
+    def test_matches_per_crop_analysis(self):
+        embeddings = FakeEmbeddingExtractor()
+        analyzer = GarmentAnalyzer(embedding_extractor=embeddings, extract_embeddings=True)
+        crops = random_crops([(160, 60), (90, 40), (200, 80), (120, 50)])
+
+        batched = analyzer.analyze_batch(crops)
+
+        assert embeddings.batch_sizes == [4]
+        for crop, outfit in zip(crops, batched):
+            expected = analyzer.analyze(crop)
+            assert rounded(outfit.to_dict()) == rounded(expected.to_dict())
+            np.testing.assert_allclose(outfit.visual_embedding, expected.visual_embedding)
+
+    def test_failed_crop_is_none(self):
+        embeddings = FakeEmbeddingExtractor()
+        analyzer = GarmentAnalyzer(embedding_extractor=embeddings, extract_embeddings=True)
+        first, second = random_crops([(160, 60), (90, 40)])
+
+        batched = analyzer.analyze_batch([first, np.zeros((0, 0, 3), dtype=np.uint8), second])
+
+        assert batched[1] is None
+        assert rounded(batched[0].to_dict()) == rounded(analyzer.analyze(first).to_dict())
+        assert rounded(batched[2].to_dict()) == rounded(analyzer.analyze(second).to_dict())
+        assert embeddings.batch_sizes == [2]
+
+    def test_embedding_failure_keeps_outfits(self):
+        class FailingExtractor(FakeEmbeddingExtractor):
+            def extract_batch(self, images):
+                raise ValueError("CLIP unavailable")
+
+        analyzer = GarmentAnalyzer(embedding_extractor=FailingExtractor(), extract_embeddings=True)
+
+        batched = analyzer.analyze_batch(random_crops([(160, 60), (90, 40)]))
+
+        assert all(outfit is not None and outfit.visual_embedding is None for outfit in batched)
@@ -0,0 +1,198 @@
+"""
+Unit tests for the local inference server.
+
+Tests:
+- Wire protocol round trip
+- Dynamic batching (size and latency bounds)
+- Detection requests from several clients batched together, with
+  per-request confidence filtering
+- PersonDetector client mode and registry routing
+"""
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.cv.inference_client import InferenceClient, InferenceServerError, recv_message, send_message
+from app.cv.inference_server import DynamicBatcher, InferenceServer
+from app.cv.model_registry import ModelKey, ModelRegistry
+from app.cv.person_detector import PersonDetector
+
+
+class TestProtocol:
+    """Test message framing."""
+
+    def test_round_trip(self):
+        left, right = socket.socketpair()
+        arrays = [
+            np.arange(24, dtype=np.uint8).reshape(2, 4, 3),
+            np.zeros((0, 5), dtype=np.float32),
+            np.ones((3, 7), dtype=np.float32),
+        ]
+
+        send_message(left, {"op": "detect", "conf": 0.5}, arrays)
+        header, received = recv_message(right)
+
+        assert header == {"op": "detect", "conf": 0.5}
+        assert [a.shape for a in received] == [(2, 4, 3), (0, 5), (3, 7)]
+        assert all(np.array_equal(a, b) for a, b in zip(arrays, received))
+        left.close()
+        right.close()
+
+
+class TestDynamicBatcher:
+    """Test batch formation."""
+
+    def test_concurrent_requests_share_a_batch(self):
+        batches = []
+
+        def run_batch(batch):
+            batches.append([len(r.items) for r in batch])
+            return [sum(r.items) for r in batch]
+
+        batcher = DynamicBatcher(run_batch, max_batch_size=8, max_latency_ms=200)
+        futures = [batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([4, 5, 6])]
+
+        assert [f.result(timeout=5) for f in futures] == [3, 3, 15]
+        assert batches == [[2, 1, 3]]
+        batcher.close()
+
+    def test_batch_size_bound(self):
+        batches = []
+
+        def run_batch(batch):
+            batches.append(sum(len(r.items) for r in batch))
+            return [None] * len(batch)
+
+        batcher = DynamicBatcher(run_batch, max_batch_size=4, max_latency_ms=200)
+        futures = [batcher.submit([0, 0, 0]) for _ in range(3)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert batches == [3, 3, 3]  # A second request of 3 would exceed 4
+        batcher.close()
+
+    def test_latency_bound(self):
+        batcher = DynamicBatcher(lambda batch: [None] * len(batch), max_batch_size=64, max_latency_ms=20)
+
+        start = time.perf_counter()
+        batcher.submit([0]).result(timeout=5)
+
+        assert time.perf_counter() - start < 1.0
+        batcher.close()
+
+    def test_errors_reach_every_request(self):
+        def run_batch(batch):
+            raise RuntimeError("model crashed")
+
+        batcher = DynamicBatcher(run_batch, max_latency_ms=50)
+        futures = [batcher.submit([0]), batcher.submit([0])]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                future.result(timeout=5)
+        batcher.close()
+
+
+class StubBackend:
+    """Returns two boxes per frame (conf 0.9 and 0.4) and records batch sizes."""
+
+    name = "torch"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, frames, conf_threshold, iou_threshold):
+        self.batch_sizes.append(len(frames))
+        boxes = np.array([[0, 0, 10, 10, 0.9], [20, 20, 30, 30, 0.4]], dtype=np.float32)
+        return [boxes[boxes[:, 4] >= conf_threshold] + [f.shape[1], 0, f.shape[1], 0, 0] for f in frames]
+
+
+class StubRegistry(ModelRegistry):
+    """Registry serving the stub backend for every detection key."""
+
+    def __init__(self):
+        super().__init__()
+        self.backend = StubBackend()
+
+    def get_detection_backend(self, *args, **kwargs):
+        return self.backend
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = InferenceServer(
+        str(tmp_path / "inference.sock"), max_batch_size=16, max_latency_ms=200, registry=StubRegistry()
+    )
+    server.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+class TestServer:
+    """Test the server over a real Unix socket."""
+
+    def test_requests_from_clients_batched_and_filtered(self, server):
+        client = InferenceClient(server.socket_path)
+        results = {}
+
+        def worker(name, conf, width):
+            frames = [np.zeros((8, width, 3), dtype=np.uint8)] * 2
+            results[name] = client.detect(frames, conf_threshold=conf, iou_threshold=0.45)
+
+        threads = [
+            threading.Thread(target=worker, args=("strict", 0.5, 100)),
+            threading.Thread(target=worker, args=("loose", 0.3, 200)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert server.registry.backend.batch_sizes == [4]
+        assert [len(b) for b in results["strict"]] == [1, 1]
+        assert [len(b) for b in results["loose"]] == [2, 2]
+        assert results["strict"][0][0, 0] == 100  # Results routed back to the right request
+        assert results["loose"][0][0, 0] == 200
+
+        stats = client.stats()
+        assert list(stats["batchers"].values())[0]["avg_batch_size"] == 4.0
+
+    def test_unknown_operation(self, server):
+        with pytest.raises(InferenceServerError, match="Unknown operation"):
+            InferenceClient(server.socket_path).request({"op": "train"})
+
+    def test_unreachable_server(self, tmp_path):
+        with pytest.raises(InferenceServerError, match="Cannot reach"):
+            InferenceClient(str(tmp_path / "missing.sock")).stats()
+
+
+class TestClientMode:
+    """Test PersonDetector and registry client mode."""
+
+    def test_person_detector_remote_backend(self, server):
+        detector = PersonDetector(
+            model_name="yolov8n.pt",
+            conf_threshold=0.5,
+            backend="remote",
+            backend_options={"socket_path": server.socket_path},
+        )
+
+        detections = detector.detect(np.zeros((8, 50, 3), dtype=np.uint8))
+
+        assert detector.backend_name == "remote"
+        assert detections == [{"bbox": [50, 0, 10, 10], "confidence": pytest.approx(0.9), "class": "person"}]
+
+    def test_registry_routes_to_server(self, server):
+        registry = ModelRegistry(server_socket=server.socket_path)
+
+        detector = registry.get_detector("yolov8n.pt", conf_threshold=0.3, backend="onnx")
+
+        assert detector.backend_name == "remote"
+        assert detector.backend.server_backend == "onnx"
+        assert ModelKey("yolov8n.pt", "remote", "cpu", "fp32") in registry
+        assert len(detector.detect(np.zeros((8, 8, 3), dtype=np.uint8))) == 2
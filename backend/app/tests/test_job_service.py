@@ -0,0 +1,133 @@
+"""
+Unit tests for queueing chunked tracking jobs.
+
+Tests:
+- JobService.queue_tracking: one chunk task per planned chunk, stitched by a chord callback
+- Jobs marked failed when the chord cannot be queued, and none created for unknown videos
+- POST /analysis/videos/{video_id}:track queues the job, and refuses a second one
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import get_db
+from app.main import app
+from app.models import ProcessingJob, Video
+from app.services.job_service import JobService, get_job_service
+
+
+def video_record(duration_seconds=1500.0):
+    return SimpleNamespace(
+        id=uuid4(),
+        processing_status="completed",
+        probe_metadata={"duration_seconds": duration_seconds},
+        duration_seconds=duration_seconds,
+    )
+
+
+def fake_db(video, running_job=None):
+    """Session whose queries return the given video and in-progress job."""
+    results = {Video: video, ProcessingJob: running_job}
+    db = MagicMock()
+
+    def query(model):
+        chain = MagicMock()
+        chain.filter.return_value = chain
+        chain.first.return_value = results[model]
+        return chain
+
+    db.query.side_effect = query
+    return db
+
+
+class TestQueueTracking:
+    """Test JobService.queue_tracking."""
+
+    def test_chunk_tasks_and_stitch_callback(self):
+        video = video_record(duration_seconds=1500.0)
+        service = JobService(fake_db(video))
+
+        with patch("celery.chord") as chord:
+            chord.return_value.return_value.id = "chord-task-id"
+            job = service.queue_tracking(
+                video.id, analysis_fps=1.0, chunk_seconds=600.0, overlap_seconds=20.0, device="cuda"
+            )
+
+        header = chord.call_args.args[0]
+        callback = chord.return_value.call_args.args[0]
+        assert [sig.task for sig in header] == ["app.tasks.analysis_tasks.track_video_chunk"] * 3
+        assert [sig.kwargs["chunk"]["index"] for sig in header] == [0, 1, 2]
+        assert all(sig.kwargs["job_id"] == str(job.id) and sig.kwargs["device"] == "cuda" for sig in header)
+        assert all(sig.options["queue"] == "cv_analysis" for sig in header)
+        assert callback.task == "app.tasks.analysis_tasks.stitch_tracking_chunks"
+
+        assert job.job_type == "cv_tracking"
+        assert job.status == "pending"
+        assert job.celery_task_id == "chord-task-id"
+        assert job.result_data == {"chunks": 3}
+
+    def test_job_failed_when_not_queued(self):
+        video = video_record()
+        service = JobService(fake_db(video))
+
+        with patch("celery.chord", side_effect=ConnectionError("broker down")):
+            with pytest.raises(ConnectionError):
+                service.queue_tracking(video.id)
+
+        job = service.db.add.call_args.args[0]
+        assert job.status == "failed"
+        assert "broker down" in job.error_message
+
+    def test_unknown_video_creates_no_job(self):
+        service = JobService(fake_db(None))
+
+        with patch("celery.chord") as chord:
+            with pytest.raises(ValueError, match="not found"):
+                service.queue_tracking(uuid4())
+
+        service.db.add.assert_not_called()
+        chord.assert_not_called()
+
+
+class TestTrackEndpoint:
+    """Test POST /analysis/videos/{video_id}:track."""
+
+    @pytest.fixture
+    def track(self):
+        def post(video, running_job=None):
+            job = SimpleNamespace(id=uuid4(), celery_task_id="chord-task-id", result_data={"chunks": 3})
+            job_service = MagicMock()
+            job_service.queue_tracking.return_value = job
+            app.dependency_overrides[get_db] = lambda: fake_db(video, running_job)
+            app.dependency_overrides[get_job_service] = lambda: job_service
+            with TestClient(app) as client:
+                response = client.post(
+                    f"/api/v1/analysis/videos/{video.id}:track",
+                    json={"analysis_fps": 2.0, "device": "cpu"},
+                )
+            return response, job, job_service
+
+        yield post
+        app.dependency_overrides.clear()
+
+    def test_job_queued(self, track):
+        video = video_record()
+
+        response, job, job_service = track(video)
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data["job_id"] == str(job.id)
+        assert (data["job_type"], data["chunks"]) == ("cv_tracking", 3)
+        kwargs = job_service.queue_tracking.call_args.kwargs
+        assert kwargs["video_id"] == video.id
+        assert (kwargs["analysis_fps"], kwargs["device"]) == (2.0, "cpu")
+
+    def test_running_job_conflicts(self, track):
+        response, _, job_service = track(video_record(), running_job=SimpleNamespace(id=uuid4()))
+
+        assert response.status_code == 409
+        job_service.queue_tracking.assert_not_called()
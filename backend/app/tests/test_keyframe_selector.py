@@ -0,0 +1,121 @@
+"""
+Unit tests for quality-driven keyframe selection.
+
+Tests:
+- Crop scores for size, edge truncation, occlusion and blur (0 for unusable crops)
+- Best crop per sliding window, and the per-window budget
+- Minimum score (with a track's first two keyframes always taken)
+- Skipping the Laplacian for crops that cannot win their window
+"""
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from app.cv.byte_tracker import Track
+from app.cv.keyframe_selector import CropQualityScorer, KeyframeSelector
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+BOX = [100.0, 40.0, 160.0, 190.0]  # 60 x 150, a standing person
+
+
+def textured(height=240, width=640, seed=0):
+    return np.random.default_rng(seed).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+def blurred(image):
+    return cv2.GaussianBlur(image, (21, 21), 8)
+
+
+def track(track_id, box=BOX):
+    return Track(track_id=track_id, bbox=np.array(box, dtype=np.float32), confidence=0.9, frame_id=1)
+
+
+class TestScores:
+    """Test crop quality scores."""
+
+    def test_small_or_outside_crops_score_zero(self):
+        scorer = CropQualityScorer()
+        boxes = np.array([
+            BOX,
+            [300.0, 40.0, 310.0, 70.0],  # 30 px high
+            [620.0, 40.0, 680.0, 190.0],  # Two thirds outside the frame
+        ])
+
+        scores = scorer.score(textured(), boxes)
+
+        assert scores[0] > 0.8
+        assert scores[1] == scores[2] == 0.0
+
+    def test_truncated_and_occluded_score_lower(self):
+        scorer = CropQualityScorer()
+        boxes = np.array([
+            BOX,
+            [0.0, 40.0, 60.0, 190.0],  # At the left border
+            [400.0, 40.0, 460.0, 190.0],  # Half covered by the next one
+            [430.0, 40.0, 490.0, 190.0],
+        ])
+
+        geometry = scorer.geometry_scores(boxes, (240, 640, 3))
+
+        assert geometry["truncation"][0] == 1.0
+        assert geometry["truncation"][1] == 0.5
+        assert geometry["occlusion"][0] == 1.0
+        assert geometry["occlusion"][2] == 0.5
+
+    def test_blurred_crop_scores_lower(self):
+        scorer = CropQualityScorer()
+        image = textured()
+        crop = image[40:190, 100:160]
+
+        assert scorer.sharpness(blurred(crop)) < 0.5 * scorer.sharpness(crop)
+
+
+class TestSelection:
+    """Test per-window keyframe selection."""
+
+    def run(self, selector, images, tracks):
+        keyframes = []
+        for frame_id, image in enumerate(images, start=1):
+            keyframes += selector.select(image, tracks, frame_id, START)
+        return keyframes + selector.close()
+
+    def test_sharpest_crop_of_each_window(self):
+        image = textured()
+        images = [blurred(image), image, blurred(image)] * 3
+        selector = KeyframeSelector(window=3, per_window=1)
+
+        keyframes = self.run(selector, images, [track(1)])
+
+        assert [k.frame_id for k in keyframes] == [2, 5, 8]
+        assert all(k.crop.shape == (150, 60, 3) for k in keyframes)
+
+    def test_budget_per_window(self):
+        selector = KeyframeSelector(window=4, per_window=2)
+
+        keyframes = self.run(selector, [textured(seed=s) for s in range(12)], [track(1), track(2, [300, 40, 360, 190])])
+
+        assert len(keyframes) == 2 * 2 * 3  # Two tracks, three windows of four frames
+
+    def test_min_score_keeps_first_two(self):
+        image = blurred(textured())
+        selector = KeyframeSelector(window=2, per_window=1, min_score=0.99)
+
+        keyframes = self.run(selector, [image] * 10, [track(1)])
+
+        # Every crop is below min_score: only the two a tracklet needs are analyzed
+        assert [k.frame_id for k in keyframes] == [1, 3]
+
+    def test_laplacian_skipped_when_crop_cannot_win(self):
+        image = textured()
+        # The person walks into the frame border after the first frame of each window
+        tracks = [[track(1)], [track(1, [0.0, 40.0, 60.0, 190.0])]] * 4
+        selector = KeyframeSelector(window=2, per_window=1)
+
+        keyframes = []
+        for frame_id, frame_tracks in enumerate(tracks, start=1):
+            keyframes += selector.select(image, frame_tracks, frame_id, START)
+
+        assert selector.crops_scored == 8
+        assert selector.sharpness_computed == 4
+        assert [k.frame_id for k in keyframes] == [1, 3, 5]
@@ -0,0 +1,191 @@
+"""
+Unit tests for the worker model registry.
+
+Tests:
+- Caching by (model, backend, device, precision)
+- Warm-up once per process
+- Shared detector backends with per-detector thresholds
+- Preloading (fork-safe filtering, no warm-up before fork, failures logged)
+- Which workers preload (queues consumed, with or without -Q)
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.cv import model_registry
+from app.cv.model_registry import ModelKey, ModelRegistry, ModelSpec
+
+
+class StubBackend:
+    """Detection backend stub counting predict() calls."""
+
+    name = "torch"
+
+    def __init__(self, model_name, device, **kwargs):
+        self.model_name = model_name
+        self.device = device
+        self.options = kwargs
+        self.calls = 0
+
+    def predict(self, frames, conf_threshold, iou_threshold):
+        self.calls += 1
+        return [np.zeros((0, 5), dtype=np.float32) for _ in frames]
+
+
+@pytest.fixture
+def stub_backends(monkeypatch):
+    created = []
+
+    def fake_create_backend(backend, model_name, device, **kwargs):
+        instance = StubBackend(model_name, device, **kwargs)
+        created.append(instance)
+        return instance
+
+    monkeypatch.setattr(model_registry, "create_backend", fake_create_backend)
+    return created
+
+
+class TestCaching:
+    """Test get_or_load()."""
+
+    def test_loads_once_per_key(self):
+        registry = ModelRegistry()
+        loads = []
+        key = ModelKey("yolov8n.pt", "torch", "cpu", "fp32")
+
+        first = registry.get_or_load(key, lambda: loads.append(1) or object())
+        second = registry.get_or_load(key, lambda: loads.append(1) or object())
+
+        assert first is second
+        assert len(loads) == 1
+        assert registry.misses == 1
+        assert registry.stats()["models"][0]["hits"] == 1
+
+    def test_different_precision_is_a_different_model(self):
+        registry = ModelRegistry()
+        fp32 = registry.get_or_load(ModelKey("m", "onnx", "cpu", "fp32"), object)
+        int8 = registry.get_or_load(ModelKey("m", "onnx", "cpu", "int8_static"), object)
+        assert fp32 is not int8
+        assert len(registry) == 2
+
+    def test_warm_up_once_per_process(self, monkeypatch):
+        registry = ModelRegistry()
+        warmed = []
+        key = ModelKey("m", "torch", "cpu", "fp32")
+
+        registry.get_or_load(key, object, warmed.append)
+        registry.get_or_load(key, object, warmed.append)
+        assert len(warmed) == 1
+
+        # A forked child has a new PID and warms up again without reloading
+        monkeypatch.setattr(model_registry.os, "getpid", lambda: -1)
+        registry.warm_up()
+        assert len(warmed) == 2
+        assert registry.misses == 1
+
+    def test_failed_warm_up_does_not_drop_model(self):
+        registry = ModelRegistry()
+
+        def broken(_):
+            raise RuntimeError("boom")
+
+        value = registry.get_or_load(ModelKey("m", "torch", "cpu", "fp32"), object, broken)
+        assert registry.get_or_load(ModelKey("m", "torch", "cpu", "fp32"), object) is value
+
+
+class TestDetectors:
+    """Test shared detection backends."""
+
+    def test_detectors_share_backend(self, stub_backends):
+        registry = ModelRegistry()
+
+        strict = registry.get_detector("yolov8n.pt", device="cpu", conf_threshold=0.8)
+        loose = registry.get_detector("yolov8n.pt", device="cpu", conf_threshold=0.3)
+
+        assert len(stub_backends) == 1
+        assert strict.backend is loose.backend
+        assert (strict.conf_threshold, loose.conf_threshold) == (0.8, 0.3)
+        assert strict.backend.calls == 1  # Warm-up inference
+        assert ModelKey("yolov8n.pt", "torch", "cpu", "fp32") in registry
+
+    def test_precision_passed_to_backend(self, stub_backends):
+        registry = ModelRegistry()
+        registry.get_detection_backend("yolov8n.pt", "cpu", "onnx", "int8_static", {"calibration_dir": "/calib"})
+
+        assert stub_backends[0].options == {"calibration_dir": "/calib", "precision": "int8_static"}
+
+
+class TestPreload:
+    """Test preloading at worker start."""
+
+    def test_fork_safe_only(self, stub_backends):
+        registry = ModelRegistry()
+        specs = [
+            ModelSpec(kind="detector", model="yolov8n.pt"),
+            ModelSpec(kind="detector", model="yolov8n.pt", backend="onnx"),
+        ]
+
+        keys = registry.preload(specs, fork_safe_only=True)
+        assert keys == [ModelKey("yolov8n.pt", "torch", "cpu", "fp32")]
+
+        keys = registry.preload(specs)
+        assert len(keys) == 2
+        assert len(stub_backends) == 2
+
+    def test_no_warm_up_before_fork(self, stub_backends):
+        registry = ModelRegistry()
+
+        registry.preload([ModelSpec(kind="detector", model="yolov8n.pt")], fork_safe_only=True, warm=False)
+        assert stub_backends[0].calls == 0
+
+        # worker_process_init warms in the child
+        registry.warm_up()
+        assert stub_backends[0].calls == 1
+
+    def test_failures_are_logged(self, monkeypatch, caplog):
+        def failing_create_backend(*args, **kwargs):
+            raise OSError("weights not found")
+
+        monkeypatch.setattr(model_registry, "create_backend", failing_create_backend)
+        registry = ModelRegistry()
+
+        assert registry.preload([ModelSpec(kind="detector", model="missing.pt")]) == []
+        assert "Could not preload detector missing.pt" in caplog.text
+
+    def test_spec_fork_safety(self):
+        assert ModelSpec(kind="embedding", model="clip").fork_safe
+        assert not ModelSpec(kind="detector", model="m", device="cuda").fork_safe
+        assert not ModelSpec(kind="detector", model="m", backend="onnx", precision="int8_static").fork_safe
+
+
+class FakeQueues(dict):
+    """Celery Queues stand-in: consume_from is the selection, or all queues without -Q."""
+
+    def __init__(self, names, selected=None):
+        super().__init__((name, None) for name in names)
+        self.selected = selected
+
+    @property
+    def consume_from(self):
+        return self.selected if self.selected is not None else self
+
+
+class TestWorkerQueues:
+    """Test which queues decide CV model preloading."""
+
+    def worker_app(self, queues):
+        routes = {"app.tasks.analysis_tasks.*": {"queue": "cv_analysis"}}
+        return SimpleNamespace(amqp=SimpleNamespace(queues=queues), conf=SimpleNamespace(task_routes=routes))
+
+    def test_selected_queues(self):
+        from app.core.celery_app import _consumed_queues
+
+        queues = FakeQueues(["celery", "video_processing"], selected={"video_processing": None})
+        assert _consumed_queues(self.worker_app(queues)) == {"video_processing"}
+
+    def test_all_queues_without_selection(self):
+        from app.core.celery_app import _consumed_queues
+
+        consumed = _consumed_queues(self.worker_app(FakeQueues(["celery"])))
+        assert "cv_analysis" in consumed
@@ -0,0 +1,174 @@
+"""
+Unit tests for the motion gate.
+
+Tests:
+- Motion detection against the background model
+- Skip decisions (empty last result, people present, forced refresh)
+- Per-pin config parsing
+- Integration with the batched detection pipeline (frame-ordered decisions
+  within a micro-batch)
+"""
+import queue
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.cv.detection_pipeline import DetectionPipeline
+from app.cv.motion_gate import MotionGate, MotionGateConfig, create_motion_gate
+
+
+def static_frame(value: int = 100) -> np.ndarray:
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+
+def moving_frame(offset: int) -> np.ndarray:
+    frame = static_frame()
+    frame[40:80, offset:offset + 30] = 250  # Bright "person"
+    return frame
+
+
+class EmptyDetector:
+    """Detector stub that never finds anyone, unless the frame has a bright blob."""
+
+    def __init__(self):
+        self.frames_seen = 0
+
+    def detect_batch(self, frames):
+        self.frames_seen += len(frames)
+        return [
+            [{"bbox": [0, 0, 1, 1], "confidence": 0.9}] if f.max() > 200 else []
+            for f in frames
+        ]
+
+
+class TestMotionMeasurement:
+    """Test background differencing."""
+
+    def test_static_frames_have_no_motion(self):
+        gate = MotionGate()
+        assert gate.measure_motion(static_frame())  # First frame initializes the model
+        assert not any(gate.measure_motion(static_frame()) for _ in range(5))
+
+    def test_moving_object_detected(self):
+        gate = MotionGate()
+        gate.measure_motion(static_frame())
+        assert gate.measure_motion(moving_frame(20))
+
+    def test_small_noise_ignored(self):
+        gate = MotionGate()
+        gate.measure_motion(static_frame())
+        noisy = static_frame().astype(np.int16) + np.random.default_rng(0).integers(-5, 6, (120, 160, 3))
+        assert not gate.measure_motion(noisy.clip(0, 255).astype(np.uint8))
+
+
+class TestSkipDecisions:
+    """Test when detection runs."""
+
+    def test_skips_after_empty_result(self):
+        gate = MotionGate()
+        assert gate.should_detect(gate.measure_motion(static_frame()))
+        gate.record([])
+
+        assert gate.would_skip(False) and not gate.would_skip(True)
+        assert gate.frames_skipped == 0
+
+        assert not gate.should_detect(gate.measure_motion(static_frame()))
+        assert gate.frames_skipped == 1
+
+    def test_detects_while_people_present(self):
+        gate = MotionGate()
+        gate.should_detect(gate.measure_motion(static_frame()))
+        gate.record([{"bbox": [0, 0, 1, 1]}])
+
+        # A person standing still produces no motion but must keep being detected
+        assert gate.should_detect(gate.measure_motion(static_frame()))
+
+    def test_forced_refresh(self):
+        gate = MotionGate(MotionGateConfig(max_skip_frames=2))
+        gate.should_detect(gate.measure_motion(static_frame()))
+        gate.record([])
+
+        decisions = [gate.should_detect(gate.measure_motion(static_frame())) for _ in range(3)]
+        assert decisions == [False, False, True]
+
+    def test_disabled_gate_always_detects(self):
+        gate = MotionGate(MotionGateConfig(enabled=False))
+        gate.record([])
+        assert all(gate.should_detect(gate.measure_motion(static_frame())) for _ in range(3))
+        assert gate.stats()["frames_skipped"] == 0
+
+
+class TestConfig:
+    """Test per-pin config parsing."""
+
+    def test_pin_overrides_defaults(self):
+        gate = create_motion_gate({"pixel_threshold": 40, "unknown": 1}, enabled=False)
+
+        assert gate.config.pixel_threshold == 40
+        assert gate.config.enabled is False
+
+    def test_pin_config_wins_over_global_default(self):
+        gate = create_motion_gate({"enabled": True}, enabled=False)
+        assert gate.config.enabled is True
+
+    def test_none_uses_defaults(self):
+        assert create_motion_gate(None).config == MotionGateConfig()
+
+
+class TestPipelineGating:
+    """Test the gate inside DetectionPipeline."""
+
+    def test_static_video_skips_inference(self):
+        frames = [
+            SimpleNamespace(frame_number=i + 1, timestamp_seconds=float(i), image=static_frame())
+            for i in range(20)
+        ]
+        detector = EmptyDetector()
+        pipeline = DetectionPipeline(detector, batch_size=1, prefetch_frames=4, motion_gate=MotionGate())
+
+        results = list(pipeline.run(frames))
+
+        assert len(results) == 20
+        assert all(r.detections == [] for r in results)
+        assert detector.frames_seen == 1
+        assert pipeline.stats.frames_skipped == 19
+        assert pipeline.stats.to_dict()["frames_skipped"] == 19
+
+    def test_motion_triggers_detection(self):
+        images = [static_frame()] * 5 + [moving_frame(10 + 10 * i) for i in range(3)] + [static_frame()] * 3
+        frames = [
+            SimpleNamespace(frame_number=i + 1, timestamp_seconds=float(i), image=image)
+            for i, image in enumerate(images)
+        ]
+        detector = EmptyDetector()
+        pipeline = DetectionPipeline(detector, batch_size=1, prefetch_frames=4, motion_gate=MotionGate())
+
+        results = list(pipeline.run(frames))
+
+        assert [len(r.detections) for r in results[5:8]] == [1, 1, 1]
+        assert not any(r.skipped for r in results[5:9])
+        assert results[1].skipped
+
+    def test_people_found_within_batch_keep_detection(self):
+        gate = MotionGate()
+        gate.should_detect(True)
+        gate.record([])  # Empty scene before this batch
+        # A person walks in, then stands still: only the first frame has motion
+        batch = [
+            (SimpleNamespace(frame_number=i + 1, timestamp_seconds=float(i), image=moving_frame(10)), i == 0)
+            for i in range(4)
+        ]
+        detector = EmptyDetector()
+        pipeline = DetectionPipeline(detector, batch_size=4, motion_gate=gate)
+        result_queue = queue.Queue()
+
+        assert pipeline._process_batch(batch, result_queue, threading.Event())
+
+        results = [result_queue.get_nowait() for _ in batch]
+        assert [r.frame_number for r in results] == [1, 2, 3, 4]
+        assert [len(r.detections) for r in results] == [1, 1, 1, 1]
+        assert not any(r.skipped for r in results)
+        # The batch is cut once, to record the first frame before deciding the rest
+        assert detector.frames_seen == 4
+        assert pipeline.stats.batches == 2
@@ -0,0 +1,151 @@
+"""
+Unit tests for person detector inference backends.
+
+Tests:
+- Letterbox preprocessing and box rescaling
+- Numpy NMS and YOLO output decoding
+- Backend resolution (int8_dynamic rejected for the detector)
+- ONNX Runtime / PyTorch output parity (requires onnxruntime and yolov8n.pt)
+"""
+import numpy as np
+import pytest
+
+from app.cv.inference_backends import (
+    box_iou_matrix,
+    letterbox,
+    non_max_suppression,
+    postprocess_yolo_output,
+    quantize_detector_model,
+    resolve_backend,
+    scale_boxes,
+)
+
+
+class TestLetterbox:
+    """Test letterbox resize/pad and the inverse box mapping."""
+
+    def test_rectangular_padding(self):
+        image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        padded, ratio, pad = letterbox(image, 640, auto=True)
+
+        assert padded.shape == (384, 640, 3)
+        assert ratio == pytest.approx(1 / 3)
+        assert pad == (0.0, 12.0)
+
+    def test_square_padding(self):
+        image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        padded, _, _ = letterbox(image, 640, auto=False)
+
+        assert padded.shape == (640, 640, 3)
+        assert padded[0, 0].tolist() == [114, 114, 114]
+
+    def test_scale_boxes_roundtrip(self):
+        image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        _, ratio, pad = letterbox(image, 640, auto=False)
+
+        original = np.array([[300.0, 150.0, 600.0, 900.0, 0.9]])
+        network = original.copy()
+        network[:, [0, 2]] = network[:, [0, 2]] * ratio + round(pad[0] - 0.1)
+        network[:, [1, 3]] = network[:, [1, 3]] * ratio + round(pad[1] - 0.1)
+
+        restored = scale_boxes(network, ratio, pad, image.shape[:2])
+        np.testing.assert_allclose(restored, original, atol=1e-4)
+
+
+class TestNMS:
+    """Test numpy NMS and YOLO output decoding."""
+
+    def test_iou_matrix(self):
+        boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=np.float32)
+        iou = box_iou_matrix(boxes, boxes)
+
+        assert iou[0, 0] == pytest.approx(1.0)
+        assert iou[0, 1] == pytest.approx(50 / 150)
+        assert iou[0, 2] == 0.0
+
+    def test_suppresses_overlaps(self):
+        boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [20, 20, 30, 30]], dtype=np.float32)
+        scores = np.array([0.8, 0.9, 0.7], dtype=np.float32)
+
+        keep = non_max_suppression(boxes, scores, iou_threshold=0.5)
+        assert keep.tolist() == [1, 2]
+
+    def test_postprocess_person_only(self):
+        # Two anchors: one person (cx, cy, w, h), one whose best class is not person
+        output = np.zeros((84, 2), dtype=np.float32)
+        output[:4, 0] = [50, 50, 20, 40]
+        output[4, 0] = 0.9
+        output[:4, 1] = [100, 100, 20, 40]
+        output[4, 1] = 0.8
+        output[5, 1] = 0.95
+
+        boxes = postprocess_yolo_output(output, conf_threshold=0.5, iou_threshold=0.45)
+
+        assert boxes.shape == (1, 5)
+        np.testing.assert_allclose(boxes[0], [40, 30, 60, 70, 0.9], atol=1e-5)
+
+
+class TestBackendResolution:
+    """Test backend selection."""
+
+    def test_explicit_backend(self):
+        assert resolve_backend("onnx", "cpu") == "onnx"
+
+    def test_auto_on_gpu_uses_torch(self):
+        assert resolve_backend("auto", "cuda") == "torch"
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            resolve_backend("tensorrt", "cpu")
+
+    @pytest.mark.parametrize("backend", ["onnx", "openvino", "auto", "remote"])
+    def test_detector_rejects_int8_dynamic(self, backend):
+        with pytest.raises(ValueError, match="int8_static"):
+            resolve_backend(backend, "cpu", "int8_dynamic")
+
+    def test_detector_not_quantized_dynamically(self, tmp_path):
+        with pytest.raises(ValueError, match="int8_static"):
+            quantize_detector_model(str(tmp_path / "yolov8n.onnx"), "int8_dynamic")
+
+
+class TestBackendParity:
+    """ONNX Runtime must reproduce the PyTorch detections."""
+
+    @pytest.fixture(scope="class")
+    def detectors(self, tmp_path_factory):
+        pytest.importorskip("onnxruntime")
+        from app.cv.person_detector import PersonDetector
+
+        cache_dir = str(tmp_path_factory.mktemp("onnx_cache"))
+        try:
+            torch_detector = PersonDetector("yolov8n.pt", conf_threshold=0.05)
+            onnx_detector = PersonDetector(
+                "yolov8n.pt",
+                conf_threshold=0.05,
+                backend="onnx",
+                backend_options={"cache_dir": cache_dir},
+            )
+        except Exception as e:  # Weights unavailable offline
+            pytest.skip(f"YOLO weights unavailable: {e}")
+        return torch_detector, onnx_detector
+
+    @pytest.mark.parametrize("shape", [(480, 640, 3), (1080, 1920, 3)])
+    def test_detect_batch_parity(self, detectors, shape):
+        torch_detector, onnx_detector = detectors
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(2)]
+
+        torch_out = torch_detector.backend.predict(frames, 0.05, 0.45)
+        onnx_out = onnx_detector.backend.predict(frames, 0.05, 0.45)
+
+        for expected, actual in zip(torch_out, onnx_out):
+            assert len(actual) == len(expected)
+            if len(expected):
+                assert box_iou_matrix(expected[:, :4], actual[:, :4]).max(axis=1).min() > 0.99
+                np.testing.assert_allclose(
+                    np.sort(actual[:, 4]), np.sort(expected[:, 4]), atol=1e-3
+                )
+
+        # Public output contract is unchanged
+        detections = onnx_detector.detect(frames[0])
+        assert all(set(d) == {"bbox", "confidence", "class"} for d in detections)
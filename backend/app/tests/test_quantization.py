@@ -0,0 +1,217 @@
+"""
+Unit tests for INT8 quantization and the accuracy gate.
+
+Tests:
+- Calibration folder loading and cache keys
+- Detection recall and embedding cosine drift metrics
+- Gate reports: pass, fail and configured-threshold re-checks
+- ONNX Runtime dynamic/static quantization of a small conv model
+  (dynamic mode leaves convolutions in float)
+"""
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from app.cv.quantization import (
+    QuantizationGateError,
+    QuantizationReport,
+    QuantizationThresholds,
+    detection_recall,
+    embedding_cosine_drift,
+    load_calibration_images,
+    quantize_onnx_model,
+    quantized_model_path,
+    require_gate_pass,
+    write_gate_report,
+)
+
+
+@pytest.fixture
+def calibration_dir(tmp_path):
+    """Folder with a few random calibration images."""
+    folder = tmp_path / "calibration"
+    folder.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(4):
+        cv2.imwrite(str(folder / f"frame_{i}.png"), rng.integers(0, 256, (32, 32, 3), dtype=np.uint8))
+    (folder / "notes.txt").write_text("ignored")
+    return str(folder)
+
+
+def make_report(artifact, failures=None, **metrics) -> QuantizationReport:
+    return QuantizationReport(
+        component="detector",
+        precision="int8_static",
+        artifact=artifact,
+        samples=4,
+        fp32_ms=20.0,
+        quantized_ms=10.0,
+        metrics=metrics,
+        thresholds={},
+        failures=failures or [],
+    )
+
+
+class TestCalibration:
+    """Test calibration folder handling."""
+
+    def test_loads_rgb_images(self, calibration_dir):
+        images = load_calibration_images(calibration_dir)
+
+        assert len(images) == 4
+        assert images[0].shape == (32, 32, 3)
+
+    def test_missing_folder(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_calibration_images(str(tmp_path / "missing"))
+
+    def test_empty_folder(self, tmp_path):
+        with pytest.raises(ValueError):
+            load_calibration_images(str(tmp_path))
+
+    def test_static_path_keyed_by_calibration_set(self, calibration_dir, tmp_path):
+        model = str(tmp_path / "model.onnx")
+        before = quantized_model_path(model, "int8_static", calibration_dir)
+
+        cv2.imwrite(f"{calibration_dir}/frame_9.png", np.zeros((8, 8, 3), dtype=np.uint8))
+        after = quantized_model_path(model, "int8_static", calibration_dir)
+
+        assert before != after
+        assert quantized_model_path(model, "int8_dynamic") == str(tmp_path / "model_int8_dynamic.onnx")
+
+    def test_static_requires_calibration(self, tmp_path):
+        with pytest.raises(ValueError):
+            quantized_model_path(str(tmp_path / "model.onnx"), "int8_static")
+
+
+class TestMetrics:
+    """Test recall and drift metrics."""
+
+    def test_detection_recall(self):
+        reference = [
+            np.array([[0, 0, 10, 10, 0.9], [20, 20, 30, 30, 0.8]], dtype=np.float32),
+            np.zeros((0, 5), dtype=np.float32),
+        ]
+        candidate = [
+            np.array([[1, 0, 11, 10, 0.85]], dtype=np.float32),
+            np.array([[0, 0, 5, 5, 0.5]], dtype=np.float32),
+        ]
+
+        assert detection_recall(reference, candidate) == pytest.approx(0.5)
+
+    def test_candidate_box_matched_once(self):
+        reference = [np.array([[0, 0, 10, 10, 0.9], [0, 0, 10, 10, 0.8]], dtype=np.float32)]
+        candidate = [np.array([[0, 0, 10, 10, 0.9]], dtype=np.float32)]
+
+        assert detection_recall(reference, candidate) == pytest.approx(0.5)
+
+    def test_empty_reference_recall(self):
+        assert detection_recall([np.zeros((0, 5))], [np.zeros((0, 5))]) == 1.0
+
+    def test_cosine_drift(self):
+        reference = np.array([[1.0, 0.0], [0.0, 1.0]])
+        candidate = np.array([[1.0, 0.0], [1.0, 1.0]])
+
+        drift = embedding_cosine_drift(reference, candidate)
+
+        assert drift["max_cosine_drift"] == pytest.approx(1 - np.sqrt(0.5))
+        assert drift["mean_cosine_drift"] == pytest.approx((1 - np.sqrt(0.5)) / 2)
+
+
+class TestGate:
+    """Test gate report persistence and enforcement."""
+
+    def test_missing_report_refused(self, tmp_path):
+        with pytest.raises(QuantizationGateError, match="No accuracy gate report"):
+            require_gate_pass(str(tmp_path / "model_int8_static.onnx"))
+
+    def test_passing_report(self, tmp_path):
+        artifact = str(tmp_path / "model_int8_static.onnx")
+        path = write_gate_report(make_report(artifact, detection_recall=0.99))
+
+        report = require_gate_pass(artifact, QuantizationThresholds())
+
+        assert report["passed"]
+        assert report["speedup"] == 2.0
+        assert json.load(open(path))["metrics"] == {"detection_recall": 0.99}
+
+    def test_failed_report_refused(self, tmp_path):
+        artifact = str(tmp_path / "model_int8_static.onnx")
+        write_gate_report(make_report(artifact, failures=["detection recall 0.8 < 0.95"]))
+
+        with pytest.raises(QuantizationGateError, match="failed the accuracy gate"):
+            require_gate_pass(artifact)
+
+    def test_stricter_configured_thresholds(self, tmp_path):
+        artifact = str(tmp_path / "model_int8_static.onnx")
+        write_gate_report(make_report(artifact, detection_recall=0.96))
+
+        with pytest.raises(QuantizationGateError, match="detection recall"):
+            require_gate_pass(artifact, QuantizationThresholds(min_detection_recall=0.98))
+        with pytest.raises(QuantizationGateError, match="speedup"):
+            require_gate_pass(artifact, QuantizationThresholds(min_speedup=3.0))
+
+
+class TestQuantizeOnnx:
+    """Quantize a small conv model with ONNX Runtime."""
+
+    @pytest.fixture
+    def conv_model(self, tmp_path):
+        onnx = pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+        from onnx import TensorProto, helper, numpy_helper
+
+        rng = np.random.default_rng(0)
+        weight = numpy_helper.from_array(rng.normal(size=(8, 3, 3, 3)).astype(np.float32), "W")
+        graph = helper.make_graph(
+            [helper.make_node("Conv", ["images", "W"], ["output"], pads=[1, 1, 1, 1], name="conv")],
+            "conv",
+            [helper.make_tensor_value_info("images", TensorProto.FLOAT, [None, 3, 16, 16])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, [None, 8, 16, 16])],
+            initializer=[weight],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+        path = tmp_path / "conv.onnx"
+        onnx.save(model, str(path))
+        return str(path)
+
+    @pytest.mark.parametrize("precision", ["int8_dynamic", "int8_static"])
+    def test_quantized_output_close_to_fp32(self, conv_model, calibration_dir, precision):
+        import onnxruntime as ort
+
+        def calibration_inputs():
+            for image in load_calibration_images(calibration_dir):
+                batch = cv2.resize(image, (16, 16)).transpose(2, 0, 1)[None]
+                yield {"images": batch.astype(np.float32) / 255.0}
+
+        quantized = quantize_onnx_model(
+            conv_model,
+            precision,
+            calibration_inputs=calibration_inputs,
+            calibration_dir=calibration_dir,
+        )
+        # Second call hits the cache
+        assert quantize_onnx_model(conv_model, precision, calibration_dir=calibration_dir) == quantized
+
+        feed = next(calibration_inputs())
+        fp32 = ort.InferenceSession(conv_model, providers=["CPUExecutionProvider"]).run(None, feed)[0]
+        int8 = ort.InferenceSession(quantized, providers=["CPUExecutionProvider"]).run(None, feed)[0]
+
+        drift = embedding_cosine_drift(fp32.reshape(1, -1), int8.reshape(1, -1))
+        assert drift["mean_cosine_drift"] < 0.01
+
+    def test_dynamic_leaves_convolutions_in_float(self, conv_model):
+        import onnx
+
+        quantized = quantize_onnx_model(conv_model, "int8_dynamic")
+
+        # ConvInteger has no ONNX Runtime CPU kernel
+        op_types = {node.op_type for node in onnx.load(quantized).graph.node}
+        assert "ConvInteger" not in op_types
+        assert "Conv" in op_types
+
+    def test_fp32_is_passthrough(self, tmp_path):
+        path = str(tmp_path / "model.onnx")
+        assert quantize_onnx_model(path, "fp32") == path
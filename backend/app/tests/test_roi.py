@@ -0,0 +1,132 @@
+"""
+Unit tests for camera region-of-interest inference.
+
+Tests:
+- Polygon validation and crop rectangle
+- Mask mode
+- Mapping boxes back to full-frame coordinates and walkable-area filtering
+- PersonDetector.detect_batch with an ROI
+"""
+import numpy as np
+import pytest
+
+from app.cv.person_detector import PersonDetector
+from app.cv.roi import MASK_FILL_VALUE, RegionOfInterest
+
+# Bottom half of the frame is walkable floor
+FLOOR = [[(0.0, 0.5), (1.0, 0.5), (1.0, 1.0), (0.0, 1.0)]]
+
+
+class TestGeometry:
+    """Test polygon handling."""
+
+    def test_crop_rectangle(self):
+        roi = RegionOfInterest(FLOOR, padding=0.0)
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+
+        crop, offset = roi.crop(frame)
+
+        assert crop.shape == (50, 200, 3)
+        assert offset == (0, 50)
+        assert roi.coverage(frame.shape) == pytest.approx(0.5)
+
+    def test_padding_clipped_to_frame(self):
+        roi = RegionOfInterest(FLOOR, padding=0.1)
+        _, offset = roi.crop(np.zeros((100, 200, 3), dtype=np.uint8))
+        assert offset == (0, 40)
+
+    def test_union_of_polygons(self):
+        roi = RegionOfInterest(
+            [[(0.1, 0.1), (0.2, 0.1), (0.2, 0.2)], [(0.5, 0.6), (0.6, 0.6), (0.6, 0.7)]],
+            padding=0.0,
+        )
+        assert roi.geometry((100, 100)).rect == (10, 10, 60, 70)
+
+    def test_invalid_polygons(self):
+        with pytest.raises(ValueError):
+            RegionOfInterest([[(0.0, 0.0), (1.0, 1.0)]])
+        with pytest.raises(ValueError):
+            RegionOfInterest([[(0.0, 0.0), (1.5, 0.0), (1.0, 1.0)]])
+        with pytest.raises(ValueError):
+            RegionOfInterest(FLOOR, mode="blur")
+
+    def test_from_config_empty(self):
+        assert RegionOfInterest.from_config(None) is None
+        assert RegionOfInterest.from_config([]) is None
+
+    def test_mask_mode_fills_outside(self):
+        triangle = [[(0.0, 0.0), (1.0, 0.0), (0.0, 1.0)]]
+        roi = RegionOfInterest(triangle, mode="mask", padding=0.0)
+        frame = np.full((100, 100, 3), 7, dtype=np.uint8)
+
+        masked, _ = roi.prepare(frame)
+
+        assert masked[5, 5].tolist() == [7, 7, 7]
+        assert masked[95, 95].tolist() == [MASK_FILL_VALUE] * 3
+        assert frame[95, 95].tolist() == [7, 7, 7]  # Source frame untouched
+
+
+class TestMapBoxes:
+    """Test crop-to-frame mapping."""
+
+    def test_offsets_and_filter(self):
+        roi = RegionOfInterest(FLOOR, padding=0.1)
+        boxes = np.array([
+            [10, 20, 30, 50, 0.9],  # Feet at y=90 -> on the floor
+            [10, 0, 30, 5, 0.8],    # Feet at y=45 -> in the padding, above the floor
+        ], dtype=np.float32)
+
+        mapped = roi.map_boxes(boxes, (0, 40), (100, 200, 3))
+
+        assert mapped.tolist() == [[10, 60, 30, 90, pytest.approx(0.9)]]
+
+    def test_filter_disabled(self):
+        roi = RegionOfInterest(FLOOR, padding=0.1, filter_outside=False)
+        boxes = np.array([[10, 0, 30, 5, 0.8]], dtype=np.float32)
+        assert len(roi.map_boxes(boxes, (0, 40), (100, 200, 3))) == 1
+
+
+class RecordingBackend:
+    """Backend stub returning one box at the centre of each input."""
+
+    name = "stub"
+
+    def __init__(self):
+        self.input_shapes = []
+
+    def predict(self, frames, conf_threshold, iou_threshold):
+        outputs = []
+        for frame in frames:
+            self.input_shapes.append(frame.shape)
+            h, w = frame.shape[:2]
+            outputs.append(np.array([[w / 2 - 5, h / 2 - 10, w / 2 + 5, h / 2 + 10, 0.9]], dtype=np.float32))
+        return outputs
+
+
+class TestDetectorWithRoi:
+    """Test ROI handling in PersonDetector."""
+
+    @pytest.fixture
+    def detector(self):
+        detector = PersonDetector.__new__(PersonDetector)
+        detector.backend = RecordingBackend()
+        detector.conf_threshold = 0.5
+        detector.iou_threshold = 0.45
+        return detector
+
+    def test_infers_on_crop_and_maps_back(self, detector):
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+        roi = RegionOfInterest(FLOOR, padding=0.0)
+
+        detections = detector.detect_batch([frame, frame], roi=roi)
+
+        assert detector.backend.input_shapes == [(50, 200, 3), (50, 200, 3)]
+        assert detections[0][0]["bbox"] == [95, 65, 10, 20]
+
+    def test_whole_frame_without_roi(self, detector):
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+
+        detections = detector.detect(frame)
+
+        assert detector.backend.input_shapes == [(100, 200, 3)]
+        assert detections[0]["bbox"] == [95, 40, 10, 20]
@@ -0,0 +1,251 @@
+"""
+Unit tests for the stage-result cache.
+
+Tests:
+- Stage keys (deterministic, parameter-sensitive, chained to upstream stages)
+- Tracking chunk keys: a tracker-only change reuses the detections, an
+  embedding-only change reuses the tracks
+- Model versions from weight file contents
+- Get/put round trip through object storage with the index
+- Stale index entries and invalidation
+"""
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.cv.byte_tracker import ByteTracker
+from app.cv.chunk_stitching import TrackingChunk
+from app.cv.keyframe_selector import KeyframeSelector
+from app.cv.tracklet_generator import TrackletGenerator
+from app.services.stage_cache_service import (
+    STAGE_APPEARANCE,
+    STAGE_DETECTIONS,
+    STAGE_TRACKS,
+    StageCacheService,
+    model_version,
+    stage_key,
+)
+from app.tasks.analysis_tasks import tracking_stage_keys
+
+CHECKSUM = "a" * 64
+CHUNK = TrackingChunk(index=1, start_frame=601, end_frame=1201, window_end_frame=1221, head_end_frame=621)
+
+
+class TestStageKey:
+    """Test key construction."""
+
+    def test_deterministic_and_order_independent(self):
+        a = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5, "fps": 1.0})
+        b = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"fps": 1.0, "conf": 0.5})
+
+        assert a == b
+        assert a.digest == b.digest
+
+    def test_sensitive_to_every_component(self):
+        base = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5})
+
+        assert stage_key("b" * 64, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5}) != base
+        assert stage_key(CHECKSUM, STAGE_TRACKS, "yolov8n", {"conf": 0.5}) != base
+        assert stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8s", {"conf": 0.5}) != base
+        assert stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.6}) != base
+
+    def test_upstream_change_invalidates_downstream(self):
+        detections_a = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5})
+        detections_b = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.6})
+
+        tracks_a = stage_key(CHECKSUM, STAGE_TRACKS, "bytetrack", {"buffer": 10}, upstream=detections_a)
+        tracks_b = stage_key(CHECKSUM, STAGE_TRACKS, "bytetrack", {"buffer": 10}, upstream=detections_b)
+
+        assert tracks_a != tracks_b
+        assert tracks_a.params["upstream"] == detections_a.digest
+
+    def test_numpy_params_normalized(self):
+        a = stage_key(CHECKSUM, STAGE_DETECTIONS, "m", {"roi": np.array([[0.1, 0.2]]), "n": np.int64(3)})
+        b = stage_key(CHECKSUM, STAGE_DETECTIONS, "m", {"roi": [[0.1, 0.2]], "n": 3})
+
+        assert a == b
+
+    def test_object_path_is_content_addressed(self):
+        key = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5})
+
+        assert key.object_path("cache") == f"cache/{CHECKSUM}/detections/{key.digest}.json.gz"
+
+
+def chunk_generator(conf_threshold=0.7, tracker=None, keyframe_selector=None):
+    """Tracklet generator configured like a chunk's, without models."""
+    detector = SimpleNamespace(
+        model_name="yolov8n.pt",
+        backend_name="torch",
+        precision="fp32",
+        conf_threshold=conf_threshold,
+        iou_threshold=0.45,
+    )
+    return TrackletGenerator(
+        camera_id="cam",
+        mall_id="mall",
+        person_detector=detector,
+        garment_analyzer=MagicMock(),
+        tracker=tracker or ByteTracker(),
+        keyframe_selector=keyframe_selector,
+    )
+
+
+class TestTrackingStageKeys:
+    """Test the chained stage keys of a tracking chunk."""
+
+    @pytest.mark.parametrize(
+        "changed",
+        [{"tracker": ByteTracker(track_buffer=30)}, {"keyframe_selector": KeyframeSelector(window=10)}],
+        ids=["tracker", "keyframes"],
+    )
+    def test_tracker_change_reuses_detections(self, changed):
+        base = tracking_stage_keys(CHECKSUM, chunk_generator(), CHUNK, extract_embeddings=True)
+        retuned = tracking_stage_keys(CHECKSUM, chunk_generator(**changed), CHUNK, extract_embeddings=True)
+
+        assert retuned[STAGE_DETECTIONS] == base[STAGE_DETECTIONS]
+        assert retuned[STAGE_TRACKS] != base[STAGE_TRACKS]
+        assert retuned[STAGE_APPEARANCE] != base[STAGE_APPEARANCE]
+
+    def test_embedding_change_reuses_tracks(self, monkeypatch):
+        base = tracking_stage_keys(CHECKSUM, chunk_generator(), CHUNK, extract_embeddings=True)
+        without_embeddings = tracking_stage_keys(CHECKSUM, chunk_generator(), CHUNK, extract_embeddings=False)
+        monkeypatch.setattr(settings, "CV_EMBEDDING_PRECISION", "int8_dynamic")
+        quantized = tracking_stage_keys(CHECKSUM, chunk_generator(), CHUNK, extract_embeddings=True)
+
+        for keys in (without_embeddings, quantized):
+            assert keys[STAGE_DETECTIONS] == base[STAGE_DETECTIONS]
+            assert keys[STAGE_TRACKS] == base[STAGE_TRACKS]
+            assert keys[STAGE_APPEARANCE] != base[STAGE_APPEARANCE]
+
+    def test_detector_change_invalidates_every_stage(self):
+        base = tracking_stage_keys(CHECKSUM, chunk_generator(), CHUNK, extract_embeddings=True)
+        stricter = tracking_stage_keys(CHECKSUM, chunk_generator(conf_threshold=0.8), CHUNK, extract_embeddings=True)
+
+        assert all(stricter[stage] != base[stage] for stage in base)
+        assert stricter[STAGE_TRACKS].params["upstream"] == stricter[STAGE_DETECTIONS].digest
+        assert stricter[STAGE_APPEARANCE].params["upstream"] == stricter[STAGE_TRACKS].digest
+
+    def test_chunks_keyed_by_frames(self):
+        last = TrackingChunk(index=2, start_frame=1201, end_frame=None, window_end_frame=None, head_end_frame=1221)
+
+        first_keys = tracking_stage_keys(CHECKSUM, chunk_generator(), CHUNK, extract_embeddings=True)
+        last_keys = tracking_stage_keys(CHECKSUM, chunk_generator(), last, extract_embeddings=True)
+
+        assert first_keys[STAGE_DETECTIONS] != last_keys[STAGE_DETECTIONS]
+
+
+class TestModelVersion:
+    """Test model version fingerprints."""
+
+    def test_weights_fingerprinted_by_content(self, tmp_path):
+        weights = tmp_path / "yolov8n.pt"
+        weights.write_bytes(b"weights-v1")
+        v1 = model_version(str(weights))
+
+        weights.write_bytes(b"weights-v2!")
+
+        assert v1.startswith("yolov8n:")
+        assert model_version(str(weights)) != v1
+
+    def test_hub_names_used_as_is(self):
+        assert model_version("openai/clip-vit-base-patch32") == "openai/clip-vit-base-patch32"
+
+
+class IndexedStageCache(StageCacheService):
+    """Stage cache with the DB index kept in a dict (the models need PostgreSQL)."""
+
+    def __init__(self, storage):
+        db = MagicMock()
+        db.begin_nested.return_value = nullcontext()
+        super().__init__(db, storage=storage, prefix="cache")
+        self.index = {}
+        db.add.side_effect = lambda entry: self.index.__setitem__(
+            (entry.checksum_sha256, entry.stage, entry.model_version, entry.params_hash), entry
+        )
+        db.delete.side_effect = lambda entry: self.index.pop(
+            (entry.checksum_sha256, entry.stage, entry.model_version, entry.params_hash)
+        )
+        db.query.return_value.filter.return_value.all.side_effect = lambda: list(self.index.values())
+
+    def _lookup(self, key):
+        return self.index.get((key.checksum_sha256, key.stage, key.model_version, key.params_hash))
+
+
+@pytest.fixture(autouse=True)
+def plain_index_rows():
+    """Index rows as plain records, so no mapper/database is needed."""
+    with patch("app.services.stage_cache_service.StageResult", side_effect=lambda **kw: SimpleNamespace(**kw)):
+        yield
+
+
+@pytest.fixture
+def storage():
+    objects = {}
+    storage = MagicMock()
+    storage.objects = objects
+    storage.upload_bytes.side_effect = lambda data, name, **kwargs: objects.__setitem__(name, data)
+
+    def download_bytes(name):
+        if name not in objects:
+            raise FileNotFoundError(name)
+        return objects[name]
+
+    storage.download_bytes.side_effect = download_bytes
+    storage.delete_file.side_effect = lambda name: objects.pop(name)
+    return storage
+
+
+class TestStageCacheService:
+    """Test reading and writing cached results."""
+
+    def test_round_trip(self, storage):
+        cache = IndexedStageCache(storage)
+        key = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5})
+        result = {"detections": [{"bbox": np.array([1.0, 2.0, 3.0, 4.0]), "confidence": np.float32(0.5)}]}
+
+        assert cache.get(key) is None
+        entry = cache.put(key, result)
+
+        assert entry.object_path in storage.objects
+        assert cache.get(key) == {"detections": [{"bbox": [1.0, 2.0, 3.0, 4.0], "confidence": 0.5}]}
+        assert entry.hit_count == 1
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_get_or_compute_computes_once(self, storage):
+        cache = IndexedStageCache(storage)
+        key = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {"conf": 0.5})
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"total": 3}
+
+        first = cache.get_or_compute(key, compute)
+        second = cache.get_or_compute(key, compute)
+
+        assert first == ({"total": 3}, False)
+        assert second == ({"total": 3}, True)
+        assert len(calls) == 1
+
+    def test_missing_object_drops_index_entry(self, storage):
+        cache = IndexedStageCache(storage)
+        key = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {})
+        entry = cache.put(key, {"x": 1})
+        del storage.objects[entry.object_path]
+
+        assert cache.get(key) is None
+        assert cache.index == {}
+
+    def test_invalidate(self, storage):
+        cache = IndexedStageCache(storage)
+        detections = stage_key(CHECKSUM, STAGE_DETECTIONS, "yolov8n", {})
+        cache.put(detections, {"x": 1})
+        cache.put(stage_key(CHECKSUM, STAGE_TRACKS, "bytetrack", {}, upstream=detections), {"y": 2})
+
+        assert cache.invalidate(CHECKSUM) == 2
+        assert storage.objects == {}
+        assert cache.get(detections) is None
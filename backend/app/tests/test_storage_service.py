@@ -4,16 +4,25 @@ Unit tests for storage service.
 Tests S3/MinIO operations including:
 - Bucket initialization
 - File upload/download
+- Parallel ranged downloads and multipart uploads with checksum verification
 - Multipart upload workflow
 - Presigned URL generation
-- File management (exists, delete, metadata)
+- File management (exists, delete, list, metadata)
 """
+import hashlib
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import timedelta
 import uuid
 
-from app.services.storage_service import StorageService, get_storage_service
+import urllib3
+
+from app.services.storage_service import (
+    StorageService,
+    get_storage_service,
+    multipart_etag,
+    part_ranges,
+)
 from minio.error import S3Error
 
 
@@ -169,30 +178,51 @@ class TestMultipartUpload:
 class TestDirectUpload:
     """Test direct file upload/download operations."""
 
-    def test_upload_file(self, storage_service, mock_minio_client):
-        """Test uploading a file directly."""
+    def test_upload_file(self, storage_service, mock_minio_client, tmp_path):
+        """Test uploading a small file with a single PUT."""
         mock_minio_client.bucket_exists.return_value = True
+        local = tmp_path / "test.mp4"
+        local.write_bytes(b"video")
 
         mock_result = Mock()
         mock_result.object_name = "videos/test.mp4"
-        mock_result.etag = "abc123"
+        mock_result.etag = hashlib.md5(b"video").hexdigest()
         mock_result.version_id = "v1"
         mock_minio_client.fput_object.return_value = mock_result
 
         result = storage_service.upload_file(
-            "/tmp/test.mp4",
+            str(local),
             "videos/test.mp4",
             content_type="video/mp4",
             metadata={"mall_id": "001"},
         )
 
         assert result["object_name"] == "videos/test.mp4"
-        assert result["etag"] == "abc123"
+        assert result["etag"] == mock_result.etag
+        assert result["sha256"] == hashlib.sha256(b"video").hexdigest()
         mock_minio_client.fput_object.assert_called_once()
+        metadata = mock_minio_client.fput_object.call_args[1]["metadata"]
+        assert metadata == {"mall_id": "001", "sha256": result["sha256"]}
+
+    def test_upload_file_etag_mismatch(self, storage_service, mock_minio_client, tmp_path):
+        """Test an object whose ETag does not match the file is removed."""
+        mock_minio_client.bucket_exists.return_value = True
+        local = tmp_path / "test.mp4"
+        local.write_bytes(b"video")
+        mock_minio_client.fput_object.return_value = Mock(etag="corrupted", version_id=None)
+
+        with pytest.raises(RuntimeError, match="does not match"):
+            storage_service.upload_file(str(local), "videos/test.mp4")
+
+        mock_minio_client.remove_object.assert_called_once_with(
+            "spatial-intel-videos",
+            "videos/test.mp4",
+        )
 
     def test_download_file(self, storage_service, mock_minio_client):
-        """Test downloading a file."""
+        """Test downloading a small file with a single GET."""
         mock_minio_client.bucket_exists.return_value = True
+        mock_minio_client.stat_object.return_value = Mock(size=1024, etag="abc", metadata={})
 
         path = storage_service.download_file(
             "videos/test.mp4",
@@ -206,6 +236,146 @@ class TestDirectUpload:
             "/tmp/downloaded.mp4",
         )
 
+    def test_upload_and_download_bytes(self, storage_service, mock_minio_client):
+        """Test in-memory object round trip."""
+        mock_minio_client.bucket_exists.return_value = True
+        stored = {}
+
+        def put_object(bucket, name, data, length, **kwargs):
+            stored[name] = data.read(length)
+            return Mock(object_name=name, etag="e1", version_id=None)
+
+        def get_object(bucket, name):
+            return Mock(read=Mock(return_value=stored[name]))
+
+        mock_minio_client.put_object.side_effect = put_object
+        mock_minio_client.get_object.side_effect = get_object
+
+        result = storage_service.upload_bytes(b"payload", "cache/a.json.gz")
+
+        assert result["object_name"] == "cache/a.json.gz"
+        assert storage_service.download_bytes("cache/a.json.gz") == b"payload"
+
+    def test_download_bytes_missing(self, storage_service, mock_minio_client):
+        """Test a missing object raises FileNotFoundError."""
+        mock_minio_client.bucket_exists.return_value = True
+        mock_minio_client.get_object.side_effect = S3Error(
+            "NoSuchKey", "Not found", "resource", "request_id", "host_id", Mock()
+        )
+
+        with pytest.raises(FileNotFoundError):
+            storage_service.download_bytes("cache/missing.json.gz")
+
+
+class TestParallelTransfers:
+    """Test parallel ranged downloads and multipart uploads."""
+
+    DATA = bytes(range(256)) * 40  # 10240 bytes
+
+    @pytest.fixture
+    def parallel_service(self, storage_service, mock_minio_client):
+        mock_minio_client.bucket_exists.return_value = True
+        storage_service.part_size = 4096  # 3 parts
+        storage_service.concurrency = 3
+        with patch("app.services.storage_service.time.sleep"):
+            yield storage_service
+
+    def serve_ranges(self, mock_minio_client, data, failures=0):
+        """Answer ranged GETs from `data`, failing the first `failures` calls."""
+        calls = []
+
+        def get_object(bucket, name, offset=0, length=0, request_headers=None):
+            calls.append((offset, length, request_headers))
+            if len(calls) <= failures:
+                raise urllib3.exceptions.ProtocolError("Connection reset")
+            return Mock(stream=Mock(return_value=iter([data[offset:offset + length]])))
+
+        mock_minio_client.get_object.side_effect = get_object
+        return calls
+
+    def test_part_ranges(self):
+        assert part_ranges(10, 4) == [(1, 0, 4), (2, 4, 4), (3, 8, 2)]
+        assert part_ranges(8, 4) == [(1, 0, 4), (2, 4, 4)]
+
+    def test_download_in_parts(self, parallel_service, mock_minio_client, tmp_path):
+        mock_minio_client.stat_object.return_value = Mock(
+            size=len(self.DATA),
+            etag="abc",
+            metadata={"x-amz-meta-sha256": hashlib.sha256(self.DATA).hexdigest()},
+        )
+        calls = self.serve_ranges(mock_minio_client, self.DATA, failures=1)
+        local = tmp_path / "video.mp4"
+
+        parallel_service.download_file("videos/test.mp4", str(local))
+
+        assert local.read_bytes() == self.DATA
+        assert len(calls) == 4  # 3 parts, one retried
+        assert {c[2]["If-Match"] for c in calls} == {'"abc"'}
+        mock_minio_client.fget_object.assert_not_called()
+
+    def test_download_checksum_mismatch(self, parallel_service, mock_minio_client, tmp_path):
+        mock_minio_client.stat_object.return_value = Mock(size=len(self.DATA), etag="abc", metadata={})
+        self.serve_ranges(mock_minio_client, self.DATA)
+        local = tmp_path / "video.mp4"
+
+        with pytest.raises(RuntimeError, match="Checksum mismatch"):
+            parallel_service.download_file("videos/test.mp4", str(local), expected_sha256="0" * 64)
+
+        assert not local.exists()
+
+    def test_download_gives_up_after_retries(self, parallel_service, mock_minio_client, tmp_path):
+        mock_minio_client.stat_object.return_value = Mock(size=len(self.DATA), etag="abc", metadata={})
+        self.serve_ranges(mock_minio_client, self.DATA, failures=100)
+        local = tmp_path / "video.mp4"
+
+        with pytest.raises(RuntimeError, match="File download failed"):
+            parallel_service.download_file("videos/test.mp4", str(local))
+
+        assert not local.exists()
+
+    def test_upload_in_parts(self, parallel_service, mock_minio_client, tmp_path):
+        local = tmp_path / "proxy.mp4"
+        local.write_bytes(self.DATA)
+        parts = {}
+
+        def upload_part(bucket, name, data, headers, upload_id, part_number):
+            parts[part_number] = (data, headers)
+            return hashlib.md5(data).hexdigest()
+
+        mock_minio_client._create_multipart_upload.return_value = "upload-1"
+        mock_minio_client._upload_part.side_effect = upload_part
+        mock_minio_client._complete_multipart_upload.return_value = Mock(
+            etag=multipart_etag([hashlib.md5(self.DATA[i:i + 4096]).digest() for i in (0, 4096, 8192)]),
+            version_id=None,
+        )
+
+        result = parallel_service.upload_file(str(local), "videos/proxy.mp4")
+
+        assert b"".join(parts[n][0] for n in sorted(parts)) == self.DATA
+        assert all("Content-MD5" in headers for _, headers in parts.values())
+        headers = mock_minio_client._create_multipart_upload.call_args[0][2]
+        assert headers["X-Amz-Meta-sha256"] == [hashlib.sha256(self.DATA).hexdigest()]
+        completed = mock_minio_client._complete_multipart_upload.call_args[0][3]
+        assert [p.part_number for p in completed] == [1, 2, 3]
+        assert result["size"] == len(self.DATA)
+        mock_minio_client.fput_object.assert_not_called()
+
+    def test_failed_upload_is_aborted(self, parallel_service, mock_minio_client, tmp_path):
+        local = tmp_path / "proxy.mp4"
+        local.write_bytes(self.DATA)
+        mock_minio_client._create_multipart_upload.return_value = "upload-1"
+        mock_minio_client._upload_part.side_effect = S3Error(
+            "NoSuchUpload", "Upload gone", "resource", "request_id", "host_id", Mock()
+        )
+
+        with pytest.raises(RuntimeError, match="File upload failed"):
+            parallel_service.upload_file(str(local), "videos/proxy.mp4")
+
+        mock_minio_client._abort_multipart_upload.assert_called_once_with(
+            "spatial-intel-videos", "videos/proxy.mp4", "upload-1"
+        )
+        mock_minio_client._complete_multipart_upload.assert_not_called()
+
 
 class TestPresignedURLs:
     """Test presigned URL generation."""
@@ -263,6 +433,21 @@ class TestFileManagement:
 
         assert exists is False
 
+    def test_list_files(self, storage_service, mock_minio_client):
+        """Test listing object keys under a prefix."""
+        mock_minio_client.bucket_exists.return_value = True
+        mock_minio_client.list_objects.return_value = [
+            Mock(object_name="results/part_00001.ndjson.gz"),
+            Mock(object_name="results/part_00000.ndjson.gz"),
+        ]
+
+        names = storage_service.list_files("results/")
+
+        assert names == ["results/part_00000.ndjson.gz", "results/part_00001.ndjson.gz"]
+        mock_minio_client.list_objects.assert_called_once_with(
+            "spatial-intel-videos", prefix="results/", recursive=True
+        )
+
     def test_get_file_metadata(self, storage_service, mock_minio_client):
         """Test getting file metadata."""
         mock_minio_client.bucket_exists.return_value = True
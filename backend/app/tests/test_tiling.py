@@ -0,0 +1,180 @@
+"""
+Unit tests for tiled (sliced) inference.
+
+Tests:
+- Tile layout and per-pin/resolution switching
+- Batched NMS (IoU and IoS) and cross-tile merging
+- PersonDetector.detect_batch in tiled mode (one forward pass for all frames)
+"""
+import numpy as np
+import pytest
+
+from app.cv.inference_backends import batched_nms, box_overlap_matrix, non_max_suppression
+from app.cv.person_detector import PersonDetector
+from app.cv.roi import RegionOfInterest
+from app.cv.tiling import TilingConfig, compute_tiles, merge_detections, resolve_tiling
+
+
+class TestTileLayout:
+    """Test tile rectangles."""
+
+    def test_tiles_cover_frame_with_equal_shape(self):
+        tiles = compute_tiles((2160, 3840, 3), tile_size=640, overlap=0.2)
+
+        assert {(x2 - x1, y2 - y1) for x1, y1, x2, y2 in tiles} == {(640, 640)}
+        assert max(x2 for _, _, x2, _ in tiles) == 3840
+        assert max(y2 for _, _, _, y2 in tiles) == 2160
+
+        covered = np.zeros((2160, 3840), dtype=bool)
+        for x1, y1, x2, y2 in tiles:
+            covered[y1:y2, x1:x2] = True
+        assert covered.all()
+
+    def test_neighbours_overlap(self):
+        tiles = compute_tiles((640, 1600, 3), tile_size=640, overlap=0.25)
+        starts = [x1 for x1, _, _, _ in tiles]
+        assert starts == [0, 480, 960]
+
+    def test_small_frame_single_tile(self):
+        assert compute_tiles((360, 480, 3), tile_size=640, overlap=0.2) == [(0, 0, 480, 360)]
+
+
+class TestTilingSwitch:
+    """Test per-pin config and resolution switching."""
+
+    def test_auto_by_resolution(self):
+        assert resolve_tiling(None, 3840, 2160) is not None
+        assert resolve_tiling(None, 1920, 1080) is None
+        assert resolve_tiling(None, 1920, 1080, min_long_side=1920) is not None
+
+    def test_pin_override(self):
+        assert resolve_tiling({"enabled": True}, 1280, 720) is not None
+        assert resolve_tiling({"enabled": False}, 3840, 2160) is None
+        assert resolve_tiling({"min_long_side": 1280}, 1280, 720).tile_size == 640
+
+    def test_null_fields_use_defaults(self):
+        tiling = resolve_tiling({"enabled": None, "min_long_side": None}, 3840, 2160, min_long_side=3000)
+        assert tiling.min_long_side == 3000
+
+    def test_unknown_resolution_not_auto_tiled(self):
+        assert resolve_tiling(None, None, None) is None
+
+    def test_invalid_config(self):
+        with pytest.raises(ValueError):
+            TilingConfig(overlap=1.0)
+        with pytest.raises(ValueError):
+            TilingConfig(merge_metric="giou")
+
+
+class TestMerging:
+    """Test batched NMS and duplicate merging."""
+
+    def test_batched_nms_matches_greedy_nms(self):
+        rng = np.random.default_rng(0)
+        xy = rng.uniform(0, 200, (60, 2))
+        boxes = np.hstack([xy, xy + rng.uniform(10, 60, (60, 2))])
+        scores = rng.uniform(0.1, 1.0, 60)
+
+        kept = batched_nms(boxes, scores, np.zeros(60, dtype=np.int64), 0.45)
+
+        assert kept.tolist() == non_max_suppression(boxes, scores, 0.45).tolist()
+
+    def test_groups_do_not_suppress_each_other(self):
+        boxes = np.array([[0, 0, 10, 10], [0, 0, 10, 10]], dtype=np.float32)
+        scores = np.array([0.9, 0.8])
+
+        assert len(batched_nms(boxes, scores, np.array([0, 1]), 0.5)) == 2
+        assert len(batched_nms(boxes, scores, np.array([0, 0]), 0.5)) == 1
+
+    def test_ios_matches_truncated_box(self):
+        full = np.array([[100, 100, 140, 220]], dtype=np.float32)
+        truncated = np.array([[100, 100, 140, 140]], dtype=np.float32)  # Cut at a tile border
+
+        assert box_overlap_matrix(full, truncated, "iou")[0, 0] == pytest.approx(1 / 3)
+        assert box_overlap_matrix(full, truncated, "ios")[0, 0] == pytest.approx(1.0)
+
+    def test_merge_per_frame(self):
+        frame_a = np.array([[100, 100, 140, 220, 0.9], [100, 100, 140, 140, 0.6]], dtype=np.float32)
+        frame_b = np.array([[0, 0, 20, 40, 0.7]], dtype=np.float32)
+
+        merged = merge_detections([frame_a, np.zeros((0, 5), dtype=np.float32), frame_b], 0.6, "ios")
+
+        assert [len(m) for m in merged] == [1, 0, 1]
+        assert merged[0][0, 4] == pytest.approx(0.9)
+
+
+class TileBackend:
+    """
+    Backend stub: finds a 'person' wherever the input has bright pixels.
+
+    Confidence grows with the visible area, so a person cut at a tile
+    border scores lower than the complete one.
+    """
+
+    name = "stub"
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, frames, conf_threshold, iou_threshold):
+        self.calls.append([f.shape for f in frames])
+        outputs = []
+        for frame in frames:
+            ys, xs = np.nonzero(frame[..., 0] > 200)
+            if len(xs):
+                conf = 0.5 + len(xs) / 10000.0
+                outputs.append(np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, conf]], dtype=np.float32))
+            else:
+                outputs.append(np.zeros((0, 5), dtype=np.float32))
+        return outputs
+
+
+class TestTiledDetector:
+    """Test tiled mode in PersonDetector."""
+
+    @pytest.fixture
+    def detector(self):
+        detector = PersonDetector.__new__(PersonDetector)
+        detector.backend = TileBackend()
+        detector.conf_threshold = 0.5
+        detector.iou_threshold = 0.45
+        return detector
+
+    @staticmethod
+    def frame_with_person(x, y):
+        frame = np.zeros((256, 384, 3), dtype=np.uint8)
+        frame[y:y + 40, x:x + 16] = 255
+        return frame
+
+    def test_tiles_of_all_frames_in_one_pass(self, detector):
+        frames = [self.frame_with_person(20, 30), self.frame_with_person(300, 200)]
+        tiling = TilingConfig(enabled=True, tile_size=128, overlap=0.25, include_full_frame=False)
+
+        detections = detector.detect_batch(frames, tiling=tiling)
+
+        tiles_per_frame = len(compute_tiles(frames[0].shape, 128, 0.25))
+        assert detector.backend.calls == [[(128, 128, 3)] * (2 * tiles_per_frame)]
+        assert [d["bbox"] for d in detections[0]] == [[20, 30, 16, 40]]
+        assert [d["bbox"] for d in detections[1]] == [[300, 200, 16, 40]]
+
+    def test_person_across_tile_border_merged(self, detector):
+        # Straddles the border between the first two tile columns
+        frame = self.frame_with_person(90, 30)
+        tiling = TilingConfig(enabled=True, tile_size=128, overlap=0.25, max_batch_tiles=4)
+
+        detections = detector.detect(frame, tiling=tiling)
+
+        assert [d["bbox"] for d in detections] == [[90, 30, 16, 40]]
+        # Tiles chunked by max_batch_tiles, then one full-frame pass
+        assert [len(c) for c in detector.backend.calls][-1] == 1
+        assert all(len(c) <= 4 for c in detector.backend.calls)
+
+    def test_tiling_inside_roi(self, detector):
+        frame = self.frame_with_person(300, 200)
+        roi = RegionOfInterest([[(0.5, 0.5), (1.0, 0.5), (1.0, 1.0), (0.5, 1.0)]], padding=0.0)
+        tiling = TilingConfig(enabled=True, tile_size=64, overlap=0.25, include_full_frame=False)
+
+        detections = detector.detect(frame, roi=roi, tiling=tiling)
+
+        assert {s for s in detector.backend.calls[0]} == {(64, 64, 3)}
+        assert [d["bbox"] for d in detections] == [[300, 200, 16, 40]]
@@ -0,0 +1,143 @@
+"""
+Unit tests for bounded per-track appearance state.
+
+Tests:
+- Running aggregates match aggregating every observation
+- Only the top-K crops are kept, copied and downscaled
+- Memory stays flat however many observations are added
+- Serialization round trip
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.cv.garment_analyzer import GarmentDescriptor, OutfitDescriptor
+from app.cv.track_appearance import TrackAppearance
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+def outfit(top_color="blue", top_type="tee", quality=0.5, embedding=None):
+    def garment(kind, color):
+        return GarmentDescriptor(
+            type=kind, color=color, lab=(50.0, 0.0, 0.0), histogram=[0.1] * 30,
+            confidence=0.8, region_quality=0.7,
+        )
+
+    return OutfitDescriptor(
+        top=garment(top_type, top_color),
+        bottom=garment("jeans", "black"),
+        shoes=garment("sneakers", "white"),
+        overall_quality=quality,
+        segmentation_method="thirds",
+        visual_embedding=None if embedding is None else np.asarray(embedding, dtype=np.float32),
+    )
+
+
+def fill(appearance, count, frame=None, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = frame if frame is not None else rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    for i in range(count):
+        appearance.add(
+            outfit(quality=float(rng.random()), embedding=rng.normal(size=8)),
+            frame_id=1 + 3 * i,
+            timestamp=START + timedelta(seconds=3 * i),
+            bbox=np.array([100.0, 50.0, 160.0, 250.0 + i]),
+            crop=frame[50:250 + i, 100:160],
+        )
+
+
+class TestAggregates:
+    """Test running aggregates."""
+
+    def test_votes_embedding_and_physique(self):
+        appearance = TrackAppearance()
+        embeddings = [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]
+        colors = ["red", "blue", "blue"]
+        boxes = [[0, 0, 50, 100], [0, 0, 60, 150], [0, 0, 40, 0]]
+        for i, (embedding, color, box) in enumerate(zip(embeddings, colors, boxes)):
+            appearance.add(outfit(top_color=color, embedding=embedding), i + 1, START + timedelta(seconds=i), np.array(box))
+
+        aggregated = appearance.aggregate_outfit()
+        assert aggregated.top.color == "blue"
+        assert aggregated.top.type == "tee" and aggregated.bottom.color == "black"
+        assert aggregated.visual_embedding is None
+
+        expected = np.mean(embeddings, axis=0)
+        np.testing.assert_allclose(appearance.mean_embedding(), expected / np.linalg.norm(expected), rtol=1e-6)
+
+        # Aspect ratio over boxes with a height, height over all boxes
+        assert appearance.physique() == ("short", (0.5 + 0.4) / 2)
+        assert (appearance.first_timestamp, appearance.last_timestamp) == (START, START + timedelta(seconds=2))
+        assert appearance.frame_ids.tolist() == [1, 2, 3] and appearance.last_frame == 3
+
+    def test_ties_go_to_first_seen(self):
+        appearance = TrackAppearance()
+        for i, color in enumerate(["green", "red", "red", "green"]):
+            appearance.add(outfit(top_color=color), i, START, np.array([0, 0, 10, 20]))
+
+        assert appearance.aggregate_outfit().top.color == "green"
+
+    def test_no_embeddings(self):
+        appearance = TrackAppearance()
+        appearance.add(outfit(), 1, START, np.array([0, 0, 10, 20]))
+
+        assert appearance.mean_embedding() is None
+
+
+class TestCrops:
+    """Test top-K crop retention."""
+
+    def test_keeps_best_k_downscaled_copies(self):
+        appearance = TrackAppearance(max_crops=3, crop_height=64)
+        frame = np.zeros((300, 300, 3), dtype=np.uint8)
+        scores = [0.2, 0.9, 0.1, 0.7, 0.8, 0.3]
+        for i, score in enumerate(scores):
+            appearance.add(outfit(quality=score), i + 1, START, np.array([100, 50, 160, 250]), crop=frame[50:250, 100:160])
+
+        crops = appearance.best_crops()
+        assert [frame_id for frame_id, _ in crops] == [2, 5, 4]
+        for _, crop in crops:
+            assert crop.shape == (64, 19, 3)
+            assert not np.shares_memory(crop, frame)
+
+    def test_small_crops_copied(self):
+        appearance = TrackAppearance(max_crops=1, crop_height=128)
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        appearance.add(outfit(), 1, START, np.array([0, 0, 20, 40]), crop=frame[0:40, 0:20])
+
+        ((_, crop),) = appearance.best_crops()
+        assert crop.shape == (40, 20, 3)
+        assert not np.shares_memory(crop, frame)
+
+    def test_memory_is_flat(self):
+        frame = np.random.default_rng(0).integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+        short, long = TrackAppearance(), TrackAppearance()
+        fill(short, 10, frame)
+        fill(long, 1000, frame)
+
+        # Only the 4-byte frame numbers grow with the number of observations
+        assert long.nbytes() - short.nbytes() <= 4 * 990 + 3 * 128 * 60 * 3
+        assert len(long.best_crops()) == 3
+
+
+class TestSerialization:
+    """Test to_dict/from_dict."""
+
+    def test_round_trip(self):
+        appearance = TrackAppearance()
+        fill(appearance, 7)
+
+        restored = TrackAppearance.from_dict(appearance.to_dict())
+
+        assert restored.aggregate_outfit().to_dict() == appearance.aggregate_outfit().to_dict()
+        np.testing.assert_allclose(restored.mean_embedding(), appearance.mean_embedding())
+        assert restored.physique() == appearance.physique()
+        assert restored.frame_ids == appearance.frame_ids
+        assert restored.last_timestamp == appearance.last_timestamp
+        assert restored.best_crops() == []  # Crops are not serialized
+
+        # Restored state keeps aggregating
+        for state in (appearance, restored):
+            state.add(outfit(top_color="red"), 100, START, np.array([0, 0, 50, 100]))
+        assert restored.aggregate_outfit().to_dict() == appearance.aggregate_outfit().to_dict()
@@ -0,0 +1,297 @@
+"""
+Unit tests for the tracklet generator.
+
+Tests:
+- Appearance analysis batched once per frame (or per several frames)
+- Batching does not change the tracklets
+- Live tracks keep only their best few crops
+- Streaming finished tracklets to a sink in batches
+- Keyframes chosen by crop quality within each window
+- Continuing tracks in the next video (load_state with a frame offset, skip_frames)
+- Cached stages: detections of an earlier run in place of the detector, and
+  appearance re-analyzed from cached tracks
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from app.cv.byte_tracker import ByteTracker
+from app.cv.garment_analyzer import GarmentAnalyzer
+from app.cv.keyframe_selector import KeyframeSelector
+from app.cv.tracklet_generator import (
+    APPEARANCE_FIELDS,
+    TrackletGenerator,
+    analyze_track_appearance,
+    shift_state_frames,
+)
+from app.cv.tracklet_sink import MemoryTrackletSink
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+class ScriptedDetector:
+    """Detector stub returning the boxes scripted for each call."""
+
+    def __init__(self, boxes_per_frame):
+        self.boxes_per_frame = list(boxes_per_frame)
+        self.calls = 0
+
+    def detect(self, frame, roi=None, tiling=None):
+        boxes = self.boxes_per_frame[self.calls]
+        self.calls += 1
+        return [{"bbox": box, "confidence": 0.9} for box in boxes]
+
+
+class CountingAnalyzer(GarmentAnalyzer):
+    """Garment analyzer recording the size of every batch."""
+
+    def __init__(self):
+        super().__init__(extract_embeddings=False)
+        self.batch_sizes = []
+
+    def analyze_batch(self, person_crops):
+        self.batch_sizes.append(len(person_crops))
+        return super().analyze_batch(person_crops)
+
+
+def walking(num_persons, num_frames):
+    """Boxes of people walking side by side, one list per frame."""
+    return [
+        [[40.0 + 90 * p + 2 * f, 50.0, 100.0 + 90 * p + 2 * f, 200.0] for p in range(num_persons)]
+        for f in range(num_frames)
+    ]
+
+
+def frames(num_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (240, 640, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+
+def generator(boxes_per_frame, tracker=None, **kwargs):
+    return TrackletGenerator(
+        camera_id="cam",
+        mall_id="mall",
+        person_detector=ScriptedDetector(boxes_per_frame),
+        garment_analyzer=CountingAnalyzer(),
+        tracker=tracker or ByteTracker(),
+        extract_embeddings=False,
+        **kwargs,
+    )
+
+
+def run(gen, images, first_frame=1, start=START):
+    for offset, image in enumerate(images):
+        gen.process_frame(image, start + timedelta(seconds=offset), first_frame + offset)
+
+
+def comparable(tracklets):
+    return [{**t.to_dict(), "created_at": None} for t in tracklets]
+
+
+class TestAppearanceBatching:
+    """Test batched appearance extraction."""
+
+    def test_one_batch_per_frame(self):
+        boxes = walking(num_persons=5, num_frames=10)
+        gen = generator(boxes)
+
+        run(gen, frames(10))
+
+        # Every call holds all five people due for a keyframe on that frame
+        assert gen.garment_analyzer.batch_sizes
+        assert all(size == 5 for size in gen.garment_analyzer.batch_sizes)
+        tracklets = gen.finalize_all_tracks(START + timedelta(seconds=9))
+        assert len(tracklets) == 5
+
+    def test_buffered_frames_give_same_tracklets(self):
+        boxes = walking(num_persons=4, num_frames=12)
+        images = frames(12)
+        per_frame = generator(boxes)
+        buffered = generator(boxes, appearance_batch_frames=4)
+
+        run(per_frame, images)
+        run(buffered, images)
+
+        end = START + timedelta(seconds=11)
+        assert comparable(buffered.finalize_all_tracks(end)) == comparable(per_frame.finalize_all_tracks(end))
+        assert len(buffered.garment_analyzer.batch_sizes) < len(per_frame.garment_analyzer.batch_sizes)
+
+    def test_removed_track_flushes_its_crops(self):
+        # Person 1 leaves after frame 6 and is removed while crops are still queued
+        boxes = walking(num_persons=2, num_frames=30)
+        boxes = [frame if f < 6 else frame[:1] for f, frame in enumerate(boxes)]
+        images = frames(30)
+        per_frame = generator(boxes)
+        buffered = generator(boxes, appearance_batch_frames=100)
+
+        run(per_frame, images)
+        run(buffered, images)
+
+        assert [t.track_id for t in buffered.get_tracklets()] == [2]
+        assert comparable(buffered.get_tracklets()) == comparable(per_frame.get_tracklets())
+
+
+class TestAppearanceMemory:
+    """Test bounded appearance state of live tracks."""
+
+    def test_live_track_keeps_k_small_crops(self):
+        gen = generator(walking(num_persons=1, num_frames=30), max_keyframe_crops=2, keyframe_crop_height=32)
+
+        run(gen, frames(30))
+
+        appearance = gen.track_appearances[1]
+        assert appearance.num_observations >= 5
+        crops = appearance.best_crops()
+        assert len(crops) == 2
+        assert all(crop.shape[0] == 32 for _, crop in crops)
+
+
+class TestKeyframeSelection:
+    """Test quality-driven keyframes."""
+
+    def test_blurred_frames_skipped(self):
+        # Only every third frame (frames 2, 5, 8, 11) is in focus
+        images = [image if f % 3 == 1 else cv2.GaussianBlur(image, (21, 21), 8) for f, image in enumerate(frames(11))]
+        gen = generator(walking(num_persons=1, num_frames=11))
+
+        run(gen, images)
+        (tracklet,) = gen.finalize_all_tracks(START + timedelta(seconds=10))
+
+        # The track is active from frame 3: windows 3-5, 6-8 and 9-11
+        assert tracklet.observation_frames == [5, 8, 11]
+
+    def test_larger_window_analyzes_fewer_crops(self):
+        boxes = walking(num_persons=3, num_frames=30)
+        images = frames(30)
+        every_third = generator(boxes)
+        budgeted = generator(boxes, keyframe_selector=KeyframeSelector(window=10))
+
+        run(every_third, images)
+        run(budgeted, images)
+        end = START + timedelta(seconds=29)
+
+        assert len(budgeted.finalize_all_tracks(end)) == len(every_third.finalize_all_tracks(end)) == 3
+        assert sum(budgeted.garment_analyzer.batch_sizes) * 3 <= sum(every_third.garment_analyzer.batch_sizes)
+
+
+class TestSink:
+    """Test streaming finished tracklets to a sink."""
+
+    def staggered(self):
+        # Person p leaves after frame 6 + 4p: tracks are removed one by one during the run
+        boxes = walking(num_persons=4, num_frames=80)
+        return [[box for p, box in enumerate(frame) if f < 6 + 4 * p] for f, frame in enumerate(boxes)]
+
+    def test_sink_gets_same_tracklets(self):
+        boxes = self.staggered()
+        images = frames(80)
+        collected = generator(boxes)
+        sink = MemoryTrackletSink(batch_size=2)
+        streamed = generator(boxes, sink=sink)
+
+        run(collected, images)
+        run(streamed, images)
+        end = START + timedelta(seconds=79)
+        expected = comparable(collected.finalize_all_tracks(end))
+
+        assert streamed.finalize_all_tracks(end) == []
+        assert [{**t, "created_at": None} for t in sink.tracklets] == expected
+        assert len(expected) == 4
+
+    def test_batches_written_while_tracking(self):
+        sink = MemoryTrackletSink(batch_size=2)
+        gen = generator(self.staggered(), sink=sink)
+
+        run(gen, frames(80))
+
+        # All four people left and were removed: two full batches, nothing held back
+        assert (sink.batches, sink.written) == (2, 4)
+        assert gen.completed_tracklets == []
+
+
+class TestCarryOver:
+    """Test continuing tracks into the next video of a pin."""
+
+    def test_state_frames_shifted(self):
+        gen = generator(walking(num_persons=1, num_frames=5))
+        run(gen, frames(5))
+        state = gen.get_state()
+
+        shifted = shift_state_frames(state, -7)
+
+        (track,) = shifted["tracker"]["tracks"]
+        assert track["frame_id"] == 5 - 7
+        assert shifted["track_appearances"]["1"]["frame_ids"] == [f - 7 for f in state["track_appearances"]["1"]["frame_ids"]]
+        assert state["tracker"]["tracks"][0]["frame_id"] == 5  # Input unchanged
+
+    def test_track_continues_across_videos(self):
+        boxes = walking(num_persons=1, num_frames=20)
+        images = frames(20)
+        previous = generator(boxes[:10])
+        run(previous, images[:10])
+        state = previous.get_state()
+
+        # Next video starts 3 frames later (2 missed), numbered from 1 again
+        following = generator(boxes[12:])
+        following.load_state(state, frame_offset=-(10 + 2))
+        following.skip_frames(2, START + timedelta(seconds=9))
+        run(following, images[12:], start=START + timedelta(seconds=12))
+        (tracklet,) = following.finalize_all_tracks(START + timedelta(seconds=19))
+
+        assert tracklet.track_id == 1
+        assert tracklet.t_in < START + timedelta(seconds=10) <= tracklet.t_out
+        assert min(tracklet.observation_frames) < 0 < max(tracklet.observation_frames)
+
+    def test_gap_beyond_buffer_finalizes(self):
+        gen = generator(walking(num_persons=1, num_frames=10))
+        run(gen, frames(10))
+
+        gen.skip_frames(gen.tracker.track_buffer + 2, START + timedelta(seconds=9))
+
+        assert gen.tracker.get_all_tracks() == []
+        assert [t.track_id for t in gen.get_tracklets()] == [1]
+
+
+class TestCachedStages:
+    """Test reusing the detections and tracks of an earlier run."""
+
+    def test_cached_detections_replace_detector(self):
+        # Another tracker configuration on the detections of the first run
+        boxes = walking(num_persons=3, num_frames=20)
+        images = frames(20)
+        first = generator(boxes)
+        detections = []
+        for offset, image in enumerate(images):
+            first.process_frame(image, START + timedelta(seconds=offset), offset + 1)
+            detections.append(first.last_detections)
+        retuned = generator(boxes, tracker=ByteTracker(track_buffer=3))
+        cached = generator([], tracker=ByteTracker(track_buffer=3))
+
+        run(retuned, images)
+        for offset, (image, frame_detections) in enumerate(zip(images, detections)):
+            cached.process_frame(image, START + timedelta(seconds=offset), offset + 1, detections=frame_detections)
+
+        end = START + timedelta(seconds=19)
+        assert cached.person_detector.calls == 0
+        assert comparable(cached.finalize_all_tracks(end)) == comparable(retuned.finalize_all_tracks(end))
+
+    def test_appearance_from_cached_tracks(self):
+        images = frames(20)
+        gen = generator(walking(num_persons=3, num_frames=20))
+        run(gen, images)
+        tracklets = [t.to_dict() for t in gen.finalize_all_tracks(START + timedelta(seconds=19))]
+        tracks = [{key: value for key, value in t.items() if key not in APPEARANCE_FIELDS} for t in tracklets]
+        video_frames = [
+            SimpleNamespace(image=image, timestamp_seconds=float(offset), frame_number=offset + 1)
+            for offset, image in enumerate(images)
+        ]
+        analyzer = CountingAnalyzer()
+
+        appearance = analyze_track_appearance(video_frames, tracks, analyzer, START, extract_embeddings=False)
+
+        expected = [{"track_id": t["track_id"], **{key: t[key] for key in APPEARANCE_FIELDS}} for t in tracklets]
+        assert appearance == expected
+        assert sum(analyzer.batch_sizes) == sum(t["num_observations"] for t in tracklets)
+        assert all(len(t["observation_boxes"]) == t["num_observations"] for t in tracklets)
@@ -0,0 +1,98 @@
+"""
+Unit tests for streaming tracklet sinks.
+
+Tests:
+- Batching by size and by age of the oldest buffered tracklet
+- Flushing on close and when leaving a `with` block on errors
+- Object-store parts (gzipped NDJSON) and reading them back
+"""
+import gzip
+import json
+
+import pytest
+
+from app.cv.tracklet_sink import (
+    MemoryTrackletSink,
+    ObjectStoreTrackletSink,
+    part_path,
+    read_tracklet_parts,
+)
+
+
+class FakeStorage:
+    """In-memory stand-in for StorageService (upload_bytes/download_bytes)."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_bytes(self, data, object_name, content_type="application/octet-stream", metadata=None):
+        self.objects[object_name] = data
+        return {"object_name": object_name, "etag": "e", "version_id": None}
+
+    def download_bytes(self, object_name):
+        if object_name not in self.objects:
+            raise FileNotFoundError(object_name)
+        return self.objects[object_name]
+
+
+def tracklets(count):
+    return [{"track_id": i, "quality": 0.5} for i in range(1, count + 1)]
+
+
+class TestBatching:
+    """Test when buffered tracklets are written."""
+
+    def test_full_batches_only(self):
+        sink = MemoryTrackletSink(batch_size=3)
+        for tracklet in tracklets(7):
+            sink.write(tracklet)
+
+        assert (sink.batches, sink.written) == (2, 6)
+
+        sink.close()
+        assert (sink.batches, sink.written) == (3, 7)
+        assert [t["track_id"] for t in sink.tracklets] == list(range(1, 8))
+
+    def test_old_partial_batch_written(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("app.cv.tracklet_sink.time.monotonic", lambda: now[0])
+        sink = MemoryTrackletSink(batch_size=50, max_wait_seconds=30.0)
+
+        sink.write(tracklets(1)[0])
+        now[0] += 29.0
+        sink.write(tracklets(2)[1])
+        assert sink.written == 0
+
+        now[0] += 1.0
+        sink.write(tracklets(3)[2])
+        assert sink.written == 3
+
+    def test_with_block_flushes_on_error(self):
+        sink = MemoryTrackletSink(batch_size=10)
+        with pytest.raises(RuntimeError):
+            with sink:
+                sink.write(tracklets(1)[0])
+                raise RuntimeError("decoder failed")
+
+        assert sink.written == 1
+
+
+class TestObjectStore:
+    """Test object-store parts."""
+
+    def test_parts_round_trip(self):
+        storage = FakeStorage()
+        sink = ObjectStoreTrackletSink(storage, "results/video/tracklets/chunk_0000/", batch_size=2)
+        for tracklet in tracklets(5):
+            sink.write(tracklet)
+        sink.close()
+
+        assert sink.paths == [part_path("results/video/tracklets/chunk_0000", i) for i in range(3)]
+        assert sink.paths[0] == "results/video/tracklets/chunk_0000/part_00000.ndjson.gz"
+        lines = gzip.decompress(storage.objects[sink.paths[0]]).decode("utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == tracklets(2)
+        assert list(read_tracklet_parts(storage, sink.paths)) == tracklets(5)
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            ObjectStoreTrackletSink(FakeStorage(), "results", format="csv")
@@ -0,0 +1,117 @@
+"""
+Unit tests for the worker-local video cache.
+
+Tests:
+- Hits, misses and atomic fills
+- Concurrent requests for one key sharing a single download
+- LRU eviction that skips entries in use
+- Shared counters
+"""
+import threading
+import time
+
+import pytest
+
+from app.services.video_cache_service import VideoCacheService
+
+
+def writer(content: bytes, calls: list = None, delay: float = 0.0):
+    """Download callable writing `content`, recording each call."""
+    def download(path):
+        if calls is not None:
+            calls.append(path)
+        time.sleep(delay)
+        with open(path, "wb") as f:
+            f.write(content)
+    return download
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return VideoCacheService(str(tmp_path / "cache"), max_bytes=100)
+
+
+class TestFetch:
+    """Test cache lookups and fills."""
+
+    def test_miss_then_hit(self, cache):
+        calls = []
+        with cache.open("sha256-a", writer(b"video", calls)) as path:
+            with open(path, "rb") as f:
+                assert f.read() == b"video"
+        with cache.open("sha256-a", writer(b"other", calls)) as second_path:
+            assert second_path == path
+
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["bytes_downloaded"]) == (1, 1, 5)
+        assert stats["hit_rate"] == 0.5
+
+    def test_failed_download_leaves_no_entry(self, cache):
+        def failing(path):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+            raise RuntimeError("connection reset")
+
+        with pytest.raises(RuntimeError):
+            with cache.open("sha256-a", failing):
+                pass
+
+        assert not cache.entry_path("sha256-a").exists()
+        assert list(cache.objects_dir.iterdir()) == []
+
+    def test_concurrent_requests_share_one_download(self, cache):
+        calls = []
+        paths = []
+
+        def fetch():
+            with cache.open("sha256-a", writer(b"video", calls, delay=0.2)) as path:
+                paths.append(path)
+
+        threads = [threading.Thread(target=fetch) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(set(paths)) == 1
+        assert cache.stats()["hits"] == 2
+
+    def test_keys_are_sanitized(self, cache):
+        assert cache.entry_path('etag-"abc/12"').name == "etag-_abc_12_.mp4"
+
+
+class TestEviction:
+    """Test size-bounded LRU eviction."""
+
+    def test_least_recently_used_evicted(self, cache):
+        with cache.open("a", writer(b"x" * 40)):
+            pass
+        time.sleep(0.01)
+        with cache.open("b", writer(b"x" * 40)):
+            pass
+        time.sleep(0.01)
+        with cache.open("a", writer(b"x" * 40)):  # a is now more recent than b
+            pass
+        time.sleep(0.01)
+        with cache.open("c", writer(b"x" * 40)):
+            pass
+
+        assert cache.entry_path("a").exists()
+        assert not cache.entry_path("b").exists()
+        assert cache.entry_path("c").exists()
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_in_use_are_kept(self, cache):
+        with cache.open("a", writer(b"x" * 60)) as in_use:
+            with cache.open("b", writer(b"x" * 60)):
+                pass
+
+            assert cache.entry_path("a").exists()
+            with open(in_use, "rb") as f:
+                assert len(f.read()) == 60
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["size_bytes"] == 120
@@ -0,0 +1,162 @@
+"""
+Benchmark INT8 Quantization Modes
+
+Quantizes the YOLO detector and the CLIP vision tower, compares each INT8
+mode against the fp32 baseline and writes the accuracy gate report that the
+runtime requires before it will load a quantized model.
+
+Reports per mode:
+- Detector: speedup and detection recall vs fp32
+- Embedding: speedup and cosine drift (1 - cosine similarity) vs fp32
+
+Usage:
+    python -m scripts.benchmark_quantization \\
+        --frames-dir /data/calibration/frames \\
+        --crops-dir /data/calibration/crops
+
+Thresholds default to CV_QUANT_MIN_DETECTION_RECALL,
+CV_QUANT_MAX_EMBEDDING_COSINE_DRIFT and CV_QUANT_MIN_SPEEDUP.
+The script exits non-zero if any benchmarked mode fails the gate.
+"""
+
+import argparse
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cv.inference_backends import create_backend
+from app.cv.embedding_extractor import EmbeddingExtractor
+from app.cv.quantization import (
+    QuantizationThresholds,
+    evaluate_detector,
+    evaluate_embedding,
+    load_calibration_images,
+    write_gate_report,
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def benchmark_detector(args, thresholds: QuantizationThresholds):
+    """Benchmark detector INT8 modes on the calibration frames."""
+    logger.info("\n=== Detector (YOLO) ===")
+    frames = load_calibration_images(args.frames_dir, limit=args.max_images)
+    logger.info(f"Loaded {len(frames)} evaluation frames from {args.frames_dir}")
+
+    baseline = create_backend(args.backend, args.detector_model, "cpu", cache_dir=args.cache_dir)
+
+    reports = []
+    for precision in args.modes:
+        if precision == "int8_dynamic":
+            logger.info("Skipping int8_dynamic (embedding only, it cannot quantize convolutions)")
+            continue
+
+        candidate = create_backend(
+            args.backend,
+            args.detector_model,
+            "cpu",
+            cache_dir=args.cache_dir,
+            precision=precision,
+            calibration_dir=args.frames_dir,
+            enforce_gate=False,
+        )
+        reports.append(evaluate_detector(
+            baseline, candidate, precision, frames, thresholds,
+            conf_threshold=args.conf_threshold,
+        ))
+    return reports
+
+
+def benchmark_embedding(args, thresholds: QuantizationThresholds):
+    """Benchmark CLIP INT8 modes on the calibration crops."""
+    logger.info("\n=== Embedding (CLIP vision tower) ===")
+    crops = load_calibration_images(args.crops_dir, limit=args.max_images)
+    logger.info(f"Loaded {len(crops)} evaluation crops from {args.crops_dir}")
+
+    baseline = EmbeddingExtractor(model_name=args.clip_model, device="cpu")
+
+    reports = []
+    for precision in args.modes:
+        candidate = EmbeddingExtractor(
+            model_name=args.clip_model,
+            precision=precision,
+            calibration_dir=args.crops_dir,
+            cache_dir=args.cache_dir,
+            enforce_gate=False,
+        )
+        reports.append(evaluate_embedding(baseline, candidate, precision, crops, thresholds))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and gate INT8 quantization modes")
+    parser.add_argument("--frames-dir", help="Sample frames for detector calibration/evaluation")
+    parser.add_argument("--crops-dir", help="Sample person crops for CLIP calibration/evaluation")
+    parser.add_argument(
+        "--modes", nargs="+", default=["int8_dynamic", "int8_static"],
+        choices=["int8_dynamic", "int8_static"],
+    )
+    parser.add_argument("--backend", default="onnx", choices=["onnx", "openvino"])
+    parser.add_argument("--detector-model", default="yolov8n.pt")
+    parser.add_argument("--clip-model", default="openai/clip-vit-base-patch32")
+    parser.add_argument("--cache-dir", default=None, help="Model artifact cache (default: CV_MODEL_CACHE_DIR)")
+    parser.add_argument("--conf-threshold", type=float, default=0.25)
+    parser.add_argument("--max-images", type=int, default=200)
+    parser.add_argument(
+        "--min-recall", type=float,
+        default=float(os.environ.get("CV_QUANT_MIN_DETECTION_RECALL", 0.95)),
+    )
+    parser.add_argument(
+        "--max-cosine-drift", type=float,
+        default=float(os.environ.get("CV_QUANT_MAX_EMBEDDING_COSINE_DRIFT", 0.02)),
+    )
+    parser.add_argument(
+        "--min-speedup", type=float,
+        default=float(os.environ.get("CV_QUANT_MIN_SPEEDUP", 1.0)),
+    )
+    args = parser.parse_args()
+
+    if not args.frames_dir and not args.crops_dir:
+        parser.error("at least one of --frames-dir or --crops-dir is required")
+
+    thresholds = QuantizationThresholds(
+        min_detection_recall=args.min_recall,
+        max_embedding_cosine_drift=args.max_cosine_drift,
+        min_speedup=args.min_speedup,
+    )
+    logger.info(f"Gate thresholds: {thresholds}")
+
+    reports = []
+    if args.frames_dir:
+        reports.extend(benchmark_detector(args, thresholds))
+    if args.crops_dir:
+        reports.extend(benchmark_embedding(args, thresholds))
+
+    logger.info("\n=== Results ===")
+    logger.info(f"{'component':<10} {'precision':<13} {'fp32 ms':>9} {'int8 ms':>9} {'speedup':>8}  metrics")
+    for report in reports:
+        write_gate_report(report)
+        status = "PASS" if report.passed else "FAIL"
+        logger.info(
+            f"{report.component:<10} {report.precision:<13} {report.fp32_ms:>9.2f} "
+            f"{report.quantized_ms:>9.2f} {report.speedup:>7.2f}x  "
+            f"{json.dumps(report.metrics)}  {status}"
+        )
+        for failure in report.failures:
+            logger.warning(f"  ❌ {failure}")
+
+    failed = [r for r in reports if not r.passed]
+    if failed:
+        logger.warning(f"\n{len(failed)} mode(s) failed the accuracy gate and will be refused at runtime")
+        sys.exit(1)
+
+    logger.info("\n✅ All benchmarked modes passed the accuracy gate")
+
+
+if __name__ == "__main__":
+    main()
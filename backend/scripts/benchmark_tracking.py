@@ -8,6 +8,10 @@ Benchmarks:
 2. Tracklet generation (end-to-end pipeline)
 3. Processing throughput (frames/sec at 1 FPS sampling)
 4. Memory usage and scalability
+5. Crowded-scene scale (100+ persons per frame, e.g. mall atriums)
+6. Batched appearance analysis (per-crop cost vs people per frame)
+7. Appearance memory on a long, busy video (per-track state, peak RSS)
+8. Keyframe selection (analyzed crops per tracklet, blurred keyframes, cost)
 
 Usage:
     python backend/scripts/benchmark_tracking.py
@@ -15,6 +19,7 @@ Usage:
 import time
 import sys
 import logging
+import resource
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Tuple
@@ -26,6 +31,8 @@ sys.path.insert(0, str(backend_path))
 
 from app.cv.byte_tracker import ByteTracker, Detection, Track, create_byte_tracker
 from app.cv.tracklet_generator import TrackletGenerator, Tracklet, create_tracklet_generator
+from app.cv.garment_analyzer import create_garment_analyzer
+from app.cv.keyframe_selector import Keyframe, KeyframeSelector
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
@@ -330,6 +337,313 @@ def benchmark_scalability():
     print("\n✅ Scalability benchmark complete")
 
 
+def generate_crowd_detections(
+    num_persons: int,
+    num_frames: int,
+    occlusion_rate: float = 0.05
+) -> List[List[Detection]]:
+    """
+    Generate a dense crowd walking through a large frame.
+
+    Persons are laid out on a grid and drift in the same general direction
+    (like a busy atrium), so neighbouring boxes are close without swapping
+    places; the number of tracks should equal the number of persons.
+
+    Args:
+        num_persons: Persons in view in every frame
+        num_frames: Number of frames to generate
+        occlusion_rate: Probability of a missed detection per person per frame
+
+    Returns:
+        List of detection lists per frame
+    """
+    rng = np.random.default_rng(42)
+    columns = 40
+    origins = np.stack([
+        (np.arange(num_persons) % columns) * 110.0,
+        (np.arange(num_persons) // columns) * 230.0,
+    ], axis=1)
+    velocity = rng.uniform(-0.5, 0.5, size=(num_persons, 2)) + [2.0, 0.0]
+    sizes = np.stack([rng.uniform(60, 90, num_persons), rng.uniform(170, 210, num_persons)], axis=1)
+
+    detections_per_frame = []
+    for frame_id in range(num_frames):
+        visible = rng.random(num_persons) >= occlusion_rate
+        top_left = origins + velocity * frame_id + rng.normal(0, 2, size=(num_persons, 2))
+        boxes = np.hstack([top_left, top_left + sizes])
+        confidences = rng.uniform(0.65, 0.95, num_persons)
+        detections_per_frame.append([
+            Detection(bbox=boxes[i], confidence=confidences[i], frame_id=frame_id)
+            for i in np.flatnonzero(visible)
+        ])
+    return detections_per_frame
+
+
+def benchmark_crowded_scene():
+    """
+    Benchmark 5: Crowded-scene scale test.
+
+    Tests:
+    - Per-frame latency with 50-800 persons in view, dense vs gated assignment
+    - Identity fragmentation (tracks created per person)
+    - Gated and dense assignment give the same tracks
+    """
+    print("\n" + "="*60)
+    print("BENCHMARK 5: Crowded-Scene Scale Test")
+    print("="*60)
+
+    person_counts = [50, 100, 200, 400, 800]
+    num_frames = 60
+
+    results = []
+    for num_persons in person_counts:
+        detections = generate_crowd_detections(num_persons, num_frames)
+        row = [num_persons]
+        outputs = []
+        for gated in (False, True):
+            tracker = create_byte_tracker(gated=gated)
+            frame_times = []
+            output = []
+            for dets in detections:
+                start_time = time.perf_counter()
+                active = tracker.update(dets)
+                frame_times.append(time.perf_counter() - start_time)
+                output.append([t.track_id for t in active])
+            frame_times_ms = np.array(frame_times) * 1000
+            row += [float(np.mean(frame_times_ms)), float(np.percentile(frame_times_ms, 95))]
+            outputs.append(output)
+
+        assert outputs[0] == outputs[1], "Gated assignment diverged from dense assignment"
+        row.append((tracker.next_id - 1) / num_persons)
+        results.append(row)
+
+    print(f"{'Persons':<10} {'Dense mean':<12} {'Dense p95':<12} {'Gated mean':<12} {'Gated p95':<12} {'Tracks/person':<15}")
+    print("-" * 75)
+    for num_persons, dense_mean, dense_p95, gated_mean, gated_p95, fragmentation in results:
+        print(
+            f"{num_persons:<10} {dense_mean:<12.2f} {dense_p95:<12.2f} "
+            f"{gated_mean:<12.2f} {gated_p95:<12.2f} {fragmentation:<15.2f}"
+        )
+    print("(times in ms/frame)")
+
+    print("\n✅ Crowded-scene benchmark complete")
+    return results
+
+
+def benchmark_appearance_batching():
+    """
+    Benchmark 6: Batched appearance analysis.
+
+    Tests:
+    - Per-crop garment analysis cost, one crop at a time vs one batch per frame
+    - Batched results match per-crop results
+
+    CLIP embeddings are off (no model download); with them on, the batch
+    also replaces one CLIP forward pass per person with one per frame.
+    """
+    print("\n" + "="*60)
+    print("BENCHMARK 6: Batched Appearance Analysis")
+    print("="*60)
+
+    analyzer = create_garment_analyzer(extract_embeddings=False)
+    rng = np.random.default_rng(0)
+    analyzer.analyze(rng.integers(0, 255, (120, 50, 3), dtype=np.uint8))  # Warm up
+    crop_counts = [1, 10, 50, 100]
+    repeats = 5
+
+    results = []
+    for num_crops in crop_counts:
+        crops = [
+            rng.integers(0, 255, (int(rng.integers(80, 240)), int(rng.integers(30, 100)), 3), dtype=np.uint8)
+            for _ in range(num_crops)
+        ]
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            single = [analyzer.analyze(crop) for crop in crops]
+        single_ms = (time.perf_counter() - start_time) / (repeats * num_crops) * 1000
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            batched = analyzer.analyze_batch(crops)
+        batch_ms = (time.perf_counter() - start_time) / (repeats * num_crops) * 1000
+
+        assert [o.top.color for o in single] == [o.top.color for o in batched], \
+            "Batched analysis diverged from per-crop analysis"
+        results.append((num_crops, single_ms, batch_ms))
+
+    print(f"{'Crops/frame':<12} {'Per crop':<12} {'Batched':<12} {'Speedup':<10}")
+    print("-" * 46)
+    for num_crops, single_ms, batch_ms in results:
+        print(f"{num_crops:<12} {single_ms:<12.3f} {batch_ms:<12.3f} {single_ms / batch_ms:<10.2f}")
+    print("(times in ms/crop)")
+
+    print("\n✅ Appearance batching benchmark complete")
+    return results
+
+
+class ScriptedDetector:
+    """Person detector stand-in returning pre-generated detections (no model weights)."""
+
+    def __init__(self, detections_per_frame: List[List[Detection]]):
+        self.detections_per_frame = detections_per_frame
+        self.calls = 0
+
+    def detect(self, frame, roi=None, tiling=None):
+        detections = self.detections_per_frame[self.calls]
+        self.calls += 1
+        return [{"bbox": d.bbox.tolist(), "confidence": float(d.confidence)} for d in detections]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def benchmark_appearance_memory():
+    """
+    Benchmark 7: Appearance memory on a long, busy video.
+
+    Tests:
+    - Per-track appearance state stays flat as tracks get longer
+      (running aggregates plus the top-K downscaled crops)
+    - Peak RSS while tracking 40 people through 1080p frames
+    """
+    print("\n" + "="*60)
+    print("BENCHMARK 7: Appearance Memory (Long Video)")
+    print("="*60)
+
+    num_persons = 40
+    num_frames = 600
+    detections = generate_crowd_detections(num_persons, num_frames)
+    generator = TrackletGenerator(
+        camera_id="cam-test-01",
+        mall_id="mall-test",
+        person_detector=ScriptedDetector(detections),
+        garment_analyzer=create_garment_analyzer(extract_embeddings=False),
+        tracker=create_byte_tracker(),
+        extract_embeddings=False,
+    )
+    # One decode buffer, reused like FFmpegService.stream_frames() does
+    frame = np.random.default_rng(0).integers(0, 255, (1080, 4480, 3), dtype=np.uint8)
+    base_time = datetime(2026, 1, 1, 9, 0, 0)
+    start_rss = peak_rss_mb()
+
+    print(f"{'Frames':<8} {'Live tracks':<13} {'Obs/track':<11} {'KB/track':<10} {'Peak RSS (MB)':<14}")
+    print("-" * 58)
+    start_time = time.perf_counter()
+    for frame_id in range(1, num_frames + 1):
+        generator.process_frame(frame, base_time + timedelta(seconds=frame_id), frame_id)
+        if frame_id % 100 == 0:
+            appearances = list(generator.track_appearances.values())
+            observations = np.mean([a.num_observations for a in appearances]) if appearances else 0.0
+            kb_per_track = np.mean([a.nbytes() for a in appearances]) / 1024 if appearances else 0.0
+            print(
+                f"{frame_id:<8} {len(appearances):<13} {observations:<11.1f} "
+                f"{kb_per_track:<10.1f} {peak_rss_mb():<14.1f}"
+            )
+    elapsed = time.perf_counter() - start_time
+    tracklets = generator.finalize_all_tracks(base_time + timedelta(seconds=num_frames))
+
+    print(f"\nTracklets: {len(tracklets)}, {num_frames / elapsed:.1f} frames/sec")
+    print(f"Peak RSS: {start_rss:.1f} MB before, {peak_rss_mb():.1f} MB after")
+
+    print("\n✅ Appearance memory benchmark complete")
+
+
+class FixedIntervalSelector(KeyframeSelector):
+    """The previous policy, for comparison: a track's first crop, then every 3rd frame."""
+
+    def __init__(self):
+        super().__init__()
+        self._last_frames = {}
+
+    def select(self, frame, tracks, frame_id, timestamp):
+        keyframes = []
+        for track in tracks:
+            last_frame = self._last_frames.get(track.track_id)
+            x1, y1, x2, y2 = track.bbox.astype(int)
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+            if x2 > x1 and y2 > y1 and (last_frame is None or frame_id - last_frame >= 3):
+                crop = frame[y1:y2, x1:x2].copy()
+                keyframes.append(Keyframe(track.track_id, crop, frame_id, timestamp, track.bbox.copy(), 0.0))
+                self._last_frames[track.track_id] = frame_id
+        return keyframes
+
+    def reset(self):
+        super().reset()
+        self._last_frames.clear()
+
+
+def benchmark_keyframe_selection():
+    """
+    Benchmark 8: Quality-driven keyframe selection.
+
+    Tests:
+    - Crops analyzed per tracklet (garment analysis and, with embeddings
+      on, one CLIP crop each) for the previous fixed interval vs windows
+    - Share of keyframes taken from motion-blurred frames
+    - Time per frame including crop scoring
+
+    20 people walk through a 1080p frame (some out of its right edge);
+    30% of the frames are motion-blurred.
+    """
+    import cv2
+
+    print("\n" + "="*60)
+    print("BENCHMARK 8: Keyframe Selection")
+    print("="*60)
+
+    num_persons = 20
+    num_frames = 300
+    detections = generate_crowd_detections(num_persons, num_frames)
+    rng = np.random.default_rng(0)
+    sharp = rng.integers(0, 255, (1080, 2240, 3), dtype=np.uint8)
+    blurred = cv2.GaussianBlur(sharp, (21, 21), 8)
+    blurred_frames = {f for f in range(1, num_frames + 1) if rng.random() < 0.3}
+    base_time = datetime(2026, 1, 1, 9, 0, 0)
+
+    policies = [
+        ("Every 3rd frame", FixedIntervalSelector()),
+        ("Best of 3", KeyframeSelector(window=3)),
+        ("Best of 5, min 0.35", KeyframeSelector(window=5, min_score=0.35)),
+        ("Best of 10, min 0.35", KeyframeSelector(window=10, min_score=0.35)),
+    ]
+
+    print(f"{'Policy':<22} {'Tracklets':<10} {'Crops/tracklet':<16} {'Blurred':<9} {'ms/frame':<9}")
+    print("-" * 68)
+    results = []
+    for name, selector in policies:
+        generator = TrackletGenerator(
+            camera_id="cam-test-01",
+            mall_id="mall-test",
+            person_detector=ScriptedDetector(detections),
+            garment_analyzer=create_garment_analyzer(extract_embeddings=False),
+            tracker=create_byte_tracker(),
+            extract_embeddings=False,
+            keyframe_selector=selector,
+        )
+        start_time = time.perf_counter()
+        for frame_id in range(1, num_frames + 1):
+            frame = blurred if frame_id in blurred_frames else sharp
+            generator.process_frame(frame, base_time + timedelta(seconds=frame_id), frame_id)
+        tracklets = generator.finalize_all_tracks(base_time + timedelta(seconds=num_frames))
+        elapsed = time.perf_counter() - start_time
+
+        observations = [f for t in tracklets for f in t.observation_frames]
+        crops_per_tracklet = len(observations) / max(1, len(tracklets))
+        blurred_share = np.mean([f in blurred_frames for f in observations]) if observations else 0.0
+        results.append((name, len(tracklets), crops_per_tracklet, blurred_share, elapsed / num_frames * 1000))
+        print(
+            f"{name:<22} {len(tracklets):<10} {crops_per_tracklet:<16.1f} "
+            f"{f'{blurred_share:.0%}':<9} {elapsed / num_frames * 1000:<9.1f}"
+        )
+
+    print("\n✅ Keyframe selection benchmark complete")
+    return results
+
+
 def benchmark_iou_accuracy():
     """
     Benchmark 4: IoU matching accuracy.
@@ -397,6 +711,18 @@ def main():
         # Benchmark 4: IoU accuracy
         benchmark_iou_accuracy()
 
+        # Benchmark 5: Crowded scenes
+        benchmark_crowded_scene()
+
+        # Benchmark 6: Appearance batching
+        benchmark_appearance_batching()
+
+        # Benchmark 7: Appearance memory
+        benchmark_appearance_memory()
+
+        # Benchmark 8: Keyframe selection
+        benchmark_keyframe_selection()
+
         print("\n" + "="*60)
         print("ALL BENCHMARKS COMPLETED SUCCESSFULLY")
         print("="*60)
@@ -406,6 +732,7 @@ def main():
         print("  • IoU-based matching (no Kalman filter)")
         print("  • End-to-end tracklet generation")
         print("  • Ready for cross-camera re-ID (Phase 4)")
+        print(f"  • Peak RSS: {peak_rss_mb():.1f} MB")
 
     except Exception as e:
         print(f"\n❌ Benchmark failed: {e}")
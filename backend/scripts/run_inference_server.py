@@ -0,0 +1,99 @@
+"""
+Run the Local Inference Server
+
+Starts one process per host that owns the YOLO/CLIP models and serves all
+Celery workers over a Unix socket with dynamic batching. Point the workers
+at it with CV_INFERENCE_SERVER_SOCKET (same path as --socket).
+
+Usage:
+    python -m scripts.run_inference_server \\
+        --socket /run/spatial-intel/inference.sock \\
+        --max-batch 32 --max-latency-ms 10 --threads 8
+
+Options default to CV_INFERENCE_SERVER_* environment variables. Models are
+loaded on first request; --preload loads and warms the detector up front.
+"""
+
+import argparse
+import os
+import signal
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cv.inference_server import InferenceServer
+from app.cv.quantization import QuantizationThresholds
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local dynamic-batching inference server")
+    parser.add_argument(
+        "--socket",
+        default=os.environ.get("CV_INFERENCE_SERVER_SOCKET", "/tmp/spatial-intel-inference.sock"),
+        help="Unix socket path to listen on",
+    )
+    parser.add_argument(
+        "--max-batch", type=int,
+        default=int(os.environ.get("CV_INFERENCE_SERVER_MAX_BATCH", 32)),
+        help="Maximum frames/crops per batch",
+    )
+    parser.add_argument(
+        "--max-latency-ms", type=float,
+        default=float(os.environ.get("CV_INFERENCE_SERVER_MAX_LATENCY_MS", 10.0)),
+        help="How long the first request of a batch waits for more",
+    )
+    parser.add_argument(
+        "--threads", type=int,
+        default=int(os.environ.get("CV_INFERENCE_SERVER_THREADS", 0)),
+        help="Intra-op inference threads (0 = runtime default)",
+    )
+    parser.add_argument(
+        "--preload", nargs="*", default=[],
+        metavar="BACKEND",
+        help="Detector backends to load and warm at startup (e.g. torch onnx)",
+    )
+    parser.add_argument("--detector-model", default=os.environ.get("CV_DETECTOR_MODEL", "yolov8n.pt"))
+    args = parser.parse_args()
+
+    gate_thresholds = QuantizationThresholds(
+        min_detection_recall=float(os.environ.get("CV_QUANT_MIN_DETECTION_RECALL", 0.95)),
+        max_embedding_cosine_drift=float(os.environ.get("CV_QUANT_MAX_EMBEDDING_COSINE_DRIFT", 0.02)),
+        min_speedup=float(os.environ.get("CV_QUANT_MIN_SPEEDUP", 1.0)),
+    )
+    calibration_dir = os.environ.get("CV_CALIBRATION_DIR")
+
+    server = InferenceServer(
+        args.socket,
+        max_batch_size=args.max_batch,
+        max_latency_ms=args.max_latency_ms,
+        num_threads=args.threads,
+        backend_options={"calibration_dir": calibration_dir, "gate_thresholds": gate_thresholds},
+        embedding_options={"calibration_dir": calibration_dir, "gate_thresholds": gate_thresholds},
+    )
+
+    for backend in args.preload:
+        server.registry.get_detection_backend(args.detector_model, "cpu", backend, "fp32", server.backend_options)
+
+    def stop(signum, frame):
+        logger.info("Shutting down inference server")
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+
+    server.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Final stats: {server.stats()}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()